@@ -0,0 +1,173 @@
+"""
+账户后台登录模块
+登录（获取bdstoken，含重试）是阻塞的网络请求，不应在概览类接口中按账户串行执行：
+- 服务启动时将全部账户提交到线程池并行登录
+- 同一账户同时只有一次登录，接口阻塞获取服务时复用正在进行的登录
+- 每个账户的登录状态保存在健康缓存中，概览接口只读缓存，不触发网络请求
+"""
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 登录状态
+STATE_PENDING = 'pending'      # 等待或正在登录
+STATE_READY = 'ready'          # 已登录
+STATE_FAILED = 'failed'        # 登录失败
+
+# 登录函数：account -> (服务实例或None, 错误信息)
+LoginFunc = Callable[[str], Tuple[Optional[Any], str]]
+
+
+class AccountLoginPool:
+    """线程池并行登录账户，并缓存每个账户的登录状态"""
+
+    def __init__(self, login_func: LoginFunc, max_workers: int = 4, retry_interval_sec: float = 300):
+        """
+        初始化登录线程池
+
+        Args:
+            login_func: 登录函数，返回 (服务实例或None, 错误信息)
+            max_workers: 后台登录线程数
+            retry_interval_sec: 登录失败后再次后台登录的最短间隔（秒）
+        """
+        self.login_func = login_func
+        self.max_workers = max(1, max_workers)
+        self.retry_interval_sec = retry_interval_sec
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._health: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, account: str, force: bool = False) -> Optional[Future]:
+        """
+        在后台登录账户（不阻塞）
+
+        Args:
+            account: 账户名
+            force: 忽略失败重试间隔
+
+        Returns:
+            登录的Future（账户正在登录时返回该次登录）；处于失败重试间隔内时返回None
+        """
+        with self._lock:
+            future = self._inflight.get(account)
+            if future or (not force and self._in_backoff(account)):
+                return future
+            future = self._start(account)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='account-login')
+            executor = self._executor
+        executor.submit(self._run, account, future)
+        return future
+
+    def submit_all(self, accounts: Iterable[str]) -> int:
+        """
+        在后台登录全部账户
+
+        Returns:
+            提交的账户数
+        """
+        return sum(1 for account in accounts if self.submit(account, force=True))
+
+    def login(self, account: str, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        阻塞登录账户：账户正在后台登录时等待该次登录，否则在当前线程登录
+
+        Args:
+            account: 账户名
+            timeout: 等待后台登录的最长时间（秒）
+
+        Returns:
+            服务实例，登录失败返回None
+        """
+        with self._lock:
+            future = self._inflight.get(account)
+            inline = future is None
+            if inline:
+                future = self._start(account)
+
+        if inline:
+            self._run(account, future)
+        try:
+            return future.result(timeout)[0]
+        except Exception as e:
+            logger.error(f"等待账户登录失败: {account}, 错误: {e}")
+            return None
+
+    def health(self, account: Optional[str] = None) -> Dict[str, Any]:
+        """
+        读取登录状态缓存
+
+        Args:
+            account: 账户名（None表示全部账户）
+
+        Returns:
+            单个账户的状态，或 {账户名: 状态}；状态包含 state、error、attempts、
+            last_attempt、last_success、login_sec
+        """
+        with self._lock:
+            if account is not None:
+                return self._public(self._health.get(account, {'state': None}))
+            return {name: self._public(state) for name, state in self._health.items()}
+
+    @staticmethod
+    def _public(state: Dict[str, Any]) -> Dict[str, Any]:
+        """去掉内部字段"""
+        return {key: value for key, value in state.items() if not key.startswith('_')}
+
+    def shutdown(self, wait: bool = False):
+        """关闭线程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+    def _in_backoff(self, account: str) -> bool:
+        """账户是否处于失败重试间隔内（调用方需持有锁）"""
+        state = self._health.get(account)
+        return (state is not None and state['state'] == STATE_FAILED
+                and time.monotonic() - state['_failed_at'] < self.retry_interval_sec)
+
+    def _start(self, account: str) -> Future:
+        """登记一次登录（调用方需持有锁）"""
+        future = Future()
+        self._inflight[account] = future
+        state = self._health.setdefault(account, {
+            'state': STATE_PENDING, 'error': '', 'attempts': 0,
+            'last_attempt': None, 'last_success': None, 'login_sec': None, '_failed_at': 0.0
+        })
+        state['state'] = STATE_PENDING
+        state['attempts'] += 1
+        state['last_attempt'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return future
+
+    def _run(self, account: str, future: Future):
+        """执行登录并更新状态缓存"""
+        started = time.monotonic()
+        try:
+            service, error = self.login_func(account)
+        except Exception as e:
+            service, error = None, f"登录异常: {e}"
+        elapsed = round(time.monotonic() - started, 3)
+
+        with self._lock:
+            state = self._health.get(account)
+            if state is not None:
+                state['login_sec'] = elapsed
+                if service is not None:
+                    state.update(state=STATE_READY, error='',
+                                 last_success=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+                else:
+                    state.update(state=STATE_FAILED, error=error, _failed_at=time.monotonic())
+            self._inflight.pop(account, None)
+
+        if service is None:
+            logger.warning(f"账户登录失败: {account} ({elapsed}s), 错误: {error}")
+        future.set_result((service, error))
@@ -0,0 +1,209 @@
+"""
+文章正文存储模块
+- 正文压缩：SQLite没有内置压缩，正文以 zlib/zstd 压缩后的BLOB存储（带格式头），
+  读取时由 decode_content 透明解压；未压缩的旧数据（TEXT）原样返回。
+  全文索引（KNOWLEDGE_FTS_ENABLED）直接索引 articles.content，启用时正文不压缩。
+  MySQL（InnoDB页压缩）和PostgreSQL（TOAST）由数据库自行压缩大字段，正文按原文存储。
+- 正文摘要：爬取时写入 content_preview 列，文章列表只读摘要，不再读取正文。
+- SQL函数 article_text(content)：在SQLite连接上注册，供LIKE检索解码正文（全文索引不依赖该函数）。
+"""
+import zlib
+from typing import Optional, Union
+
+from config import get_config
+from knowledge_search import drop_article_search_index, ensure_search_index
+from logger import get_logger
+from migrations import add_column, backfill_in_batches
+
+logger = get_logger(__name__)
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖：仅zstd压缩需要
+    zstandard = None
+
+# 文章列表摘要长度（字符）
+CONTENT_PREVIEW_LENGTH = 200
+
+# 短于该长度（字节）的正文不压缩
+MIN_COMPRESS_BYTES = 128
+
+COMPRESSION_METHODS = ('none', 'zlib', 'zstd')
+
+# 压缩正文的格式头：NUL + 算法标识（UTF-8文本不会以NUL开头）
+_ZLIB_HEADER = b'\x00z'
+_ZSTD_HEADER = b'\x00s'
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+# 在SQLite连接上注册的正文解码函数名
+SQL_FUNCTION = 'article_text'
+
+
+def resolve_compression(db_type: str, method: Optional[str] = None) -> str:
+    """
+    确定正文实际使用的压缩算法
+
+    Args:
+        db_type: 数据库类型
+        method: 配置的压缩算法（默认读取 ARTICLE_CONTENT_COMPRESSION）
+
+    Returns:
+        none/zlib/zstd；非SQLite数据库和启用全文索引的SQLite数据库为none
+    """
+    if db_type != 'sqlite':
+        return 'none'
+
+    config = get_config()
+    if config.KNOWLEDGE_FTS_ENABLED:
+        return 'none'
+
+    method = (method or config.ARTICLE_CONTENT_COMPRESSION).lower()
+    if method not in COMPRESSION_METHODS:
+        logger.warning(f"未知的正文压缩算法 {method}，使用zlib")
+        return 'zlib'
+    if method == 'zstd' and zstandard is None:
+        logger.warning("zstandard未安装，正文压缩使用zlib，请运行: pip install zstandard")
+        return 'zlib'
+    return method
+
+
+def encode_content(content: Optional[str], method: str) -> Union[str, bytes, None]:
+    """
+    按压缩算法编码正文
+
+    Args:
+        content: 正文
+        method: none/zlib/zstd（见 resolve_compression）
+
+    Returns:
+        压缩后的BLOB；不压缩、正文过短或压缩无收益时返回原文
+    """
+    if not content or method == 'none':
+        return content
+
+    data = content.encode('utf-8')
+    if len(data) < MIN_COMPRESS_BYTES:
+        return content
+
+    if method == 'zstd':
+        encoded = _ZSTD_HEADER + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        encoded = _ZLIB_HEADER + zlib.compress(data, ZLIB_LEVEL)
+
+    return encoded if len(encoded) < len(data) else content
+
+
+def decode_content(value: Union[str, bytes, None]) -> Optional[str]:
+    """
+    解码数据库中的正文（压缩的BLOB解压，文本原样返回）
+
+    Args:
+        value: articles.content 列的值
+
+    Returns:
+        正文文本
+    """
+    if value is None or isinstance(value, str):
+        return value
+
+    data = bytes(value)
+    header, payload = data[:2], data[2:]
+    if header == _ZLIB_HEADER:
+        data = zlib.decompress(payload)
+    elif header == _ZSTD_HEADER:
+        if zstandard is None:
+            raise RuntimeError("正文使用zstd压缩，请运行: pip install zstandard")
+        data = zstandard.ZstdDecompressor().decompress(payload)
+    return data.decode('utf-8')
+
+
+def make_preview(content: Optional[str]) -> Optional[str]:
+    """生成文章列表摘要（与 substr(content, 1, 200) 一致）"""
+    if content is None:
+        return None
+    return content[:CONTENT_PREVIEW_LENGTH]
+
+
+def register_sqlite_functions(conn):
+    """
+    在SQLite连接上注册 article_text(content) 函数
+
+    全文索引不可用时，LIKE检索通过该函数读取解压后的正文（连接池已自动注册）；
+    写入 articles 表不需要注册。
+    """
+    conn.create_function(SQL_FUNCTION, 1, decode_content, deterministic=True)
+
+
+def migrate_article_content(conn, db_type: str, batch_size: int = 500) -> int:
+    """
+    增加 content_preview 列，分批回填摘要，并压缩SQLite中已有的正文
+
+    SQLite回填期间先移除文章全文索引（避免每行更新都重建索引），回填后重新建立。
+    压缩后的空间要在执行 VACUUM 后才会归还给文件系统。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+        batch_size: 每批回填的行数
+
+    Returns:
+        回填的行数
+    """
+    add_column(conn, db_type, 'articles', 'content_preview',
+               'VARCHAR(200)' if db_type == 'mysql' else 'TEXT')
+
+    method = resolve_compression(db_type)
+    had_search_index = db_type == 'sqlite' and drop_article_search_index(conn)
+
+    def compute(row):
+        content = decode_content(row[0])
+        if db_type == 'sqlite':
+            return make_preview(content), encode_content(content, method)
+        return (make_preview(content),)
+
+    set_columns = ['content_preview', 'content'] if db_type == 'sqlite' else ['content_preview']
+    updated = backfill_in_batches(
+        conn, db_type, 'articles', ['content'], set_columns, compute,
+        where='content_preview IS NULL AND content IS NOT NULL', batch_size=batch_size
+    )
+
+    if had_search_index:
+        ensure_search_index(conn, db_type)
+
+    logger.info(f"文章正文迁移完成: 回填 {updated} 行，压缩算法 {method}")
+    return updated
+
+
+def migrate_article_search_content(conn, db_type: str, batch_size: int = 500) -> int:
+    """
+    启用全文索引时，把SQLite中压缩存储的正文还原为文本，并按当前结构重建文章全文索引
+
+    文章全文索引是引用 articles.content 的外部内容表，只能索引文本正文；
+    旧版本的触发器通过 article_text() 函数解压正文，未注册该函数的连接无法写入 articles 表。
+    未启用全文索引时正文保持压缩，不做处理。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+        batch_size: 每批还原的行数
+
+    Returns:
+        还原的行数
+    """
+    if db_type != 'sqlite' or not get_config().KNOWLEDGE_FTS_ENABLED:
+        return 0
+
+    had_search_index = drop_article_search_index(conn)
+    restored = backfill_in_batches(
+        conn, db_type, 'articles', ['content'], ['content'],
+        lambda row: (decode_content(row[0]),),
+        where="typeof(content) = 'blob'", batch_size=batch_size
+    )
+    if had_search_index:
+        ensure_search_index(conn, db_type)
+
+    if restored:
+        logger.info(f"已还原 {restored} 篇文章的压缩正文（全文索引需要文本正文）")
+    return restored
@@ -0,0 +1,77 @@
+"""
+文章标签模块
+标签取自文章URL的分类路径，在爬取时写入 articles.tag 列（带索引），
+使知识库的标签过滤和统计可以直接在SQL中完成。
+同时提供为旧数据库补充 tag 列并回填历史数据的迁移函数。
+"""
+from typing import Optional
+from urllib.parse import urlparse
+
+from logger import get_logger
+from migrations import add_column, backfill_in_batches, create_index
+
+logger = get_logger(__name__)
+
+UNCATEGORIZED_TAG = "未分类"
+
+# 回填时每批更新的文章数
+BACKFILL_BATCH_SIZE = 1000
+
+
+def derive_tag_from_url(url: Optional[str]) -> str:
+    """
+    从文章URL中提取标签/分类
+    规则：提取URL的第二级路径作为标签（jprj后的第一个路径段）
+    例如：https://lewz.cn/jprj/category/article -> "category"
+         https://lewz.cn/jprj/article -> "未分类"
+
+    Args:
+        url: 文章URL
+
+    Returns:
+        标签名称，如果无法提取则返回"未分类"
+    """
+    if not url:
+        return UNCATEGORIZED_TAG
+
+    try:
+        parsed = urlparse(url)
+        path = parsed.path.strip('/')
+
+        parts = path.split('/')
+
+        if len(parts) >= 3:
+            return parts[1]
+        else:
+            return UNCATEGORIZED_TAG
+    except Exception as e:
+        logger.warning(f"从URL提取标签失败: {url}, 错误: {e}")
+        return UNCATEGORIZED_TAG
+
+
+def migrate_article_tags(conn, db_type: str, batch_size: int = BACKFILL_BATCH_SIZE) -> bool:
+    """
+    迁移：为 articles 表添加带索引的 tag 列，并回填已有文章的标签
+    可重复执行，列和索引已存在时只回填 tag 为空的行
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+        batch_size: 每批回填的文章数
+
+    Returns:
+        本次是否新增了 tag 列
+    """
+    added = add_column(conn, db_type, 'articles', 'tag',
+                       'TEXT' if db_type == 'sqlite' else 'VARCHAR(255)')
+    create_index(conn, db_type, 'idx_articles_tag', 'articles', 'tag')
+
+    updated = backfill_in_batches(
+        conn, db_type, 'articles', ['url'], ['tag'],
+        lambda row: (derive_tag_from_url(row[0]),),
+        where='tag IS NULL', batch_size=batch_size
+    )
+    if updated:
+        logger.info(f"已回填 {updated} 篇文章的标签")
+
+    return added
@@ -44,6 +44,12 @@ import random
 from typing import Union, List, Dict, Any, Tuple, Optional
 import requests
 
+from logger import get_logger
+from metrics import timed_pan_call
+from tracing import traced
+
+logger = get_logger(__name__)
+
 
 # ============================================================================
 # 常量定义
@@ -119,6 +125,7 @@ ISDIR_REGEX = re.compile(r'"isdir":(\d+?),')
 # 工具函数
 # ============================================================================
 
+@traced('pan.normalize_link')
 def normalize_link(url_code: str) -> str:
     """
     标准化百度网盘分享链接格式
@@ -190,6 +197,7 @@ def parse_url_and_code(url_code: str) -> Tuple[str, str]:
     return url, code
 
 
+@traced('pan.parse_response')
 def parse_response(response: str) -> Union[List[str], int]:
     """
     解析分享页面的 HTML 内容，提取转存所需的参数
@@ -450,6 +458,29 @@ class BaiduPanAdapter:
             self._log(f"初始化异常: {e}")
             return False
     
+    def refresh_bdstoken(self) -> Union[str, int]:
+        """
+        重新获取 bdstoken（Cookie 不变）
+        
+        用于会话校验和令牌刷新：获取成功时替换当前 bdstoken，
+        失败时保留原 bdstoken 并返回错误码
+        
+        返回：
+            成功: 新的 bdstoken
+            失败: 错误码（整数，-6/-4 表示 Cookie 已失效）
+        """
+        try:
+            result = self._get_bdstoken()
+        except Exception as e:
+            self._log(f"刷新 bdstoken 异常: {e}")
+            return -1
+        
+        if isinstance(result, str) and result:
+            self.bdstoken = result
+        return result
+    
+    @traced('pan.get_bdstoken')
+    @timed_pan_call('get_bdstoken')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def _get_bdstoken(self) -> Union[str, int]:
         """
@@ -507,6 +538,8 @@ class BaiduPanAdapter:
         
         return -6  # 所有尝试都失败，返回"Cookie无效"错误码
     
+    @traced('pan.list_dir')
+    @timed_pan_call('list_dir')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def list_dir(self, path: str, page: int = 1, num: int = 1000) -> Union[List[Dict[str, Any]], int]:
         """
@@ -576,6 +609,8 @@ class BaiduPanAdapter:
         
         return data.get('list', [])
     
+    @traced('pan.create_dir')
+    @timed_pan_call('create_dir')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def create_dir(self, path: str) -> int:
         """
@@ -638,6 +673,8 @@ class BaiduPanAdapter:
         
         return errno
     
+    @traced('pan.delete')
+    @timed_pan_call('delete')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def delete(self, fs_id: int) -> int:
         """
@@ -682,6 +719,8 @@ class BaiduPanAdapter:
 
         return errno
 
+    @traced('pan.rename')
+    @timed_pan_call('rename')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def rename(self, fs_id: int, new_name: str) -> int:
         """
@@ -728,6 +767,8 @@ class BaiduPanAdapter:
 
         return errno
 
+    @traced('pan.move')
+    @timed_pan_call('move')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def move(self, fs_id: int, dest_path: str) -> int:
         """
@@ -778,6 +819,8 @@ class BaiduPanAdapter:
 
         return errno
 
+    @traced('pan.copy')
+    @timed_pan_call('copy')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def copy(self, fs_id: int, dest_path: str) -> int:
         """
@@ -828,6 +871,8 @@ class BaiduPanAdapter:
 
         return errno
 
+    @traced('pan.create_share')
+    @timed_pan_call('create_share')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def create_share(self, fs_id: int, expiry: int = 7, password: str = '') -> Union[str, int]:
         """
@@ -902,8 +947,9 @@ class BaiduPanAdapter:
 
         if result.get('errno') != 0:
             errno = result.get('errno', -1)
-            # 输出详细错误信息用于调试
-            print(f"[分享失败] errno={errno}, 完整响应: {result}, 参数: expiry={expiry}, pwd={password}, fs_id={fs_id}")
+            # 完整响应只在 DEBUG 级别输出（不记录提取码）
+            logger.warning("分享失败: errno=%s, fs_id=%s, expiry=%s", errno, fs_id, expiry)
+            logger.debug("分享失败完整响应: %s", result)
             return errno
         
         link = result.get('link', '')
@@ -912,6 +958,8 @@ class BaiduPanAdapter:
         
         return link
     
+    @traced('pan.verify_pass_code')
+    @timed_pan_call('verify_pass_code')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def _verify_pass_code(self, share_url: str, password: str) -> Union[str, int]:
         """
@@ -982,6 +1030,8 @@ class BaiduPanAdapter:
         
         return randsk
     
+    @traced('pan.get_transfer_params')
+    @timed_pan_call('get_transfer_params')
     @simple_retry(max_attempts=3, delay_range=(1.0, 2.0))
     def _get_transfer_params(self, share_url: str) -> str:
         """
@@ -1013,6 +1063,8 @@ class BaiduPanAdapter:
         
         return r.content.decode("utf-8", errors='ignore')
     
+    @traced('pan.do_transfer')
+    @timed_pan_call('do_transfer')
     @simple_retry(max_attempts=5, delay_range=(1.0, 2.0))
     def _do_transfer(self, params_list: List[str], dest_folder: str) -> int:
         """
@@ -1072,6 +1124,7 @@ class BaiduPanAdapter:
         
         return errno
     
+    @traced('pan.transfer')
     def transfer(self, share_url: str, password: str, dest_folder: str) -> int:
         """
         转存分享链接到指定目录
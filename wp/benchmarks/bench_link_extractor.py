@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+链接提取微基准测试
+
+在合成的大规模文章语料上比较：
+- regex_floor: 只用一个正则扫描全文（理论下限）
+- legacy:      旧实现（每个模式单独扫描，再在每个链接附近重复查找提取码）
+- scanner:     LinkExtractorService.extract_links_from_text（单次组合扫描）
+
+用法:
+    python benchmarks/bench_link_extractor.py --articles 100000 --link-ratio 0.2
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from link_extractor_service import LinkExtractorService
+
+FILLER = (
+    "本文整理了近期的学习资料与工具合集，内容涵盖编程、设计与办公技巧。"
+    "The quick brown fox jumps over the lazy dog. 欢迎收藏转发，持续更新中。"
+)
+
+
+def build_corpus(count: int, link_ratio: float, size: int, seed: int = 42):
+    """生成合成文章语料"""
+    rng = random.Random(seed)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    corpus = []
+    for i in range(count):
+        # 每篇文章都带一个普通URL，避免 "://" 预检查让无链接文章直接跳过
+        parts = [f"原文地址：https://mp.weixin.qq.com/s/{i:08d} ", FILLER * (size // len(FILLER) + 1)]
+        if rng.random() < link_ratio:
+            for _ in range(rng.randint(1, 3)):
+                surl = ''.join(rng.choice(alphabet) for _ in range(22))
+                code = ''.join(rng.choice(alphabet) for _ in range(4))
+                style = rng.randint(0, 2)
+                if style == 0:
+                    parts.append(f"链接：https://pan.baidu.com/s/1{surl} 提取码：{code}")
+                elif style == 1:
+                    parts.append(f"下载 https://pan.baidu.com/s/1{surl}?pwd={code}")
+                else:
+                    parts.append(f"https://pan.baidu.com/share/init?surl={surl} 密码: {code}")
+            parts.append(FILLER)
+        corpus.append(''.join(parts)[:size * 2])
+    return corpus
+
+
+def legacy_extract(text: str):
+    """旧实现（用于对比）"""
+    if not text:
+        return []
+    links = []
+    found_urls = set()
+    for pattern in LinkExtractorService.BAIDU_LINK_PATTERNS:
+        for match in re.finditer(pattern, text, re.IGNORECASE):
+            url = match.group(0)
+            if url in found_urls:
+                continue
+            found_urls.add(url)
+            context = text[max(0, match.start() - 200):min(len(text), match.end() + 200)]
+            password = ''
+            for password_pattern in LinkExtractorService.PASSWORD_PATTERNS:
+                found = re.search(password_pattern, context, re.IGNORECASE)
+                if found:
+                    password = found.group(1)
+                    break
+            links.append({'link': url, 'password': password})
+    return links
+
+
+def run(name, func, corpus):
+    """执行一轮并返回 (耗时, 链接数)"""
+    start = time.perf_counter()
+    total = 0
+    for text in corpus:
+        total += len(func(text))
+    elapsed = time.perf_counter() - start
+    return name, elapsed, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='链接提取微基准测试')
+    parser.add_argument('--articles', type=int, default=100000, help='文章数量')
+    parser.add_argument('--link-ratio', type=float, default=0.2, help='含链接文章比例')
+    parser.add_argument('--size', type=int, default=1500, help='每篇文章大致字符数')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数（取最好成绩）')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.articles, args.link_ratio, args.size)
+    total_chars = sum(len(t) for t in corpus)
+    print(f"语料: {len(corpus)} 篇文章, {total_chars / 1e6:.1f}M 字符, 含链接比例 {args.link_ratio}")
+
+    service = LinkExtractorService()
+    floor_regex = re.compile(r'https?://pan\.baidu\.com/\S+', re.IGNORECASE)
+    candidates = [
+        ('regex_floor', lambda text: floor_regex.findall(text)),
+        ('legacy', legacy_extract),
+        ('scanner', service.extract_links_from_text),
+    ]
+
+    results = {}
+    for name, func in candidates:
+        best = None
+        for _ in range(args.repeat):
+            _, elapsed, found = run(name, func, corpus)
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = best
+        print(f"{name:12s} {best:8.3f}s  {len(corpus) / best:12.0f} 篇/秒  "
+              f"{total_chars / best / 1e6:8.1f}M 字符/秒  链接 {found}")
+
+    print(f"\nscanner 相对 legacy 提速: {results['legacy'] / results['scanner']:.2f}x")
+    print(f"scanner / regex_floor: {results['scanner'] / results['regex_floor']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
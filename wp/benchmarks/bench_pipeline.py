@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+转存/分享流水线端到端基准测试（离线）
+
+在本地百度网盘模拟服务器（fake_pan_server.py）上执行真实的 HTTP 请求，测量每秒完成的任务数：
+- core:      CoreService 转存队列和分享队列（工作线程 → 适配器 → HTTP）
+- processor: LinkProcessorService 处理数据库中的待转存链接并分享（额外包含 SQLite 读写）
+- api:       通过 Flask 接口导入、启动并轮询转存队列（额外包含路由、鉴权和 JSON 序列化）
+
+默认关闭节流（抖动、窗口休息、失败暂停），测量的是代码本身的吞吐量；
+--throttle 使用配置中的节流参数，测量实际运行时的吞吐量。
+
+用法:
+    python benchmarks/bench_pipeline.py --tasks 200 --latency-ms 5
+    python benchmarks/bench_pipeline.py --targets core --error=-62=0.02 --error 500=0.01 --rate-limit 200
+    python benchmarks/bench_pipeline.py --tasks 500 --json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# 作为脚本运行时按生产环境配置，默认只输出警告以上的日志，避免逐任务日志的终端输出影响测量
+# （需在导入配置前设置；被测试导入时不修改环境变量）
+if __name__ == '__main__':
+    os.environ.setdefault('ENV', 'production')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from baidu_pan_adapter import BaiduPanAdapter
+from config import Config
+from core_service import CoreService
+from fake_pan_server import FakePanServer, add_server_arguments, parse_error_rates, redirect
+
+TARGETS = ('core', 'processor', 'api')
+TARGET_PATH = '/批量转存'
+COOKIE = 'BDUSS=fake; STOKEN=fake'
+
+# 关闭节流：测量代码本身的吞吐量
+NO_THROTTLE = {
+    'throttle': {
+        'jitter_ms_min': 0,
+        'jitter_ms_max': 0,
+        'ops_per_window': 10 ** 9,
+        'window_sec': 60,
+        'window_rest_sec': 0,
+        'max_consecutive_failures': 10 ** 9,
+        'pause_sec_on_failure': 0,
+        'backoff_factor': 1.0,
+        'cooldown_on_errno_-62_sec': 0
+    }
+}
+
+
+def create_service(server: FakePanServer, throttle: bool) -> CoreService:
+    """创建连接到模拟服务器的 CoreService（不启动会话管理）"""
+    service_config = Config.get_throttle_config() if throttle else dict(NO_THROTTLE)
+    service_config['session'] = {'enabled': False}
+    service = CoreService(COOKIE, service_config)
+    service.set_log_callback(lambda message, *args: None)
+
+    adapter = BaiduPanAdapter(debug=False)
+    redirect(adapter.session, server.url)
+    if not adapter.init(COOKIE):
+        raise RuntimeError(f"无法从模拟服务器获取 bdstoken: {server.url}")
+    service.cookie = COOKIE
+    service.adapter = adapter
+    return service
+
+
+def wait_drained(get_status: Callable[[], Dict[str, Any]], poll_sec: float = 0.01) -> Dict[str, Any]:
+    """等待队列中没有待处理和执行中的任务"""
+    while True:
+        status = get_status()
+        if status['pending'] + status['running'] == 0:
+            return status
+        time.sleep(poll_sec)
+
+
+def summarize(name: str, tasks: int, elapsed: float, status: Dict[str, Any]) -> Dict[str, Any]:
+    """汇总一个阶段的结果"""
+    return {
+        'name': name,
+        'tasks': tasks,
+        'seconds': round(elapsed, 3),
+        'tasks_per_sec': round(tasks / elapsed, 2) if elapsed > 0 else 0.0,
+        'completed': status.get('completed', 0),
+        'failed': status.get('failed', 0),
+        'skipped': status.get('skipped', 0)
+    }
+
+
+def bench_core(server: FakePanServer, tasks: int, throttle: bool) -> List[Dict[str, Any]]:
+    """CoreService：转存 tasks 个链接，再分享转存得到的文件"""
+    service = create_service(server, throttle)
+    rows = [{'标题': f'任务{i}', '链接': server.make_link(password='abcd'), '提取码': 'abcd', '保存位置': TARGET_PATH}
+            for i in range(tasks)]
+    results = []
+    try:
+        service.add_transfer_tasks_from_csv(rows, TARGET_PATH)
+        start = time.perf_counter()
+        service.start_transfer()
+        status = wait_drained(service.get_transfer_status)
+        results.append(summarize('core.transfer', tasks, time.perf_counter() - start, status))
+        service.stop_transfer()
+
+        shares = service.add_share_tasks_from_path(TARGET_PATH)
+        start = time.perf_counter()
+        service.start_share()
+        status = wait_drained(service.get_share_status)
+        results.append(summarize('core.share', shares, time.perf_counter() - start, status))
+        service.stop_share()
+    finally:
+        service.adapter.close()
+    return results
+
+
+def bench_processor(server: FakePanServer, tasks: int, throttle: bool) -> List[Dict[str, Any]]:
+    """LinkProcessorService：处理数据库中的待转存链接，再为已转存的链接创建分享"""
+    from init_db import init_sqlite
+    from link_processor_service import LinkProcessorService
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        class BenchConfig(Config):
+            DATABASE_TYPE = 'sqlite'
+            DATABASE_PATH = os.path.join(temp_dir, 'bench.db')
+
+        if not init_sqlite(BenchConfig.DATABASE_PATH):
+            raise RuntimeError("初始化基准测试数据库失败")
+
+        service = create_service(server, throttle)
+        processor = LinkProcessorService('bench', service, BenchConfig)
+        processor.poll_interval_sec = 0.01
+        processor.extractor.save_extracted_links([
+            {'article_id': f'article-{i}', 'original_link': server.make_link(password='abcd'),
+             'original_password': 'abcd'}
+            for i in range(tasks)
+        ])
+
+        results = []
+        try:
+            start = time.perf_counter()
+            result = processor.process_pending_links(limit=tasks, target_path=TARGET_PATH)
+            results.append(summarize('processor.transfer', result['processed'],
+                                     time.perf_counter() - start, result))
+
+            start = time.perf_counter()
+            result = processor.share_transferred_links()
+            results.append(summarize('processor.share', len(service.share_queue),
+                                     time.perf_counter() - start, result.get('share_status', {})))
+        finally:
+            service.adapter.close()
+        return results
+
+
+def bench_api(server: FakePanServer, tasks: int, throttle: bool) -> List[Dict[str, Any]]:
+    """Flask 接口：导入、启动并轮询转存队列（进程内 WSGI 测试客户端）"""
+    import server as server_module
+
+    account = 'bench'
+    service = create_service(server, throttle)
+    server_module.accounts[account] = COOKIE
+    server_module.services[account] = service
+    server_module.limiter.enabled = False
+    headers = {'X-API-Key': server_module.api_secret_key}
+    client = server_module.app.test_client()
+
+    rows = [{'标题': f'任务{i}', '链接': server.make_link(password='abcd'), '提取码': 'abcd', '保存位置': TARGET_PATH}
+            for i in range(tasks)]
+    polls = 0
+    try:
+        start = time.perf_counter()
+        response = client.post('/api/transfer/import', json={'account': account, 'csv_data': rows}, headers=headers)
+        if response.status_code != 200:
+            raise RuntimeError(f"导入任务失败: {response.get_json()}")
+        client.post('/api/transfer/start', json={'account': account}, headers=headers)
+        while True:
+            polls += 1
+            status = client.get(f'/api/transfer/status?account={account}', headers=headers).get_json()['data']
+            if status['pending'] + status['running'] == 0:
+                break
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - start
+        client.post('/api/transfer/stop', json={'account': account}, headers=headers)
+    finally:
+        server_module.services.pop(account, None)
+        server_module.accounts.pop(account, None)
+        service.adapter.close()
+
+    result = summarize('api.transfer', tasks, elapsed, status)
+    result['status_polls'] = polls
+    return [result]
+
+
+BENCHMARKS = {
+    'core': bench_core,
+    'processor': bench_processor,
+    'api': bench_api,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='转存/分享流水线端到端基准测试（离线）')
+    parser.add_argument('--tasks', type=int, default=200, help='每个基准的任务数')
+    parser.add_argument('--targets', default=','.join(TARGETS), help=f"要运行的基准（逗号分隔: {', '.join(TARGETS)}）")
+    parser.add_argument('--throttle', action='store_true', help='使用配置中的节流参数（默认关闭节流）')
+    parser.add_argument('--json', metavar='PATH', help='同时把结果写入 JSON 文件')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    targets = [target.strip() for target in args.targets.split(',') if target.strip()]
+    unknown = [target for target in targets if target not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的基准: {', '.join(unknown)}")
+
+    error_rates = parse_error_rates(args.error)
+    print(f"任务数 {args.tasks}, 延迟 {args.latency_ms}ms (+0~{args.jitter_ms}ms), "
+          f"错误注入 {error_rates or '无'}, 限流 {args.rate_limit or '无'}/秒, "
+          f"节流 {'开启' if args.throttle else '关闭'}")
+
+    report = {
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'args': vars(args),
+        'results': []
+    }
+    for target in targets:
+        # 每个基准使用新的模拟服务器，使用相同种子，注入的错误序列可复现
+        with FakePanServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rates=error_rates,
+                           rate_limit=args.rate_limit, seed=args.seed) as server:
+            results = BENCHMARKS[target](server, args.tasks, args.throttle)
+            stats = server.get_stats()
+        for result in results:
+            result['server'] = stats
+            report['results'].append(result)
+            print(f"{result['name']:20s} {result['tasks']:6d} 任务 {result['seconds']:8.3f}s "
+                  f"{result['tasks_per_sec']:10.2f} 任务/秒  完成 {result['completed']} "
+                  f"失败 {result['failed']} 跳过 {result['skipped']}")
+        print(f"{'':20s} 请求 {sum(stats['requests'].values())}, 注入错误 {stats['errors'] or '无'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+本地百度网盘模拟服务器（离线基准测试用）
+
+模拟适配器用到的网页接口，数据保存在内存中：
+- GET  /api/gettemplatevariable  返回 bdstoken
+- GET  /api/list                 列出目录（包含转存进来的文件）
+- POST /share/verify             验证提取码，返回 randsk
+- GET  /s/<surl>                 分享页面（包含 shareid/share_uk/fs_id/server_filename/isdir）
+- POST /share/transfer           转存分享中的文件到目录
+- POST /share/set                创建分享，返回新的分享链接（可再次转存）
+
+可配置：
+- latency_ms / jitter_ms: 每个请求的固定延迟和随机附加延迟
+- error_rates: 按比例注入错误，键为 -62（访问次数过多）、-9（提取码错误）、500（HTTP 500）
+- rate_limit: 每秒请求数上限（令牌桶），超过时返回 errno -62，与百度网盘限流时的表现一致
+
+适配器的请求地址固定为 https://pan.baidu.com，通过 redirect() 在 requests 会话上挂载传输适配器，
+把这些请求改发到本服务器，适配器代码和链接格式都不需要改动。
+
+用法:
+    python benchmarks/fake_pan_server.py --port 8765 --latency-ms 20 --error -62=0.01 --rate-limit 50
+"""
+import argparse
+import itertools
+import json
+import random
+import string
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PAN_ORIGINS = ('https://pan.baidu.com', 'http://pan.baidu.com')
+
+# 可注入的错误及其适用的接口（HTTP 500 适用于所有接口）
+ERROR_ENDPOINTS = {
+    '-62': ('share_verify', 'share_transfer'),
+    '-9': ('share_verify',),
+    '500': None,
+}
+
+_SURL_ALPHABET = string.ascii_letters + string.digits
+
+
+class RedirectAdapter(HTTPAdapter):
+    """把 pan.baidu.com 的请求改发到本地模拟服务器的传输适配器"""
+
+    def __init__(self, base_url: str, **kwargs):
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        for origin in PAN_ORIGINS:
+            if request.url.startswith(origin):
+                request.url = self.base_url + request.url[len(origin):]
+                break
+        return super().send(request, **kwargs)
+
+
+def redirect(session: requests.Session, base_url: str) -> requests.Session:
+    """
+    让 requests 会话访问 pan.baidu.com 时改为访问模拟服务器
+
+    Args:
+        session: requests 会话（如 BaiduPanAdapter.session）
+        base_url: 模拟服务器地址（FakePanServer.url）
+
+    Returns:
+        传入的会话
+    """
+    transport = RedirectAdapter(base_url)
+    for origin in PAN_ORIGINS:
+        session.mount(origin, transport)
+    return session
+
+
+class FakePanServer:
+    """内存中的百度网盘模拟服务器（后台线程运行）"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rates: Optional[Dict[str, float]] = None, rate_limit: float = 0, seed: int = 42):
+        """
+        初始化模拟服务器
+
+        Args:
+            host: 监听地址
+            port: 监听端口（0 表示自动分配）
+            latency_ms: 每个请求的固定延迟（毫秒）
+            jitter_ms: 每个请求的随机附加延迟上限（毫秒）
+            error_rates: 错误注入比例，如 {'-62': 0.01, '-9': 0.01, '500': 0.005}
+            rate_limit: 每秒请求数上限（0 表示不限流）
+            seed: 随机数种子（相同参数下注入的错误可复现）
+        """
+        error_rates = {str(kind): float(rate) for kind, rate in (error_rates or {}).items()}
+        unknown = set(error_rates) - set(ERROR_ENDPOINTS)
+        if unknown:
+            raise ValueError(f"不支持的错误类型: {', '.join(sorted(unknown))}（可用: -62, -9, 500）")
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rates = error_rates
+        self.rate_limit = rate_limit
+        self.requests = Counter()
+        self.errors = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(10_000_000)
+        # surl（不含开头的 1）-> 分享信息
+        self._shares: Dict[str, Dict[str, Any]] = {}
+        self._shares_by_id: Dict[str, Dict[str, Any]] = {}
+        # fs_id -> 文件信息；目录 -> fs_id 列表
+        self._files: Dict[int, Dict[str, Any]] = {}
+        self._dirs: Dict[str, List[int]] = {}
+        self._tokens = float(rate_limit)
+        self._token_time = time.monotonic()
+
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """服务器地址"""
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self) -> 'FakePanServer':
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-pan-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务器"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join(5)
+
+    def __enter__(self) -> 'FakePanServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def make_link(self, filename: Optional[str] = None, password: str = '') -> str:
+        """
+        生成一个可转存的分享链接（包含一个文件）
+
+        Args:
+            filename: 分享的文件名（默认按分享ID生成）
+            password: 提取码
+
+        Returns:
+            https://pan.baidu.com/s/1xxxxxxxxxxxxxxxxxxxxxx 格式的链接
+        """
+        with self._lock:
+            fs_id = next(self._ids)
+            self._files[fs_id] = {'fs_id': fs_id, 'server_filename': filename or f'file_{fs_id}.zip',
+                                  'isdir': 0, 'size': 1024 * (fs_id % 997 + 1)}
+            return self._create_share([fs_id], password)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """请求和注入错误的统计"""
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'errors': dict(self.errors),
+                'shares': len(self._shares),
+                'files': sum(len(ids) for ids in self._dirs.values())
+            }
+
+    # ------------------------------------------------------------------
+    # 请求处理（在服务器线程中调用）
+    # ------------------------------------------------------------------
+
+    def _create_share(self, fs_ids: List[int], password: str) -> str:
+        """创建分享（调用方持有锁）"""
+        surl = ''.join(self._rng.choice(_SURL_ALPHABET) for _ in range(22))
+        share = {'surl': surl, 'shareid': str(next(self._ids)), 'uk': '1100000001',
+                 'fs_ids': list(fs_ids), 'password': password}
+        self._shares[surl] = share
+        self._shares_by_id[share['shareid']] = share
+        return f'https://pan.baidu.com/s/1{surl}'
+
+    def _admit(self, endpoint: str) -> Optional[str]:
+        """
+        统计请求并决定是否注入错误
+
+        Returns:
+            注入的错误类型（'-62'/'-9'/'500'），None 表示正常处理
+        """
+        injected = None
+        with self._lock:
+            self.requests[endpoint] += 1
+            delay = self.latency_ms + (self._rng.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+            if self.rate_limit > 0:
+                now = time.monotonic()
+                self._tokens = min(float(self.rate_limit), self._tokens + (now - self._token_time) * self.rate_limit)
+                self._token_time = now
+                if self._tokens < 1:
+                    self.errors['rate_limited'] += 1
+                    injected = '-62'
+                else:
+                    self._tokens -= 1
+            for kind, rate in self.error_rates.items():
+                if injected is not None:
+                    break
+                endpoints = ERROR_ENDPOINTS[kind]
+                if (endpoints is None or endpoint in endpoints) and self._rng.random() < rate:
+                    self.errors[kind] += 1
+                    injected = kind
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        return injected
+
+    def handle(self, method: str, path: str, query: Dict[str, str], form: Dict[str, str]):
+        """
+        处理一个请求
+
+        Returns:
+            (HTTP 状态码, 内容类型, 响应体)
+        """
+        if method == 'GET' and path == '/api/gettemplatevariable':
+            endpoint = 'get_bdstoken'
+        elif method == 'GET' and path == '/api/list':
+            endpoint = 'list'
+        elif method == 'POST' and path == '/share/verify':
+            endpoint = 'share_verify'
+        elif method == 'GET' and path.startswith('/s/'):
+            endpoint = 'share_page'
+        elif method == 'POST' and path == '/share/transfer':
+            endpoint = 'share_transfer'
+        elif method == 'POST' and path == '/share/set':
+            endpoint = 'share_set'
+        else:
+            return 404, 'application/json', {'errno': -1, 'path': path}
+
+        injected = self._admit(endpoint)
+        if injected == '500':
+            return 500, 'text/html', '<html><body>500 Internal Server Error</body></html>'
+        if injected is not None:
+            if endpoint == 'share_page':
+                return 200, 'text/html', '<html><body>访问过于频繁，请稍后再试</body></html>'
+            return 200, 'application/json', {'errno': int(injected), 'request_id': next(self._ids)}
+
+        return getattr(self, f'_{endpoint}')(path, query, form)
+
+    def _get_bdstoken(self, path, query, form):
+        return 200, 'application/json', {
+            'errno': 0,
+            'result': {'bdstoken': 'fakebdstoken0123456789abcdef0000', 'uk': 1100000002,
+                       'servertime': int(time.time())}
+        }
+
+    def _list(self, path, query, form):
+        directory = query.get('dir', '/')
+        page = max(1, int(query.get('page', 1) or 1))
+        num = max(1, int(query.get('num', 1000) or 1000))
+        with self._lock:
+            ids = self._dirs.get(directory, [])[(page - 1) * num:page * num]
+            items = [{**self._files[fs_id], 'path': f"{directory.rstrip('/')}/{self._files[fs_id]['server_filename']}"}
+                     for fs_id in ids]
+        return 200, 'application/json', {'errno': 0, 'list': items}
+
+    def _share_verify(self, path, query, form):
+        with self._lock:
+            share = self._shares.get(query.get('surl', ''))
+        if share is None:
+            return 200, 'application/json', {'errno': -1}
+        if share['password'] and form.get('pwd') != share['password']:
+            return 200, 'application/json', {'errno': -9}
+        return 200, 'application/json', {'errno': 0, 'randsk': f"randsk{share['shareid']}"}
+
+    def _share_page(self, path, query, form):
+        surl = path[len('/s/'):].split('/')[0]
+        with self._lock:
+            share = self._shares.get(surl[1:])
+            files = [self._files[fs_id] for fs_id in share['fs_ids']] if share else []
+        if share is None:
+            return 200, 'text/html', '<html><body>啊哦，你所访问的页面不存在了。</body></html>'
+        file_list = ','.join(
+            f'{{"fs_id":{f["fs_id"]},"server_filename":"{f["server_filename"]}","isdir":{f["isdir"]},"size":{f["size"]}}}'
+            for f in files
+        )
+        data = f'{{"shareid":{share["shareid"]},"share_uk":"{share["uk"]}","file_list":[{file_list}],"self":0}}'
+        return 200, 'text/html', f'<html><head><script>locals.mset({data});</script></head><body></body></html>'
+
+    def _share_transfer(self, path, query, form):
+        directory = form.get('path', '/')
+        try:
+            fs_ids = [int(fs_id) for fs_id in json.loads(form.get('fsidlist', '[]'))]
+        except (TypeError, ValueError):
+            return 200, 'application/json', {'errno': 2}
+        with self._lock:
+            share = self._shares_by_id.get(query.get('shareid', ''))
+            if share is None or not fs_ids or any(fs_id not in share['fs_ids'] for fs_id in fs_ids):
+                return 200, 'application/json', {'errno': 105}
+            entries = self._dirs.setdefault(directory, [])
+            for fs_id in fs_ids:
+                copy_id = next(self._ids)
+                self._files[copy_id] = {**self._files[fs_id], 'fs_id': copy_id}
+                entries.append(copy_id)
+        return 200, 'application/json', {'errno': 0, 'extra': {'list': [{'to': directory}]}}
+
+    def _share_set(self, path, query, form):
+        try:
+            fs_ids = [int(fs_id) for fs_id in json.loads(form.get('fid_list', '[]'))]
+        except (TypeError, ValueError):
+            return 200, 'application/json', {'errno': 2}
+        with self._lock:
+            if not fs_ids or any(fs_id not in self._files for fs_id in fs_ids):
+                return 200, 'application/json', {'errno': 2}
+            link = self._create_share(fs_ids, form.get('pwd', ''))
+            shareid = int(self._shares[link[-22:]]['shareid'])
+        return 200, 'application/json', {'errno': 0, 'link': link, 'shareid': shareid}
+
+
+def _make_handler(server: FakePanServer):
+    """创建绑定到模拟服务器的请求处理类"""
+
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.1 保持连接，与真实服务器一样复用 requests 会话的连接
+        protocol_version = 'HTTP/1.1'
+        # 响应头和响应体分两次写出，关闭 Nagle 算法避免每个响应多等一次延迟确认（约40ms）
+        disable_nagle_algorithm = True
+
+        def _dispatch(self, method: str):
+            parts = urlsplit(self.path)
+            query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+            form = {}
+            length = int(self.headers.get('Content-Length') or 0)
+            if length:
+                body = self.rfile.read(length).decode('utf-8', errors='ignore')
+                form = {key: values[-1] for key, values in parse_qs(body, keep_blank_values=True).items()}
+
+            status, content_type, body = server.handle(method, parts.path, query, form)
+            if not isinstance(body, str):
+                body = json.dumps(body, ensure_ascii=False)
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', f'{content_type}; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_error_rates(values: List[str]) -> Dict[str, float]:
+    """解析命令行的 KIND=RATE 错误注入参数"""
+    rates = {}
+    for value in values or []:
+        kind, _, rate = value.partition('=')
+        if not rate:
+            raise argparse.ArgumentTypeError(f"错误注入参数格式应为 KIND=RATE: {value}")
+        rates[kind.strip()] = float(rate)
+    return rates
+
+
+def add_server_arguments(parser: argparse.ArgumentParser):
+    """添加模拟服务器的命令行参数（基准测试脚本共用）"""
+    parser.add_argument('--latency-ms', type=float, default=5, help='每个请求的固定延迟（毫秒）')
+    parser.add_argument('--jitter-ms', type=float, default=0, help='每个请求的随机附加延迟上限（毫秒）')
+    parser.add_argument('--error', action='append', metavar='KIND=RATE',
+                        help='错误注入比例，KIND 为 -62、-9 或 500，可重复，如 --error=-62=0.01')
+    parser.add_argument('--rate-limit', type=float, default=0, help='每秒请求数上限（0 表示不限流）')
+    parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='本地百度网盘模拟服务器')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口')
+    parser.add_argument('--links', type=int, default=10, help='启动时生成并打印的分享链接数')
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakePanServer(args.host, args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                           error_rates=parse_error_rates(args.error), rate_limit=args.rate_limit, seed=args.seed)
+    server.start()
+    print(f"模拟服务器已启动: {server.url}")
+    for _ in range(args.links):
+        print(server.make_link())
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(server.get_stats(), ensure_ascii=False))
+        server.stop()
+        sys.exit(0)
+
+
+if __name__ == '__main__':
+    main()
@@ -43,6 +43,11 @@ class Config:
         'LOG_FORMAT',
         '%(asctime)s - %(name)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
     )
+    LOG_JSON = os.getenv('LOG_JSON', 'False').lower() in ('true', '1', 'yes')  # 输出JSON格式日志（忽略LOG_FORMAT）
+    LOG_ASYNC = os.getenv('LOG_ASYNC', 'True').lower() in ('true', '1', 'yes')  # 后台线程异步写日志
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # 异步日志队列长度，队列满时丢弃新日志
+    LOG_SAMPLE_BURST = int(os.getenv('LOG_SAMPLE_BURST', 100))  # 逐任务日志每分钟完整输出的条数，0表示不采样
+    LOG_SAMPLE_EVERY = int(os.getenv('LOG_SAMPLE_EVERY', 100))  # 超过后每多少条输出1条
     
     # 数据库配置
     DATABASE_TYPE = os.getenv('DATABASE_TYPE', 'sqlite')  # sqlite, mysql, postgresql
@@ -63,6 +68,24 @@ class Config:
     POSTGRES_PASSWORD = os.getenv('POSTGRES_PASSWORD', '')
     POSTGRES_DATABASE = os.getenv('POSTGRES_DATABASE', 'baidu_pan')
     
+    # 连接池配置
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 10))  # MySQL/PostgreSQL最大连接数
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # 获取连接/SQLite锁等待超时（秒）
+    DB_POOL_RECYCLE_SEC = int(os.getenv('DB_POOL_RECYCLE_SEC', 3600))  # 连接最长复用时间（秒）
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 16384))  # 每个连接的页缓存（KB）
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', 268435456))  # 内存映射大小（字节）
+    SQLITE_CACHED_STATEMENTS = int(os.getenv('SQLITE_CACHED_STATEMENTS', 256))  # 每个连接缓存的预编译语句数
+    
+    # 知识库配置
+    KNOWLEDGE_COUNT_CACHE_TTL = int(os.getenv('KNOWLEDGE_COUNT_CACHE_TTL', 30))  # 游标分页时条目总数的缓存时间（秒）
+    KNOWLEDGE_FTS_ENABLED = os.getenv('KNOWLEDGE_FTS_ENABLED', 'True').lower() in ('true', '1', 'yes')  # 知识库检索使用全文索引
+    KNOWLEDGE_EXPORT_CHUNK_SIZE = int(os.getenv('KNOWLEDGE_EXPORT_CHUNK_SIZE', 1000))  # 流式导出每次查询的行数
+    KNOWLEDGE_CACHE_TTL = int(os.getenv('KNOWLEDGE_CACHE_TTL', 30))  # 知识库只读接口响应缓存时间（秒），0表示禁用
+    KNOWLEDGE_CACHE_URL = os.getenv('KNOWLEDGE_CACHE_URL', 'memory://')  # 响应缓存存储：memory:// 或 redis://（多进程共享）
+    ARTICLE_CONTENT_COMPRESSION = os.getenv('ARTICLE_CONTENT_COMPRESSION', 'zlib')  # 文章正文压缩算法：zlib/zstd/none（仅SQLite）
+    
     # 数据目录
     DATA_DIR = os.getenv('DATA_DIR', 'data')
     
@@ -79,14 +102,54 @@ class Config:
     
     # 账户配置
     DEFAULT_ACCOUNT = os.getenv('DEFAULT_ACCOUNT', 'main')
+    ACCOUNT_LOGIN_AT_STARTUP = os.getenv('ACCOUNT_LOGIN_AT_STARTUP', 'True').lower() in ('true', '1', 'yes')  # 启动时在后台登录全部账户
+    ACCOUNT_LOGIN_WORKERS = int(os.getenv('ACCOUNT_LOGIN_WORKERS', 4))  # 后台登录线程数
+    ACCOUNT_LOGIN_RETRY_SEC = int(os.getenv('ACCOUNT_LOGIN_RETRY_SEC', 300))  # 登录失败后再次后台重试的最短间隔（秒）
+    
+    # 会话管理配置
+    SESSION_MANAGER_ENABLED = os.getenv('SESSION_MANAGER_ENABLED', 'True').lower() in ('true', '1', 'yes')  # 登录失效时暂停工作线程并重新认证
+    SESSION_REFRESH_INTERVAL_SEC = int(os.getenv('SESSION_REFRESH_INTERVAL_SEC', 1800))  # 后台主动刷新bdstoken的间隔（秒），0表示只在失效时刷新
+    SESSION_RETRY_SEC = int(os.getenv('SESSION_RETRY_SEC', 60))  # 会话失效后后台重新认证的间隔（秒）
     
     # 工作线程配置
     MAX_TRANSFER_WORKERS = int(os.getenv('MAX_TRANSFER_WORKERS', 1))
     MAX_SHARE_WORKERS = int(os.getenv('MAX_SHARE_WORKERS', 1))
+    LINK_EXTRACT_WORKERS = int(os.getenv('LINK_EXTRACT_WORKERS', 0))  # 并行提取链接的进程数，0表示使用全部CPU核心
+    LINK_EXTRACT_BATCH_SIZE = int(os.getenv('LINK_EXTRACT_BATCH_SIZE', 500))  # 每批读取/提取的文章数
+    
+    # 队列事件推送配置
+    QUEUE_EVENTS_BUFFER_SIZE = int(os.getenv('QUEUE_EVENTS_BUFFER_SIZE', 1000))  # 保留用于断线补发的最近事件数
+    QUEUE_EVENTS_HEARTBEAT_SEC = int(os.getenv('QUEUE_EVENTS_HEARTBEAT_SEC', 15))  # 事件流无事件时的心跳间隔（秒）
+    QUEUE_EVENTS_MAX_STREAM_SEC = int(os.getenv('QUEUE_EVENTS_MAX_STREAM_SEC', 60))  # 单个事件流连接的最长时间（秒），到期后客户端自动重连
     
     # 性能监控配置
     ENABLE_PERFORMANCE_MONITORING = os.getenv('ENABLE_PERFORMANCE_MONITORING', 'False').lower() in ('true', '1', 'yes')
     
+    # 链路追踪配置
+    TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+    TRACING_EXPORT_PATH = os.getenv('TRACING_EXPORT_PATH', 'logs/traces.jsonl')  # span 输出文件（JSON Lines）
+    TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', 1.0))  # 链路采样比例（0~1）
+    
+    # 采样分析配置
+    PROFILER_MAX_DURATION_SEC = int(os.getenv('PROFILER_MAX_DURATION_SEC', 300))  # 单次采样分析的最长时间（秒），到期自动停止
+    
+    # 操作日志配置
+    OPERATION_LOG_ENABLED = os.getenv('OPERATION_LOG_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    OPERATION_LOG_BATCH_SIZE = int(os.getenv('OPERATION_LOG_BATCH_SIZE', 200))  # 缓冲达到该条数时立即批量写入
+    OPERATION_LOG_FLUSH_SEC = float(os.getenv('OPERATION_LOG_FLUSH_SEC', 2))  # 最长写入间隔（秒）
+    OPERATION_LOG_MAX_BUFFER = int(os.getenv('OPERATION_LOG_MAX_BUFFER', 10000))  # 缓冲上限，超过后丢弃新记录
+    
+    @classmethod
+    def get_session_config(cls) -> Dict[str, Any]:
+        """获取会话管理配置字典"""
+        return {
+            'session': {
+                'enabled': cls.SESSION_MANAGER_ENABLED,
+                'refresh_interval_sec': cls.SESSION_REFRESH_INTERVAL_SEC,
+                'retry_sec': cls.SESSION_RETRY_SEC
+            }
+        }
+    
     @classmethod
     def get_throttle_config(cls) -> Dict[str, Any]:
         """获取节流配置字典"""
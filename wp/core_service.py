@@ -7,11 +7,19 @@ import time
 import random
 import threading
 import sqlite3
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Tuple, Callable
 
 from baidu_pan_adapter import BaiduPanAdapter, ERROR_CODES, generate_random_password
+from config import get_config
+from logger import LogSampler, get_logger
+from metrics import THROTTLE_SLEEP, TASK_DURATION, registry as metrics_registry
+import tracing
+from pan_session import PanSession, is_auth_error
+from queue_events import count_statuses, counter_delta, select_tasks
 
+logger = get_logger(__name__)
 
 # 定义应该直接跳过的错误码（不重试，直接标记为跳过）
 SKIP_ON_ERRORS = {
@@ -23,6 +31,9 @@ SKIP_ON_ERRORS = {
     2,    # 分享失败，参数错误
 }
 
+# 同一任务因登录失效（-6/-4）退回待处理的最多次数，超过后按原逻辑失败/跳过
+MAX_AUTH_RETRIES = 2
+
 
 # -------------------------------
 # 工具函数
@@ -96,6 +107,38 @@ def build_link_with_pwd(base_url: str, pwd: str) -> str:
     return f"{base_url}{sep}pwd={pwd}"
 
 
+def requeue_on_auth_error(worker, tasks: List[Dict[str, Any]], index: int, errno: int, stale_token: str) -> bool:
+    """
+    工作线程遇到登录失效时，将任务退回待处理并重新认证（认证期间该账户的工作线程暂停）
+    参数:
+        worker: TransferWorker/ShareWorker
+        tasks: 工作线程的任务队列
+        index: 任务索引
+        errno: 操作返回的错误码
+        stale_token: 发起操作时使用的 bdstoken
+    返回: 任务已退回返回True；非登录错误、未启用会话管理或重试次数用尽返回False
+    """
+    if not worker.session or not is_auth_error(errno):
+        return False
+
+    with worker._queue_lock:
+        if index >= len(tasks):
+            return False
+        task = tasks[index]
+        retries = task.get('auth_retries', 0)
+        if retries >= MAX_AUTH_RETRIES:
+            return False
+        task['auth_retries'] = retries + 1
+        task['status'] = 'pending'
+        task['errno'] = errno
+
+    worker.log("🔑 任务 #%d 登录失效 (错误码: %s)，重新认证后重试", index, errno)
+    if worker.on_requeued:
+        worker.on_requeued(index)
+    worker.session.recover(errno, stale_token)
+    return True
+
+
 # -------------------------------
 # 节流策略
 # -------------------------------
@@ -121,7 +164,13 @@ class Throttler:
     def jitter(self):
         """添加随机延迟"""
         delay = random.uniform(self.jitter_min/1000.0, self.jitter_max/1000.0)
-        time.sleep(delay)
+        self._sleep(delay, 'jitter')
+
+    def _sleep(self, seconds: float, reason: str):
+        """休眠并记录节流耗时指标"""
+        with tracing.span('throttler.sleep', reason=reason, seconds=round(seconds, 3)):
+            time.sleep(seconds)
+        THROTTLE_SLEEP.inc(seconds, reason=reason)
 
     def tick(self):
         """执行操作前调用"""
@@ -130,7 +179,7 @@ class Throttler:
             self.window_start = now
             self.ops_in_window = 0
         if self.ops_in_window >= self.ops_per_window:
-            time.sleep(self.window_rest_sec)
+            self._sleep(self.window_rest_sec, 'window_rest')
             self.window_start = time.time()
             self.ops_in_window = 0
         self.jitter()
@@ -144,9 +193,9 @@ class Throttler:
         """操作失败时调用"""
         self.consec_fail += 1
         if errno == -62:
-            time.sleep(self.cooldown_on_62)
+            self._sleep(self.cooldown_on_62, 'cooldown_62')
         if self.consec_fail >= self.max_consec_fail:
-            time.sleep(self.pause_sec_on_failure)
+            self._sleep(self.pause_sec_on_failure, 'failure_pause')
             self.consec_fail = 0
 
 
@@ -164,8 +213,10 @@ class TransferWorker(threading.Thread):
                  on_progress: Optional[Callable] = None,
                  on_completed: Optional[Callable] = None,
                  on_failed: Optional[Callable] = None,
-                 log_callback: Optional[Callable] = None):
-        super().__init__(daemon=True)
+                 log_callback: Optional[Callable] = None,
+                 session: Optional[PanSession] = None,
+                 on_requeued: Optional[Callable] = None):
+        super().__init__(name='transfer-worker', daemon=True)
         self.transfer_queue = transfer_queue
         self.adapter = adapter
         self.throttler = throttler
@@ -173,16 +224,18 @@ class TransferWorker(threading.Thread):
         self.on_completed = on_completed
         self.on_failed = on_failed
         self.log_callback = log_callback
+        self.session = session
+        self.on_requeued = on_requeued
 
         self.is_running = False
         self.is_paused = False
         self._state_lock = threading.Lock()
         self._queue_lock = threading.Lock()
 
-    def log(self, message: str):
-        """日志输出"""
+    def log(self, message: str, *args):
+        """日志输出（参数原样传给回调，由回调延迟格式化和采样）"""
         if self.log_callback:
-            self.log_callback(message)
+            self.log_callback(message, *args)
 
     def run(self):
         """执行转存任务"""
@@ -197,6 +250,10 @@ class TransferWorker(threading.Thread):
                     time.sleep(0.1)
                     continue
 
+            # 会话重新认证期间暂停取任务
+            if self.session and not self.session.wait_ready(0.5):
+                continue
+
             # 查找待处理的任务
             pending_task = None
             pending_index = -1
@@ -212,114 +269,121 @@ class TransferWorker(threading.Thread):
                 time.sleep(0.5)
                 continue
 
-            try:
-                # 更新状态为运行中
-                with self._queue_lock:
-                    if pending_index < len(self.transfer_queue):
-                        self.transfer_queue[pending_index]['status'] = 'running'
-
-                if self.on_progress:
-                    self.on_progress(pending_index, 'running')
-
-                # 获取转存参数
-                share_link = pending_task.get('share_link', '')
-                share_password = pending_task.get('share_password', '')
-                target_path = pending_task.get('target_path', '/批量转存')
-
-                if not share_link:
-                    raise Exception("分享链接为空")
-
-                # 解析链接和密码
-                base_url, pwd = parse_pwd_from_link(share_link)
-                if not pwd and share_password:
-                    pwd = share_password
-
-                # 转存前先获取文件名（用于后续匹配title）
-                filename = None
+            with tracing.span('worker.transfer_task', index=pending_index) as task_span:
                 try:
-                    from baidu_pan_adapter import normalize_link, parse_url_and_code
-                    normalized = normalize_link(f'{base_url} {pwd}')
-                    url, _ = parse_url_and_code(normalized)
-
-                    # 如果有密码，先验证
-                    if pwd:
-                        randsk = self.adapter._verify_pass_code(url, pwd)
-                        if not isinstance(randsk, int):
-                            # 验证成功，更新Cookie
-                            from baidu_pan_adapter import update_cookie
-                            old_cookie = self.adapter.session.headers.get('Cookie', '')
-                            new_cookie = update_cookie(randsk, old_cookie)
-                            self.adapter.session.headers['Cookie'] = new_cookie
-
-                    # 获取HTML并解析文件名
-                    html = self.adapter._get_transfer_params(url)
-                    from baidu_pan_adapter import parse_response
-                    params = parse_response(html)
-                    if params and not isinstance(params, int) and len(params) >= 4:
-                        filename_list = params[3]
-                        if filename_list and len(filename_list) > 0:
-                            filename = filename_list[0]  # 取第一个文件名
-                except Exception as e:
-                    # 获取文件名失败，不影响转存
-                    pass
-
-                # 执行转存
-                self.throttler.tick()
-                errno = self.adapter.transfer(base_url, pwd, target_path)
-
-                if errno == 0:
-                    # 转存成功
-                    self.throttler.on_success()
+                    # 更新状态为运行中
                     with self._queue_lock:
                         if pending_index < len(self.transfer_queue):
-                            self.transfer_queue[pending_index]['status'] = 'completed'
-                            self.transfer_queue[pending_index]['target_path'] = target_path
-                            # 保存文件名，用于匹配title
-                            if filename:
-                                self.transfer_queue[pending_index]['filename'] = filename
-
-                            # 日志：记录转存成功的信息
-                            task_title = self.transfer_queue[pending_index].get('title', '')
-                            self.log(f"✅ 转存成功 #{pending_index}: 标题='{task_title}', 文件名='{filename}', 目标={target_path}")
-
-                    if self.on_completed:
-                        self.on_completed(pending_index, target_path)
-                else:
-                    # 转存失败
-                    error_msg = f"转存失败 (错误码: {errno}) - {ERROR_CODES.get(errno, '未知错误')}"
-
-                    # 检查是否应该跳过（不重试）
-                    if errno in SKIP_ON_ERRORS:
-                        # 直接跳过，不计入连续失败
+                            self.transfer_queue[pending_index]['status'] = 'running'
+
+                    if self.on_progress:
+                        self.on_progress(pending_index, 'running')
+
+                    # 获取转存参数
+                    share_link = pending_task.get('share_link', '')
+                    share_password = pending_task.get('share_password', '')
+                    target_path = pending_task.get('target_path', '/批量转存')
+
+                    if not share_link:
+                        raise Exception("分享链接为空")
+
+                    # 解析链接和密码
+                    base_url, pwd = parse_pwd_from_link(share_link)
+                    if not pwd and share_password:
+                        pwd = share_password
+
+                    # 转存前先获取文件名（用于后续匹配title）
+                    filename = None
+                    try:
+                        from baidu_pan_adapter import normalize_link, parse_url_and_code
+                        normalized = normalize_link(f'{base_url} {pwd}')
+                        url, _ = parse_url_and_code(normalized)
+
+                        # 如果有密码，先验证
+                        if pwd:
+                            randsk = self.adapter._verify_pass_code(url, pwd)
+                            if not isinstance(randsk, int):
+                                # 验证成功，更新Cookie
+                                from baidu_pan_adapter import update_cookie
+                                old_cookie = self.adapter.session.headers.get('Cookie', '')
+                                new_cookie = update_cookie(randsk, old_cookie)
+                                self.adapter.session.headers['Cookie'] = new_cookie
+
+                        # 获取HTML并解析文件名
+                        html = self.adapter._get_transfer_params(url)
+                        from baidu_pan_adapter import parse_response
+                        params = parse_response(html)
+                        if params and not isinstance(params, int) and len(params) >= 4:
+                            filename_list = params[3]
+                            if filename_list and len(filename_list) > 0:
+                                filename = filename_list[0]  # 取第一个文件名
+                    except Exception as e:
+                        # 获取文件名失败，不影响转存
+                        pass
+
+                    # 执行转存
+                    self.throttler.tick()
+                    token = self.adapter.bdstoken
+                    errno = self.adapter.transfer(base_url, pwd, target_path)
+                    task_span.set_attribute('errno', errno)
+
+                    if errno == 0:
+                        # 转存成功
+                        self.throttler.on_success()
                         with self._queue_lock:
                             if pending_index < len(self.transfer_queue):
-                                self.transfer_queue[pending_index]['status'] = 'skipped'
-                                self.transfer_queue[pending_index]['error_message'] = error_msg
-
-                        self.log(f"⏭️ 跳过任务 #{pending_index}: {error_msg}")
-                        if self.on_failed:
-                            self.on_failed(pending_index, f"已跳过 - {error_msg}")
+                                self.transfer_queue[pending_index]['status'] = 'completed'
+                                self.transfer_queue[pending_index]['target_path'] = target_path
+                                # 保存文件名，用于匹配title
+                                if filename:
+                                    self.transfer_queue[pending_index]['filename'] = filename
+
+                                # 日志：记录转存成功的信息
+                                task_title = self.transfer_queue[pending_index].get('title', '')
+                                self.log("✅ 转存成功 #%d: 标题='%s', 文件名='%s', 目标=%s", pending_index, task_title, filename, target_path)
+
+                        if self.on_completed:
+                            self.on_completed(pending_index, target_path)
+                    elif requeue_on_auth_error(self, self.transfer_queue, pending_index, errno, token):
+                        continue
                     else:
-                        # 正常失败，计入throttler
-                        self.throttler.on_failure(errno)
-                        with self._queue_lock:
-                            if pending_index < len(self.transfer_queue):
-                                self.transfer_queue[pending_index]['status'] = 'failed'
-                                self.transfer_queue[pending_index]['error_message'] = error_msg
-
-                        if self.on_failed:
-                            self.on_failed(pending_index, error_msg)
+                        # 转存失败
+                        error_msg = f"转存失败 (错误码: {errno}) - {ERROR_CODES.get(errno, '未知错误')}"
+
+                        # 检查是否应该跳过（不重试）
+                        if errno in SKIP_ON_ERRORS:
+                            # 直接跳过，不计入连续失败
+                            with self._queue_lock:
+                                if pending_index < len(self.transfer_queue):
+                                    self.transfer_queue[pending_index]['status'] = 'skipped'
+                                    self.transfer_queue[pending_index]['error_message'] = error_msg
+                                    self.transfer_queue[pending_index]['errno'] = errno
+
+                            self.log("⏭️ 跳过任务 #%d: %s", pending_index, error_msg)
+                            if self.on_failed:
+                                self.on_failed(pending_index, f"已跳过 - {error_msg}")
+                        else:
+                            # 正常失败，计入throttler
+                            self.throttler.on_failure(errno)
+                            with self._queue_lock:
+                                if pending_index < len(self.transfer_queue):
+                                    self.transfer_queue[pending_index]['status'] = 'failed'
+                                    self.transfer_queue[pending_index]['error_message'] = error_msg
+                                    self.transfer_queue[pending_index]['errno'] = errno
+
+                            if self.on_failed:
+                                self.on_failed(pending_index, error_msg)
 
-            except Exception as e:
-                # 异常处理
-                error_msg = f"转存异常: {str(e)}\n链接: {pending_task.get('share_link', 'N/A')}\n目标路径: {pending_task.get('target_path', 'N/A')}"
-                with self._queue_lock:
-                    if pending_index < len(self.transfer_queue):
-                        self.transfer_queue[pending_index]['status'] = 'failed'
-                        self.transfer_queue[pending_index]['error_message'] = error_msg
+                except Exception as e:
+                    # 异常处理
+                    error_msg = f"转存异常: {str(e)}\n链接: {pending_task.get('share_link', 'N/A')}\n目标路径: {pending_task.get('target_path', 'N/A')}"
+                    with self._queue_lock:
+                        if pending_index < len(self.transfer_queue):
+                            self.transfer_queue[pending_index]['status'] = 'failed'
+                            self.transfer_queue[pending_index]['error_message'] = error_msg
 
-                if self.on_failed:
-                    self.on_failed(pending_index, error_msg)
+                    if self.on_failed:
+                        self.on_failed(pending_index, error_msg)
 
     def pause(self):
         """暂停转存"""
@@ -351,8 +415,10 @@ class ShareWorker(threading.Thread):
                  on_progress: Optional[Callable] = None,
                  on_completed: Optional[Callable] = None,
                  on_failed: Optional[Callable] = None,
-                 log_callback: Optional[Callable] = None):
-        super().__init__(daemon=True)
+                 log_callback: Optional[Callable] = None,
+                 session: Optional[PanSession] = None,
+                 on_requeued: Optional[Callable] = None):
+        super().__init__(name='share-worker', daemon=True)
         self.share_queue = share_queue
         self.adapter = adapter
         self.throttler = throttler
@@ -360,16 +426,18 @@ class ShareWorker(threading.Thread):
         self.on_completed = on_completed
         self.on_failed = on_failed
         self.log_callback = log_callback
+        self.session = session
+        self.on_requeued = on_requeued
 
         self.is_running = False
         self.is_paused = False
         self._state_lock = threading.Lock()
         self._queue_lock = threading.Lock()
 
-    def log(self, message: str):
-        """日志输出"""
+    def log(self, message: str, *args):
+        """日志输出（参数原样传给回调，由回调延迟格式化和采样）"""
         if self.log_callback:
-            self.log_callback(message)
+            self.log_callback(message, *args)
 
     def run(self):
         """执行分享任务"""
@@ -384,6 +452,10 @@ class ShareWorker(threading.Thread):
                     time.sleep(0.1)
                     continue
 
+            # 会话重新认证期间暂停取任务
+            if self.session and not self.session.wait_ready(0.5):
+                continue
+
             # 查找待处理的任务
             pending_task = None
             pending_index = -1
@@ -399,88 +471,95 @@ class ShareWorker(threading.Thread):
                 time.sleep(0.5)
                 continue
 
-            try:
-                # 更新状态为运行中
-                with self._queue_lock:
-                    if pending_index < len(self.share_queue):
-                        self.share_queue[pending_index]['status'] = 'running'
-
-                if self.on_progress:
-                    self.on_progress(pending_index, 'running')
-
-                # 获取分享参数
-                fs_id = pending_task['file_info']['fs_id']
-                expiry = pending_task.get('expiry', 7)  # 默认7天
-                password_mode = pending_task.get('password_mode', 'random')
-
-                # 生成密码
-                if password_mode == 'fixed':
-                    # 使用固定密码
-                    password = pending_task.get('share_password', '')
-                elif password_mode == 'random':
-                    # 随机生成密码
-                    password = generate_random_password()
-                else:
-                    # 无密码
-                    password = ''
-
-                # 执行分享
-                self.throttler.tick()
-                result = self.adapter.create_share(fs_id, expiry=expiry, password=password)
-
-                if isinstance(result, str):
-                    # 分享成功
-                    self.throttler.on_success()
-                    share_link = result
+            with tracing.span('worker.share_task', index=pending_index) as task_span:
+                try:
+                    # 更新状态为运行中
                     with self._queue_lock:
                         if pending_index < len(self.share_queue):
-                            self.share_queue[pending_index]['status'] = 'completed'
-                            self.share_queue[pending_index]['share_link'] = share_link
-                            self.share_queue[pending_index]['share_password'] = password
-
-                            # 日志：记录分享成功的信息
-                            task_title = self.share_queue[pending_index].get('title', '')
-                            task_filename = self.share_queue[pending_index]['file_info'].get('name', '')
-                            self.log(f"🎉 分享成功 #{pending_index}: 标题='{task_title}', 文件名='{task_filename}', 链接={share_link[:40]}...")
-
-                    if self.on_completed:
-                        self.on_completed(pending_index, share_link, password)
-                else:
-                    # 分享失败
-                    error_msg = f"分享失败 (错误码: {result})"
-
-                    # 检查是否应该跳过（不重试）
-                    if result in SKIP_ON_ERRORS:
-                        # 直接跳过，不计入连续失败
-                        with self._queue_lock:
-                            if pending_index < len(self.share_queue):
-                                self.share_queue[pending_index]['status'] = 'skipped'
-                                self.share_queue[pending_index]['error_message'] = error_msg
-
-                        self.log(f"⏭️ 跳过任务 #{pending_index}: {error_msg}")
-                        if self.on_failed:
-                            self.on_failed(pending_index, f"已跳过 - {error_msg}")
+                            self.share_queue[pending_index]['status'] = 'running'
+
+                    if self.on_progress:
+                        self.on_progress(pending_index, 'running')
+
+                    # 获取分享参数
+                    fs_id = pending_task['file_info']['fs_id']
+                    expiry = pending_task.get('expiry', 7)  # 默认7天
+                    password_mode = pending_task.get('password_mode', 'random')
+
+                    # 生成密码
+                    if password_mode == 'fixed':
+                        # 使用固定密码
+                        password = pending_task.get('share_password', '')
+                    elif password_mode == 'random':
+                        # 随机生成密码
+                        password = generate_random_password()
                     else:
-                        # 正常失败，计入throttler
-                        self.throttler.on_failure(result)
+                        # 无密码
+                        password = ''
+
+                    # 执行分享
+                    self.throttler.tick()
+                    token = self.adapter.bdstoken
+                    result = self.adapter.create_share(fs_id, expiry=expiry, password=password)
+                    task_span.set_attribute('errno', result if isinstance(result, int) else 0)
+
+                    if isinstance(result, str):
+                        # 分享成功
+                        self.throttler.on_success()
+                        share_link = result
                         with self._queue_lock:
                             if pending_index < len(self.share_queue):
-                                self.share_queue[pending_index]['status'] = 'failed'
-                                self.share_queue[pending_index]['error_message'] = error_msg
-
-                        if self.on_failed:
-                            self.on_failed(pending_index, error_msg)
+                                self.share_queue[pending_index]['status'] = 'completed'
+                                self.share_queue[pending_index]['share_link'] = share_link
+                                self.share_queue[pending_index]['share_password'] = password
+
+                                # 日志：记录分享成功的信息
+                                task_title = self.share_queue[pending_index].get('title', '')
+                                task_filename = self.share_queue[pending_index]['file_info'].get('name', '')
+                                self.log("🎉 分享成功 #%d: 标题='%s', 文件名='%s', 链接=%.40s...", pending_index, task_title, task_filename, share_link)
+
+                        if self.on_completed:
+                            self.on_completed(pending_index, share_link, password)
+                    elif requeue_on_auth_error(self, self.share_queue, pending_index, result, token):
+                        continue
+                    else:
+                        # 分享失败
+                        error_msg = f"分享失败 (错误码: {result})"
+
+                        # 检查是否应该跳过（不重试）
+                        if result in SKIP_ON_ERRORS:
+                            # 直接跳过，不计入连续失败
+                            with self._queue_lock:
+                                if pending_index < len(self.share_queue):
+                                    self.share_queue[pending_index]['status'] = 'skipped'
+                                    self.share_queue[pending_index]['error_message'] = error_msg
+                                    self.share_queue[pending_index]['errno'] = result
+
+                            self.log("⏭️ 跳过任务 #%d: %s", pending_index, error_msg)
+                            if self.on_failed:
+                                self.on_failed(pending_index, f"已跳过 - {error_msg}")
+                        else:
+                            # 正常失败，计入throttler
+                            self.throttler.on_failure(result)
+                            with self._queue_lock:
+                                if pending_index < len(self.share_queue):
+                                    self.share_queue[pending_index]['status'] = 'failed'
+                                    self.share_queue[pending_index]['error_message'] = error_msg
+                                    self.share_queue[pending_index]['errno'] = result
+
+                            if self.on_failed:
+                                self.on_failed(pending_index, error_msg)
 
-            except Exception as e:
-                # 异常处理
-                error_msg = f"分享异常: {str(e)}\n文件: {pending_task['file_info'].get('name', 'N/A')}"
-                with self._queue_lock:
-                    if pending_index < len(self.share_queue):
-                        self.share_queue[pending_index]['status'] = 'failed'
-                        self.share_queue[pending_index]['error_message'] = error_msg
+                except Exception as e:
+                    # 异常处理
+                    error_msg = f"分享异常: {str(e)}\n文件: {pending_task['file_info'].get('name', 'N/A')}"
+                    with self._queue_lock:
+                        if pending_index < len(self.share_queue):
+                            self.share_queue[pending_index]['status'] = 'failed'
+                            self.share_queue[pending_index]['error_message'] = error_msg
 
-                if self.on_failed:
-                    self.on_failed(pending_index, error_msg)
+                    if self.on_failed:
+                        self.on_failed(pending_index, error_msg)
 
     def pause(self):
         """暂停分享"""
@@ -509,6 +588,7 @@ class CoreService:
         self.cookie = cookie
         self.config = config or {}
         self.adapter = None
+        self.session: Optional[PanSession] = None
         self.throttler = Throttler(self.config)
 
         self.transfer_queue: List[Dict[str, Any]] = []
@@ -521,6 +601,18 @@ class CoreService:
 
         # 回调函数
         self.log_callback: Optional[Callable] = None
+        self.event_callback: Optional[Callable] = None
+        self.operation_callback: Optional[Callable] = None
+        app_config = get_config()
+        self._log_sampler = LogSampler(app_config.LOG_SAMPLE_BURST, app_config.LOG_SAMPLE_EVERY)
+
+        # 任务修订号：{队列名: {任务索引: 最后一次变化的事件序号}}，按序号升序排列
+        self._revisions = {'transfer': OrderedDict(), 'share': OrderedDict()}
+        # 队列最后一次清空时的事件序号（早于该序号的增量查询需要重新加载）
+        self._cleared_at = {'transfer': 0, 'share': 0}
+        self._revision_lock = threading.Lock()
+        # 正在执行的任务的开始时间：{队列名: {任务索引: time.monotonic()}}，用于任务耗时指标
+        self._task_started = {'transfer': {}, 'share': {}}
         
         # 默认设置
         self.share_defaults = {
@@ -536,12 +628,161 @@ class CoreService:
         """设置日志回调函数"""
         self.log_callback = callback
 
-    def log(self, message: str):
-        """记录日志"""
+    def log(self, message: str, *args):
+        """
+        记录日志
+        带参数的消息按 %-格式化延迟到实际输出时，并视为逐任务日志按消息模板采样：
+        大批量导入/执行时每个模板只输出前 LOG_SAMPLE_BURST 条和之后每 LOG_SAMPLE_EVERY 条
+        """
+        if args:
+            allowed, suppressed = self._log_sampler.allow(message)
+            if not allowed:
+                return
+            if suppressed:
+                message += "（同类日志已省略 %d 条）"
+                args += (suppressed,)
         if self.log_callback:
-            self.log_callback(message)
+            self.log_callback(message % args if args else message)
         else:
-            print(f"[{now_str()}] {message}")
+            logger.info(message, *args)
+
+    def set_event_callback(self, callback: Callable):
+        """
+        设置队列事件回调函数
+        回调参数: (队列名 transfer/share, 事件类型 task/queue, 事件数据)
+        回调返回事件序号时，任务按该序号记录修订号，供 get_queue_page 增量查询
+        """
+        self.event_callback = callback
+
+    def set_operation_callback(self, callback: Callable):
+        """
+        设置任务操作日志回调函数
+        回调参数: (队列名 transfer/share, 结果 completed/failed/skipped/requeued, 错误码, 耗时毫秒, 详情)
+        """
+        self.operation_callback = callback
+
+    def _emit(self, queue: str, event: str, data: Dict[str, Any]) -> Optional[int]:
+        """发布队列事件（回调异常不影响任务执行），返回事件序号"""
+        if not self.event_callback:
+            return None
+        try:
+            return self.event_callback(queue, event, data)
+        except Exception as e:
+            self.log(f"发布队列事件失败: {e}")
+            return None
+
+    def _mark_changed(self, queue: str, indices, revision: Optional[int]):
+        """记录任务修订号（调用方需持有 _revision_lock）"""
+        if not revision:
+            return
+        revisions = self._revisions[queue]
+        for index in indices:
+            revisions.pop(index, None)
+            revisions[index] = revision
+
+    @tracing.traced('core.task_changed')
+    def _task_changed(self, queue: str, index: int, previous: Optional[str]):
+        """发布单个任务的状态变化（附带任务快照和计数器增量）"""
+        self._observe_task(queue, index, previous)
+        if not self.event_callback:
+            return
+        tasks = self.transfer_queue if queue == 'transfer' else self.share_queue
+        if not 0 <= index < len(tasks):
+            return
+        task = dict(tasks[index])
+        # 发布事件与记录修订号在同一把锁内完成，读取方不会看到已发布但未记录的变化
+        with self._revision_lock:
+            revision = self._emit(queue, 'task', {
+                'index': index,
+                'status': task['status'],
+                'previous': previous,
+                'delta': counter_delta(previous, task['status']),
+                'task': task
+            })
+            self._mark_changed(queue, [index], revision)
+
+    def _observe_task(self, queue: str, index: int, previous: Optional[str]):
+        """记录任务耗时指标和操作日志（开始执行时计时，完成/失败/跳过/退回时记录）"""
+        if not (metrics_registry.enabled or self.operation_callback):
+            return
+        started = self._task_started[queue]
+        if previous == 'pending':
+            started[index] = time.monotonic()
+            return
+        start = started.pop(index, None)
+        if start is None:
+            return
+        tasks = self.transfer_queue if queue == 'transfer' else self.share_queue
+        task = tasks[index] if 0 <= index < len(tasks) else {}
+        outcome = task.get('status', 'unknown')
+        if outcome == 'pending':
+            outcome = 'requeued'
+        elapsed = time.monotonic() - start
+        TASK_DURATION.observe(elapsed, queue=queue, outcome=outcome)
+
+        if self.operation_callback:
+            # 详情：转存为分享链接，分享为文件路径；未完成时附加错误信息
+            if queue == 'transfer':
+                details = task.get('share_link', '')
+            else:
+                details = task.get('file_info', {}).get('path', '')
+            if outcome == 'completed':
+                errno = 0
+            else:
+                errno = task.get('errno')
+                details = f"{details} {task.get('error_message', '')}".strip()
+            try:
+                self.operation_callback(queue, outcome, errno, int(elapsed * 1000), details)
+            except Exception as e:
+                self.log(f"记录操作日志失败: {e}")
+
+    def _queue_changed(self, queue: str, action: str, **extra):
+        """发布队列整体变化（导入、清空、启停），附带最新的计数器"""
+        if not self.event_callback:
+            return
+        status = self.get_transfer_status() if queue == 'transfer' else self.get_share_status()
+        status = {key: value for key, value in status.items() if key != 'tasks'}
+        with self._revision_lock:
+            revision = self._emit(queue, 'queue', {'action': action, 'status': status, **extra})
+            if action == 'added':
+                total = status['total']
+                self._mark_changed(queue, range(total - extra.get('count', 0), total), revision)
+            elif action == 'cleared':
+                self._revisions[queue].clear()
+                if revision:
+                    self._cleared_at[queue] = revision
+
+    def get_queue_page(self, queue: str, status: Optional[str] = None, offset: int = 0,
+                       limit: int = 100, since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        分页获取队列任务（控制面板用，不再一次返回整个队列）
+        参数:
+            queue: 队列名 transfer/share
+            status: 只返回该状态的任务（增量查询时不过滤，客户端需要据最新状态移出过滤视图）
+            offset: 跳过的任务数
+            limit: 最多返回的任务数
+            since: 事件序号，只返回该序号之后变化过的任务；
+                   队列在该序号之后被清空时返回完整分页并标记 reset
+        返回: {'status': 计数器, 'queue': 任务列表（附 index）, 'total', 'offset', 'limit', 'has_more', 'reset'}
+        """
+        tasks = self.transfer_queue if queue == 'transfer' else self.share_queue
+        queue_status = self.get_transfer_status() if queue == 'transfer' else self.get_share_status()
+        queue_status = {key: value for key, value in queue_status.items() if key != 'tasks'}
+
+        with self._revision_lock:
+            reset = since is not None and since < self._cleared_at[queue]
+            indices = None
+            if since is not None and not reset:
+                changed = []
+                for index, revision in reversed(self._revisions[queue].items()):
+                    if revision <= since:
+                        break
+                    changed.append(index)
+                indices = sorted(changed)
+                status = None
+            page = select_tasks(tasks, indices, status, offset, limit)
+
+        return {'status': queue_status, **page, 'reset': reset}
 
     def login(self, cookie: str) -> Tuple[bool, str]:
         """
@@ -558,6 +799,7 @@ class CoreService:
 
             if success:
                 self.log("登录成功")
+                self._start_session()
                 return True, ""
             else:
                 error_msg = "登录失败，Cookie无效或已过期"
@@ -568,6 +810,28 @@ class CoreService:
             self.log(error_msg)
             return False, error_msg
 
+    def _start_session(self):
+        """为新登录的适配器创建会话（后台刷新 bdstoken，登录失效时暂停工作线程并重新认证）"""
+        if self.session:
+            self.session.stop()
+
+        session_config = self.config.get('session', {})
+        if not session_config.get('enabled', True):
+            self.session = None
+            return
+
+        self.session = PanSession(
+            self.adapter,
+            refresh_interval_sec=safe_int(session_config.get('refresh_interval_sec', 1800)),
+            retry_sec=safe_int(session_config.get('retry_sec', 60)),
+            log_callback=self.log
+        )
+        self.session.start()
+
+    def get_session_status(self) -> Optional[Dict[str, Any]]:
+        """获取会话状态（未启用会话管理时返回None）"""
+        return self.session.get_status() if self.session else None
+
     def add_transfer_tasks_from_csv(self, csv_data: List[Dict[str, str]], default_target_path: str = '/批量转存') -> int:
         """
         从CSV数据添加转存任务
@@ -610,9 +874,11 @@ class CoreService:
             imported_count += 1
 
             # 日志：记录导入的title
-            self.log(f"📥 导入任务 #{imported_count}: 标题='{title}', 链接={share_link[:30]}...")
+            self.log("📥 导入任务 #%d: 标题='%s', 链接=%.30s...", imported_count, title, share_link)
 
         self.log(f"已导入 {imported_count} 个转存任务")
+        if imported_count:
+            self._queue_changed('transfer', 'added', count=imported_count)
         return imported_count
 
     def add_transfer_task(self, share_link: str, share_password: str = '', target_path: str = '/批量转存') -> bool:
@@ -641,6 +907,7 @@ class CoreService:
 
         self.transfer_queue.append(transfer_task)
         self.log(f"已添加转存任务: {share_link[:50]}...")
+        self._queue_changed('transfer', 'added', count=1)
         return True
 
     def start_transfer(self) -> Tuple[bool, str]:
@@ -659,26 +926,50 @@ class CoreService:
             self.transfer_queue,
             self.adapter,
             self.throttler,
-            on_progress=lambda idx, status: self.log(f"转存进度: 任务{idx} - {status}"),
-            on_completed=lambda idx, path: self.log(f"转存成功: 任务{idx} -> {path}"),
-            on_failed=lambda idx, error: self.log(f"转存失败: 任务{idx} - {error}"),
-            log_callback=self.log
+            on_progress=self._on_transfer_progress,
+            on_completed=self._on_transfer_completed,
+            on_failed=self._on_transfer_failed,
+            log_callback=self.log,
+            session=self.session,
+            on_requeued=self._on_transfer_requeued
         )
         self.transfer_worker.start()
         self.log("转存任务已启动")
+        self._queue_changed('transfer', 'started')
         return True, ""
 
+    def _on_transfer_progress(self, idx: int, status: str):
+        """工作线程回调：转存任务开始执行"""
+        self.log("转存进度: 任务%d - %s", idx, status)
+        self._task_changed('transfer', idx, 'pending')
+
+    def _on_transfer_completed(self, idx: int, path: str):
+        """工作线程回调：转存任务完成"""
+        self.log("转存成功: 任务%d -> %s", idx, path)
+        self._task_changed('transfer', idx, 'running')
+
+    def _on_transfer_failed(self, idx: int, error: str):
+        """工作线程回调：转存任务失败或跳过"""
+        self.log("转存失败: 任务%d - %s", idx, error)
+        self._task_changed('transfer', idx, 'running')
+
+    def _on_transfer_requeued(self, idx: int):
+        """工作线程回调：转存任务因登录失效退回待处理"""
+        self._task_changed('transfer', idx, 'running')
+
     def pause_transfer(self):
         """暂停转存"""
         if self.transfer_worker:
             self.transfer_worker.pause()
             self.log("转存已暂停")
+            self._queue_changed('transfer', 'paused')
 
     def resume_transfer(self):
         """继续转存"""
         if self.transfer_worker:
             self.transfer_worker.resume()
             self.log("转存已继续")
+            self._queue_changed('transfer', 'resumed')
 
     def stop_transfer(self):
         """停止转存"""
@@ -686,26 +977,17 @@ class CoreService:
             self.transfer_worker.stop()
             self.transfer_worker = None
             self.log("转存已停止")
+            self._queue_changed('transfer', 'stopped')
 
     def get_transfer_status(self) -> Dict[str, Any]:
         """获取转存状态"""
-        total = len(self.transfer_queue)
-        pending = sum(1 for t in self.transfer_queue if t['status'] == 'pending')
-        running = sum(1 for t in self.transfer_queue if t['status'] == 'running')
-        completed = sum(1 for t in self.transfer_queue if t['status'] == 'completed')
-        failed = sum(1 for t in self.transfer_queue if t['status'] == 'failed')
-        skipped = sum(1 for t in self.transfer_queue if t['status'] == 'skipped')
+        counts = count_statuses(self.transfer_queue)
 
         is_running = self.transfer_worker and self.transfer_worker.is_alive()
         is_paused = self.transfer_worker.is_paused if self.transfer_worker else False
 
         return {
-            'total': total,
-            'pending': pending,
-            'running': running,
-            'completed': completed,
-            'failed': failed,
-            'skipped': skipped,
+            **counts,
             'is_running': is_running,
             'is_paused': is_paused,
             'tasks': self.transfer_queue
@@ -738,10 +1020,10 @@ class CoreService:
                 title = task.get('title', '')
                 if filename and title:
                     title_map[filename] = title
-                    self.log(f"🔗 标题映射: '{filename}' -> '{title}'")
+                    self.log("🔗 标题映射: '%s' -> '%s'", filename, title)
                 elif filename:
                     # 有文件名但没有title，记录一下
-                    self.log(f"⚠️ 转存任务有文件名但无标题: '{filename}'")
+                    self.log("⚠️ 转存任务有文件名但无标题: '%s'", filename)
 
         self.log(f"📋 共建立 {len(title_map)} 个标题映射")
 
@@ -755,9 +1037,9 @@ class CoreService:
 
             # 日志：记录匹配结果
             if file_name in title_map:
-                self.log(f"✅ 匹配成功: '{file_name}' -> 标题='{title}'")
+                self.log("✅ 匹配成功: '%s' -> 标题='%s'", file_name, title)
             else:
-                self.log(f"⚠️ 未匹配到标题，使用文件名: '{file_name}'")
+                self.log("⚠️ 未匹配到标题，使用文件名: '%s'", file_name)
 
 
             share_task = {
@@ -780,6 +1062,8 @@ class CoreService:
             added_count += 1
 
         self.log(f"已从 {path} 添加 {added_count} 个分享任务 (有效期: {expiry}天, 提取码: {'固定' if password else '随机'})")
+        if added_count:
+            self._queue_changed('share', 'added', count=added_count)
         return added_count
 
     def start_share(self) -> Tuple[bool, str]:
@@ -798,34 +1082,46 @@ class CoreService:
             self.share_queue,
             self.adapter,
             self.throttler,
-            on_progress=lambda idx, status: self.log(f"分享进度: 任务{idx} - {status}"),
-            on_completed=lambda idx, link, pwd: self.log(f"分享成功: 任务{idx} - {link} (密码: {pwd})"),
-            on_failed=lambda idx, error: self.log(f"分享失败: 任务{idx} - {error}"),
-            log_callback=self.log
+            on_progress=self._on_share_progress,
+            on_completed=self._on_share_completed,
+            on_failed=self._on_share_failed,
+            log_callback=self.log,
+            session=self.session,
+            on_requeued=self._on_share_requeued
         )
         self.share_worker.start()
         self.log("分享任务已启动")
+        self._queue_changed('share', 'started')
         return True, ""
 
+    def _on_share_progress(self, idx: int, status: str):
+        """工作线程回调：分享任务开始执行"""
+        self.log("分享进度: 任务%d - %s", idx, status)
+        self._task_changed('share', idx, 'pending')
+
+    def _on_share_completed(self, idx: int, link: str, pwd: str):
+        """工作线程回调：分享任务完成"""
+        self.log("分享成功: 任务%d - %s (密码: %s)", idx, link, pwd)
+        self._task_changed('share', idx, 'running')
+
+    def _on_share_failed(self, idx: int, error: str):
+        """工作线程回调：分享任务失败或跳过"""
+        self.log("分享失败: 任务%d - %s", idx, error)
+        self._task_changed('share', idx, 'running')
+
+    def _on_share_requeued(self, idx: int):
+        """工作线程回调：分享任务因登录失效退回待处理"""
+        self._task_changed('share', idx, 'running')
+
     def get_share_status(self) -> Dict[str, Any]:
         """获取分享状态"""
-        total = len(self.share_queue)
-        pending = sum(1 for t in self.share_queue if t['status'] == 'pending')
-        running = sum(1 for t in self.share_queue if t['status'] == 'running')
-        completed = sum(1 for t in self.share_queue if t['status'] == 'completed')
-        failed = sum(1 for t in self.share_queue if t['status'] == 'failed')
-        skipped = sum(1 for t in self.share_queue if t['status'] == 'skipped')
+        counts = count_statuses(self.share_queue)
 
         is_running = self.share_worker and self.share_worker.is_alive()
         is_paused = self.share_worker.is_paused if self.share_worker else False
 
         return {
-            'total': total,
-            'pending': pending,
-            'running': running,
-            'completed': completed,
-            'failed': failed,
-            'skipped': skipped,
+            **counts,
             'is_running': is_running,
             'is_paused': is_paused,
             'tasks': self.share_queue
@@ -836,12 +1132,14 @@ class CoreService:
         if self.share_worker:
             self.share_worker.pause()
             self.log("分享已暂停")
+            self._queue_changed('share', 'paused')
 
     def resume_share(self):
         """继续分享"""
         if self.share_worker:
             self.share_worker.resume()
             self.log("分享已继续")
+            self._queue_changed('share', 'resumed')
 
     def stop_share(self):
         """停止分享"""
@@ -849,6 +1147,7 @@ class CoreService:
             self.share_worker.stop()
             self.share_worker = None
             self.log("分享已停止")
+            self._queue_changed('share', 'stopped')
 
     def get_share_results(self) -> List[Dict[str, str]]:
         """
@@ -869,7 +1168,7 @@ class CoreService:
                 final_title = title if title else filename
 
                 # 日志：记录最终输出
-                self.log(f"📤 输出结果: 标题='{final_title}' (原始title='{title}', 文件名='{filename}')")
+                self.log("📤 输出结果: 标题='%s' (原始title='%s', 文件名='%s')", final_title, title, filename)
 
                 results.append({
                     '标题': final_title,  # 优先使用标题，否则使用文件名
@@ -953,12 +1252,16 @@ class CoreService:
     def clear_transfer_queue(self):
         """清空转存队列"""
         self.transfer_queue.clear()
+        self._task_started['transfer'].clear()
         self.log("转存队列已清空")
+        self._queue_changed('transfer', 'cleared')
 
     def clear_share_queue(self):
         """清空分享队列"""
         self.share_queue.clear()
+        self._task_started['share'].clear()
         self.log("分享队列已清空")
+        self._queue_changed('share', 'cleared')
 
     def export_transfer_results(self) -> List[Dict[str, Any]]:
         """
@@ -4,7 +4,6 @@
 """
 import os
 import time
-import sqlite3
 import hashlib
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -18,6 +17,11 @@ from bs4 import BeautifulSoup
 
 from config import get_config, Config
 from logger import get_logger
+from db_pool import get_connection
+from article_content import decode_content, encode_content, make_preview, resolve_compression
+from article_tags import derive_tag_from_url
+from pagination import decode_cursor, encode_cursor, keyset_condition
+from knowledge_repository import invalidate_knowledge_cache
 
 logger = get_logger(__name__)
 
@@ -38,30 +42,8 @@ class CrawlerService:
         self.crawl_delay = 3  # 慢速爬取，每次请求间隔3秒
         
     def _get_db_connection(self):
-        """获取数据库连接"""
-        if self.config.DATABASE_TYPE == 'sqlite':
-            return sqlite3.connect(self.config.DATABASE_PATH)
-        elif self.config.DATABASE_TYPE == 'mysql':
-            import pymysql
-            return pymysql.connect(
-                host=self.config.MYSQL_HOST,
-                port=self.config.MYSQL_PORT,
-                user=self.config.MYSQL_USER,
-                password=self.config.MYSQL_PASSWORD,
-                database=self.config.MYSQL_DATABASE,
-                charset='utf8mb4'
-            )
-        elif self.config.DATABASE_TYPE == 'postgresql':
-            import psycopg2
-            return psycopg2.connect(
-                host=self.config.POSTGRES_HOST,
-                port=self.config.POSTGRES_PORT,
-                user=self.config.POSTGRES_USER,
-                password=self.config.POSTGRES_PASSWORD,
-                database=self.config.POSTGRES_DATABASE
-            )
-        else:
-            raise ValueError(f"不支持的数据库类型: {self.config.DATABASE_TYPE}")
+        """从共享连接池获取数据库连接（close() 归还连接）"""
+        return get_connection(self.config)
     
     def _generate_article_id(self, url: str) -> str:
         """
@@ -89,32 +71,48 @@ class CrawlerService:
         """
         try:
             article_id = self._generate_article_id(url)
+            tag = derive_tag_from_url(url)
+            preview = make_preview(content)
+            stored_content = encode_content(content, resolve_compression(self.config.DATABASE_TYPE))
             conn = self._get_db_connection()
             cursor = conn.cursor()
             
             if self.config.DATABASE_TYPE == 'sqlite':
+                # 使用UPSERT而非INSERT OR REPLACE：保持行id不变，且更新会触发全文索引同步
+                # 清空 links_extracted_at，下次增量提取重新处理更新后的文章
                 cursor.execute("""
-                    INSERT OR REPLACE INTO articles 
-                    (article_id, url, title, content, crawled_at, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (article_id, url, title, content, 
+                    INSERT INTO articles 
+                    (article_id, url, title, content, content_preview, tag, crawled_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(article_id) DO UPDATE SET
+                    title = excluded.title,
+                    content = excluded.content,
+                    content_preview = excluded.content_preview,
+                    tag = excluded.tag,
+                    updated_at = excluded.updated_at,
+                    links_extracted_at = NULL
+                """, (article_id, url, title, stored_content, preview, tag,
                       datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                       datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
             else:
                 cursor.execute("""
                     INSERT INTO articles 
-                    (article_id, url, title, content, crawled_at, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    (article_id, url, title, content, content_preview, tag, crawled_at, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                     ON DUPLICATE KEY UPDATE 
                     title = VALUES(title),
                     content = VALUES(content),
-                    updated_at = VALUES(updated_at)
-                """, (article_id, url, title, content,
+                    content_preview = VALUES(content_preview),
+                    tag = VALUES(tag),
+                    updated_at = VALUES(updated_at),
+                    links_extracted_at = NULL
+                """, (article_id, url, title, stored_content, preview, tag,
                       datetime.now(),
                       datetime.now()))
             
             conn.commit()
             conn.close()
+            invalidate_knowledge_cache()
             
             logger.info(f"保存文章成功: {title} ({url})")
             return True
@@ -387,32 +385,52 @@ class CrawlerService:
         Returns:
             文章列表
         """
+        return self.get_articles_page(limit, offset)['articles']
+    
+    def get_articles_page(self, limit: int = 100, offset: int = 0,
+                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        分页获取已爬取的文章列表（按 crawled_at, id 倒序）
+        
+        Args:
+            limit: 返回数量限制
+            offset: 偏移量（传入cursor时忽略）
+            cursor: 上一页返回的 next_cursor
+            
+        Returns:
+            {'articles': [...], 'has_more': bool, 'next_cursor': str或None}
+            
+        Raises:
+            ValueError: 游标无效
+        """
+        after = decode_cursor(cursor, 'crawled_at', 'DESC') if cursor else None
+        
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor()
-            
-            if self.config.DATABASE_TYPE == 'sqlite':
-                cursor.execute("""
-                    SELECT id, article_id, url, title, 
-                           substr(content, 1, 200) as content_preview,
-                           crawled_at, updated_at
-                    FROM articles
-                    ORDER BY crawled_at DESC
-                    LIMIT ? OFFSET ?
-                """, (limit, offset))
-            else:
-                cursor.execute("""
-                    SELECT id, article_id, url, title, 
-                           SUBSTRING(content, 1, 200) as content_preview,
-                           crawled_at, updated_at
-                    FROM articles
-                    ORDER BY crawled_at DESC
-                    LIMIT %s OFFSET %s
-                """, (limit, offset))
+            db_cursor = conn.cursor()
+            
+            p = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+            where_clause = ""
+            params = []
+            if after:
+                condition, params = keyset_condition('crawled_at', 'id', 'DESC', p, *after)
+                where_clause = f"WHERE {condition}"
+            
+            db_cursor.execute(f"""
+                SELECT id, article_id, url, title, content_preview,
+                       crawled_at, updated_at
+                FROM articles
+                {where_clause}
+                ORDER BY crawled_at DESC, id DESC
+                LIMIT {p} OFFSET {p}
+            """, params + [limit + 1, 0 if after else offset])
             
-            rows = cursor.fetchall()
+            rows = db_cursor.fetchall()
             conn.close()
             
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
             articles = []
             for row in rows:
                 articles.append({
@@ -425,11 +443,15 @@ class CrawlerService:
                     'updated_at': str(row[6])
                 })
             
-            return articles
+            return {
+                'articles': articles,
+                'has_more': has_more,
+                'next_cursor': encode_cursor('crawled_at', 'DESC', rows[-1][5], rows[-1][0]) if has_more else None
+            }
             
         except Exception as e:
             logger.error(f"获取文章列表失败: {e}")
-            return []
+            return {'articles': [], 'has_more': False, 'next_cursor': None}
     
     def get_article_by_id(self, article_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -467,7 +489,7 @@ class CrawlerService:
                     'article_id': row[1],
                     'url': row[2],
                     'title': row[3],
-                    'content': row[4],
+                    'content': decode_content(row[4]),
                     'crawled_at': str(row[5]),
                     'updated_at': str(row[6])
                 }
@@ -0,0 +1,389 @@
+"""
+数据库连接池模块
+为爬虫、链接提取和知识库等服务提供统一的数据库访问入口：
+- MySQL/PostgreSQL：线程安全的连接池，连接复用并定期回收
+- SQLite：按线程复用的持久连接，启用WAL模式和调优的PRAGMA，
+  并借助sqlite3的语句缓存复用已编译的SQL语句；连接上注册正文解码函数 article_text()
+"""
+import os
+import time
+import queue
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from article_content import register_sqlite_functions
+from config import get_config, Config
+from logger import get_logger
+from metrics import DB_QUERY_DURATION, registry as metrics_registry, sql_operation, timed_cursor
+
+logger = get_logger(__name__)
+
+
+class PooledConnection:
+    """
+    池化连接代理
+
+    行为与底层DB-API连接一致，但 close() 只是把连接归还给连接池，
+    因此现有的 conn.close() 调用方式无需修改。也可作为上下文管理器使用：
+    正常退出时提交，异常时回滚，最后归还连接。
+    """
+
+    _conn = None
+
+    def __init__(self, conn, release: Callable[[Any], None]):
+        self._conn = conn
+        self._release = release
+
+    def __getattr__(self, name):
+        conn = self._conn
+        if conn is None:
+            raise sqlite3.ProgrammingError("连接已归还连接池，不能继续使用")
+        return getattr(conn, name)
+
+    @property
+    def raw(self):
+        """底层数据库连接"""
+        return self._conn
+
+    def cursor(self, *args, **kwargs):
+        """创建游标（启用性能监控时统计语句执行耗时）"""
+        return timed_cursor(self.__getattr__('cursor')(*args, **kwargs))
+
+    def execute(self, sql, *args, **kwargs):
+        """执行语句（sqlite3 连接的快捷方法，启用性能监控时统计耗时）"""
+        execute = self.__getattr__('execute')
+        if not metrics_registry.enabled:
+            return execute(sql, *args, **kwargs)
+        with DB_QUERY_DURATION.time(operation=sql_operation(sql)):
+            return execute(sql, *args, **kwargs)
+
+    def close(self):
+        """归还连接（可重复调用）"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._conn is not None:
+                if exc_type is None:
+                    self._conn.commit()
+                else:
+                    self._conn.rollback()
+        finally:
+            self.close()
+        return False
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class SQLiteConnectionManager:
+    """
+    SQLite按线程持久连接管理器
+
+    sqlite3连接不能跨线程共享，因此每个线程持有一个长期连接。
+    同一线程内的嵌套获取共享同一连接，只有最外层归还时才回滚未提交的事务。
+    如果数据库文件被删除或替换（inode变化），会自动重新打开连接。
+    """
+
+    def __init__(self, db_path: str, pragmas: Tuple[Tuple[str, Any], ...],
+                 timeout: float = 30.0, cached_statements: int = 256):
+        self.db_path = db_path
+        self.pragmas = pragmas
+        self.timeout = timeout
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+
+    def _file_id(self) -> Optional[Tuple[int, int]]:
+        """返回数据库文件标识，用于检测文件是否被替换"""
+        try:
+            st = os.stat(self.db_path)
+            return (st.st_dev, st.st_ino)
+        except OSError:
+            return None
+
+    def _open(self) -> sqlite3.Connection:
+        """打开新连接并应用PRAGMA"""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements
+        )
+        for name, value in self.pragmas:
+            try:
+                conn.execute(f"PRAGMA {name}={value}")
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"设置SQLite PRAGMA失败 {name}={value}: {e}")
+        register_sqlite_functions(conn)
+        return conn
+
+    def acquire(self) -> PooledConnection:
+        """获取当前线程的连接"""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+
+        if conn is not None and local.depth == 0:
+            if local.file_id != self._file_id():
+                # 数据库文件已被删除或替换，丢弃旧连接
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+                conn = None
+            elif conn.in_transaction:
+                # 上一次使用遗留了未提交的事务
+                conn.rollback()
+
+        if conn is None:
+            conn = self._open()
+            local.conn = conn
+            local.depth = 0
+            local.file_id = self._file_id()
+
+        local.depth += 1
+        return PooledConnection(conn, lambda c, _local=local: self._release(_local, c))
+
+    def _release(self, local, conn: sqlite3.Connection):
+        """归还连接：最外层归还时回滚未提交的事务"""
+        local.depth = max(0, local.depth - 1)
+        if local.depth == 0:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                pass
+
+    def close_all(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            self._local.conn = None
+            self._local.depth = 0
+
+
+class ServerConnectionPool:
+    """
+    MySQL/PostgreSQL线程安全连接池
+
+    空闲连接按LIFO复用（最近使用的连接最可能仍然有效），
+    超过回收时间的连接在取出时被关闭重建。连接数达到上限时阻塞等待。
+    """
+
+    def __init__(self, factory: Callable[[], Any], is_alive: Callable[[Any], bool],
+                 max_size: int = 10, timeout: float = 30.0, recycle_sec: float = 3600):
+        self._factory = factory
+        self._is_alive = is_alive
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.recycle_sec = recycle_sec
+        self._idle = queue.LifoQueue()
+        self._created_at: Dict[int, float] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """当前已创建的连接数"""
+        with self._lock:
+            return len(self._created_at)
+
+    def _discard(self, conn):
+        with self._lock:
+            self._created_at.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self) -> PooledConnection:
+        """取出一个可用连接"""
+        deadline = time.time() + self.timeout
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = len(self._created_at) + self._pending < self.max_size
+                    if can_create:
+                        self._pending += 1
+                if can_create:
+                    try:
+                        conn = self._factory()
+                        with self._lock:
+                            self._created_at[id(conn)] = time.time()
+                    finally:
+                        with self._lock:
+                            self._pending -= 1
+                    return PooledConnection(conn, self._release)
+
+                remaining = deadline - time.time()
+                try:
+                    if remaining <= 0:
+                        raise queue.Empty
+                    conn = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    raise TimeoutError(f"获取数据库连接超时（连接池上限 {self.max_size}）")
+
+            created = self._created_at.get(id(conn), 0)
+            if time.time() - created > self.recycle_sec or not self._is_alive(conn):
+                self._discard(conn)
+                continue
+            return PooledConnection(conn, self._release)
+
+    def _release(self, conn):
+        """归还连接：结束事务后放回空闲队列，失效连接直接丢弃"""
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+# ============================================================================
+# 连接池注册表
+# ============================================================================
+
+_pools: Dict[Tuple, Any] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(config: Config) -> Tuple:
+    """根据连接参数生成连接池标识"""
+    db_type = config.DATABASE_TYPE
+    if db_type == 'sqlite':
+        return (db_type, os.path.abspath(config.DATABASE_PATH))
+    elif db_type == 'mysql':
+        return (db_type, config.MYSQL_HOST, config.MYSQL_PORT,
+                config.MYSQL_USER, config.MYSQL_DATABASE)
+    elif db_type == 'postgresql':
+        return (db_type, config.POSTGRES_HOST, config.POSTGRES_PORT,
+                config.POSTGRES_USER, config.POSTGRES_DATABASE)
+    raise ValueError(f"不支持的数据库类型: {db_type}")
+
+
+def _sqlite_pragmas(config: Config) -> Tuple[Tuple[str, Any], ...]:
+    """SQLite连接的调优PRAGMA"""
+    return (
+        ('journal_mode', config.SQLITE_JOURNAL_MODE),
+        ('synchronous', config.SQLITE_SYNCHRONOUS),
+        ('temp_store', 'MEMORY'),
+        ('cache_size', -abs(config.SQLITE_CACHE_SIZE_KB)),
+        ('mmap_size', config.SQLITE_MMAP_SIZE),
+    )
+
+
+def _create_pool(config: Config):
+    """创建对应数据库类型的连接池"""
+    db_type = config.DATABASE_TYPE
+
+    if db_type == 'sqlite':
+        return SQLiteConnectionManager(
+            config.DATABASE_PATH,
+            _sqlite_pragmas(config),
+            timeout=config.DB_POOL_TIMEOUT,
+            cached_statements=config.SQLITE_CACHED_STATEMENTS
+        )
+
+    if db_type == 'mysql':
+        def factory():
+            import pymysql
+            return pymysql.connect(
+                host=config.MYSQL_HOST,
+                port=config.MYSQL_PORT,
+                user=config.MYSQL_USER,
+                password=config.MYSQL_PASSWORD,
+                database=config.MYSQL_DATABASE,
+                charset='utf8mb4'
+            )
+        is_alive = lambda conn: bool(getattr(conn, 'open', True))
+    elif db_type == 'postgresql':
+        def factory():
+            import psycopg2
+            return psycopg2.connect(
+                host=config.POSTGRES_HOST,
+                port=config.POSTGRES_PORT,
+                user=config.POSTGRES_USER,
+                password=config.POSTGRES_PASSWORD,
+                database=config.POSTGRES_DATABASE
+            )
+        is_alive = lambda conn: getattr(conn, 'closed', 0) == 0
+    else:
+        raise ValueError(f"不支持的数据库类型: {db_type}")
+
+    return ServerConnectionPool(
+        factory,
+        is_alive,
+        max_size=config.DB_POOL_SIZE,
+        timeout=config.DB_POOL_TIMEOUT,
+        recycle_sec=config.DB_POOL_RECYCLE_SEC
+    )
+
+
+def get_pool(config: Optional[Config] = None):
+    """
+    获取（或创建）与配置对应的连接池
+
+    Args:
+        config: 配置对象
+
+    Returns:
+        SQLiteConnectionManager 或 ServerConnectionPool
+    """
+    config = config or get_config()
+    key = _pool_key(config)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _create_pool(config)
+                _pools[key] = pool
+                logger.info(f"创建数据库连接池: {key[0]}")
+    return pool
+
+
+def get_connection(config: Optional[Config] = None) -> PooledConnection:
+    """
+    从连接池获取数据库连接
+
+    Args:
+        config: 配置对象
+
+    Returns:
+        池化连接，使用完毕后调用 close() 归还
+    """
+    return get_pool(config).acquire()
+
+
+def close_all_pools():
+    """关闭所有连接池中的连接（用于优雅关闭）"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        try:
+            pool.close_all()
+        except Exception as e:
+            logger.warning(f"关闭连接池失败: {e}")
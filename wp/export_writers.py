@@ -0,0 +1,270 @@
+"""
+流式导出写入器
+把逐行产生的数据编码为可直接交给Flask流式响应的数据块，内存占用与导出总行数无关。
+支持CSV、NDJSON，以及安装pyarrow后可用的Parquet和Arrow IPC列式格式。
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from flask import Response, stream_with_context
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # 可选依赖：未安装时列式格式不可用
+    pyarrow = None
+
+# 缓冲区超过该字节数时输出一个数据块
+FLUSH_BYTES = 64 * 1024
+
+# 列式格式每个行组（record batch）的行数
+COLUMNAR_BATCH_ROWS = 10000
+
+# 导出格式 -> (MIME类型, 文件扩展名)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrows'),
+}
+
+# 需要pyarrow的格式
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def csv_chunks(rows: Iterable[Dict[str, Any]], fields: List[str], bom: bool = True,
+               flush_bytes: int = FLUSH_BYTES) -> Iterator[str]:
+    """
+    将数据行编码为CSV文本块
+
+    Args:
+        rows: 数据行（字典）迭代器
+        fields: 列顺序
+        bom: 是否输出UTF-8 BOM（便于Excel识别编码）
+        flush_bytes: 缓冲区输出阈值
+
+    Returns:
+        CSV文本块迭代器（第一个块包含表头）
+    """
+    output = io.StringIO()
+    if bom:
+        output.write('\ufeff')
+
+    writer = csv.DictWriter(output, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= flush_bytes:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+
+    remaining = output.getvalue()
+    if remaining:
+        yield remaining
+
+
+def gzip_chunks(chunks: Iterable[Union[str, bytes]], level: int = 6) -> Iterator[bytes]:
+    """
+    将数据块流式压缩为gzip格式
+
+    Args:
+        chunks: 文本（按UTF-8编码）或字节数据块
+        level: 压缩级别（1-9）
+
+    Returns:
+        gzip字节块迭代器
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def ndjson_chunks(rows: Iterable[Dict[str, Any]], flush_bytes: int = FLUSH_BYTES) -> Iterator[str]:
+    """
+    将数据行编码为NDJSON（每行一个JSON对象）文本块
+
+    Args:
+        rows: 数据行（字典）迭代器
+        flush_bytes: 缓冲区输出阈值
+
+    Returns:
+        NDJSON文本块迭代器
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, default=str)
+    buffer = []
+    size = 0
+    for row in rows:
+        line = encoder.encode(row) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= flush_bytes:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def columnar_available() -> bool:
+    """Parquet/Arrow导出是否可用（需要安装pyarrow）"""
+    return pyarrow is not None
+
+
+class _ChunkSink(io.RawIOBase):
+    """只追加写入的内存输出流，pyarrow写入的字节可随时取出"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        """取出并清空已写入的字节"""
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _record_batches(rows: Iterable[Dict[str, Any]], fields: List[str], schema,
+                    batch_rows: int) -> Iterator[Any]:
+    """将数据行按批转换为Arrow RecordBatch（所有列按字符串存储）"""
+    columns = {field: [] for field in fields}
+    count = 0
+
+    def to_batch():
+        return pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(columns[field], type=pyarrow.string()) for field in fields],
+            schema=schema
+        )
+
+    for row in rows:
+        for field in fields:
+            value = row.get(field)
+            columns[field].append(None if value is None else str(value))
+        count += 1
+        if count >= batch_rows:
+            yield to_batch()
+            columns = {field: [] for field in fields}
+            count = 0
+
+    if count:
+        yield to_batch()
+
+
+def columnar_chunks(rows: Iterable[Dict[str, Any]], fields: List[str], format_type: str,
+                    batch_rows: int = COLUMNAR_BATCH_ROWS) -> Iterator[bytes]:
+    """
+    将数据行编码为Parquet或Arrow IPC流
+
+    每 batch_rows 行写出一个行组并输出对应字节，内存中最多保留一个行组。
+
+    Args:
+        rows: 数据行（字典）迭代器
+        fields: 列顺序
+        format_type: parquet 或 arrow
+        batch_rows: 每个行组的行数
+
+    Returns:
+        字节块迭代器
+
+    Raises:
+        RuntimeError: 未安装pyarrow
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet/Arrow导出需要安装pyarrow: pip install pyarrow")
+
+    schema = pyarrow.schema([(field, pyarrow.string()) for field in fields])
+    sink = _ChunkSink()
+
+    if format_type == 'parquet':
+        writer = pyarrow.parquet.ParquetWriter(sink, schema, compression='zstd')
+        write = writer.write_batch
+    else:
+        writer = pyarrow.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    for batch in _record_batches(rows, fields, schema, batch_rows):
+        write(batch)
+        data = sink.drain()
+        if data:
+            yield data
+
+    writer.close()
+    yield sink.drain()
+
+
+def encode_rows(rows: Iterable[Dict[str, Any]], fields: List[str],
+                format_type: str) -> Iterator[Union[str, bytes]]:
+    """
+    按导出格式编码数据行
+
+    Args:
+        rows: 数据行（字典）迭代器
+        fields: 列顺序
+        format_type: csv/ndjson/parquet/arrow
+
+    Returns:
+        数据块迭代器
+    """
+    if format_type == 'csv':
+        return csv_chunks(rows, fields)
+    if format_type == 'ndjson':
+        return ndjson_chunks({field: row.get(field) for field in fields} for row in rows)
+    if format_type in COLUMNAR_FORMATS:
+        return columnar_chunks(rows, fields, format_type)
+    raise ValueError(f"不支持的导出格式: {format_type}")
+
+
+def export_response(rows: Iterable[Dict[str, Any]], fields: List[str], format_type: str,
+                    basename: str, compression: Optional[str] = None) -> Response:
+    """
+    构建流式导出响应
+
+    Args:
+        rows: 数据行（字典）迭代器
+        fields: 列顺序
+        format_type: csv/ndjson/parquet/arrow
+        basename: 下载文件名前缀（会追加时间戳和扩展名）
+        compression: gzip 或 None（列式格式自带压缩，忽略该参数）
+
+    Returns:
+        Flask流式响应
+    """
+    mimetype, extension = EXPORT_FORMATS[format_type]
+    chunks = encode_rows(rows, fields, format_type)
+    filename = f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+
+    if compression == 'gzip' and format_type not in COLUMNAR_FORMATS:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
@@ -1,16 +1,396 @@
 """
 数据库初始化脚本
 支持SQLite、MySQL、PostgreSQL
+
+数据库结构由 MIGRATIONS 中的版本化迁移定义，初始化时只执行尚未执行的迁移
+（已执行的版本记录在 schema_migrations 表中）。结构变更请追加新的迁移，不要修改已发布的迁移。
 """
 import os
 import sqlite3
-from typing import Optional
+from typing import List, Optional
 from config import get_config, Config
 from logger import get_logger
+from article_content import migrate_article_content, migrate_article_search_content
+from article_tags import migrate_article_tags
+from knowledge_search import migrate_search_index
+from link_extractor_service import migrate_links_extracted_at
+from migrations import Migration, create_index, run_migrations
+from operation_log import migrate_operation_logs
+from schema_indexes import ensure_composite_indexes
 
 logger = get_logger(__name__)
 
 
+# SQLite建表语句（初始结构）
+SQLITE_TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS transfer_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            share_link TEXT NOT NULL,
+            share_password TEXT,
+            target_path TEXT NOT NULL,
+            status TEXT DEFAULT 'pending',
+            error_message TEXT,
+            filename TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS share_tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            file_path TEXT NOT NULL,
+            fs_id TEXT NOT NULL,
+            expiry INTEGER DEFAULT 7,
+            password_mode TEXT DEFAULT 'random',
+            share_password TEXT,
+            share_link TEXT,
+            status TEXT DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_name TEXT UNIQUE NOT NULL,
+            cookie TEXT NOT NULL,
+            is_active INTEGER DEFAULT 1,
+            last_login_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS operation_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account TEXT NOT NULL,
+            operation TEXT NOT NULL,
+            details TEXT,
+            status TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS system_config (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id TEXT UNIQUE NOT NULL,
+            url TEXT UNIQUE NOT NULL,
+            title TEXT,
+            content TEXT,
+            tag TEXT,
+            crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS extracted_links (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id TEXT NOT NULL,
+            original_link TEXT NOT NULL,
+            original_password TEXT,
+            new_link TEXT,
+            new_password TEXT,
+            new_title TEXT,
+            status TEXT DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(article_id, original_link)
+        )
+    """,
+]
+
+# MySQL建表语句（初始结构）
+MYSQL_TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS transfer_tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            share_link TEXT NOT NULL,
+            share_password VARCHAR(255),
+            target_path TEXT NOT NULL,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            filename TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_status (status),
+            INDEX idx_account (account)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS share_tasks (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            file_path TEXT NOT NULL,
+            fs_id VARCHAR(255) NOT NULL,
+            expiry INT DEFAULT 7,
+            password_mode VARCHAR(50) DEFAULT 'random',
+            share_password VARCHAR(255),
+            share_link TEXT,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_status (status),
+            INDEX idx_account (account)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            account_name VARCHAR(255) UNIQUE NOT NULL,
+            cookie TEXT NOT NULL,
+            is_active TINYINT DEFAULT 1,
+            last_login_at TIMESTAMP NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS operation_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            operation VARCHAR(255) NOT NULL,
+            details TEXT,
+            status VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS system_config (
+            `key` VARCHAR(255) PRIMARY KEY,
+            value TEXT NOT NULL,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS articles (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            article_id VARCHAR(255) UNIQUE NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT,
+            content LONGTEXT,
+            tag VARCHAR(255),
+            crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            INDEX idx_article_id (article_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS extracted_links (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            article_id VARCHAR(255) NOT NULL,
+            original_link TEXT NOT NULL,
+            original_password VARCHAR(255),
+            new_link TEXT,
+            new_password VARCHAR(255),
+            new_title TEXT,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            UNIQUE KEY unique_article_link (article_id, original_link(500)),
+            INDEX idx_article_id (article_id),
+            INDEX idx_status (status)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+]
+
+# PostgreSQL建表语句（初始结构）
+POSTGRESQL_TABLES = [
+    """
+        CREATE TABLE IF NOT EXISTS transfer_tasks (
+            id SERIAL PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            share_link TEXT NOT NULL,
+            share_password VARCHAR(255),
+            target_path TEXT NOT NULL,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            filename TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS share_tasks (
+            id SERIAL PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            file_path TEXT NOT NULL,
+            fs_id VARCHAR(255) NOT NULL,
+            expiry INTEGER DEFAULT 7,
+            password_mode VARCHAR(50) DEFAULT 'random',
+            share_password VARCHAR(255),
+            share_link TEXT,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS accounts (
+            id SERIAL PRIMARY KEY,
+            account_name VARCHAR(255) UNIQUE NOT NULL,
+            cookie TEXT NOT NULL,
+            is_active SMALLINT DEFAULT 1,
+            last_login_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS operation_logs (
+            id SERIAL PRIMARY KEY,
+            account VARCHAR(255) NOT NULL,
+            operation VARCHAR(255) NOT NULL,
+            details TEXT,
+            status VARCHAR(50),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS system_config (
+            key VARCHAR(255) PRIMARY KEY,
+            value TEXT NOT NULL,
+            description TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS articles (
+            id SERIAL PRIMARY KEY,
+            article_id VARCHAR(255) UNIQUE NOT NULL,
+            url TEXT NOT NULL,
+            title TEXT,
+            content TEXT,
+            tag VARCHAR(255),
+            crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """,
+    """
+        CREATE TABLE IF NOT EXISTS extracted_links (
+            id SERIAL PRIMARY KEY,
+            article_id VARCHAR(255) NOT NULL,
+            original_link TEXT NOT NULL,
+            original_password VARCHAR(255),
+            new_link TEXT,
+            new_password VARCHAR(255),
+            new_title TEXT,
+            status VARCHAR(50) DEFAULT 'pending',
+            error_message TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(article_id, original_link)
+        )
+    """,
+]
+
+
+# 初始结构的索引：(索引名, 表名, 列)
+BASE_INDEXES = {
+    'sqlite': [
+        ('idx_transfer_status', 'transfer_tasks', 'status'),
+        ('idx_transfer_account', 'transfer_tasks', 'account'),
+        ('idx_share_status', 'share_tasks', 'status'),
+        ('idx_share_account', 'share_tasks', 'account'),
+        ('idx_articles_url', 'articles', 'url'),
+        ('idx_articles_article_id', 'articles', 'article_id'),
+        ('idx_articles_title', 'articles', 'title'),
+        ('idx_articles_crawled_at', 'articles', 'crawled_at'),
+        ('idx_articles_updated_at_id', 'articles', 'updated_at, id'),
+        ('idx_extracted_links_article_id', 'extracted_links', 'article_id'),
+        ('idx_extracted_links_status', 'extracted_links', 'status'),
+        ('idx_extracted_links_created_at', 'extracted_links', 'created_at'),
+        ('idx_extracted_links_updated_at', 'extracted_links', 'updated_at'),
+        ('idx_extracted_links_new_link', 'extracted_links', 'new_link'),
+    ],
+    'mysql': [
+        ('idx_articles_title', 'articles', 'title(255)'),
+        ('idx_articles_crawled_at', 'articles', 'crawled_at'),
+        ('idx_articles_updated_at_id', 'articles', 'updated_at, id'),
+        ('idx_extracted_links_created_at', 'extracted_links', 'created_at'),
+        ('idx_extracted_links_updated_at', 'extracted_links', 'updated_at'),
+        ('idx_extracted_links_new_link', 'extracted_links', 'new_link(500)'),
+    ],
+    'postgresql': [
+        ('idx_transfer_status', 'transfer_tasks', 'status'),
+        ('idx_transfer_account', 'transfer_tasks', 'account'),
+        ('idx_share_status', 'share_tasks', 'status'),
+        ('idx_share_account', 'share_tasks', 'account'),
+        ('idx_articles_article_id', 'articles', 'article_id'),
+        ('idx_articles_title', 'articles', 'title'),
+        ('idx_articles_crawled_at', 'articles', 'crawled_at'),
+        ('idx_articles_updated_at_id', 'articles', 'updated_at, id'),
+        ('idx_extracted_links_article_id', 'extracted_links', 'article_id'),
+        ('idx_extracted_links_status', 'extracted_links', 'status'),
+        ('idx_extracted_links_created_at', 'extracted_links', 'created_at'),
+        ('idx_extracted_links_updated_at', 'extracted_links', 'updated_at'),
+        ('idx_extracted_links_new_link', 'extracted_links', 'new_link'),
+    ],
+}
+
+
+def _create_base_indexes(conn, db_type: str):
+    """建立初始结构的索引"""
+    for index_name, table, columns in BASE_INDEXES[db_type]:
+        create_index(conn, db_type, index_name, table, columns)
+
+
+# 数据库结构迁移（按版本号顺序执行；只追加新迁移，不修改已发布的迁移）
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'initial_schema', scripts={
+        'sqlite': SQLITE_TABLES,
+        'mysql': MYSQL_TABLES,
+        'postgresql': POSTGRESQL_TABLES,
+    }, upgrade=_create_base_indexes),
+    # 旧数据库补充标签列并回填
+    Migration(2, 'article_tag_column', upgrade=migrate_article_tags),
+    # 知识库全文索引
+    Migration(3, 'knowledge_fulltext_index', upgrade=migrate_search_index),
+    # 热点查询的复合索引
+    Migration(4, 'composite_indexes', upgrade=ensure_composite_indexes),
+    # 文章摘要列（列表查询不再读取正文）与SQLite正文压缩存储
+    Migration(5, 'article_content_storage', upgrade=migrate_article_content),
+    # 任务操作日志的错误码、耗时和时间戳列（吞吐量/错误率时间序列）
+    Migration(6, 'operation_log_metrics', upgrade=migrate_operation_logs),
+    # 文章全文索引直接索引文本正文，触发器不再依赖 article_text() 函数
+    Migration(7, 'article_search_plain_content', upgrade=migrate_article_search_content),
+    # 按文章记录链接提取时间，增量提取不再依赖秒级精度的 updated_at 水位线
+    Migration(8, 'article_links_extracted_at', upgrade=migrate_links_extracted_at),
+]
+
+
+def migrate_database(conn, db_type: str, target: Optional[int] = None) -> List[int]:
+    """
+    执行尚未执行的结构迁移
+    
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+        target: 只迁移到该版本（None表示最新）
+    
+    Returns:
+        本次执行的版本号列表
+    """
+    return run_migrations(conn, db_type, MIGRATIONS, target)
+
+
 def init_sqlite(db_path: str) -> bool:
     """
     初始化SQLite数据库
@@ -29,150 +409,9 @@ def init_sqlite(db_path: str) -> bool:
         
         # 连接数据库（如果不存在会自动创建）
         conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # 创建转存任务表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transfer_tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account TEXT NOT NULL,
-                share_link TEXT NOT NULL,
-                share_password TEXT,
-                target_path TEXT NOT NULL,
-                status TEXT DEFAULT 'pending',
-                error_message TEXT,
-                filename TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 创建分享任务表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS share_tasks (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account TEXT NOT NULL,
-                file_path TEXT NOT NULL,
-                fs_id TEXT NOT NULL,
-                expiry INTEGER DEFAULT 7,
-                password_mode TEXT DEFAULT 'random',
-                share_password TEXT,
-                share_link TEXT,
-                status TEXT DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 创建账户表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account_name TEXT UNIQUE NOT NULL,
-                cookie TEXT NOT NULL,
-                is_active INTEGER DEFAULT 1,
-                last_login_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
         
-        # 创建操作日志表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS operation_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account TEXT NOT NULL,
-                operation TEXT NOT NULL,
-                details TEXT,
-                status TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+        migrate_database(conn, 'sqlite')
         
-        # 创建系统配置表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_config (
-                key TEXT PRIMARY KEY,
-                value TEXT NOT NULL,
-                description TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 创建文章表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS articles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                article_id TEXT UNIQUE NOT NULL,
-                url TEXT UNIQUE NOT NULL,
-                title TEXT,
-                content TEXT,
-                crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # 创建提取链接表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS extracted_links (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                article_id TEXT NOT NULL,
-                original_link TEXT NOT NULL,
-                original_password TEXT,
-                new_link TEXT,
-                new_password TEXT,
-                new_title TEXT,
-                status TEXT DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(article_id, original_link)
-            )
-        """)
-        
-        # 创建索引
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_transfer_status ON transfer_tasks(status)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_transfer_account ON transfer_tasks(account)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_share_status ON share_tasks(status)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_share_account ON share_tasks(account)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_article_id ON articles(article_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_articles_crawled_at ON articles(crawled_at)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_extracted_links_article_id ON extracted_links(article_id)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_extracted_links_status ON extracted_links(status)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_extracted_links_created_at ON extracted_links(created_at)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_extracted_links_updated_at ON extracted_links(updated_at)
-        """)
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_extracted_links_new_link ON extracted_links(new_link)
-        """)
-        
-        conn.commit()
         conn.close()
         
         logger.info(f"SQLite数据库初始化成功: {db_path}")
@@ -210,114 +449,8 @@ def init_mysql(config: Config) -> bool:
         cursor.execute(f"CREATE DATABASE IF NOT EXISTS {config.MYSQL_DATABASE} CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
         cursor.execute(f"USE {config.MYSQL_DATABASE}")
         
-        # 创建表（与SQLite类似，但使用MySQL语法）
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transfer_tasks (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                share_link TEXT NOT NULL,
-                share_password VARCHAR(255),
-                target_path TEXT NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                filename TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_status (status),
-                INDEX idx_account (account)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS share_tasks (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                file_path TEXT NOT NULL,
-                fs_id VARCHAR(255) NOT NULL,
-                expiry INT DEFAULT 7,
-                password_mode VARCHAR(50) DEFAULT 'random',
-                share_password VARCHAR(255),
-                share_link TEXT,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_status (status),
-                INDEX idx_account (account)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                account_name VARCHAR(255) UNIQUE NOT NULL,
-                cookie TEXT NOT NULL,
-                is_active TINYINT DEFAULT 1,
-                last_login_at TIMESTAMP NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS operation_logs (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                operation VARCHAR(255) NOT NULL,
-                details TEXT,
-                status VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_config (
-                `key` VARCHAR(255) PRIMARY KEY,
-                value TEXT NOT NULL,
-                description TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS articles (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                article_id VARCHAR(255) UNIQUE NOT NULL,
-                url TEXT NOT NULL,
-                title TEXT,
-                content LONGTEXT,
-                crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                INDEX idx_article_id (article_id)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS extracted_links (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                article_id VARCHAR(255) NOT NULL,
-                original_link TEXT NOT NULL,
-                original_password VARCHAR(255),
-                new_link TEXT,
-                new_password VARCHAR(255),
-                new_title TEXT,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
-                UNIQUE KEY unique_article_link (article_id, original_link(500)),
-                INDEX idx_article_id (article_id),
-                INDEX idx_status (status)
-            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
-        """)
+        migrate_database(conn, 'mysql')
         
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title(255))")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_crawled_at ON articles(crawled_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_created_at ON extracted_links(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_updated_at ON extracted_links(updated_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_new_link ON extracted_links(new_link(500))")
-        
-        conn.commit()
         conn.close()
         
         logger.info(f"MySQL数据库初始化成功: {config.MYSQL_DATABASE}")
@@ -372,117 +505,9 @@ def init_postgresql(config: Config) -> bool:
             password=config.POSTGRES_PASSWORD,
             database=config.POSTGRES_DATABASE
         )
-        cursor = conn.cursor()
-        
-        # 创建表
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transfer_tasks (
-                id SERIAL PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                share_link TEXT NOT NULL,
-                share_password VARCHAR(255),
-                target_path TEXT NOT NULL,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                filename TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS share_tasks (
-                id SERIAL PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                file_path TEXT NOT NULL,
-                fs_id VARCHAR(255) NOT NULL,
-                expiry INTEGER DEFAULT 7,
-                password_mode VARCHAR(50) DEFAULT 'random',
-                share_password VARCHAR(255),
-                share_link TEXT,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS accounts (
-                id SERIAL PRIMARY KEY,
-                account_name VARCHAR(255) UNIQUE NOT NULL,
-                cookie TEXT NOT NULL,
-                is_active SMALLINT DEFAULT 1,
-                last_login_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS operation_logs (
-                id SERIAL PRIMARY KEY,
-                account VARCHAR(255) NOT NULL,
-                operation VARCHAR(255) NOT NULL,
-                details TEXT,
-                status VARCHAR(50),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_config (
-                key VARCHAR(255) PRIMARY KEY,
-                value TEXT NOT NULL,
-                description TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS articles (
-                id SERIAL PRIMARY KEY,
-                article_id VARCHAR(255) UNIQUE NOT NULL,
-                url TEXT NOT NULL,
-                title TEXT,
-                content TEXT,
-                crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS extracted_links (
-                id SERIAL PRIMARY KEY,
-                article_id VARCHAR(255) NOT NULL,
-                original_link TEXT NOT NULL,
-                original_password VARCHAR(255),
-                new_link TEXT,
-                new_password VARCHAR(255),
-                new_title TEXT,
-                status VARCHAR(50) DEFAULT 'pending',
-                error_message TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(article_id, original_link)
-            )
-        """)
         
-        # 创建索引
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transfer_status ON transfer_tasks(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transfer_account ON transfer_tasks(account)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_share_status ON share_tasks(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_share_account ON share_tasks(account)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_article_id ON articles(article_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_title ON articles(title)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_articles_crawled_at ON articles(crawled_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_article_id ON extracted_links(article_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_status ON extracted_links(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_created_at ON extracted_links(created_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_updated_at ON extracted_links(updated_at)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_extracted_links_new_link ON extracted_links(new_link)")
+        migrate_database(conn, 'postgresql')
         
-        conn.commit()
         conn.close()
         
         logger.info(f"PostgreSQL数据库初始化成功: {config.POSTGRES_DATABASE}")
@@ -2,6 +2,9 @@ import sqlite3
 import hashlib
 from datetime import datetime
 
+from article_content import encode_content, make_preview, resolve_compression
+from article_tags import derive_tag_from_url
+
 conn = sqlite3.connect('data/baidu_pan_deployment.db')
 cursor = conn.cursor()
 
@@ -38,13 +41,16 @@ for article in test_articles:
     article_id = hashlib.md5(article['url'].encode()).hexdigest()
     try:
         cursor.execute('''
-            INSERT OR IGNORE INTO articles (article_id, url, title, content, crawled_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?)
+            INSERT OR IGNORE INTO articles
+            (article_id, url, title, content, content_preview, tag, crawled_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             article_id,
             article['url'],
             article['title'],
-            article['content'],
+            encode_content(article['content'], resolve_compression('sqlite')),
+            make_preview(article['content']),
+            derive_tag_from_url(article['url']),
             datetime.now().isoformat(),
             datetime.now().isoformat()
         ))
@@ -2,17 +2,17 @@
 知识库API蓝图
 提供知识库条目的查询、筛选、导出等REST接口
 """
-import csv
-import io
 from datetime import datetime
 from typing import Optional
 
-from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask import Blueprint, request, jsonify
 from flasgger import swag_from
 
 from config import get_config
 from logger import get_logger
 from knowledge_repository import KnowledgeRepository
+from response_cache import knowledge_cache
+from export_writers import EXPORT_FORMATS, COLUMNAR_FORMATS, columnar_available, export_response
 
 logger = get_logger(__name__)
 config = get_config()
@@ -82,6 +82,7 @@ def validate_date(date_str: Optional[str]) -> Optional[str]:
 
 
 @knowledge_bp.route('/entries', methods=['GET'])
+@knowledge_cache.cached
 def get_entries():
     """
     获取知识库条目列表
@@ -105,7 +106,7 @@ def get_entries():
         in: query
         type: string
         required: false
-        description: 搜索关键词（应用于标题、ID、URL、链接）
+        description: 搜索关键词（应用于标题、ID、URL、正文、链接，使用全文索引）
       - name: status
         in: query
         type: string
@@ -131,14 +132,25 @@ def get_entries():
         in: query
         type: string
         default: created_at
-        enum: [created_at, updated_at, title, status]
-        description: 排序字段
+        enum: [created_at, updated_at, title, status, relevance]
+        description: 排序字段（relevance按检索相关度排序，需配合search）
       - name: order
         in: query
         type: string
         default: DESC
         enum: [ASC, DESC]
         description: 排序方向
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: 上一页返回的next_cursor（键集分页，传入时忽略page）
+      - name: count
+        in: query
+        type: string
+        required: false
+        enum: [exact, cached, none]
+        description: 总数统计方式（默认：无cursor时exact，有cursor时cached）
     responses:
       200:
         description: 条目列表及分页信息
@@ -165,9 +177,13 @@ def get_entries():
                       type: integer
                     total_pages:
                       type: integer
+                    has_more:
+                      type: boolean
+                    next_cursor:
+                      type: string
             summary:
               type: object
-              description: 状态统计
+              description: 状态统计（仅第一页返回）
       400:
         description: 请求参数错误
       401:
@@ -183,9 +199,18 @@ def get_entries():
         date_to = request.args.get('date_to')
         sort = request.args.get('sort', 'created_at')
         order = request.args.get('order', 'DESC')
+        cursor = request.args.get('cursor') or None
+        count_mode = request.args.get('count') or ('cached' if cursor else 'exact')
         
         page, page_size, offset = validate_page_params(page, page_size)
         
+        if count_mode not in ('exact', 'cached', 'none'):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid count mode',
+                'message': 'count 必须是 exact、cached 或 none'
+            }), 400
+        
         date_from = validate_date(date_from)
         date_to = validate_date(date_to)
         
@@ -205,24 +230,31 @@ def get_entries():
         
         repo = get_knowledge_repository()
         
-        result = repo.list_entries(
-            limit=page_size,
-            offset=offset,
-            search=search,
-            status=status,
-            tag=tag,
-            date_from=date_from,
-            date_to=date_to,
-            sort_by=sort,
-            sort_order=order.upper()
-        )
-        
-        total = result.get('total', 0)
-        total_pages = (total + page_size - 1) // page_size if page_size > 0 else 0
+        try:
+            result = repo.list_entries(
+                limit=page_size,
+                offset=offset,
+                search=search,
+                status=status,
+                tag=tag,
+                date_from=date_from,
+                date_to=date_to,
+                sort_by=sort,
+                sort_order=order.upper(),
+                cursor=cursor,
+                count_mode=count_mode
+            )
+        except ValueError as ve:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor',
+                'message': str(ve)
+            }), 400
         
-        summary = repo.summaries_by_status()
+        total = result.get('total')
+        total_pages = (total + page_size - 1) // page_size if total is not None else None
         
-        return jsonify({
+        response = {
             'success': True,
             'data': {
                 'entries': result.get('entries', []),
@@ -230,11 +262,18 @@ def get_entries():
                     'page': page,
                     'page_size': page_size,
                     'total': total,
-                    'total_pages': total_pages
+                    'total_pages': total_pages,
+                    'has_more': result.get('has_more', False),
+                    'next_cursor': result.get('next_cursor')
                 }
-            },
-            'summary': summary
-        })
+            }
+        }
+        
+        # 游标翻页只返回条目，状态统计仅在第一页计算
+        if not cursor:
+            response['summary'] = repo.summaries_by_status()
+        
+        return jsonify(response)
         
     except Exception as e:
         logger.error(f"获取知识库条目失败: {e}")
@@ -246,9 +285,10 @@ def get_entries():
 
 
 @knowledge_bp.route('/tags', methods=['GET'])
+@knowledge_cache.cached
 def get_tags():
     """
-    获取所有不重复的标签列表
+    获取所有不重复的标签列表及每个标签的条目数量
     ---
     tags:
       - 知识库
@@ -271,18 +311,23 @@ def get_tags():
                     type: string
                 count:
                   type: integer
+                counts:
+                  type: object
+                  description: 每个标签的条目数量
       401:
         description: 未授权
     """
     try:
         repo = get_knowledge_repository()
-        tags = repo.get_distinct_tags()
+        counts = repo.tag_counts()
+        tags = sorted(counts)
         
         return jsonify({
             'success': True,
             'data': {
                 'tags': tags,
-                'count': len(tags)
+                'count': len(tags),
+                'counts': counts
             }
         })
         
@@ -296,6 +341,7 @@ def get_tags():
 
 
 @knowledge_bp.route('/statuses', methods=['GET'])
+@knowledge_cache.cached
 def get_statuses():
     """
     获取所有状态及其对应的条目数量
@@ -349,7 +395,7 @@ def get_statuses():
 @knowledge_bp.route('/export', methods=['GET'])
 def export_entries():
     """
-    导出知识库条目为CSV
+    导出知识库条目（CSV/NDJSON/Parquet/Arrow）
     ---
     tags:
       - 知识库
@@ -357,7 +403,16 @@ def export_entries():
       - ApiKeyAuth: []
     produces:
       - text/csv
+      - application/x-ndjson
+      - application/vnd.apache.parquet
+      - application/vnd.apache.arrow.stream
     parameters:
+      - name: format
+        in: query
+        type: string
+        default: csv
+        enum: [csv, ndjson, parquet, arrow]
+        description: 导出格式（parquet/arrow需要安装pyarrow）
       - name: fields
         in: query
         type: string
@@ -398,9 +453,15 @@ def export_entries():
         type: string
         default: DESC
         description: 排序方向
+      - name: compression
+        in: query
+        type: string
+        required: false
+        enum: [gzip]
+        description: 压缩方式（仅csv/ndjson，gzip时返回 .gz 文件；parquet自带zstd压缩）
     responses:
       200:
-        description: CSV文件
+        description: 导出文件（按块流式输出，不限制行数）
         headers:
           Content-Type:
             type: string
@@ -412,8 +473,11 @@ def export_entries():
         description: 请求参数错误
       401:
         description: 未授权
+      501:
+        description: 未安装pyarrow，无法导出parquet/arrow
     """
     try:
+        format_type = request.args.get('format', 'csv').lower()
         fields_param = request.args.get('fields', '')
         search = request.args.get('search')
         status = request.args.get('status')
@@ -422,6 +486,28 @@ def export_entries():
         date_to = request.args.get('date_to')
         sort = request.args.get('sort', 'created_at')
         order = request.args.get('order', 'DESC')
+        compression = request.args.get('compression', '').lower()
+        
+        if compression not in ('', 'gzip'):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid compression',
+                'message': '压缩方式必须是: gzip'
+            }), 400
+        
+        if format_type not in EXPORT_FORMATS:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid format',
+                'message': f"导出格式必须是: {', '.join(EXPORT_FORMATS)}"
+            }), 400
+        
+        if format_type in COLUMNAR_FORMATS and not columnar_available():
+            return jsonify({
+                'success': False,
+                'error': 'pyarrow not installed',
+                'message': f'导出{format_type}需要安装pyarrow: pip install pyarrow'
+            }), 501
         
         if fields_param:
             fields = [f.strip() for f in fields_param.split(',') if f.strip()]
@@ -448,7 +534,7 @@ def export_entries():
         }
         
         try:
-            rows = repo.prepare_export_rows(
+            rows = repo.iter_export_rows(
                 fields=fields,
                 filters=filters,
                 sort_by=sort,
@@ -461,34 +547,9 @@ def export_entries():
                 'message': str(ve)
             }), 400
         
-        def generate():
-            output = io.StringIO()
-            
-            output.write('\ufeff')
-            
-            writer = csv.DictWriter(output, fieldnames=fields, extrasaction='ignore')
-            
-            writer.writeheader()
-            yield output.getvalue()
-            output.seek(0)
-            output.truncate(0)
-            
-            for row in rows:
-                writer.writerow(row)
-                yield output.getvalue()
-                output.seek(0)
-                output.truncate(0)
-        
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f'knowledge_export_{timestamp}.csv'
-        
-        response = Response(
-            stream_with_context(generate()),
-            mimetype='text/csv',
-            headers={
-                'Content-Disposition': f'attachment; filename="{filename}"'
-            }
-        )
+        # 行从数据库分块读取后直接写入响应，内存占用与导出行数无关
+        response = export_response(rows, fields, format_type, 'knowledge_export',
+                                   compression=compression or None)
         
         return response
         
@@ -518,7 +579,7 @@ def get_entry_detail(article_id: str):
         description: 文章ID
     responses:
       200:
-        description: 条目详情
+        description: 条目详情（最新一条链接的字段，links 为该文章的全部链接）
         schema:
           type: object
           properties:
@@ -534,19 +595,7 @@ def get_entry_detail(article_id: str):
     try:
         repo = get_knowledge_repository()
         
-        result = repo.list_entries(
-            limit=1,
-            offset=0,
-            search=article_id
-        )
-        
-        entries = result.get('entries', [])
-        
-        matching_entry = None
-        for entry in entries:
-            if entry.get('article_id') == article_id:
-                matching_entry = entry
-                break
+        matching_entry = repo.get_entry(article_id)
         
         if matching_entry:
             return jsonify({
@@ -2,21 +2,33 @@
 知识库存储层
 提供文章与提取链接的聚合查询、过滤、排序和统计功能
 """
-import re
-from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime
-from urllib.parse import urlparse
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 from config import get_config, Config
 from logger import get_logger
+from db_pool import get_connection
+from tracing import traced
+from article_tags import derive_tag_from_url
+from knowledge_search import fts_rank_joins, fts_search_condition, like_search_clause, search_index_exists
+from pagination import CountCache, decode_cursor, encode_cursor, keyset_condition
+from response_cache import knowledge_cache
 
 logger = get_logger(__name__)
 
+# 条目总数缓存（count_mode='cached' 时使用）
+_count_cache = CountCache(ttl_sec=get_config().KNOWLEDGE_COUNT_CACHE_TTL)
+
+
+def invalidate_knowledge_cache():
+    """文章或提取链接写入后调用：清空条目总数缓存和知识库API响应缓存"""
+    _count_cache.invalidate()
+    knowledge_cache.invalidate()
+
 
 class KnowledgeRepository:
     """知识库数据访问层"""
     
-    ALLOWED_SORT_FIELDS = ['created_at', 'updated_at', 'title', 'status']
+    ALLOWED_SORT_FIELDS = ['created_at', 'updated_at', 'title', 'status', 'relevance']
     ALLOWED_EXPORT_FIELDS = [
         'article_id', 'article_title', 'article_url', 
         'original_link', 'original_password',
@@ -33,40 +45,15 @@ class KnowledgeRepository:
             config: 配置对象
         """
         self.config = config or get_config()
+        self._search_index_available = None
     
     def _get_db_connection(self):
-        """获取数据库连接"""
-        if self.config.DATABASE_TYPE == 'sqlite':
-            import sqlite3
-            return sqlite3.connect(self.config.DATABASE_PATH)
-        elif self.config.DATABASE_TYPE == 'mysql':
-            import pymysql
-            return pymysql.connect(
-                host=self.config.MYSQL_HOST,
-                port=self.config.MYSQL_PORT,
-                user=self.config.MYSQL_USER,
-                password=self.config.MYSQL_PASSWORD,
-                database=self.config.MYSQL_DATABASE,
-                charset='utf8mb4'
-            )
-        elif self.config.DATABASE_TYPE == 'postgresql':
-            import psycopg2
-            return psycopg2.connect(
-                host=self.config.POSTGRES_HOST,
-                port=self.config.POSTGRES_PORT,
-                user=self.config.POSTGRES_USER,
-                password=self.config.POSTGRES_PASSWORD,
-                database=self.config.POSTGRES_DATABASE
-            )
-        else:
-            raise ValueError(f"不支持的数据库类型: {self.config.DATABASE_TYPE}")
+        """从共享连接池获取数据库连接（close() 归还连接）"""
+        return get_connection(self.config)
     
     def _derive_tag_from_url(self, url: str) -> str:
         """
-        从文章URL中提取标签/分类
-        规则：提取URL的第二级路径作为标签（jprj后的第一个路径段）
-        例如：https://lewz.cn/jprj/category/article -> "category"
-             https://lewz.cn/jprj/article -> "未分类"
+        从文章URL中提取标签/分类（规则见 article_tags.derive_tag_from_url）
         
         Args:
             url: 文章URL
@@ -74,23 +61,26 @@ class KnowledgeRepository:
         Returns:
             标签名称，如果无法提取则返回"未分类"
         """
-        if not url:
-            return "未分类"
-        
-        try:
-            parsed = urlparse(url)
-            path = parsed.path.strip('/')
-            
-            parts = path.split('/')
-            
-            if len(parts) >= 3:
-                return parts[1]
-            else:
-                return "未分类"
-        except Exception as e:
-            logger.warning(f"从URL提取标签失败: {url}, 错误: {e}")
-            return "未分类"
+        return derive_tag_from_url(url)
+    
+    def _search_index_ready(self, conn) -> bool:
+        """全文索引是否可用（每个实例只检查一次；索引由迁移建立，读取路径不执行DDL）"""
+        if self._search_index_available is None:
+            self._search_index_available = (
+                self.config.KNOWLEDGE_FTS_ENABLED
+                and search_index_exists(conn, self.config.DATABASE_TYPE)
+            )
+        return self._search_index_available
+    
+    def _database_identity(self) -> Tuple:
+        """当前数据库的标识（用于总数缓存键）"""
+        if self.config.DATABASE_TYPE == 'sqlite':
+            return ('sqlite', self.config.DATABASE_PATH)
+        elif self.config.DATABASE_TYPE == 'mysql':
+            return ('mysql', self.config.MYSQL_HOST, self.config.MYSQL_PORT, self.config.MYSQL_DATABASE)
+        return ('postgresql', self.config.POSTGRES_HOST, self.config.POSTGRES_PORT, self.config.POSTGRES_DATABASE)
     
+    @traced('repository.list_entries')
     def list_entries(
         self,
         limit: int = 50,
@@ -101,24 +91,31 @@ class KnowledgeRepository:
         date_from: Optional[str] = None,
         date_to: Optional[str] = None,
         sort_by: str = 'created_at',
-        sort_order: str = 'DESC'
+        sort_order: str = 'DESC',
+        cursor: Optional[str] = None,
+        count_mode: str = 'exact'
     ) -> Dict[str, Any]:
         """
         列出知识库条目
         
         Args:
             limit: 每页条数
-            offset: 偏移量
-            search: 搜索关键词（应用于标题、文章ID、URL、原始链接、新链接、新标题）
+            offset: 偏移量（传入cursor时忽略）
+            search: 搜索关键词（应用于文章ID、标题、URL、正文、原始链接、新链接、新标题，优先使用全文索引）
             status: 状态过滤（pending/processing/transferred/completed/failed）
             tag: 标签过滤
             date_from: 起始日期（YYYY-MM-DD格式，基于extracted_links.created_at）
             date_to: 结束日期（YYYY-MM-DD格式，基于extracted_links.created_at）
-            sort_by: 排序字段（created_at/updated_at/title/status）
+            sort_by: 排序字段（created_at/updated_at/title/status/relevance，relevance仅在全文检索时生效）
             sort_order: 排序方向（ASC/DESC）
+            cursor: 上一页返回的 next_cursor，按 (排序值, id) 键集翻页
+            count_mode: 总数统计方式（exact=每次统计，cached=缓存KNOWLEDGE_COUNT_CACHE_TTL秒，none=不统计）
             
         Returns:
-            包含entries列表、total总数和相关元数据的字典
+            包含entries列表、total总数、next_cursor和相关元数据的字典
+            
+        Raises:
+            ValueError: 游标无效或与排序方式不匹配
         """
         if sort_by not in self.ALLOWED_SORT_FIELDS:
             logger.warning(f"非法排序字段: {sort_by}，使用默认值 created_at")
@@ -126,69 +123,130 @@ class KnowledgeRepository:
         
         if sort_order.upper() not in ['ASC', 'DESC']:
             sort_order = 'DESC'
+        sort_order = sort_order.upper()
+        
+        after = decode_cursor(cursor, sort_by, sort_order) if cursor else None
         
         try:
-            conn = self._get_db_connection()
-            cursor = conn.cursor()
+            return self._query_entries(
+                limit, offset, search, status, tag, date_from, date_to,
+                sort_by, sort_order, after, count_mode
+            )
+        except Exception as e:
+            logger.error(f"列出知识库条目失败: {e}")
+            return {
+                'entries': [],
+                'total': 0,
+                'limit': limit,
+                'offset': offset,
+                'has_more': False,
+                'next_cursor': None,
+                'error': str(e)
+            }
+    
+    def _query_entries(
+        self,
+        limit: int,
+        offset: int,
+        search: Optional[str],
+        status: Optional[str],
+        tag: Optional[str],
+        date_from: Optional[str],
+        date_to: Optional[str],
+        sort_by: str,
+        sort_order: str,
+        after: Optional[Tuple[Any, Any]],
+        count_mode: str
+    ) -> Dict[str, Any]:
+        """执行 list_entries 的查询（参数已校验）"""
+        conn = self._get_db_connection()
+        try:
+            db_cursor = conn.cursor()
             
             is_sqlite = self.config.DATABASE_TYPE == 'sqlite'
             param_placeholder = '?' if is_sqlite else '%s'
             
             conditions = []
             params = []
+            joins = ""
+            join_params = []
+            rank = None
             
             if status:
                 conditions.append(f"el.status = {param_placeholder}")
                 params.append(status)
             
+            if tag:
+                conditions.append(f"a.tag = {param_placeholder}")
+                params.append(tag)
+            
             if date_from:
-                if is_sqlite:
-                    conditions.append(f"DATE(el.created_at) >= {param_placeholder}")
-                else:
-                    conditions.append(f"DATE(el.created_at) >= {param_placeholder}")
+                conditions.append(f"DATE(el.created_at) >= {param_placeholder}")
                 params.append(date_from)
             
             if date_to:
-                if is_sqlite:
-                    conditions.append(f"DATE(el.created_at) <= {param_placeholder}")
-                else:
-                    conditions.append(f"DATE(el.created_at) <= {param_placeholder}")
+                conditions.append(f"DATE(el.created_at) <= {param_placeholder}")
                 params.append(date_to)
             
             if search:
-                search_term = f"%{search}%"
-                search_conditions = [
-                    f"a.title LIKE {param_placeholder}",
-                    f"a.article_id LIKE {param_placeholder}",
-                    f"a.url LIKE {param_placeholder}",
-                    f"el.original_link LIKE {param_placeholder}",
-                    f"el.new_link LIKE {param_placeholder}",
-                    f"el.new_title LIKE {param_placeholder}"
-                ]
-                conditions.append(f"({' OR '.join(search_conditions)})")
-                params.extend([search_term] * 6)
+                fts_condition = None
+                if self._search_index_ready(conn):
+                    fts_condition = fts_search_condition(self.config.DATABASE_TYPE, search, param_placeholder)
+                if fts_condition:
+                    search_condition, search_params = fts_condition
+                    if sort_by == 'relevance':
+                        joins, join_params, rank = fts_rank_joins(
+                            self.config.DATABASE_TYPE, search, param_placeholder
+                        )
+                else:
+                    search_condition, search_params = like_search_clause(
+                        search, param_placeholder, self.config.DATABASE_TYPE
+                    )
+                conditions.append(search_condition)
+                params.extend(search_params)
             
             where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
             
+            # 可为空的列用COALESCE归一，保证键集比较与排序一致
             field_mapping = {
-                'title': 'a.title',
-                'status': 'el.status',
+                'title': "COALESCE(a.title, '')",
+                'status': "COALESCE(el.status, '')",
                 'created_at': 'el.created_at',
-                'updated_at': 'el.updated_at'
+                'updated_at': 'el.updated_at',
+                'relevance': rank or 'el.created_at'
             }
             
             order_field = field_mapping.get(sort_by, 'el.created_at')
-            order_by = f"ORDER BY {order_field} {sort_order}"
-            
-            count_query = f"""
-                SELECT COUNT(*)
-                FROM extracted_links el
-                INNER JOIN articles a ON el.article_id = a.article_id
-                {where_clause}
-            """
-            
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
+            order_by = f"ORDER BY {order_field} {sort_order}, el.id {sort_order}"
+            
+            total = None
+            if count_mode in ('exact', 'cached'):
+                count_query = f"""
+                    SELECT COUNT(*)
+                    FROM extracted_links el
+                    INNER JOIN articles a ON el.article_id = a.article_id
+                    {where_clause}
+                """
+                
+                def count_rows() -> int:
+                    db_cursor.execute(count_query, params)
+                    return db_cursor.fetchone()[0]
+                
+                if count_mode == 'cached':
+                    cache_key = (self._database_identity(), where_clause, tuple(params))
+                    total = _count_cache.get_or_compute(cache_key, count_rows)
+                else:
+                    total = count_rows()
+            
+            page_conditions = list(conditions)
+            page_params = join_params + params
+            if after:
+                condition, condition_params = keyset_condition(
+                    order_field, 'el.id', sort_order, param_placeholder, *after
+                )
+                page_conditions.append(condition)
+                page_params.extend(condition_params)
+            page_where = " WHERE " + " AND ".join(page_conditions) if page_conditions else ""
             
             query = f"""
                 SELECT 
@@ -203,100 +261,171 @@ class KnowledgeRepository:
                     el.status,
                     el.error_message,
                     el.created_at,
-                    el.updated_at
+                    el.updated_at,
+                    el.id,
+                    {order_field} AS sort_value,
+                    a.tag
                 FROM extracted_links el
                 INNER JOIN articles a ON el.article_id = a.article_id
-                {where_clause}
+                {joins}
+                {page_where}
                 {order_by}
                 LIMIT {param_placeholder} OFFSET {param_placeholder}
             """
             
-            params.extend([limit, offset])
-            cursor.execute(query, params)
+            # 多取一行用于判断是否还有下一页
+            page_params.extend([limit + 1, 0 if after else offset])
+            db_cursor.execute(query, page_params)
             
-            rows = cursor.fetchall()
+            rows = db_cursor.fetchall()
+        finally:
             conn.close()
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = encode_cursor(sort_by, sort_order, rows[-1][13], rows[-1][12])
+        
+        entries = [self._row_to_entry(row, row[14]) for row in rows]
+        
+        return {
+            'entries': entries,
+            'total': total,
+            'limit': limit,
+            'offset': offset,
+            'has_more': has_more,
+            'next_cursor': next_cursor
+        }
+    
+    def _row_to_entry(self, row: Tuple, tag: Optional[str]) -> Dict[str, Any]:
+        """将条目查询结果的前12列转换为条目字典"""
+        article_url = row[2]
+        return {
+            'article_id': row[0],
+            'article_title': row[1],
+            'article_url': article_url,
+            'original_link': row[3],
+            'original_password': row[4] or '',
+            'new_link': row[5] or '',
+            'new_password': row[6] or '',
+            'new_title': row[7] or '',
+            'status': row[8],
+            'error_message': row[9] or '',
+            'tag': tag or self._derive_tag_from_url(article_url),
+            'created_at': str(row[10]) if row[10] else '',
+            'updated_at': str(row[11]) if row[11] else ''
+        }
+    
+    @traced('repository.get_entry')
+    def get_entry(self, article_id: str) -> Optional[Dict[str, Any]]:
+        """
+        按文章ID获取条目及其全部提取链接
+        
+        通过 articles.article_id 唯一索引和 idx_extracted_links_article_id 直接定位，
+        不经过检索条件和总数统计。
+        
+        Args:
+            article_id: 文章ID
             
-            entries = []
-            for row in rows:
-                article_url = row[2]
-                tag_value = self._derive_tag_from_url(article_url)
-                
-                if tag and tag != tag_value:
-                    continue
-                
-                entry = {
-                    'article_id': row[0],
-                    'article_title': row[1],
-                    'article_url': article_url,
-                    'original_link': row[3],
-                    'original_password': row[4] or '',
-                    'new_link': row[5] or '',
-                    'new_password': row[6] or '',
-                    'new_title': row[7] or '',
-                    'status': row[8],
-                    'error_message': row[9] or '',
-                    'tag': tag_value,
-                    'created_at': str(row[10]) if row[10] else '',
-                    'updated_at': str(row[11]) if row[11] else ''
-                }
-                entries.append(entry)
-            
-            filtered_total = len(entries) if tag else total
-            
-            return {
-                'entries': entries,
-                'total': filtered_total,
-                'limit': limit,
-                'offset': offset,
-                'has_more': (offset + len(entries)) < filtered_total
-            }
-            
+        Returns:
+            最新一条链接的条目字典，附带 links（该文章全部链接，按创建时间倒序）；
+            文章不存在或没有提取链接时返回None
+        """
+        p = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+        
+        try:
+            conn = self._get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT 
+                        a.article_id,
+                        a.title AS article_title,
+                        a.url AS article_url,
+                        el.original_link,
+                        el.original_password,
+                        el.new_link,
+                        el.new_password,
+                        el.new_title,
+                        el.status,
+                        el.error_message,
+                        el.created_at,
+                        el.updated_at,
+                        a.tag
+                    FROM articles a
+                    INNER JOIN extracted_links el ON el.article_id = a.article_id
+                    WHERE a.article_id = {p}
+                    ORDER BY el.created_at DESC, el.id DESC
+                """, (article_id,))
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
         except Exception as e:
-            logger.error(f"列出知识库条目失败: {e}")
-            return {
-                'entries': [],
-                'total': 0,
-                'limit': limit,
-                'offset': offset,
-                'has_more': False,
-                'error': str(e)
-            }
+            logger.error(f"获取条目失败: {article_id}, 错误: {e}")
+            return None
+        
+        if not rows:
+            return None
+        
+        links = [self._row_to_entry(row, row[12]) for row in rows]
+        entry = dict(links[0])
+        entry['links'] = links
+        return entry
     
+    @traced('repository.get_distinct_tags')
     def get_distinct_tags(self) -> List[str]:
         """
-        获取所有不重复的标签列表
-        标签从文章URL的第二级路径中提取
+        获取所有不重复的标签列表（仅包含有提取链接的文章）
+        标签读取自带索引的 articles.tag 列
         
         Returns:
             排序后的标签列表
         """
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor()
-            
-            query = """
-                SELECT DISTINCT a.url
-                FROM articles a
-                INNER JOIN extracted_links el ON a.article_id = el.article_id
-            """
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            conn.close()
-            
-            tags = set()
-            for row in rows:
-                url = row[0]
-                tag = self._derive_tag_from_url(url)
-                tags.add(tag)
-            
-            return sorted(list(tags))
-            
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT DISTINCT a.tag
+                    FROM articles a
+                    WHERE a.tag IS NOT NULL
+                      AND EXISTS (SELECT 1 FROM extracted_links el WHERE el.article_id = a.article_id)
+                """)
+                return sorted(row[0] for row in cursor.fetchall())
+            finally:
+                conn.close()
         except Exception as e:
             logger.error(f"获取标签列表失败: {e}")
             return []
     
+    @traced('repository.tag_counts')
+    def tag_counts(self) -> Dict[str, int]:
+        """
+        按标签统计条目数量
+        
+        Returns:
+            标签统计字典，例如 {'technology': 10, '未分类': 3}
+        """
+        try:
+            conn = self._get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute("""
+                    SELECT a.tag, COUNT(*)
+                    FROM extracted_links el
+                    INNER JOIN articles a ON el.article_id = a.article_id
+                    WHERE a.tag IS NOT NULL
+                    GROUP BY a.tag
+                """)
+                return {row[0]: row[1] for row in cursor.fetchall()}
+            finally:
+                conn.close()
+        except Exception as e:
+            logger.error(f"获取标签统计失败: {e}")
+            return {}
+    
+    @traced('repository.summaries_by_status')
     def summaries_by_status(self) -> Dict[str, int]:
         """
         按状态统计条目数量
@@ -328,6 +457,7 @@ class KnowledgeRepository:
             logger.error(f"获取状态统计失败: {e}")
             return {}
     
+    @traced('repository.prepare_export_rows')
     def prepare_export_rows(
         self,
         fields: List[str],
@@ -337,7 +467,7 @@ class KnowledgeRepository:
     ) -> List[Dict[str, Any]]:
         """
         准备导出数据行
-        验证字段名称并返回符合条件的记录
+        验证字段名称并返回符合条件的全部记录（大数据量请使用 iter_export_rows 流式读取）
         
         Args:
             fields: 要导出的字段列表
@@ -348,27 +478,71 @@ class KnowledgeRepository:
         Returns:
             符合条件的记录列表，每条记录只包含指定字段
         """
+        return list(self.iter_export_rows(fields, filters, sort_by, sort_order))
+    
+    def iter_export_rows(
+        self,
+        fields: List[str],
+        filters: Optional[Dict[str, Any]] = None,
+        sort_by: str = 'created_at',
+        sort_order: str = 'DESC',
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        流式读取导出数据行
+        按 (排序值, id) 键集分块查询，每次只在内存中保留一块，导出行数不设上限
+        
+        Args:
+            fields: 要导出的字段列表
+            filters: 过滤条件字典（可选，同list_entries）
+            sort_by: 排序字段
+            sort_order: 排序方向
+            chunk_size: 每块行数，默认使用配置 KNOWLEDGE_EXPORT_CHUNK_SIZE
+            
+        Returns:
+            记录迭代器，每条记录只包含指定字段
+            
+        Raises:
+            ValueError: 存在非法导出字段（调用时立即抛出）
+        """
         invalid_fields = [f for f in fields if f not in self.ALLOWED_EXPORT_FIELDS]
         if invalid_fields:
             raise ValueError(f"非法导出字段: {', '.join(invalid_fields)}")
         
-        filters = filters or {}
-        
-        result = self.list_entries(
-            limit=100000,
-            offset=0,
-            search=filters.get('search'),
-            status=filters.get('status'),
-            tag=filters.get('tag'),
-            date_from=filters.get('date_from'),
-            date_to=filters.get('date_to'),
-            sort_by=sort_by,
-            sort_order=sort_order
+        return self._iter_export_chunks(
+            list(fields), filters or {}, sort_by, sort_order,
+            chunk_size or self.config.KNOWLEDGE_EXPORT_CHUNK_SIZE
         )
-        
-        export_rows = []
-        for entry in result.get('entries', []):
-            row = {field: entry.get(field, '') for field in fields}
-            export_rows.append(row)
-        
-        return export_rows
+    
+    def _iter_export_chunks(
+        self,
+        fields: List[str],
+        filters: Dict[str, Any],
+        sort_by: str,
+        sort_order: str,
+        chunk_size: int
+    ) -> Iterator[Dict[str, Any]]:
+        """iter_export_rows 的生成器实现"""
+        cursor = None
+        while True:
+            page = self.list_entries(
+                limit=chunk_size,
+                search=filters.get('search'),
+                status=filters.get('status'),
+                tag=filters.get('tag'),
+                date_from=filters.get('date_from'),
+                date_to=filters.get('date_to'),
+                sort_by=sort_by,
+                sort_order=sort_order,
+                cursor=cursor,
+                count_mode='none'
+            )
+            if 'error' in page:
+                raise RuntimeError(f"导出查询失败: {page['error']}")
+            
+            for entry in page['entries']:
+                yield {field: entry.get(field, '') for field in fields}
+            
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
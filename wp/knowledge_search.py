@@ -0,0 +1,391 @@
+"""
+知识库全文检索模块
+为文章（文章ID、标题、URL、正文）和提取链接（原始链接、新链接、分享标题）建立全文索引：
+- SQLite：FTS5外部内容表（trigram分词，语义与 LIKE '%词%' 一致，支持中文），由触发器增量同步；
+  索引直接读取 articles.content，启用全文索引时正文不压缩存储
+- MySQL：FULLTEXT索引（ngram解析器），由数据库随写入自动维护
+- PostgreSQL：基于tsvector表达式的GIN索引，由数据库随写入自动维护
+检索时从索引命中结果出发筛选条目，按相关度排序时再连接各索引的命中分数。
+"""
+from typing import List, Optional, Tuple
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# SQLite trigram分词要求检索词至少3个字符，更短的检索词回退到LIKE
+SQLITE_MIN_TERM_LENGTH = 3
+
+# 外部内容表直接引用 articles.content（不另存正文副本），触发器只使用普通SQL；
+# 因此启用全文索引时SQLite正文不压缩存储（见 article_content.resolve_compression）
+_SQLITE_ARTICLE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+        article_id, title, url, content,
+        content='articles', content_rowid='rowid', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_ai AFTER INSERT ON articles BEGIN
+        INSERT INTO articles_fts(rowid, article_id, title, url, content)
+        VALUES (new.rowid, new.article_id, new.title, new.url, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_ad AFTER DELETE ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, article_id, title, url, content)
+        VALUES ('delete', old.rowid, old.article_id, old.title, old.url, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS articles_fts_au AFTER UPDATE OF article_id, title, url, content ON articles BEGIN
+        INSERT INTO articles_fts(articles_fts, rowid, article_id, title, url, content)
+        VALUES ('delete', old.rowid, old.article_id, old.title, old.url, old.content);
+        INSERT INTO articles_fts(rowid, article_id, title, url, content)
+        VALUES (new.rowid, new.article_id, new.title, new.url, new.content);
+    END
+    """,
+]
+
+_SQLITE_LINK_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS extracted_links_fts USING fts5(
+        original_link, new_link, new_title,
+        content='extracted_links', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS extracted_links_fts_ai AFTER INSERT ON extracted_links BEGIN
+        INSERT INTO extracted_links_fts(rowid, original_link, new_link, new_title)
+        VALUES (new.id, new.original_link, new.new_link, new.new_title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS extracted_links_fts_ad AFTER DELETE ON extracted_links BEGIN
+        INSERT INTO extracted_links_fts(extracted_links_fts, rowid, original_link, new_link, new_title)
+        VALUES ('delete', old.id, old.original_link, old.new_link, old.new_title);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS extracted_links_fts_au AFTER UPDATE OF original_link, new_link, new_title ON extracted_links BEGIN
+        INSERT INTO extracted_links_fts(extracted_links_fts, rowid, original_link, new_link, new_title)
+        VALUES ('delete', old.id, old.original_link, old.new_link, old.new_title);
+        INSERT INTO extracted_links_fts(rowid, original_link, new_link, new_title)
+        VALUES (new.id, new.original_link, new.new_link, new.new_title);
+    END
+    """,
+]
+
+_SQLITE_DDL = _SQLITE_ARTICLE_DDL + _SQLITE_LINK_DDL
+
+# articles_fts_source 为旧版本（触发器依赖 article_text() 函数）的外部内容来源视图，移除索引时一并清理
+_SQLITE_ARTICLE_OBJECTS = [
+    ('TRIGGER', 'articles_fts_ai'), ('TRIGGER', 'articles_fts_ad'), ('TRIGGER', 'articles_fts_au'),
+    ('TABLE', 'articles_fts'), ('VIEW', 'articles_fts_source'),
+]
+
+_ARTICLE_COLUMNS = ['article_id', 'title', 'url', 'content']
+_LINK_COLUMNS = ['original_link', 'new_link', 'new_title']
+
+
+def _columns(columns: List[str], alias: str = '') -> str:
+    """列清单（可带表别名前缀）"""
+    prefix = f"{alias}." if alias else ''
+    return ", ".join(f"{prefix}{column}" for column in columns)
+
+
+def _pg_document(columns: List[str], alias: str = '') -> str:
+    """PostgreSQL检索文档表达式（查询与索引必须使用同一表达式）"""
+    prefix = f"{alias}." if alias else ''
+    joined = " || ' ' || ".join(f"coalesce({prefix}{column}, '')" for column in columns)
+    return f"to_tsvector('simple', {joined})"
+
+
+def _search_index_exists(cursor, db_type: str) -> bool:
+    """检查全文索引是否已建立"""
+    if db_type == 'sqlite':
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name IN ('articles_fts', 'extracted_links_fts')"
+        )
+        return cursor.fetchone()[0] == 2
+
+    if db_type == 'mysql':
+        cursor.execute("""
+            SELECT COUNT(DISTINCT INDEX_NAME) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+              AND INDEX_NAME IN ('ft_articles_search', 'ft_extracted_links_search')
+        """)
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM pg_indexes
+            WHERE schemaname = current_schema()
+              AND indexname IN ('idx_articles_search', 'idx_extracted_links_search')
+        """)
+    return cursor.fetchone()[0] == 2
+
+
+def _create_search_index(conn, db_type: str):
+    """建立全文索引并导入已有数据"""
+    cursor = conn.cursor()
+
+    if db_type == 'sqlite':
+        for statement in _SQLITE_DDL:
+            cursor.execute(statement)
+        # 外部内容表从源表重建索引
+        cursor.execute("INSERT INTO articles_fts(articles_fts) VALUES ('rebuild')")
+        cursor.execute("INSERT INTO extracted_links_fts(extracted_links_fts) VALUES ('rebuild')")
+    elif db_type == 'mysql':
+        cursor.execute(
+            f"ALTER TABLE articles ADD FULLTEXT INDEX ft_articles_search "
+            f"({_columns(_ARTICLE_COLUMNS)}) WITH PARSER ngram"
+        )
+        cursor.execute(
+            f"ALTER TABLE extracted_links ADD FULLTEXT INDEX ft_extracted_links_search "
+            f"({_columns(_LINK_COLUMNS)}) WITH PARSER ngram"
+        )
+    else:
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_articles_search ON articles "
+            f"USING GIN (({_pg_document(_ARTICLE_COLUMNS)}))"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_extracted_links_search ON extracted_links "
+            f"USING GIN (({_pg_document(_LINK_COLUMNS)}))"
+        )
+
+    conn.commit()
+
+
+def ensure_search_index(conn, db_type: str) -> bool:
+    """
+    确保全文索引存在（不存在时建立并导入已有数据）
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+
+    Returns:
+        全文索引是否可用；不可用（如SQLite缺少FTS5/trigram支持）时调用方应回退到LIKE检索
+    """
+    try:
+        cursor = conn.cursor()
+        if _search_index_exists(cursor, db_type):
+            return True
+        _create_search_index(conn, db_type)
+        logger.info("知识库全文索引已建立")
+        return True
+    except Exception as e:
+        logger.warning(f"建立全文索引失败，检索将回退到LIKE: {e}")
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        return False
+
+
+def search_index_exists(conn, db_type: str) -> bool:
+    """
+    检查全文索引是否已建立（只读，不建立索引；索引由迁移3建立）
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+
+    Returns:
+        全文索引是否存在，检查失败时返回False
+    """
+    try:
+        return _search_index_exists(conn.cursor(), db_type)
+    except Exception as e:
+        logger.warning(f"检查全文索引失败，检索将回退到LIKE: {e}")
+        return False
+
+
+def migrate_search_index(conn, db_type: str):
+    """
+    迁移：建立知识库全文索引（KNOWLEDGE_FTS_ENABLED 为False时跳过）
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+
+    Raises:
+        RuntimeError: 建立全文索引失败（如SQLite缺少FTS5/trigram支持，可设置 KNOWLEDGE_FTS_ENABLED=False）
+    """
+    if not get_config().KNOWLEDGE_FTS_ENABLED:
+        logger.info("未启用全文索引（KNOWLEDGE_FTS_ENABLED=False），跳过建立")
+        return
+    if not ensure_search_index(conn, db_type):
+        raise RuntimeError("建立全文索引失败，可设置 KNOWLEDGE_FTS_ENABLED=False 使用LIKE检索")
+
+
+def drop_article_search_index(conn) -> bool:
+    """
+    移除SQLite的文章全文索引（表、视图和触发器），用于批量改写文章前暂停增量同步
+
+    Args:
+        conn: SQLite数据库连接
+
+    Returns:
+        移除前文章全文索引是否存在（存在时调用方应在改写后调用 ensure_search_index 重建）
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'articles_fts'")
+    existed = cursor.fetchone()[0] > 0
+    for object_type, name in _SQLITE_ARTICLE_OBJECTS:
+        cursor.execute(f"DROP {object_type} IF EXISTS {name}")
+    conn.commit()
+    return existed
+
+
+def _fts_query(db_type: str, term: str) -> Optional[str]:
+    """把检索词转换为对应数据库的全文检索表达式，不适合全文索引时返回None"""
+    term = term.strip()
+    if not term:
+        return None
+
+    if db_type == 'sqlite':
+        if len(term) < SQLITE_MIN_TERM_LENGTH:
+            return None
+        return '"' + term.replace('"', '""') + '"'
+    if db_type == 'mysql':
+        return '"' + term.replace('"', ' ') + '"'
+    # PostgreSQL：每个词按前缀匹配，词之间为AND
+    return ' & '.join(
+        "'" + word.replace('\\', '\\\\').replace("'", "''") + "':*"
+        for word in term.split()
+    )
+
+
+def fts_search_condition(db_type: str, term: str, placeholder: str) -> Optional[Tuple[str, List[str]]]:
+    """
+    生成基于全文索引的检索条件
+
+    先分别在文章索引和链接索引中检索，再合并为命中的提取链接id集合，
+    查询从索引命中结果出发而不是扫描整个连接结果。要求提取链接表别名为 el。
+
+    Args:
+        db_type: 数据库类型
+        term: 检索词
+        placeholder: 参数占位符（? 或 %s）
+
+    Returns:
+        (WHERE条件, 参数列表)；检索词不适合全文索引时返回None
+    """
+    query = _fts_query(db_type, term)
+    if query is None:
+        return None
+
+    if db_type == 'sqlite':
+        link_hits = f"SELECT rowid FROM extracted_links_fts WHERE extracted_links_fts MATCH {placeholder}"
+        article_hits = f"""
+            SELECT el2.id FROM articles_fts f
+            INNER JOIN articles a2 ON a2.rowid = f.rowid
+            INNER JOIN extracted_links el2 ON el2.article_id = a2.article_id
+            WHERE articles_fts MATCH {placeholder}
+        """
+    elif db_type == 'mysql':
+        link_hits = (
+            f"SELECT id FROM extracted_links "
+            f"WHERE MATCH({_columns(_LINK_COLUMNS)}) AGAINST ({placeholder} IN BOOLEAN MODE)"
+        )
+        article_hits = f"""
+            SELECT el2.id FROM articles a2
+            INNER JOIN extracted_links el2 ON el2.article_id = a2.article_id
+            WHERE MATCH({_columns(_ARTICLE_COLUMNS, 'a2')}) AGAINST ({placeholder} IN BOOLEAN MODE)
+        """
+    else:
+        link_hits = (
+            f"SELECT id FROM extracted_links "
+            f"WHERE {_pg_document(_LINK_COLUMNS)} @@ to_tsquery('simple', {placeholder})"
+        )
+        article_hits = f"""
+            SELECT el2.id FROM articles a2
+            INNER JOIN extracted_links el2 ON el2.article_id = a2.article_id
+            WHERE {_pg_document(_ARTICLE_COLUMNS, 'a2')} @@ to_tsquery('simple', {placeholder})
+        """
+
+    return f"el.id IN ({link_hits} UNION {article_hits})", [query, query]
+
+
+def fts_rank_joins(db_type: str, term: str, placeholder: str) -> Optional[Tuple[str, List[str], str]]:
+    """
+    生成相关度排序所需的连接子句
+
+    文章和链接的索引命中分数以派生表 af、lf 左连接到查询中，
+    要求文章表别名为 a、提取链接表别名为 el。
+
+    Args:
+        db_type: 数据库类型
+        term: 检索词
+        placeholder: 参数占位符
+
+    Returns:
+        (JOIN子句, JOIN参数, 相关度表达式（越大越相关）)；检索词不适合全文索引时返回None
+    """
+    query = _fts_query(db_type, term)
+    if query is None:
+        return None
+
+    if db_type == 'sqlite':
+        joins = f"""
+            LEFT JOIN (
+                SELECT rowid AS rid, -bm25(articles_fts) AS score
+                FROM articles_fts WHERE articles_fts MATCH {placeholder}
+            ) af ON af.rid = a.rowid
+            LEFT JOIN (
+                SELECT rowid AS rid, -bm25(extracted_links_fts) AS score
+                FROM extracted_links_fts WHERE extracted_links_fts MATCH {placeholder}
+            ) lf ON lf.rid = el.id
+        """
+        params = [query, query]
+    elif db_type == 'mysql':
+        article_match = f"MATCH({_columns(_ARTICLE_COLUMNS)}) AGAINST ({placeholder} IN BOOLEAN MODE)"
+        link_match = f"MATCH({_columns(_LINK_COLUMNS)}) AGAINST ({placeholder} IN BOOLEAN MODE)"
+        joins = f"""
+            LEFT JOIN (
+                SELECT id AS rid, {article_match} AS score FROM articles WHERE {article_match}
+            ) af ON af.rid = a.id
+            LEFT JOIN (
+                SELECT id AS rid, {link_match} AS score FROM extracted_links WHERE {link_match}
+            ) lf ON lf.rid = el.id
+        """
+        params = [query] * 4
+    else:
+        article_document = _pg_document(_ARTICLE_COLUMNS)
+        link_document = _pg_document(_LINK_COLUMNS)
+        joins = f"""
+            LEFT JOIN (
+                SELECT id AS rid, ts_rank({article_document}, q) AS score
+                FROM articles, to_tsquery('simple', {placeholder}) q
+                WHERE {article_document} @@ q
+            ) af ON af.rid = a.id
+            LEFT JOIN (
+                SELECT id AS rid, ts_rank({link_document}, q) AS score
+                FROM extracted_links, to_tsquery('simple', {placeholder}) q
+                WHERE {link_document} @@ q
+            ) lf ON lf.rid = el.id
+        """
+        params = [query, query]
+
+    return joins, params, "(COALESCE(af.score, 0) + COALESCE(lf.score, 0))"
+
+
+def like_search_clause(term: str, placeholder: str, db_type: str = '') -> Tuple[str, List[str]]:
+    """
+    生成LIKE检索条件（全文索引不可用或检索词过短时使用）
+
+    Args:
+        term: 检索词
+        placeholder: 参数占位符
+        db_type: 数据库类型（SQLite的正文可能压缩存储，经 article_text() 解压后匹配）
+
+    Returns:
+        (WHERE条件, 参数列表)
+    """
+    content = 'article_text(a.content)' if db_type == 'sqlite' else 'a.content'
+    columns = ['a.title', 'a.article_id', 'a.url', content,
+               'el.original_link', 'el.new_link', 'el.new_title']
+    condition = "(" + " OR ".join(f"{column} LIKE {placeholder}" for column in columns) + ")"
+    return condition, [f"%{term}%"] * len(columns)
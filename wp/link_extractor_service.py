@@ -2,14 +2,24 @@
 百度网盘链接提取和转存服务
 从文章中提取百度网盘分享链接，执行转存和分享操作，并更新数据库
 """
+import json
+import multiprocessing
+import os
 import re
 import time
-import sqlite3
-from typing import List, Dict, Any, Optional, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
+from article_content import decode_content
 from config import get_config, Config
 from logger import get_logger
+from db_pool import get_connection
+from migrations import add_column, backfill_in_batches, create_index
+from pagination import decode_cursor, encode_cursor, keyset_condition
+from knowledge_repository import invalidate_knowledge_cache
 
 logger = get_logger(__name__)
 
@@ -25,13 +35,15 @@ class LinkExtractorService:
         r'https?://pan\.baidu\.com/share/init\?surl=[A-Za-z0-9_-]+',
     ]
     
-    # 提取码正则表达式（支持多种格式）
+    # 提取码正则表达式（按优先级排列）
     PASSWORD_PATTERNS = [
-        r'(?:提取码|密码|pwd|code)[:：\s]*([a-zA-Z0-9]{4})',
         r'(?:提取码|密码|pwd|code)[:：\s]*([a-zA-Z0-9]{4})',
         r'\?pwd=([a-zA-Z0-9]{4})',
     ]
     
+    # 在链接前后多少个字符内查找提取码
+    PASSWORD_WINDOW = 200
+    
     def __init__(self, config: Optional[Config] = None):
         """
         初始化链接提取服务
@@ -42,35 +54,17 @@ class LinkExtractorService:
         self.config = config or get_config()
         
     def _get_db_connection(self):
-        """获取数据库连接"""
-        if self.config.DATABASE_TYPE == 'sqlite':
-            return sqlite3.connect(self.config.DATABASE_PATH)
-        elif self.config.DATABASE_TYPE == 'mysql':
-            import pymysql
-            return pymysql.connect(
-                host=self.config.MYSQL_HOST,
-                port=self.config.MYSQL_PORT,
-                user=self.config.MYSQL_USER,
-                password=self.config.MYSQL_PASSWORD,
-                database=self.config.MYSQL_DATABASE,
-                charset='utf8mb4'
-            )
-        elif self.config.DATABASE_TYPE == 'postgresql':
-            import psycopg2
-            return psycopg2.connect(
-                host=self.config.POSTGRES_HOST,
-                port=self.config.POSTGRES_PORT,
-                user=self.config.POSTGRES_USER,
-                password=self.config.POSTGRES_PASSWORD,
-                database=self.config.POSTGRES_DATABASE
-            )
-        else:
-            raise ValueError(f"不支持的数据库类型: {self.config.DATABASE_TYPE}")
+        """从共享连接池获取数据库连接（close() 归还连接）"""
+        return get_connection(self.config)
     
     def extract_links_from_text(self, text: str) -> List[Dict[str, str]]:
         """
         从文本中提取百度网盘链接和密码
         
+        所有链接格式由一个预编译正则在一次扫描中找出，然后只在每个链接
+        前后 PASSWORD_WINDOW 个字符内查找提取码（优先 提取码/密码 等关键字
+        形式，其次 ?pwd= 参数）。
+        
         Args:
             text: 文本内容
             
@@ -80,43 +74,63 @@ class LinkExtractorService:
         if not text:
             return []
         
+        # 每种链接格式一个列表，元素为 (起始位置, 结束位置, 链接)
+        link_matches = ([], [])
+        link_ends = [0, 0]
+        
+        for match in _LINK_SCANNER.finditer(text):
+            # 扫描从 "://" 开始，这里向前补上 http/https 协议头
+            pos = match.start()
+            if text[max(0, pos - 5):pos].lower() == 'https':
+                start = pos - 5
+            elif text[max(0, pos - 4):pos].lower() == 'http':
+                start = pos - 4
+            else:
+                continue
+            
+            index = 0 if match.lastgroup == 'short' else 1
+            # 与逐个模式 finditer 的结果保持一致：同一格式内的匹配不重叠
+            if start < link_ends[index]:
+                continue
+            link_ends[index] = match.end()
+            link_matches[index].append((start, match.end(), text[start:match.end()]))
+        
         links = []
         found_urls = set()
+        text_length = len(text)
         
-        # 提取所有百度网盘链接
-        for pattern in self.BAIDU_LINK_PATTERNS:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                url = match.group(0)
-                if url not in found_urls:
-                    found_urls.add(url)
-                    
-                    # 尝试在链接附近查找密码
-                    start_pos = max(0, match.start() - 200)
-                    end_pos = min(len(text), match.end() + 200)
-                    context = text[start_pos:end_pos]
-                    
-                    password = self._extract_password(context)
-                    
-                    links.append({
-                        'link': url,
-                        'password': password
-                    })
+        for start, end, url in chain.from_iterable(link_matches):
+            if url in found_urls:
+                continue
+            found_urls.add(url)
+            
+            # 尝试在链接附近查找密码（pos/endpos 限定范围，避免切片复制）
+            window_start = max(0, start - self.PASSWORD_WINDOW)
+            window_end = min(text_length, end + self.PASSWORD_WINDOW)
+            
+            links.append({
+                'link': url,
+                'password': self._extract_password(text, window_start, window_end)
+            })
         
         return links
     
-    def _extract_password(self, text: str) -> str:
+    def _extract_password(self, text: str, start: int = 0, end: Optional[int] = None) -> str:
         """
         从文本中提取密码
         
         Args:
             text: 文本内容
+            start: 查找起始位置
+            end: 查找结束位置（不含），None表示到文本末尾
             
         Returns:
             提取的密码，如果没有则返回空字符串
         """
-        for pattern in self.PASSWORD_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        if end is None:
+            end = len(text)
+        for pattern in _PASSWORD_REGEXES:
+            match = pattern.search(text, start, end)
             if match:
                 return match.group(1)
         return ''
@@ -161,7 +175,7 @@ class LinkExtractorService:
                     'article_id': row[1],
                     'url': row[2],
                     'title': row[3],
-                    'content': row[4],
+                    'content': decode_content(row[4]),
                     'crawled_at': str(row[5]),
                     'updated_at': str(row[6])
                 }
@@ -179,6 +193,273 @@ class LinkExtractorService:
             logger.error(f"获取文章失败: {e}")
             return []
     
+    def iter_article_batches(self, batch_size: int = 500) -> Iterator[List[Tuple[int, str, str]]]:
+        """
+        按主键分批流式读取文章内容（键集分页，不使用OFFSET）
+        
+        Args:
+            batch_size: 每批文章数
+            
+        Yields:
+            [(id, article_id, content), ...]（content为数据库中的存储值，可能是压缩的BLOB）
+        """
+        placeholder = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+        query = f"""
+            SELECT id, article_id, content
+            FROM articles
+            WHERE id > {placeholder}
+            ORDER BY id
+            LIMIT {placeholder}
+        """
+        last_id = 0
+        
+        while True:
+            conn = self._get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(query, (last_id, batch_size))
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+            
+            if not rows:
+                break
+            
+            yield rows
+            
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+    
+    def extract_all_links_parallel(self, batch_size: Optional[int] = None,
+                                   max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        并行提取全部文章中的链接并批量保存
+        
+        主进程分批读取文章，交给进程池做正则提取，再把每批结果批量写入数据库。
+        同时在途的批次数有上限，内存占用与文章总数无关。
+        
+        进程池使用 spawn 方式启动子进程，不会 fork 调用方（例如多线程的服务进程）的锁和连接。
+        全量提取耗时与语料规模成正比，只通过命令行运行：python link_extractor_service.py
+        
+        Args:
+            batch_size: 每批文章数，默认 LINK_EXTRACT_BATCH_SIZE
+            max_workers: 进程数，默认 LINK_EXTRACT_WORKERS（0表示CPU核心数），不超过CPU核心数
+            
+        Returns:
+            提取结果统计
+            
+        Raises:
+            ValueError: batch_size 或 max_workers 小于1
+        """
+        if batch_size is None:
+            batch_size = self.config.LINK_EXTRACT_BATCH_SIZE
+        if batch_size < 1:
+            raise ValueError(f"batch_size 必须大于0: {batch_size}")
+        cpu_count = os.cpu_count() or 1
+        if max_workers is None:
+            max_workers = self.config.LINK_EXTRACT_WORKERS or cpu_count
+        if max_workers < 1:
+            raise ValueError(f"max_workers 必须大于0: {max_workers}")
+        max_workers = min(max_workers, cpu_count)
+        
+        started = time.time()
+        total_articles = 0
+        total_links = 0
+        saved_links = 0
+        
+        def consume(rows, result):
+            nonlocal total_articles, total_links, saved_links
+            article_count, links = result
+            total_articles += article_count
+            total_links += len(links)
+            saved = 0
+            if links:
+                # 重新提取不覆盖已处理链接的状态和转存结果
+                saved = self.save_extracted_links(links, keep_existing=True)
+                saved_links += saved
+            if saved or not links:
+                self.mark_links_extracted(rows)
+        
+        if max_workers <= 1:
+            for rows in self.iter_article_batches(batch_size):
+                consume(rows, _extract_links_batch([(row[1], row[2]) for row in rows]))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                pending = deque()
+                for rows in self.iter_article_batches(batch_size):
+                    future = executor.submit(_extract_links_batch, [(row[1], row[2]) for row in rows])
+                    pending.append((rows, future))
+                    # 限制在途批次数，避免一次性把整个语料读入内存
+                    if len(pending) >= max_workers * 2:
+                        done_rows, done = pending.popleft()
+                        consume(done_rows, done.result())
+                while pending:
+                    done_rows, done = pending.popleft()
+                    consume(done_rows, done.result())
+        
+        elapsed = time.time() - started
+        result = {
+            'success': True,
+            'total_articles': total_articles,
+            'total_links': total_links,
+            'saved_links': saved_links,
+            'workers': max_workers,
+            'elapsed_sec': round(elapsed, 3),
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        logger.info(f"并行提取完成: {result}")
+        return result
+    
+    def iter_unextracted_article_batches(self, batch_size: int = 500) -> Iterator[List[Tuple[int, str, Any]]]:
+        """
+        按主键分批读取尚未提取链接的文章（links_extracted_at 为空）
+        
+        Args:
+            batch_size: 每批文章数
+            
+        Yields:
+            [(id, article_id, content), ...]（content为数据库中的存储值）
+        """
+        p = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+        last_id = 0
+        
+        while True:
+            conn = self._get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT id, article_id, content
+                    FROM articles
+                    WHERE links_extracted_at IS NULL AND id > {p}
+                    ORDER BY id
+                    LIMIT {p}
+                """, (last_id, batch_size))
+                rows = cursor.fetchall()
+            finally:
+                conn.close()
+            
+            if not rows:
+                break
+            
+            yield rows
+            
+            if len(rows) < batch_size:
+                break
+            last_id = rows[-1][0]
+    
+    def mark_links_extracted(self, rows: List[Tuple[int, str, Any]]) -> int:
+        """
+        标记文章已提取链接
+        
+        只标记正文与读取时一致的文章：提取期间被爬虫更新的文章保持未标记，下次增量提取重新处理。
+        
+        Args:
+            rows: [(id, article_id, content), ...]，content为读取时的存储值
+            
+        Returns:
+            标记的文章数
+        """
+        if not rows:
+            return 0
+        
+        p = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+        if self.config.DATABASE_TYPE == 'sqlite':
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            now = datetime.now()
+        
+        try:
+            conn = self._get_db_connection()
+            cursor = conn.cursor()
+            cursor.executemany(
+                f"UPDATE articles SET links_extracted_at = {p} WHERE id = {p} AND content = {p}",
+                [(now, row[0], row[2]) for row in rows]
+            )
+            conn.commit()
+            marked = cursor.rowcount
+            conn.close()
+            return marked
+            
+        except Exception as e:
+            logger.error(f"标记文章已提取失败: {e}")
+            return 0
+    
+    def reset_extraction_marks(self) -> bool:
+        """
+        清除全部文章的已提取标记（下次增量提取将重新处理全部文章）
+        
+        Returns:
+            是否成功
+        """
+        try:
+            conn = self._get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("UPDATE articles SET links_extracted_at = NULL WHERE links_extracted_at IS NOT NULL")
+            conn.commit()
+            conn.close()
+            logger.info("已清除文章的链接提取标记")
+            return True
+            
+        except Exception as e:
+            logger.error(f"清除链接提取标记失败: {e}")
+            return False
+    
+    def extract_new_links(self, limit: Optional[int] = None,
+                          batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        增量提取：只处理新增或更新后尚未提取链接的文章
+        
+        爬虫保存文章时清空 links_extracted_at，每批链接保存成功后再标记该批文章，
+        中断后可从断点继续。新链接以 pending 状态写入，已存在的链接保持原状态不变。
+        
+        Args:
+            limit: 本次最多处理的文章数，None表示处理全部新文章
+            batch_size: 每批文章数，默认 LINK_EXTRACT_BATCH_SIZE
+            
+        Returns:
+            提取结果统计
+        """
+        batch_size = batch_size or self.config.LINK_EXTRACT_BATCH_SIZE
+        if limit:
+            batch_size = min(batch_size, limit)
+        
+        total_articles = 0
+        total_links = 0
+        saved_links = 0
+        
+        for rows in self.iter_unextracted_article_batches(batch_size):
+            if limit:
+                rows = rows[:limit - total_articles]
+            
+            article_count, links = _extract_links_batch([(row[1], row[2]) for row in rows])
+            if links:
+                saved = self.save_extracted_links(links, keep_existing=True)
+                if not saved:
+                    # 保存失败时不标记，下次重新处理这一批
+                    break
+                saved_links += saved
+            
+            self.mark_links_extracted(rows)
+            total_articles += article_count
+            total_links += len(links)
+            
+            if limit and total_articles >= limit:
+                break
+        
+        result = {
+            'success': True,
+            'total_articles': total_articles,
+            'total_links': total_links,
+            'saved_links': saved_links,
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        
+        logger.info(f"增量提取完成: {result}")
+        return result
+    
     def save_extracted_link(self, article_id: str, original_link: str, original_password: str,
                            new_link: str = '', new_password: str = '', new_title: str = '',
                            status: str = 'pending', error_message: str = '') -> bool:
@@ -198,47 +479,125 @@ class LinkExtractorService:
         Returns:
             是否成功
         """
+        saved = self.save_extracted_links([{
+            'article_id': article_id,
+            'original_link': original_link,
+            'original_password': original_password,
+            'new_link': new_link,
+            'new_password': new_password,
+            'new_title': new_title,
+            'status': status,
+            'error_message': error_message
+        }])
+        if saved:
+            logger.info(f"保存提取链接成功: {article_id} - {original_link}")
+        return saved > 0
+    
+    def save_extracted_links(self, links: List[Dict[str, Any]], keep_existing: bool = False) -> int:
+        """
+        批量保存提取的链接（单个事务，多行upsert）
+        
+        (article_id, original_link) 已存在时更新其余字段，保留原有的 id 和 created_at。
+        
+        Args:
+            links: 链接列表，每项包含 article_id、original_link、original_password，
+                   可选 new_link、new_password、new_title、status、error_message
+            keep_existing: 为True时已存在的链接保持不变，只插入新链接
+            
+        Returns:
+            成功写入的条数，失败返回0
+        """
+        if not links:
+            return 0
+        
+        db_type = self.config.DATABASE_TYPE
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S') if db_type == 'sqlite' else datetime.now()
+        rows = [
+            (link['article_id'], link['original_link'], link.get('original_password', ''),
+             link.get('new_link', ''), link.get('new_password', ''), link.get('new_title', ''),
+             link.get('status', 'pending'), link.get('error_message', ''), now, now)
+            for link in links
+        ]
+        columns = """
+            (article_id, original_link, original_password, new_link, new_password,
+             new_title, status, error_message, created_at, updated_at)
+        """
+        
         try:
             conn = self._get_db_connection()
             cursor = conn.cursor()
             
-            if self.config.DATABASE_TYPE == 'sqlite':
-                cursor.execute("""
-                    INSERT OR REPLACE INTO extracted_links
-                    (article_id, original_link, original_password, new_link, new_password, 
-                     new_title, status, error_message, created_at, updated_at)
+            if keep_existing:
+                if db_type == 'mysql':
+                    cursor.executemany(f"""
+                        INSERT IGNORE INTO extracted_links {columns}
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, rows)
+                elif db_type == 'postgresql':
+                    from psycopg2.extras import execute_values
+                    execute_values(cursor, f"""
+                        INSERT INTO extracted_links {columns}
+                        VALUES %s
+                        ON CONFLICT (article_id, original_link) DO NOTHING
+                    """, rows, page_size=1000)
+                else:
+                    cursor.executemany(f"""
+                        INSERT INTO extracted_links {columns}
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(article_id, original_link) DO NOTHING
+                    """, rows)
+            elif db_type == 'sqlite':
+                cursor.executemany(f"""
+                    INSERT INTO extracted_links {columns}
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (article_id, original_link, original_password, new_link, new_password,
-                      new_title, status, error_message,
-                      datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                      datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+                    ON CONFLICT(article_id, original_link) DO UPDATE SET
+                    original_password = excluded.original_password,
+                    new_link = excluded.new_link,
+                    new_password = excluded.new_password,
+                    new_title = excluded.new_title,
+                    status = excluded.status,
+                    error_message = excluded.error_message,
+                    updated_at = excluded.updated_at
+                """, rows)
+            elif db_type == 'postgresql':
+                from psycopg2.extras import execute_values
+                execute_values(cursor, f"""
+                    INSERT INTO extracted_links {columns}
+                    VALUES %s
+                    ON CONFLICT (article_id, original_link) DO UPDATE SET
+                    original_password = EXCLUDED.original_password,
+                    new_link = EXCLUDED.new_link,
+                    new_password = EXCLUDED.new_password,
+                    new_title = EXCLUDED.new_title,
+                    status = EXCLUDED.status,
+                    error_message = EXCLUDED.error_message,
+                    updated_at = EXCLUDED.updated_at
+                """, rows, page_size=1000)
             else:
-                cursor.execute("""
-                    INSERT INTO extracted_links
-                    (article_id, original_link, original_password, new_link, new_password,
-                     new_title, status, error_message, created_at, updated_at)
+                # pymysql 会把 executemany 改写为多行 INSERT
+                cursor.executemany(f"""
+                    INSERT INTO extracted_links {columns}
                     VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                     ON DUPLICATE KEY UPDATE
+                    original_password = VALUES(original_password),
                     new_link = VALUES(new_link),
                     new_password = VALUES(new_password),
                     new_title = VALUES(new_title),
                     status = VALUES(status),
                     error_message = VALUES(error_message),
                     updated_at = VALUES(updated_at)
-                """, (article_id, original_link, original_password, new_link, new_password,
-                      new_title, status, error_message,
-                      datetime.now(),
-                      datetime.now()))
+                """, rows)
             
             conn.commit()
             conn.close()
+            invalidate_knowledge_cache()
             
-            logger.info(f"保存提取链接成功: {article_id} - {original_link}")
-            return True
+            logger.debug(f"批量保存提取链接成功: {len(rows)} 条")
+            return len(rows)
             
         except Exception as e:
-            logger.error(f"保存提取链接失败: {e}")
-            return False
+            logger.error(f"批量保存提取链接失败: {e}")
+            return 0
     
     def get_extracted_links(self, article_id: str = None, status: str = None,
                            limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
@@ -254,48 +613,70 @@ class LinkExtractorService:
         Returns:
             链接列表
         """
+        return self.get_extracted_links_page(article_id, status, limit, offset)['links']
+    
+    def get_extracted_links_page(self, article_id: str = None, status: str = None,
+                                 limit: int = 100, offset: int = 0,
+                                 cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        分页获取提取的链接列表（按 created_at, id 倒序）
+        
+        Args:
+            article_id: 筛选指定文章ID（可选）
+            status: 筛选指定状态（可选）
+            limit: 返回数量限制
+            offset: 偏移量（传入cursor时忽略）
+            cursor: 上一页返回的 next_cursor
+            
+        Returns:
+            {'links': [...], 'has_more': bool, 'next_cursor': str或None}
+            
+        Raises:
+            ValueError: 游标无效
+        """
+        after = decode_cursor(cursor, 'created_at', 'DESC') if cursor else None
+        
         try:
             conn = self._get_db_connection()
-            cursor = conn.cursor()
+            db_cursor = conn.cursor()
             
+            placeholder = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
             conditions = []
             params = []
             
             if article_id:
-                conditions.append("article_id = " + ("?" if self.config.DATABASE_TYPE == 'sqlite' else "%s"))
+                conditions.append(f"article_id = {placeholder}")
                 params.append(article_id)
             
             if status:
-                conditions.append("status = " + ("?" if self.config.DATABASE_TYPE == 'sqlite' else "%s"))
+                conditions.append(f"status = {placeholder}")
                 params.append(status)
             
+            if after:
+                condition, condition_params = keyset_condition('created_at', 'id', 'DESC', placeholder, *after)
+                conditions.append(condition)
+                params.extend(condition_params)
+            
             where_clause = " WHERE " + " AND ".join(conditions) if conditions else ""
             
-            params.extend([limit, offset])
+            params.extend([limit + 1, 0 if after else offset])
             
-            if self.config.DATABASE_TYPE == 'sqlite':
-                query = f"""
-                    SELECT id, article_id, original_link, original_password, new_link,
-                           new_password, new_title, status, error_message, created_at, updated_at
-                    FROM extracted_links
-                    {where_clause}
-                    ORDER BY created_at DESC
-                    LIMIT ? OFFSET ?
-                """
-            else:
-                query = f"""
-                    SELECT id, article_id, original_link, original_password, new_link,
-                           new_password, new_title, status, error_message, created_at, updated_at
-                    FROM extracted_links
-                    {where_clause}
-                    ORDER BY created_at DESC
-                    LIMIT %s OFFSET %s
-                """
+            query = f"""
+                SELECT id, article_id, original_link, original_password, new_link,
+                       new_password, new_title, status, error_message, created_at, updated_at
+                FROM extracted_links
+                {where_clause}
+                ORDER BY created_at DESC, id DESC
+                LIMIT {placeholder} OFFSET {placeholder}
+            """
             
-            cursor.execute(query, params)
-            rows = cursor.fetchall()
+            db_cursor.execute(query, params)
+            rows = db_cursor.fetchall()
             conn.close()
             
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+            
             links = []
             for row in rows:
                 links.append({
@@ -312,11 +693,15 @@ class LinkExtractorService:
                     'updated_at': str(row[10])
                 })
             
-            return links
+            return {
+                'links': links,
+                'has_more': has_more,
+                'next_cursor': encode_cursor('created_at', 'DESC', rows[-1][9], rows[-1][0]) if has_more else None
+            }
             
         except Exception as e:
             logger.error(f"获取提取链接列表失败: {e}")
-            return []
+            return {'links': [], 'has_more': False, 'next_cursor': None}
     
     def update_extracted_link_status(self, article_id: str, original_link: str,
                                     new_link: str = '', new_password: str = '',
@@ -337,38 +722,65 @@ class LinkExtractorService:
         Returns:
             是否成功
         """
+        updated = self.update_extracted_link_statuses([{
+            'article_id': article_id,
+            'original_link': original_link,
+            'new_link': new_link,
+            'new_password': new_password,
+            'new_title': new_title,
+            'status': status,
+            'error_message': error_message
+        }])
+        if updated is None:
+            return False
+        logger.info(f"更新提取链接状态成功: {article_id} - {original_link} - {status}")
+        return True
+    
+    def update_extracted_link_statuses(self, updates: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        批量更新提取链接的状态（单个事务，不修改 created_at）
+        
+        Args:
+            updates: 更新列表，每项包含 article_id、original_link，
+                     可选 new_link、new_password、new_title、status、error_message
+            
+        Returns:
+            更新的条数，失败返回None
+        """
+        if not updates:
+            return 0
+        
+        placeholder = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S') if self.config.DATABASE_TYPE == 'sqlite' else datetime.now()
+        rows = [
+            (update.get('new_link', ''), update.get('new_password', ''), update.get('new_title', ''),
+             update.get('status', 'completed'), update.get('error_message', ''), now,
+             update['article_id'], update['original_link'])
+            for update in updates
+        ]
+        
         try:
             conn = self._get_db_connection()
             cursor = conn.cursor()
             
-            if self.config.DATABASE_TYPE == 'sqlite':
-                cursor.execute("""
-                    UPDATE extracted_links
-                    SET new_link = ?, new_password = ?, new_title = ?,
-                        status = ?, error_message = ?, updated_at = ?
-                    WHERE article_id = ? AND original_link = ?
-                """, (new_link, new_password, new_title, status, error_message,
-                      datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                      article_id, original_link))
-            else:
-                cursor.execute("""
-                    UPDATE extracted_links
-                    SET new_link = %s, new_password = %s, new_title = %s,
-                        status = %s, error_message = %s, updated_at = %s
-                    WHERE article_id = %s AND original_link = %s
-                """, (new_link, new_password, new_title, status, error_message,
-                      datetime.now(),
-                      article_id, original_link))
+            cursor.executemany(f"""
+                UPDATE extracted_links
+                SET new_link = {placeholder}, new_password = {placeholder}, new_title = {placeholder},
+                    status = {placeholder}, error_message = {placeholder}, updated_at = {placeholder}
+                WHERE article_id = {placeholder} AND original_link = {placeholder}
+            """, rows)
+            updated = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else len(rows)
             
             conn.commit()
             conn.close()
+            invalidate_knowledge_cache()
             
-            logger.info(f"更新提取链接状态成功: {article_id} - {original_link} - {status}")
-            return True
+            logger.debug(f"批量更新提取链接状态成功: {updated} 条")
+            return updated
             
         except Exception as e:
             logger.error(f"更新提取链接状态失败: {e}")
-            return False
+            return None
     
     def get_statistics(self) -> Dict[str, Any]:
         """
@@ -417,3 +829,95 @@ class LinkExtractorService:
                 'failed': 0,
                 'error': str(e)
             }
+
+
+
+# 旧版本在 system_config 中保存增量提取水位线的键
+_LEGACY_WATERMARK_KEY = 'link_extraction_watermark'
+
+
+def migrate_links_extracted_at(conn, db_type: str):
+    """
+    迁移：为 articles 表添加 links_extracted_at 列和索引
+    
+    旧版本按 (updated_at, id) 水位线做增量提取；水位线之前的文章回填为已提取，
+    随后删除水位线，避免升级后重新提取全部文章。
+    
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+    """
+    add_column(conn, db_type, 'articles', 'links_extracted_at', 'TIMESTAMP')
+    create_index(conn, db_type, 'idx_articles_links_extracted_at', 'articles', 'links_extracted_at, id')
+    
+    key_column = '`key`' if db_type == 'mysql' else 'key'
+    p = '?' if db_type == 'sqlite' else '%s'
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT value FROM system_config WHERE {key_column} = {p}", (_LEGACY_WATERMARK_KEY,))
+    row = cursor.fetchone()
+    if not row:
+        return
+    
+    watermark = json.loads(row[0])
+    position = (watermark['updated_at'], int(watermark['id']))
+    backfill_in_batches(
+        conn, db_type, 'articles', ('updated_at', 'id'), ('links_extracted_at',),
+        lambda values: (values[0] if (str(values[0]), values[1]) <= position else None,),
+        where='links_extracted_at IS NULL'
+    )
+    cursor.execute(f"DELETE FROM system_config WHERE {key_column} = {p}", (_LEGACY_WATERMARK_KEY,))
+    conn.commit()
+    logger.info(f"已按旧水位线 {watermark} 回填 links_extracted_at")
+
+
+def _extract_links_batch(batch: List[Tuple[str, str]]) -> Tuple[int, List[Dict[str, str]]]:
+    """
+    提取一批文章中的链接（进程池工作函数，需位于模块顶层以便序列化）
+    
+    Args:
+        batch: [(article_id, content), ...]，content为存储值，在工作进程中解压
+        
+    Returns:
+        (文章数, 待保存的链接列表)
+    """
+    extractor = LinkExtractorService()
+    links = []
+    for article_id, content in batch:
+        for link in extractor.extract_links_from_text(decode_content(content)):
+            links.append({
+                'article_id': article_id,
+                'original_link': link['link'],
+                'original_password': link['password'],
+                'status': 'pending'
+            })
+    return len(batch), links
+
+# 预编译正则（模块加载时编译一次）
+# _LINK_SCANNER 与 BAIDU_LINK_PATTERNS 等价：一次扫描同时匹配两种链接格式。
+# 以不区分大小写的字面量 "://" 开头，使正则引擎可以先快速定位候选位置，
+# 协议头 http/https 在 extract_links_from_text 中补全。
+_LINK_SCANNER = re.compile(
+    r'://pan\.baidu\.com/(?:(?P<short>s/)|(?P<init>share/init\?surl=))[A-Za-z0-9_-]+',
+    re.IGNORECASE
+)
+_PASSWORD_REGEXES = [re.compile(p, re.IGNORECASE) for p in LinkExtractorService.PASSWORD_PATTERNS]
+
+
+if __name__ == '__main__':
+    """命令行入口：并行全量提取全部文章中的链接"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='并行提取全部文章中的百度网盘链接')
+    parser.add_argument('--batch-size', type=int, default=None,
+                        help='每批文章数（默认 LINK_EXTRACT_BATCH_SIZE）')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='进程数（默认 LINK_EXTRACT_WORKERS，不超过CPU核心数）')
+    args = parser.parse_args()
+    
+    try:
+        result = LinkExtractorService().extract_all_links_parallel(
+            batch_size=args.batch_size, max_workers=args.workers
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
@@ -17,6 +17,9 @@ logger = get_logger(__name__)
 class LinkProcessorService:
     """百度网盘链接处理服务 - 协调提取、转存、分享流程"""
     
+    # 等待队列执行完成时的轮询间隔（秒）
+    poll_interval_sec = 2
+    
     def __init__(self, account_name: str, core_service: CoreService, config: Optional[Config] = None):
         """
         初始化链接处理服务
@@ -31,39 +34,45 @@ class LinkProcessorService:
         self.config = config or get_config()
         self.extractor = LinkExtractorService(config)
         
-    def extract_and_save_links(self, limit: int = 100, offset: int = 0) -> Dict[str, Any]:
+    def extract_and_save_links(self, limit: int = 100, offset: int = 0,
+                               incremental: bool = False) -> Dict[str, Any]:
         """
         从文章中提取链接并保存到数据库
         
         Args:
             limit: 处理文章数量限制
-            offset: 偏移量
+            offset: 偏移量（增量模式不支持）
+            incremental: 是否只处理尚未提取链接的新增或更新文章
             
         Returns:
             提取结果统计
+            
+        Raises:
+            ValueError: 增量模式下指定了offset
         """
+        if incremental:
+            if offset:
+                raise ValueError("增量提取只处理未提取的文章，不支持offset")
+            logger.info(f"开始增量提取文章中的百度网盘链接 (limit={limit})")
+            return self.extractor.extract_new_links(limit=limit)
+        
         logger.info(f"开始提取文章中的百度网盘链接 (limit={limit}, offset={offset})")
         
         articles = self.extractor.get_articles_with_links(limit, offset)
         
         total_articles = len(articles)
-        total_links = 0
-        saved_links = 0
-        
-        for article in articles:
-            article_id = article['article_id']
-            links = article.get('extracted_links', [])
-            
-            for link_data in links:
-                total_links += 1
-                success = self.extractor.save_extracted_link(
-                    article_id=article_id,
-                    original_link=link_data['link'],
-                    original_password=link_data['password'],
-                    status='pending'
-                )
-                if success:
-                    saved_links += 1
+        links = [
+            {
+                'article_id': article['article_id'],
+                'original_link': link_data['link'],
+                'original_password': link_data['password'],
+                'status': 'pending'
+            }
+            for article in articles
+            for link_data in article.get('extracted_links', [])
+        ]
+        total_links = len(links)
+        saved_links = self.extractor.save_extracted_links(links, keep_existing=True)
         
         result = {
             'success': True,
@@ -98,14 +107,18 @@ class LinkProcessorService:
                 'processed': 0
             }
         
+        # 批量标记为处理中
+        self.extractor.update_extracted_link_statuses([
+            {
+                'article_id': link['article_id'],
+                'original_link': link['original_link'],
+                'status': 'processing'
+            }
+            for link in pending_links
+        ])
+        
         # 添加转存任务到队列
         for link in pending_links:
-            self.extractor.update_extracted_link_status(
-                article_id=link['article_id'],
-                original_link=link['original_link'],
-                status='processing'
-            )
-            
             csv_data = [{
                 '标题': link['article_id'],
                 '链接': link['original_link'],
@@ -127,16 +140,13 @@ class LinkProcessorService:
         
         # 等待转存完成
         logger.info("等待转存任务完成...")
-        while True:
-            status = self.core_service.get_transfer_status()
-            if not status['is_running']:
-                break
-            time.sleep(2)
+        status = self._wait_for_queue(self.core_service.get_transfer_status, self.core_service.stop_transfer)
         
         logger.info(f"转存完成: {status}")
         
         # 更新链接状态
         transfer_status = self.core_service.get_transfer_status()
+        updates = []
         for i, task in enumerate(transfer_status['tasks']):
             if i >= len(pending_links):
                 break
@@ -144,18 +154,20 @@ class LinkProcessorService:
             link = pending_links[i]
             
             if task['status'] == 'completed':
-                self.extractor.update_extracted_link_status(
-                    article_id=link['article_id'],
-                    original_link=link['original_link'],
-                    status='transferred'
-                )
+                updates.append({
+                    'article_id': link['article_id'],
+                    'original_link': link['original_link'],
+                    'status': 'transferred'
+                })
             elif task['status'] in ['failed', 'skipped']:
-                self.extractor.update_extracted_link_status(
-                    article_id=link['article_id'],
-                    original_link=link['original_link'],
-                    status='failed',
-                    error_message=task.get('error_message', '')
-                )
+                updates.append({
+                    'article_id': link['article_id'],
+                    'original_link': link['original_link'],
+                    'status': 'failed',
+                    'error_message': task.get('error_message', '')
+                })
+        
+        self.extractor.update_extracted_link_statuses(updates)
         
         return {
             'success': True,
@@ -166,6 +178,27 @@ class LinkProcessorService:
             'transfer_status': transfer_status
         }
     
+    def _wait_for_queue(self, get_status, stop) -> Dict[str, Any]:
+        """
+        等待队列中没有待处理和执行中的任务，然后停止工作线程
+        
+        工作线程在队列为空时不会自行退出，只等待线程结束会一直阻塞
+        
+        Args:
+            get_status: 获取队列状态的方法
+            stop: 停止工作线程的方法
+            
+        Returns:
+            最后一次获取的队列状态
+        """
+        while True:
+            status = get_status()
+            if not status['is_running'] or status['pending'] + status['running'] == 0:
+                break
+            time.sleep(self.poll_interval_sec)
+        stop()
+        return status
+    
     def share_transferred_links(self, expiry: int = 7, password: str = None) -> Dict[str, Any]:
         """
         为已转存的文件创建分享链接
@@ -211,34 +244,32 @@ class LinkProcessorService:
         
         # 等待分享完成
         logger.info("等待分享任务完成...")
-        while True:
-            status = self.core_service.get_share_status()
-            if not status['is_running']:
-                break
-            time.sleep(2)
+        status = self._wait_for_queue(self.core_service.get_share_status, self.core_service.stop_share)
         
         logger.info(f"分享完成: {status}")
         
         # 更新链接状态 - 将分享结果关联到提取的链接
         share_status = self.core_service.get_share_status()
+        links_by_article = {}
+        for link in transferred_links:
+            links_by_article.setdefault(link['article_id'], link)
+        
+        updates = []
         for task in share_status['tasks']:
             if task['status'] == 'completed':
-                title = task.get('title', '')
-                new_link = task.get('share_link', '')
-                new_password = task.get('share_password', '')
-                
                 # 通过title（即article_id）找到对应的提取链接
-                for link in transferred_links:
-                    if link['article_id'] == title:
-                        self.extractor.update_extracted_link_status(
-                            article_id=link['article_id'],
-                            original_link=link['original_link'],
-                            new_link=new_link,
-                            new_password=new_password,
-                            new_title=task['file_info'].get('name', ''),
-                            status='completed'
-                        )
-                        break
+                link = links_by_article.get(task.get('title', ''))
+                if link:
+                    updates.append({
+                        'article_id': link['article_id'],
+                        'original_link': link['original_link'],
+                        'new_link': task.get('share_link', ''),
+                        'new_password': task.get('share_password', ''),
+                        'new_title': task['file_info'].get('name', ''),
+                        'status': 'completed'
+                    })
+        
+        self.extractor.update_extracted_link_statuses(updates)
         
         return {
             'success': True,
@@ -263,8 +294,8 @@ class LinkProcessorService:
         """
         logger.info("开始完整处理流程：提取 → 转存 → 分享")
         
-        # 步骤1：提取链接
-        extract_result = self.extract_and_save_links(limit=limit)
+        # 步骤1：提取链接（只处理新增或更新的文章）
+        extract_result = self.extract_and_save_links(limit=limit, incremental=True)
         
         # 步骤2：转存
         transfer_result = self.process_pending_links(limit=limit, target_path=target_path)
@@ -1,38 +1,191 @@
 """
 日志系统模块
 提供统一的日志记录接口，支持文件日志和控制台日志
+
+- 所有日志记录器共享同一组输出处理器（控制台、按大小轮转的文件）
+- 默认异步输出：记录器只把日志放入内存队列（QueueHandler），由后台线程（QueueListener）
+  格式化并写入，工作线程不再等待磁盘和终端；队列满时丢弃新日志而不阻塞
+- 可选 JSON 格式（每行一个 JSON 对象，extra 字段一并输出）
+- LogSampler 供逐任务日志采样：大批量导入/执行时只输出前 N 条和之后每 M 条
 """
+import atexit
+import json
 import os
 import logging
 import logging.handlers
-from typing import Optional
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from config import Config
 
+# LogRecord 自带的属性，JSON 输出时其余属性视为 extra 字段
+_RECORD_ATTRS = frozenset(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON 格式化器：每条日志输出为一行 JSON"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    非阻塞队列处理器
+    
+    与标准 QueueHandler 不同，入队时只做 %-格式化（参数可能在入队后被调用方修改），
+    时间戳、格式模板和异常堆栈仍由后台线程格式化；队列满时丢弃日志并计数，而不是阻塞或抛出异常
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LogSampler:
+    """
+    日志采样器：按键（如消息模板）限制输出频率
+    
+    每个时间窗口内每个键先输出前 burst 条，之后每 every 条输出 1 条，
+    被省略的条数在下一条输出时返回，由调用方附加到消息中
+    """
+    
+    def __init__(self, burst: int = 100, every: int = 100, window_sec: float = 60):
+        """
+        初始化采样器
+        
+        Args:
+            burst: 每个窗口内完整输出的条数（<=0 表示不采样）
+            every: 超过 burst 后每多少条输出 1 条（<=0 表示超过后不再输出）
+            window_sec: 计数窗口（秒）
+        """
+        self.burst = burst
+        self.every = every
+        self.window_sec = window_sec
+        # 键 -> [窗口开始时间, 窗口内条数, 待报告的省略条数]
+        self._state: Dict[str, List] = {}
+        self._lock = threading.Lock()
+    
+    def allow(self, key: str) -> Tuple[bool, int]:
+        """
+        判断一条日志是否输出
+        
+        Returns:
+            (是否输出, 此前被省略的条数)
+        """
+        if self.burst <= 0:
+            return True, 0
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.get(key)
+            if state is None or now - state[0] >= self.window_sec:
+                suppressed = state[2] if state else 0
+                state = self._state[key] = [now, 0, suppressed]
+            state[1] += 1
+            count = state[1]
+            if count <= self.burst or (self.every > 0 and (count - self.burst) % self.every == 0):
+                suppressed, state[2] = state[2], 0
+                return True, suppressed
+            state[2] += 1
+            return False, 0
+
 
 class Logger:
     """日志管理器"""
     
     _loggers = {}
     _initialized = False
+    _handlers: List[logging.Handler] = []
+    _listener: Optional[logging.handlers.QueueListener] = None
+    _lock = threading.Lock()
     
     @classmethod
     def initialize(cls, config: Config):
         """
-        初始化日志系统
+        初始化日志系统（创建共享的输出处理器，异步模式下启动后台写入线程）
         
         Args:
             config: 配置对象
         """
-        if cls._initialized:
-            return
-        
-        # 确保日志目录存在
-        if config.LOG_FILE_ENABLED:
-            log_dir = os.path.dirname(config.LOG_FILE_PATH)
-            if log_dir and not os.path.exists(log_dir):
-                os.makedirs(log_dir, exist_ok=True)
-        
-        cls._initialized = True
+        with cls._lock:
+            if cls._initialized:
+                return
+            
+            # 确保日志目录存在
+            if config.LOG_FILE_ENABLED:
+                log_dir = os.path.dirname(config.LOG_FILE_PATH)
+                if log_dir and not os.path.exists(log_dir):
+                    os.makedirs(log_dir, exist_ok=True)
+            
+            level = getattr(logging, config.LOG_LEVEL.upper())
+            if config.LOG_JSON:
+                formatter = JsonFormatter()
+            else:
+                formatter = logging.Formatter(config.LOG_FORMAT)
+            
+            # 控制台处理器
+            sinks = [logging.StreamHandler()]
+            
+            # 文件处理器（如果启用）：所有记录器共用一个，避免多个处理器同时轮转同一文件
+            if config.LOG_FILE_ENABLED:
+                sinks.append(logging.handlers.RotatingFileHandler(
+                    config.LOG_FILE_PATH,
+                    maxBytes=config.LOG_MAX_BYTES,
+                    backupCount=config.LOG_BACKUP_COUNT,
+                    encoding='utf-8'
+                ))
+            
+            for handler in sinks:
+                handler.setFormatter(formatter)
+                handler.setLevel(level)
+            
+            if config.LOG_ASYNC:
+                log_queue = queue.Queue(maxsize=max(0, config.LOG_QUEUE_SIZE))
+                cls._listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+                cls._listener.start()
+                atexit.register(cls.shutdown)
+                cls._handlers = [NonBlockingQueueHandler(log_queue)]
+            else:
+                cls._handlers = sinks
+            
+            cls._initialized = True
+    
+    @classmethod
+    def shutdown(cls):
+        """停止后台写入线程（写完队列中剩余的日志）"""
+        listener, cls._listener = cls._listener, None
+        if listener:
+            listener.stop()
+    
+    @classmethod
+    def dropped(cls) -> int:
+        """异步模式下因队列满被丢弃的日志条数"""
+        return sum(getattr(handler, 'dropped', 0) for handler in cls._handlers)
     
     @classmethod
     def get_logger(cls, name: str, config: Optional[Config] = None) -> logging.Logger:
@@ -62,29 +215,10 @@ class Logger:
         logger.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
         logger.propagate = False
         
-        # 清除已有的处理器
+        # 清除已有的处理器，挂上共享处理器
         logger.handlers.clear()
-        
-        # 创建格式化器
-        formatter = logging.Formatter(config.LOG_FORMAT)
-        
-        # 添加控制台处理器
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        console_handler.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
-        logger.addHandler(console_handler)
-        
-        # 添加文件处理器（如果启用）
-        if config.LOG_FILE_ENABLED:
-            file_handler = logging.handlers.RotatingFileHandler(
-                config.LOG_FILE_PATH,
-                maxBytes=config.LOG_MAX_BYTES,
-                backupCount=config.LOG_BACKUP_COUNT,
-                encoding='utf-8'
-            )
-            file_handler.setFormatter(formatter)
-            file_handler.setLevel(getattr(logging, config.LOG_LEVEL.upper()))
-            logger.addHandler(file_handler)
+        for handler in cls._handlers:
+            logger.addHandler(handler)
         
         cls._loggers[name] = logger
         return logger
@@ -0,0 +1,303 @@
+"""
+性能指标模块
+以 Prometheus 文本格式（text/plain; version=0.0.4）输出计数器、直方图和仪表盘，
+由 /metrics 接口暴露。ENABLE_PERFORMANCE_MONITORING 关闭时所有记录操作为空操作。
+
+采集的指标：
+- 百度网盘接口：按接口和错误码计数，按接口统计耗时
+- 节流器：按原因累计休眠时间
+- 队列：各账户各状态的任务数（抓取时实时统计）
+- 任务：从开始执行到完成/失败/退回的耗时
+- HTTP：按路由、方法和状态码统计请求耗时
+- 数据库：按语句类型统计执行耗时
+
+指标保存在进程内存中；gunicorn 多进程部署时每个进程分别统计，抓取到的是处理该请求的进程的数据。
+"""
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from config import get_config
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# 默认耗时分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """格式化标签：{a="1",b="2"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    """格式化样本值（整数不带小数点）"""
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """带标签的指标基类"""
+
+    kind = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """单调递增的计数器"""
+
+    kind = 'counter'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        """增加计数"""
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        """读取计数（测试和调试用）"""
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """分桶直方图（输出 _bucket/_sum/_count）"""
+
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各分桶计数..., 总和, 总数]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """记录一次观测值"""
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """统计代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        """读取观测次数（测试和调试用）"""
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            return int(series[-1]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {int(cumulative)}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {int(series[-1])}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {int(series[-1])}")
+        return lines
+
+
+class GaugeCollector(_Metric):
+    """抓取时通过回调实时计算的仪表盘"""
+
+    kind = 'gauge'
+
+    def __init__(self, *args, collect: Callable[[], Iterable[Tuple[LabelValues, float]]], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for key, value in self.collect():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标重复注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """注册计数器"""
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """注册直方图"""
+        return self._register(Histogram(self, name, documentation, labelnames, buckets=buckets))
+
+    def gauge_collector(self, name: str, documentation: str, labelnames: Sequence[str],
+                        collect: Callable[[], Iterable[Tuple[LabelValues, float]]]) -> GaugeCollector:
+        """注册抓取时计算的仪表盘（同名重复注册时替换回调）"""
+        with self._lock:
+            self._metrics.pop(name, None)
+        return self._register(GaugeCollector(self, name, documentation, labelnames, collect=collect))
+
+    def render(self) -> str:
+        """输出 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry(enabled=get_config().ENABLE_PERFORMANCE_MONITORING)
+
+PAN_API_REQUESTS = registry.counter(
+    'pan_api_requests_total', '百度网盘接口调用次数（按接口和错误码）', ('endpoint', 'errno'))
+PAN_API_DURATION = registry.histogram(
+    'pan_api_request_duration_seconds', '百度网盘接口调用耗时（含重试）', ('endpoint',))
+THROTTLE_SLEEP = registry.counter(
+    'throttler_sleep_seconds_total', '节流器累计休眠时间（按原因）', ('reason',))
+TASK_DURATION = registry.histogram(
+    'task_duration_seconds', '转存/分享任务从开始执行到结束的耗时', ('queue', 'outcome'),
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+HTTP_REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'HTTP请求处理耗时', ('method', 'endpoint', 'status'))
+DB_QUERY_DURATION = registry.histogram(
+    'db_query_duration_seconds', '数据库语句执行耗时', ('operation',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0))
+
+# 数据库语句类型（其他语句归为 OTHER，避免标签基数膨胀）
+_SQL_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH', 'CREATE', 'DROP', 'ALTER'})
+
+
+def sql_operation(sql: str) -> str:
+    """语句类型标签（SELECT/INSERT/...）"""
+    word = sql.lstrip().split(None, 1)[0].upper() if sql and sql.strip() else ''
+    return word if word in _SQL_OPERATIONS else 'OTHER'
+
+
+def timed_pan_call(endpoint: str):
+    """
+    装饰器：统计百度网盘接口调用次数和耗时
+
+    返回整数视为错误码，其他返回值视为成功（errno=0），抛出异常时 errno=exception
+
+    Args:
+        endpoint: 接口标签（如 share_set、list）
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            errno = 'exception'
+            try:
+                result = func(*args, **kwargs)
+                errno = result if isinstance(result, int) and not isinstance(result, bool) else 0
+                return result
+            finally:
+                PAN_API_DURATION.observe(time.perf_counter() - start, endpoint=endpoint)
+                PAN_API_REQUESTS.inc(endpoint=endpoint, errno=errno)
+        return wrapper
+    return decorator
+
+
+class TimedCursor:
+    """统计 execute/executemany 耗时的游标代理"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, *args, **kwargs):
+        with DB_QUERY_DURATION.time(operation=sql_operation(sql)):
+            return self._cursor.execute(sql, *args, **kwargs)
+
+    def executemany(self, sql, *args, **kwargs):
+        with DB_QUERY_DURATION.time(operation=sql_operation(sql)):
+            return self._cursor.executemany(sql, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+        return False
+
+
+def timed_cursor(cursor):
+    """启用性能监控时返回统计耗时的游标代理，否则原样返回"""
+    return TimedCursor(cursor) if registry.enabled else cursor
@@ -0,0 +1,394 @@
+"""
+版本化数据库迁移
+每个迁移有递增的版本号，已执行的版本记录在 schema_migrations 表中，启动时只执行尚未执行的迁移。
+提供按后端区分的在线DDL辅助函数（建索引、加列）和分批回填工具，
+使大表变更不会长时间持有写锁。
+"""
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 默认每批回填的行数
+DEFAULT_BACKFILL_BATCH_SIZE = 1000
+
+# 迁移锁等待时间（秒）
+MIGRATION_LOCK_TIMEOUT_SEC = 300
+
+_LOCK_NAME = 'schema_migrations'
+
+_VERSION_TABLE_DDL = {
+    'sqlite': """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INTEGER
+        )
+    """,
+    'mysql': """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INT
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """,
+    'postgresql': """
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            duration_ms INTEGER
+        )
+    """,
+}
+
+
+class Migration:
+    """
+    一个版本化迁移
+
+    scripts 为按数据库类型区分的SQL语句列表，upgrade 为需要逻辑处理的迁移函数
+    （签名 upgrade(conn, db_type)），两者都提供时先执行 scripts。
+    迁移应当可重复执行（例如使用 IF NOT EXISTS），以便接管没有版本记录的旧数据库。
+    """
+
+    def __init__(self, version: int, name: str,
+                 scripts: Optional[Dict[str, Sequence[str]]] = None,
+                 upgrade: Optional[Callable[[Any, str], Any]] = None):
+        self.version = version
+        self.name = name
+        self.scripts = scripts or {}
+        self.upgrade = upgrade
+
+    def apply(self, conn, db_type: str):
+        """执行迁移"""
+        cursor = conn.cursor()
+        for statement in self.scripts.get(db_type, ()):
+            cursor.execute(statement)
+        conn.commit()
+
+        if self.upgrade:
+            self.upgrade(conn, db_type)
+            conn.commit()
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version}, {self.name!r})"
+
+
+def _placeholder(db_type: str) -> str:
+    return '?' if db_type == 'sqlite' else '%s'
+
+
+def _acquire_lock(cursor, db_type: str):
+    """获取跨进程迁移锁（多个服务进程同时启动时只有一个执行迁移）"""
+    if db_type == 'mysql':
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NAME, MIGRATION_LOCK_TIMEOUT_SEC))
+        if cursor.fetchone()[0] != 1:
+            raise RuntimeError("等待数据库迁移锁超时")
+    elif db_type == 'postgresql':
+        cursor.execute("SELECT pg_advisory_lock(%s)", (zlib.crc32(_LOCK_NAME.encode()),))
+
+
+def _release_lock(cursor, db_type: str):
+    if db_type == 'mysql':
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NAME,))
+    elif db_type == 'postgresql':
+        cursor.execute("SELECT pg_advisory_unlock(%s)", (zlib.crc32(_LOCK_NAME.encode()),))
+
+
+def applied_versions(conn, db_type: str) -> Dict[int, str]:
+    """
+    获取已执行的迁移
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+
+    Returns:
+        {版本号: 迁移名称}
+    """
+    cursor = conn.cursor()
+    cursor.execute(_VERSION_TABLE_DDL[db_type])
+    conn.commit()
+    cursor.execute("SELECT version, name FROM schema_migrations ORDER BY version")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+
+def run_migrations(conn, db_type: str, migrations: List[Migration],
+                   target: Optional[int] = None) -> List[int]:
+    """
+    按版本顺序执行尚未执行的迁移
+
+    每个迁移执行成功后立即记录版本号，中途失败时已完成的迁移不会重复执行。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+        migrations: 迁移列表
+        target: 只迁移到该版本（None表示最新）
+
+    Returns:
+        本次执行的版本号列表
+
+    Raises:
+        ValueError: 迁移版本号重复
+        Exception: 迁移执行失败
+    """
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("迁移版本号重复")
+
+    cursor = conn.cursor()
+    p = _placeholder(db_type)
+    executed = []
+
+    _acquire_lock(cursor, db_type)
+    try:
+        done = applied_versions(conn, db_type)
+
+        for migration in sorted(migrations, key=lambda m: m.version):
+            if migration.version in done:
+                continue
+            if target is not None and migration.version > target:
+                break
+
+            logger.info(f"执行数据库迁移 {migration.version}: {migration.name}")
+            started = time.perf_counter()
+            try:
+                migration.apply(conn, db_type)
+            except Exception:
+                conn.rollback()
+                logger.error(f"数据库迁移失败 {migration.version}: {migration.name}")
+                raise
+
+            duration_ms = int((time.perf_counter() - started) * 1000)
+            cursor.execute(
+                f"INSERT INTO schema_migrations (version, name, duration_ms) VALUES ({p}, {p}, {p})",
+                (migration.version, migration.name, duration_ms)
+            )
+            conn.commit()
+            executed.append(migration.version)
+    finally:
+        _release_lock(cursor, db_type)
+
+    if executed:
+        logger.info(f"数据库迁移完成，当前版本: {executed[-1]}")
+    return executed
+
+
+def index_exists(cursor, db_type: str, table: str, index_name: str) -> bool:
+    """
+    检查索引是否存在（MySQL不支持 CREATE INDEX IF NOT EXISTS）
+
+    Args:
+        cursor: 数据库游标
+        db_type: 数据库类型
+        table: 表名
+        index_name: 索引名
+
+    Returns:
+        是否存在
+    """
+    if db_type == 'sqlite':
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name = ?",
+            (table, index_name)
+        )
+    elif db_type == 'mysql':
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        """, (table, index_name))
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM pg_indexes
+            WHERE schemaname = current_schema() AND tablename = %s AND indexname = %s
+        """, (table, index_name))
+    return cursor.fetchone()[0] > 0
+
+
+def _drop_invalid_postgresql_index(conn, index_name: str):
+    """CREATE INDEX CONCURRENTLY 中断后会留下无效索引，重建前先删除"""
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT i.indisvalid FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = %s
+    """, (index_name,))
+    row = cursor.fetchone()
+    if row is not None and not row[0]:
+        logger.warning(f"删除未建完的索引: {index_name}")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+def create_index(conn, db_type: str, index_name: str, table: str, columns: str,
+                 unique: bool = False) -> bool:
+    """
+    在线建立索引（已存在时跳过）
+
+    MySQL使用 ALGORITHM=INPLACE, LOCK=NONE；PostgreSQL使用 CREATE INDEX CONCURRENTLY
+    （需要在事务外执行，会临时切换到自动提交）。建索引期间不阻塞写入。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+        index_name: 索引名
+        table: 表名
+        columns: 列定义，如 "status, created_at"
+        unique: 是否唯一索引
+
+    Returns:
+        本次是否新建了索引
+    """
+    unique_sql = 'UNIQUE ' if unique else ''
+
+    if db_type == 'postgresql':
+        conn.commit()
+        conn.autocommit = True
+        try:
+            _drop_invalid_postgresql_index(conn, index_name)
+            cursor = conn.cursor()
+            if index_exists(cursor, db_type, table, index_name):
+                return False
+            cursor.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY {index_name} ON {table}({columns})")
+        finally:
+            conn.autocommit = False
+        return True
+
+    cursor = conn.cursor()
+    if index_exists(cursor, db_type, table, index_name):
+        return False
+
+    sql = f"CREATE {unique_sql}INDEX {index_name} ON {table}({columns})"
+    if db_type == 'mysql':
+        sql += " ALGORITHM=INPLACE LOCK=NONE"
+    cursor.execute(sql)
+    conn.commit()
+    return True
+
+
+def column_exists(cursor, db_type: str, table: str, column: str) -> bool:
+    """检查列是否存在"""
+    if db_type == 'sqlite':
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+
+    if db_type == 'mysql':
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+        """, (table, column))
+    else:
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = %s AND column_name = %s
+        """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+
+def add_column(conn, db_type: str, table: str, column: str, definition: str) -> bool:
+    """
+    添加可为空的列（已存在时跳过）
+
+    SQLite和PostgreSQL添加无默认值的列只修改元数据；MySQL 8优先使用 ALGORITHM=INSTANT，
+    不支持时回退为 INPLACE。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+        table: 表名
+        column: 列名
+        definition: 列类型定义，如 "TEXT"
+
+    Returns:
+        本次是否新增了列
+    """
+    cursor = conn.cursor()
+    if column_exists(cursor, db_type, table, column):
+        return False
+
+    sql = f"ALTER TABLE {table} ADD COLUMN {column} {definition}"
+    if db_type == 'mysql':
+        try:
+            cursor.execute(f"{sql}, ALGORITHM=INSTANT")
+        except Exception:
+            cursor.execute(f"{sql}, ALGORITHM=INPLACE, LOCK=NONE")
+    else:
+        cursor.execute(sql)
+    conn.commit()
+    logger.info(f"{table} 表已添加 {column} 列")
+    return True
+
+
+def backfill_in_batches(conn, db_type: str, table: str, columns: Sequence[str],
+                        set_columns: Sequence[str],
+                        compute: Callable[[Tuple], Tuple],
+                        where: str = '', key_column: str = 'id',
+                        batch_size: int = DEFAULT_BACKFILL_BATCH_SIZE,
+                        pause_sec: float = 0.0) -> int:
+    """
+    按主键分批回填数据
+
+    按 key_column 键集分页读取，每批单独提交，写锁只在一批更新期间持有；
+    pause_sec 大于0时每批之间让出时间给在线写入。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型
+        table: 表名
+        columns: 读取的列（不含主键）
+        set_columns: 要更新的列
+        compute: 根据读取的列值计算更新值的函数，返回与 set_columns 对应的元组
+        where: 额外的过滤条件（如 "content_preview IS NULL"）
+        key_column: 主键列
+        batch_size: 每批行数
+        pause_sec: 每批之间的等待时间（秒）
+
+    Returns:
+        回填的行数
+    """
+    p = _placeholder(db_type)
+    cursor = conn.cursor()
+    select_columns = ', '.join([key_column] + list(columns))
+    assignments = ', '.join(f"{column} = {p}" for column in set_columns)
+    extra = f" AND ({where})" if where else ''
+
+    last_key = None
+    updated = 0
+
+    while True:
+        if last_key is None:
+            cursor.execute(
+                f"SELECT {select_columns} FROM {table} WHERE 1 = 1{extra} "
+                f"ORDER BY {key_column} LIMIT {p}",
+                (batch_size,)
+            )
+        else:
+            cursor.execute(
+                f"SELECT {select_columns} FROM {table} WHERE {key_column} > {p}{extra} "
+                f"ORDER BY {key_column} LIMIT {p}",
+                (last_key, batch_size)
+            )
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        cursor.executemany(
+            f"UPDATE {table} SET {assignments} WHERE {key_column} = {p}",
+            [tuple(compute(tuple(row[1:]))) + (row[0],) for row in rows]
+        )
+        conn.commit()
+
+        updated += len(rows)
+        last_key = rows[-1][0]
+
+        if len(rows) < batch_size:
+            break
+        if pause_sec:
+            time.sleep(pause_sec)
+
+    return updated
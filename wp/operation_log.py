@@ -0,0 +1,263 @@
+"""
+任务操作日志模块
+把每个任务的状态变化（账户、操作、结果、错误码、耗时）写入 operation_logs 表，
+作为可查询的持久化性能历史：
+- 工作线程只把记录放入内存缓冲，由后台线程按批量（或间隔）在一个事务中写入多行
+- 缓冲已满时丢弃新记录并计数，数据库变慢不会拖慢任务执行
+- 按账户查询吞吐量和错误率时间序列（按 created_ts 整数时间戳分桶，各数据库通用）
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from db_pool import get_connection
+from logger import get_logger
+from migrations import add_column, create_index
+
+logger = get_logger(__name__)
+
+# 任务结果（completed/failed/skipped 为任务结束，requeued 为登录失效退回待处理）
+OUTCOMES = ('completed', 'failed', 'skipped', 'requeued')
+
+# details 字段最长字符数
+MAX_DETAILS_LENGTH = 500
+
+# 时间序列分桶范围（秒）与最多桶数
+MIN_BUCKET_SEC = 60
+MAX_BUCKET_SEC = 86400
+MAX_BUCKETS = 2000
+
+
+def migrate_operation_logs(conn, db_type: str):
+    """
+    迁移：为 operation_logs 表添加 errno、latency_ms、created_ts 列和时间序列查询的索引
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+    """
+    add_column(conn, db_type, 'operation_logs', 'errno', 'INTEGER')
+    add_column(conn, db_type, 'operation_logs', 'latency_ms', 'INTEGER')
+    add_column(conn, db_type, 'operation_logs', 'created_ts', 'INTEGER' if db_type == 'sqlite' else 'BIGINT')
+    create_index(conn, db_type, 'idx_operation_logs_account_ts', 'operation_logs', 'account, created_ts')
+    create_index(conn, db_type, 'idx_operation_logs_ts', 'operation_logs', 'created_ts')
+
+
+class OperationLogWriter:
+    """缓冲批量写入 operation_logs 的后台写入器"""
+
+    def __init__(self, config: Config, batch_size: int = 200, flush_interval_sec: float = 2,
+                 max_buffer: int = 10000):
+        """
+        初始化写入器（首次记录时启动后台线程）
+
+        Args:
+            config: 配置对象（决定写入的数据库）
+            batch_size: 缓冲达到该条数时立即写入
+            flush_interval_sec: 最长写入间隔（秒）
+            max_buffer: 缓冲上限，超过后丢弃新记录
+        """
+        self.config = config
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_sec = flush_interval_sec
+        self.max_buffer = max_buffer
+        self.written = 0
+        self.dropped = 0
+        self._buffer: deque = deque()
+        self._lock = threading.Lock()
+        # 同一时间只有一个线程写数据库，保证按记录顺序写入
+        self._write_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def record(self, account: str, operation: str, status: str, errno: Optional[int] = None,
+               latency_ms: Optional[int] = None, details: str = ''):
+        """
+        记录一次任务状态变化（不阻塞，只放入缓冲）
+
+        Args:
+            account: 账户名
+            operation: 操作（transfer/share）
+            status: 结果（completed/failed/skipped/requeued）
+            errno: 百度网盘错误码（成功为0，异常为None）
+            latency_ms: 任务从开始执行到结束的耗时（毫秒）
+            details: 链接、路径或错误信息
+        """
+        now = time.time()
+        row = (account, operation, (details or '')[:MAX_DETAILS_LENGTH], status, errno, latency_ms,
+               int(now), datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'))
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return
+            self._buffer.append(row)
+            pending = len(self._buffer)
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name='operation-log-writer', daemon=True)
+                self._thread.start()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def _drain(self) -> List[Tuple]:
+        with self._lock:
+            rows = list(self._buffer)
+            self._buffer.clear()
+        return rows
+
+    def flush(self) -> int:
+        """
+        立即写入缓冲中的全部记录
+
+        Returns:
+            写入的条数
+        """
+        with self._write_lock:
+            rows = self._drain()
+            if not rows:
+                return 0
+            conn = None
+            try:
+                conn = get_connection(self.config)
+                placeholder = '?' if self.config.DATABASE_TYPE == 'sqlite' else '%s'
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "INSERT INTO operation_logs "
+                    "(account, operation, details, status, errno, latency_ms, created_ts, created_at) "
+                    f"VALUES ({', '.join([placeholder] * 8)})",
+                    rows
+                )
+                conn.commit()
+                self.written += len(rows)
+                return len(rows)
+            except Exception as e:
+                # 写入失败的批次直接丢弃，避免缓冲无限增长
+                self.dropped += len(rows)
+                logger.error(f"写入操作日志失败（丢弃 {len(rows)} 条）: {e}")
+                if conn is not None:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                return 0
+            finally:
+                if conn is not None:
+                    conn.close()
+
+    def _run(self):
+        """后台写入循环"""
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval_sec)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self, timeout: float = 5):
+        """停止后台线程并写入剩余记录"""
+        self._stop.set()
+        self._wakeup.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self.flush()
+
+    def get_status(self) -> Dict[str, int]:
+        """写入器状态"""
+        with self._lock:
+            buffered = len(self._buffer)
+        return {'buffered': buffered, 'written': self.written, 'dropped': self.dropped}
+
+
+def _bucket_expression(db_type: str, bucket_sec: int) -> str:
+    """created_ts 按 bucket_sec 向下取整的表达式（bucket_sec 已校验为整数）"""
+    if db_type == 'mysql':
+        return f"(created_ts DIV {bucket_sec}) * {bucket_sec}"
+    return f"(created_ts / {bucket_sec}) * {bucket_sec}"
+
+
+def query_timeseries(config: Config, since_ts: int, until_ts: int, bucket_sec: int = 300,
+                     account: Optional[str] = None, operation: Optional[str] = None) -> Dict[str, Any]:
+    """
+    按账户查询吞吐量和错误率时间序列
+
+    Args:
+        config: 配置对象
+        since_ts: 开始时间（Unix时间戳，包含）
+        until_ts: 结束时间（Unix时间戳，不包含）
+        bucket_sec: 分桶宽度（秒）
+        account: 只查询该账户
+        operation: 只查询该操作（transfer/share）
+
+    Returns:
+        {'bucket_sec', 'since', 'until', 'series': {账户: [每个有记录的桶]}}；每个桶包含
+        ts、time、各结果条数、finished（结束的任务数）、throughput_per_min（每分钟完成数）、
+        error_rate（失败和跳过占结束任务的比例）、avg_latency_ms
+
+    Raises:
+        ValueError: 参数超出范围
+    """
+    bucket_sec = int(bucket_sec)
+    if not MIN_BUCKET_SEC <= bucket_sec <= MAX_BUCKET_SEC:
+        raise ValueError(f"bucket_sec 必须在 {MIN_BUCKET_SEC}~{MAX_BUCKET_SEC} 之间")
+    if until_ts <= since_ts:
+        raise ValueError("结束时间必须晚于开始时间")
+    if (until_ts - since_ts) / bucket_sec > MAX_BUCKETS:
+        raise ValueError(f"时间范围过大：最多 {MAX_BUCKETS} 个分桶，请增大 bucket_sec")
+
+    placeholder = '?' if config.DATABASE_TYPE == 'sqlite' else '%s'
+    conditions = [f"created_ts >= {placeholder}", f"created_ts < {placeholder}"]
+    params: List[Any] = [int(since_ts), int(until_ts)]
+    if account:
+        conditions.append(f"account = {placeholder}")
+        params.append(account)
+    if operation:
+        conditions.append(f"operation = {placeholder}")
+        params.append(operation)
+
+    bucket = _bucket_expression(config.DATABASE_TYPE, bucket_sec)
+    conn = get_connection(config)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT account, {bucket} AS bucket, status, COUNT(*), SUM(latency_ms), COUNT(latency_ms)
+            FROM operation_logs
+            WHERE {' AND '.join(conditions)}
+            GROUP BY account, {bucket}, status
+            ORDER BY account, bucket
+        """, params)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    # 汇总为 {账户: {桶: 计数}}
+    buckets: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for row_account, row_bucket, status, count, latency_sum, latency_count in rows:
+        point = buckets.setdefault(row_account, {}).setdefault(int(row_bucket), {
+            **{outcome: 0 for outcome in OUTCOMES}, '_latency_sum': 0, '_latency_count': 0
+        })
+        point[status] = point.get(status, 0) + count
+        point['_latency_sum'] += latency_sum or 0
+        point['_latency_count'] += latency_count or 0
+
+    series = {}
+    for row_account, points in buckets.items():
+        series[row_account] = []
+        for ts in sorted(points):
+            point = points[ts]
+            latency_sum = point.pop('_latency_sum')
+            latency_count = point.pop('_latency_count')
+            errors = point['failed'] + point['skipped']
+            finished = point['completed'] + errors
+            series[row_account].append({
+                'ts': ts,
+                'time': datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S'),
+                **point,
+                'finished': finished,
+                'throughput_per_min': round(point['completed'] * 60 / bucket_sec, 3),
+                'error_rate': round(errors / finished, 4) if finished else 0.0,
+                'avg_latency_ms': round(latency_sum / latency_count, 1) if latency_count else None
+            })
+
+    return {'bucket_sec': bucket_sec, 'since': int(since_ts), 'until': int(until_ts), 'series': series}
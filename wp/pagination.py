@@ -0,0 +1,134 @@
+"""
+键集（游标）分页工具
+用 (排序值, id) 作为位置标记代替 OFFSET，翻页耗时与页码无关；
+同时提供带过期时间的总数缓存，避免每次翻页都执行 COUNT(*)
+"""
+import base64
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def encode_cursor(sort_by: str, sort_order: str, sort_value: Any, row_id: Any) -> str:
+    """
+    将分页位置编码为不透明游标
+
+    Args:
+        sort_by: 排序字段
+        sort_order: 排序方向（ASC/DESC）
+        sort_value: 当前页最后一行的排序值
+        row_id: 当前页最后一行的id
+
+    Returns:
+        URL安全的游标字符串
+    """
+    if sort_value is not None and not isinstance(sort_value, (str, int, float)):
+        sort_value = str(sort_value)
+    payload = json.dumps([sort_by, sort_order.upper(), sort_value, row_id],
+                         ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, Any]:
+    """
+    解析游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        sort_by: 当前请求的排序字段（必须与生成游标时一致）
+        sort_order: 当前请求的排序方向
+
+    Returns:
+        (sort_value, row_id)
+
+    Raises:
+        ValueError: 游标无效或与排序方式不匹配
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, sort_value, row_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+        )
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+    if cursor_sort_by != sort_by or cursor_order != sort_order.upper():
+        raise ValueError("分页游标与排序方式不匹配")
+
+    return sort_value, row_id
+
+
+def keyset_condition(sort_column: str, id_column: str, sort_order: str,
+                     placeholder: str, sort_value: Any, row_id: Any) -> Tuple[str, List[Any]]:
+    """
+    生成"位于游标之后"的WHERE条件
+
+    Args:
+        sort_column: 排序列（SQL表达式，需与ORDER BY一致）
+        id_column: 作为并列排序依据的唯一id列
+        sort_order: 排序方向（ASC/DESC）
+        placeholder: 参数占位符（? 或 %s）
+        sort_value: 游标中的排序值
+        row_id: 游标中的id
+
+    Returns:
+        (SQL条件, 参数列表)
+    """
+    op = '<' if sort_order.upper() == 'DESC' else '>'
+    condition = (
+        f"({sort_column} {op} {placeholder} OR "
+        f"({sort_column} = {placeholder} AND {id_column} {op} {placeholder}))"
+    )
+    return condition, [sort_value, sort_value, row_id]
+
+
+class CountCache:
+    """
+    总数缓存
+
+    同样的过滤条件在TTL内只统计一次，适合无限滚动这类只需要近似总数的场景。
+    """
+
+    def __init__(self, ttl_sec: float = 30, max_entries: int = 256):
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], int]) -> int:
+        """
+        返回缓存的总数，过期或不存在时调用 compute 重新统计
+
+        Args:
+            key: 缓存键（通常由数据库标识和过滤条件组成）
+            compute: 统计函数
+
+        Returns:
+            总数
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        value = compute()
+
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 先清理过期项，仍然过多时整体清空
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl_sec, value)
+        return value
+
+    def invalidate(self):
+        """清空缓存（数据写入后调用）"""
+        with self._lock:
+            self._entries.clear()
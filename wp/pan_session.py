@@ -0,0 +1,178 @@
+"""
+百度网盘会话管理
+bdstoken 只在登录时获取一次，Cookie 或令牌失效后操作会持续返回 -6/-4，
+任务被逐个标记为失败。会话管理器负责：
+- 后台定期重新获取 bdstoken（校验 Cookie 并刷新令牌）
+- 工作线程遇到 -6/-4 时重新认证，认证期间暂停该账户的工作线程，任务退回待处理而不计为失败
+- 重新认证失败时保持暂停，后台按间隔重试，恢复后工作线程自动继续
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# 表示登录状态失效的错误码
+AUTH_ERRNOS = frozenset({-6, -4})
+
+# 会话状态
+SESSION_READY = 'ready'
+SESSION_REFRESHING = 'refreshing'
+SESSION_EXPIRED = 'expired'
+
+
+def is_auth_error(errno: Any) -> bool:
+    """错误码是否表示登录状态失效"""
+    return isinstance(errno, int) and errno in AUTH_ERRNOS
+
+
+class PanSession:
+    """单个账户的会话：bdstoken 刷新和工作线程暂停闸门"""
+
+    def __init__(self, adapter, refresh_interval_sec: float = 1800, retry_sec: float = 60,
+                 log_callback: Optional[Callable] = None):
+        """
+        初始化会话
+
+        Args:
+            adapter: 已登录的 BaiduPanAdapter
+            refresh_interval_sec: 后台主动刷新 bdstoken 的间隔（秒），0表示只在失效时刷新
+            retry_sec: 会话失效后后台重新认证的间隔（秒）
+            log_callback: 日志回调
+        """
+        self.adapter = adapter
+        self.refresh_interval_sec = refresh_interval_sec
+        self.retry_sec = retry_sec
+        self.log_callback = log_callback
+
+        self.state = SESSION_READY
+        self.last_error: Optional[int] = None
+        self.refresh_count = 0
+        self.token_refreshed_at = time.monotonic()
+        self.last_refresh: Optional[str] = None
+
+        # 闸门：会话可用时置位，工作线程取任务前等待
+        self._ready = threading.Event()
+        self._ready.set()
+        # 同一时间只有一次刷新
+        self._refresh_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def log(self, message: str):
+        """日志输出"""
+        if self.log_callback:
+            self.log_callback(message)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待会话可用（工作线程取任务前调用）
+
+        Returns:
+            会话可用返回True；超时（刷新中或已失效）返回False
+        """
+        return self._ready.wait(timeout)
+
+    def recover(self, errno: int, stale_token: str) -> bool:
+        """
+        操作返回 -6/-4 后重新认证（期间暂停工作线程）
+
+        Args:
+            errno: 操作返回的错误码
+            stale_token: 发起该操作时使用的 bdstoken
+
+        Returns:
+            会话已恢复返回True；仍然失效返回False（工作线程保持暂停，后台继续重试）
+        """
+        if not is_auth_error(errno):
+            return False
+        return self._refresh(f"操作返回错误码 {errno}", pause=True, stale_token=stale_token)
+
+    def refresh(self) -> bool:
+        """
+        主动刷新 bdstoken（不暂停工作线程，只有确认失效时才暂停）
+
+        Returns:
+            刷新成功返回True
+        """
+        return self._refresh("定期刷新", pause=False)
+
+    def _refresh(self, reason: str, pause: bool, stale_token: Optional[str] = None) -> bool:
+        """重新获取 bdstoken 并更新会话状态"""
+        with self._refresh_lock:
+            if (stale_token is not None and self.state == SESSION_READY
+                    and self.adapter.bdstoken != stale_token):
+                # 等锁期间其他工作线程已完成刷新
+                return True
+
+            if pause:
+                self._ready.clear()
+                self.state = SESSION_REFRESHING
+                self.log(f"🔑 会话重新认证（{reason}），暂停工作线程")
+
+            result = self.adapter.refresh_bdstoken()
+            if isinstance(result, str) and result:
+                was_paused = not self._ready.is_set()
+                self.state = SESSION_READY
+                self.last_error = None
+                self.refresh_count += 1
+                self.token_refreshed_at = time.monotonic()
+                self.last_refresh = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self._ready.set()
+                if was_paused:
+                    self.log("🔑 会话已恢复，工作线程继续")
+                return True
+
+            self.last_error = result
+            if pause or is_auth_error(result) or self.state != SESSION_READY:
+                # 确认失效（或认证期间请求失败）：保持暂停，由后台线程重试
+                self._ready.clear()
+                self.state = SESSION_EXPIRED
+                self.log(f"🔑 会话已失效（错误码: {result}），工作线程暂停，{self.retry_sec}秒后重试")
+            else:
+                # 主动刷新遇到网络错误：保留原令牌，下个周期再试
+                self.log(f"🔑 刷新 bdstoken 失败（错误码: {result}），沿用当前令牌")
+            return False
+
+    def start(self):
+        """启动后台刷新线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='pan-session', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop.set()
+
+    def _next_wait(self) -> float:
+        """距离下一次后台检查的秒数"""
+        if self.state != SESSION_READY:
+            return self.retry_sec
+        if self.refresh_interval_sec <= 0:
+            # 只在失效时重试：定期醒来检查状态
+            return self.retry_sec
+        elapsed = time.monotonic() - self.token_refreshed_at
+        return max(0.0, self.refresh_interval_sec - elapsed)
+
+    def _run(self):
+        """后台刷新循环"""
+        while not self._stop.wait(self._next_wait()):
+            if self.state == SESSION_READY and self.refresh_interval_sec <= 0:
+                continue
+            if self.state == SESSION_READY and time.monotonic() - self.token_refreshed_at < self.refresh_interval_sec:
+                continue
+            try:
+                self._refresh("后台重试" if self.state != SESSION_READY else "定期刷新", pause=False)
+            except Exception as e:
+                self.log(f"🔑 会话刷新异常: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        """会话状态"""
+        return {
+            'state': self.state,
+            'last_error': self.last_error,
+            'refresh_count': self.refresh_count,
+            'last_refresh': self.last_refresh,
+            'token_age_sec': round(time.monotonic() - self.token_refreshed_at, 1)
+        }
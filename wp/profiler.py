@@ -0,0 +1,182 @@
+"""
+采样分析器模块
+在运行中的进程上按固定间隔采集所有线程的调用栈（sys._current_frames），
+输出火焰图可用的折叠栈格式（flamegraph.pl / speedscope / inferno 均可直接读取）：
+
+    线程组;最外层函数 (文件:行号);...;最内层函数 (文件:行号) 采样次数
+
+- 只在开启期间有开销：后台线程每次采样只读取栈帧，不使用 sys.setprofile
+- 单次采样有最长时间限制，到期自动停止，结果保留到下一次开始
+- 线程组为线程名中的数字替换为 N（如 waitress-N、transfer-worker），同类线程合并统计
+"""
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 采样间隔范围（毫秒）
+MIN_INTERVAL_MS = 1
+MAX_INTERVAL_MS = 1000
+
+_DIGITS = re.compile(r'\d+')
+
+
+def thread_group(name: str) -> str:
+    """线程组名：线程名中的数字替换为 N"""
+    return _DIGITS.sub('N', name or 'unknown').replace(';', ',')
+
+
+class SamplingProfiler:
+    """采样分析器（进程内同一时间只有一次采样）"""
+
+    def __init__(self, max_duration_sec: float = 300):
+        """
+        初始化采样分析器
+
+        Args:
+            max_duration_sec: 单次采样的最长时间（秒），到期自动停止
+        """
+        self.max_duration_sec = max_duration_sec
+        self._lock = threading.Lock()
+        self._data_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stacks: Counter = Counter()
+        self._labels: Dict[Any, str] = {}
+        self._samples = 0
+        self._interval_sec = 0.01
+        self._duration_sec = 0.0
+        self._started_at: Optional[str] = None
+        self._started = 0.0
+        self._finished_at: Optional[str] = None
+        self._thread_filter: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        """是否正在采样"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = 10, duration_sec: Optional[float] = None,
+              thread_filter: Optional[str] = None) -> bool:
+        """
+        开始采样
+
+        Args:
+            interval_ms: 采样间隔（毫秒）
+            duration_sec: 采样时长（秒），不超过 max_duration_sec；None 表示采样到 stop() 或最长时间
+            thread_filter: 只采集线程组名包含该字符串的线程（如 worker、waitress）
+
+        Returns:
+            已在采样时返回False
+        """
+        with self._lock:
+            if self.running:
+                return False
+            interval_ms = min(max(float(interval_ms), MIN_INTERVAL_MS), MAX_INTERVAL_MS)
+            duration = self.max_duration_sec if duration_sec is None else min(float(duration_sec), self.max_duration_sec)
+
+            with self._data_lock:
+                self._stacks = Counter()
+                self._samples = 0
+            self._interval_sec = interval_ms / 1000.0
+            self._duration_sec = 0.0
+            self._thread_filter = thread_filter or None
+            self._started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self._finished_at = None
+            self._started = time.monotonic()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(max(0.0, duration),),
+                                             name='sampling-profiler', daemon=True)
+            self._thread.start()
+        logger.info(f"开始采样分析: 间隔 {interval_ms}ms, 最长 {duration}s")
+        return True
+
+    def stop(self, timeout: float = 5) -> bool:
+        """
+        停止采样并等待采样线程结束
+
+        Returns:
+            采样正在进行时返回True
+        """
+        with self._lock:
+            thread = self._thread
+        if thread is None or not thread.is_alive():
+            return False
+        self._stop.set()
+        thread.join(timeout)
+        return True
+
+    def _run(self, duration: float):
+        """采样循环"""
+        own = threading.get_ident()
+        deadline = self._started + duration
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            self._sample(own)
+            self._stop.wait(self._interval_sec)
+        self._duration_sec = round(time.monotonic() - self._started, 3)
+        self._finished_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        logger.info(f"采样分析结束: {self._samples} 次采样, {self._duration_sec}s")
+
+    def _sample(self, own: int):
+        """采集一次所有线程的调用栈"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            group = thread_group(names.get(ident, f'thread-{ident}'))
+            if self._thread_filter and self._thread_filter not in group:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(group)
+            stack.reverse()
+            stacks.append(tuple(stack))
+        with self._data_lock:
+            self._stacks.update(stacks)
+            self._samples += 1
+
+    def _label(self, code) -> str:
+        """函数标签：函数名 (文件名:首行号)，按代码对象缓存"""
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})".replace(';', ',')
+            self._labels[code] = label
+        return label
+
+    def collapsed(self) -> str:
+        """折叠栈文本（按采样次数降序）"""
+        with self._data_lock:
+            stacks: Tuple = tuple(self._stacks.items())
+        lines = [f"{';'.join(stack)} {count}" for stack, count in sorted(stacks, key=lambda item: -item[1])]
+        return '\n'.join(lines) + ('\n' if lines else '')
+
+    def status(self) -> Dict[str, Any]:
+        """采样状态"""
+        running = self.running
+        groups = Counter()
+        with self._data_lock:
+            stacks = tuple(self._stacks.items())
+        for stack, count in stacks:
+            groups[stack[0]] += count
+        return {
+            'running': running,
+            'interval_ms': round(self._interval_sec * 1000, 3),
+            'samples': self._samples,
+            'duration_sec': round(time.monotonic() - self._started, 3) if running else self._duration_sec,
+            'max_duration_sec': self.max_duration_sec,
+            'thread_filter': self._thread_filter,
+            'started_at': self._started_at,
+            'finished_at': self._finished_at,
+            'threads': dict(groups.most_common())
+        }
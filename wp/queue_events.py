@@ -0,0 +1,258 @@
+"""
+队列事件总线
+转存/分享工作线程的任务状态变化以事件形式发布，控制面板通过SSE流订阅，
+不再定时拉取整个队列。
+
+事件带有单调递增的序号，最近的事件保存在环形缓冲区中：
+客户端断线重连时携带最后收到的序号即可补发遗漏的事件；
+序号已被挤出缓冲区时返回重置信号，客户端应重新拉取完整快照。
+"""
+import json
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+# 事件：{'id': 序号, 'event': 类型, 'account': 账户, 'queue': transfer/share, 'data': {...}}
+QueueEvent = Dict[str, Any]
+
+QUEUE_NAMES = ('transfer', 'share')
+
+# 任务状态 -> 计数器名（与 get_transfer_status/get_share_status 一致）
+TASK_STATUSES = ('pending', 'running', 'completed', 'failed', 'skipped')
+
+# 分页查询队列时每页的最大任务数
+QUEUE_PAGE_MAX_LIMIT = 1000
+
+
+def counter_delta(previous: Optional[str], status: str) -> Dict[str, int]:
+    """
+    计算任务状态迁移对队列计数器的增量
+
+    Args:
+        previous: 迁移前的状态（None表示新任务）
+        status: 迁移后的状态
+
+    Returns:
+        {计数器名: 增量}，状态未变化时为空
+    """
+    if previous == status:
+        return {}
+    delta = {}
+    if previous in TASK_STATUSES:
+        delta[previous] = -1
+    if status in TASK_STATUSES:
+        delta[status] = 1
+    return delta
+
+
+def count_statuses(tasks: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    一次遍历统计队列各状态的任务数
+
+    Args:
+        tasks: 任务列表
+
+    Returns:
+        {'total': 总数, 各状态: 任务数}
+    """
+    counts = dict.fromkeys(TASK_STATUSES, 0)
+    for task in tasks:
+        status = task.get('status')
+        if status in counts:
+            counts[status] += 1
+    return {'total': len(tasks), **counts}
+
+
+def select_tasks(tasks: List[Dict[str, Any]], indices: Optional[Iterable[int]] = None,
+                 status: Optional[str] = None, offset: int = 0, limit: int = 100) -> Dict[str, Any]:
+    """
+    按状态过滤并分页选取任务（返回的任务附带其在队列中的 index）
+
+    Args:
+        tasks: 任务列表
+        indices: 只在这些任务索引中选取（升序；None表示整个队列）
+        status: 只选取该状态的任务（None表示全部）
+        offset: 跳过的匹配任务数
+        limit: 最多返回的任务数
+
+    Returns:
+        {'queue': 任务列表, 'total': 匹配的任务数, 'offset', 'limit', 'has_more'}
+    """
+    size = len(tasks)
+    if indices is None:
+        indices = range(size)
+
+    if status is None and isinstance(indices, range):
+        # 未过滤时直接切片，不遍历整个队列
+        total = len(indices)
+        selected = indices[offset:offset + limit]
+    else:
+        total = 0
+        selected = []
+        for index in indices:
+            if index >= size or (status is not None and tasks[index].get('status') != status):
+                continue
+            if offset <= total < offset + limit:
+                selected.append(index)
+            total += 1
+
+    return {
+        'queue': [{**tasks[index], 'index': index} for index in selected if index < size],
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'has_more': offset + len(selected) < total
+    }
+
+
+class QueueEventBus:
+    """线程安全的队列事件总线（发布方为工作线程，订阅方为SSE连接）"""
+
+    def __init__(self, buffer_size: int = 1000):
+        """
+        初始化事件总线
+
+        Args:
+            buffer_size: 保留用于断线补发的最近事件数
+        """
+        self._events: deque = deque(maxlen=buffer_size)
+        self._version = 0
+        self._condition = threading.Condition()
+
+    @property
+    def version(self) -> int:
+        """最新事件序号（快照与该序号对应，订阅时从该序号之后开始）"""
+        with self._condition:
+            return self._version
+
+    def publish(self, account: str, queue: str, event: str, data: Dict[str, Any]) -> int:
+        """
+        发布事件并唤醒等待中的订阅者
+
+        Args:
+            account: 账户名
+            queue: 队列名（transfer/share）
+            event: 事件类型（task: 单个任务状态变化；queue: 队列整体变化）
+            data: 事件数据
+
+        Returns:
+            事件序号
+        """
+        with self._condition:
+            self._version += 1
+            self._events.append({
+                'id': self._version,
+                'event': event,
+                'account': account,
+                'queue': queue,
+                'data': data
+            })
+            self._condition.notify_all()
+            return self._version
+
+    def events_since(self, last_id: int) -> Tuple[List[QueueEvent], bool]:
+        """
+        读取序号之后的事件
+
+        Args:
+            last_id: 客户端最后收到的事件序号
+
+        Returns:
+            (事件列表, 是否需要重置)；last_id 之后的事件已不完整时需要重置
+        """
+        with self._condition:
+            return self._collect(last_id)
+
+    def wait_for_events(self, last_id: int, timeout: float) -> Tuple[List[QueueEvent], bool]:
+        """
+        等待序号之后的新事件（超时返回空列表）
+
+        Args:
+            last_id: 客户端最后收到的事件序号
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            (事件列表, 是否需要重置)
+        """
+        with self._condition:
+            if self._version <= last_id:
+                self._condition.wait_for(lambda: self._version > last_id, timeout)
+            return self._collect(last_id)
+
+    def _collect(self, last_id: int) -> Tuple[List[QueueEvent], bool]:
+        """收集事件（调用方需持有锁）"""
+        if last_id > self._version:
+            # 序号来自重启前的服务进程
+            return [], True
+        if self._events and self._events[0]['id'] > last_id + 1:
+            # 序号之后的部分事件已被挤出缓冲区
+            return [], True
+        return [event for event in self._events if event['id'] > last_id], False
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """按 text/event-stream 格式编码一条事件"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def stream_events(bus: QueueEventBus, last_id: int, account: Optional[str] = None,
+                  heartbeat_sec: float = 15, max_duration_sec: float = 300) -> Iterator[str]:
+    """
+    生成SSE事件流
+
+    无事件时按心跳间隔发送注释行保持连接；连接达到最长时间后结束，
+    浏览器会携带最后的事件序号自动重连（避免长期占用服务线程）。
+
+    Args:
+        bus: 事件总线
+        last_id: 从该序号之后开始推送
+        account: 只推送该账户的事件（None表示全部账户）
+        heartbeat_sec: 心跳间隔（秒）
+        max_duration_sec: 单个连接的最长时间（秒）
+
+    Yields:
+        SSE格式的文本
+    """
+    deadline = time.monotonic() + max_duration_sec
+    yield "retry: 3000\n\n"
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+
+        events, reset = bus.wait_for_events(last_id, min(heartbeat_sec, remaining))
+        if reset:
+            last_id = bus.version
+            yield format_sse('reset', {'version': last_id}, last_id)
+            continue
+
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+
+        for event in events:
+            last_id = event['id']
+            if account and event['account'] != account:
+                # 只推进客户端的事件序号，不派发事件
+                yield f"id: {event['id']}\n\n"
+                continue
+            payload = {'account': event['account'], 'queue': event['queue'], **event['data']}
+            yield format_sse(event['event'], payload, event['id'])
+
+
+_config = get_config()
+
+# 全部账户共享的队列事件总线
+queue_events = QueueEventBus(buffer_size=_config.QUEUE_EVENTS_BUFFER_SIZE)
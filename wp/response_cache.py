@@ -0,0 +1,197 @@
+"""
+API响应缓存
+缓存只读接口的完整响应体并附带ETag，客户端携带 If-None-Match 时直接返回304；
+数据写入后调用 invalidate() 使全部缓存失效。
+默认缓存在进程内存中，配置 redis:// 地址时可在多个进程之间共享（需要安装redis）。
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from flask import Response, make_response, request
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import redis
+except ImportError:  # 可选依赖：仅共享缓存需要
+    redis = None
+
+# 缓存条目：(ETag, 响应体, MIME类型)
+CachedResponse = Tuple[str, bytes, str]
+
+
+class _MemoryBackend:
+    """进程内缓存后端"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, CachedResponse]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached and cached[0] > time.time():
+            return cached[1]
+        return None
+
+    def set(self, key: str, value: CachedResponse, ttl_sec: float):
+        now = time.time()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # 先清理过期项，仍然过多时整体清空
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + ttl_sec, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _RedisBackend:
+    """Redis共享缓存后端（用代数键失效，旧条目随TTL自然过期）"""
+
+    def __init__(self, url: str, namespace: str):
+        self._client = redis.Redis.from_url(url)
+        self._namespace = namespace
+        self._generation_key = f"{namespace}:generation"
+
+    def _key(self, key: str) -> str:
+        generation = self._client.get(self._generation_key) or b'0'
+        return f"{self._namespace}:{generation.decode()}:{key}"
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        values = self._client.hmget(self._key(key), 'etag', 'body', 'mimetype')
+        if values[0] is None:
+            return None
+        return values[0].decode(), values[1], values[2].decode()
+
+    def set(self, key: str, value: CachedResponse, ttl_sec: float):
+        etag, body, mimetype = value
+        redis_key = self._key(key)
+        pipe = self._client.pipeline()
+        pipe.hset(redis_key, mapping={'etag': etag, 'body': body, 'mimetype': mimetype})
+        pipe.expire(redis_key, max(1, int(ttl_sec)))
+        pipe.execute()
+
+    def clear(self):
+        self._client.incr(self._generation_key)
+
+
+class ResponseCache:
+    """
+    带TTL和ETag的响应缓存
+
+    只缓存状态码为200的非流式响应，缓存键为请求路径加查询字符串。
+    """
+
+    def __init__(self, ttl_sec: float = 30, max_entries: int = 512,
+                 storage_url: str = 'memory://', namespace: str = 'response_cache'):
+        """
+        初始化响应缓存
+
+        Args:
+            ttl_sec: 缓存有效期（秒），0表示禁用缓存
+            max_entries: 进程内缓存的最大条目数
+            storage_url: memory:// 或 redis://host:port/db
+            namespace: 共享缓存的键前缀
+        """
+        self.ttl_sec = ttl_sec
+        self._backend = _MemoryBackend(max_entries)
+
+        if storage_url.startswith(('redis://', 'rediss://')):
+            if redis is None:
+                logger.warning("redis未安装，响应缓存使用进程内存储，请运行: pip install redis")
+            else:
+                self._backend = _RedisBackend(storage_url, namespace)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_sec > 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """读取缓存，缓存后端出错时视为未命中"""
+        try:
+            return self._backend.get(key)
+        except Exception as e:
+            logger.warning(f"读取响应缓存失败: {e}")
+            return None
+
+    def set(self, key: str, body: bytes, mimetype: str) -> CachedResponse:
+        """
+        写入缓存
+
+        Args:
+            key: 缓存键
+            body: 响应体
+            mimetype: MIME类型
+
+        Returns:
+            缓存条目 (ETag, 响应体, MIME类型)
+        """
+        value = (f'"{hashlib.sha1(body).hexdigest()}"', body, mimetype)
+        try:
+            self._backend.set(key, value, self.ttl_sec)
+        except Exception as e:
+            logger.warning(f"写入响应缓存失败: {e}")
+        return value
+
+    def invalidate(self):
+        """使全部缓存失效（数据写入后调用）"""
+        try:
+            self._backend.clear()
+        except Exception as e:
+            logger.warning(f"清空响应缓存失败: {e}")
+
+    def cached(self, view: Callable[..., Any]) -> Callable[..., Any]:
+        """
+        Flask视图装饰器：命中缓存时直接返回，ETag匹配时返回304
+
+        响应头 X-Cache 标明 HIT/MISS，Cache-Control 要求客户端每次用ETag重新验证。
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.enabled:
+                return view(*args, **kwargs)
+
+            key = request.full_path
+            entry = self.get(key)
+            status = 'HIT'
+
+            if entry is None:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = self.set(key, response.get_data(), response.mimetype)
+                status = 'MISS'
+
+            etag, body, mimetype = entry
+            if request.if_none_match.contains(etag.strip('"')):
+                response = Response(status=304)
+            else:
+                response = Response(body, mimetype=mimetype)
+
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'private, no-cache'
+            response.headers['X-Cache'] = status
+            return response
+
+        return wrapper
+
+
+_config = get_config()
+
+# 知识库只读接口的响应缓存（知识库数据写入后由 knowledge_repository.invalidate_knowledge_cache 清空）
+knowledge_cache = ResponseCache(
+    ttl_sec=_config.KNOWLEDGE_CACHE_TTL,
+    storage_url=_config.KNOWLEDGE_CACHE_URL,
+    namespace='knowledge'
+)
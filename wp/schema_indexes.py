@@ -0,0 +1,49 @@
+"""
+复合索引迁移
+为热点查询的"过滤 + 排序"访问路径建立复合索引，使这些查询走索引有序扫描，
+不再回表排序或全表扫描：
+
+- extracted_links(status, created_at, id)：按状态过滤并按创建时间分页（知识库列表、链接列表）
+- extracted_links(article_id, created_at, id)：按文章查链接并按创建时间排序（条目详情、链接列表）
+- articles(crawled_at, id)：文章列表按爬取时间键集分页
+
+update_extracted_link_status 的 (article_id, original_link) 定位由表上的唯一约束索引覆盖。
+"""
+from typing import List, Tuple
+
+from logger import get_logger
+from migrations import create_index
+
+logger = get_logger(__name__)
+
+# (索引名, 表名, 列)
+COMPOSITE_INDEXES: List[Tuple[str, str, str]] = [
+    ('idx_extracted_links_status_created', 'extracted_links', 'status, created_at, id'),
+    ('idx_extracted_links_article_created', 'extracted_links', 'article_id, created_at, id'),
+    ('idx_articles_crawled_at_id', 'articles', 'crawled_at, id'),
+]
+
+
+def ensure_composite_indexes(conn, db_type: str) -> List[str]:
+    """
+    建立缺失的复合索引（可重复执行）
+
+    通过 migrations.create_index 在线建立：MySQL使用 INPLACE/LOCK=NONE，
+    PostgreSQL使用 CONCURRENTLY，建索引期间不阻塞写入。
+
+    Args:
+        conn: 数据库连接
+        db_type: 数据库类型（sqlite/mysql/postgresql）
+
+    Returns:
+        本次新建的索引名列表
+    """
+    created = [
+        index_name
+        for index_name, table, columns in COMPOSITE_INDEXES
+        if create_index(conn, db_type, index_name, table, columns)
+    ]
+
+    if created:
+        logger.info(f"已建立复合索引: {', '.join(created)}")
+    return created
@@ -9,11 +9,11 @@ import csv
 import json
 import io
 import time
-from functools import wraps
+from functools import partial, wraps
 from typing import Dict, Any, Optional
 from datetime import datetime
 
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_file, send_from_directory, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -23,11 +23,20 @@ from config import get_config, Config
 from logger import get_logger
 from core_service import CoreService
 from init_db import initialize_database
+from db_pool import close_all_pools
 from crawler_service import CrawlerService
 from link_extractor_service import LinkExtractorService
 from link_processor_service import LinkProcessorService
 from knowledge_api import knowledge_bp
+from export_writers import COLUMNAR_FORMATS, columnar_available, export_response
 from settings_manager import SettingsManager
+from account_logins import AccountLoginPool
+from profiler import SamplingProfiler
+from operation_log import OperationLogWriter, query_timeseries
+import metrics
+from queue_events import (
+    QUEUE_NAMES, QUEUE_PAGE_MAX_LIMIT, TASK_STATUSES, count_statuses, queue_events, stream_events
+)
 
 # 初始化配置
 config = get_config()
@@ -53,6 +62,25 @@ limiter = Limiter(
     storage_uri=config.RATE_LIMIT_STORAGE_URL
 )
 
+
+@app.before_request
+def start_request_timer():
+    """记录请求开始时间（性能监控）"""
+    if metrics.registry.enabled:
+        g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    """记录请求处理耗时（按路由模板统计，避免路径参数导致标签膨胀）"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, method=request.method,
+                                              endpoint=endpoint, status=response.status_code)
+    return response
+
+
 # Swagger配置
 swagger_config = {
     "headers": [],
@@ -142,6 +170,13 @@ crawler_service: Optional[CrawlerService] = None  # 爬虫服务实例
 link_extractor_service: Optional[LinkExtractorService] = None  # 链接提取服务实例
 settings_manager: Optional[SettingsManager] = None  # 设置管理器实例
 current_settings: Dict[str, Any] = {}  # 当前设置缓存
+profiler = SamplingProfiler(max_duration_sec=config.PROFILER_MAX_DURATION_SEC)  # 采样分析器
+operation_logs = OperationLogWriter(  # 任务操作日志批量写入器
+    config,
+    batch_size=config.OPERATION_LOG_BATCH_SIZE,
+    flush_interval_sec=config.OPERATION_LOG_FLUSH_SEC,
+    max_buffer=config.OPERATION_LOG_MAX_BUFFER
+)
 
 
 def load_accounts_from_env():
@@ -222,9 +257,7 @@ def require_service(f):
 
 
 def get_or_create_service(account: Optional[str] = None) -> Optional[CoreService]:
-    """获取或创建服务实例"""
-    global current_settings
-    
+    """获取或创建服务实例（未登录时阻塞登录，账户正在后台登录时等待该次登录）"""
     if not account:
         account = config.DEFAULT_ACCOUNT
     
@@ -237,6 +270,45 @@ def get_or_create_service(account: Optional[str] = None) -> Optional[CoreService
         logger.error(f"账户不存在: {account}")
         return None
     
+    return account_logins.login(account)
+
+
+def get_cached_service(account: str) -> Optional[CoreService]:
+    """
+    获取已登录的服务实例（只读缓存，不触发网络请求）
+    
+    概览、统计等聚合接口使用；账户未登录时在后台发起登录并返回None
+    """
+    service = services.get(account)
+    if service and service.adapter:
+        return service
+    
+    if account in accounts:
+        account_logins.submit(account)
+    return None
+
+
+def describe_unavailable_account(account: str) -> Dict[str, Any]:
+    """未登录账户的状态（附登录状态缓存）"""
+    health = account_logins.health(account)
+    if health.get('state') == 'failed':
+        error = health.get('error') or 'Login failed'
+    else:
+        error = 'Service unavailable or login in progress'
+    return {
+        'available': False,
+        'error': error,
+        'login': health
+    }
+
+
+def login_account(account: str):
+    """
+    登录账户并创建服务实例（由登录线程池调用）
+    
+    Returns:
+        (服务实例或None, 错误信息)
+    """
     cookie = accounts[account]
     
     # 创建服务实例，传递完整设置
@@ -245,6 +317,7 @@ def get_or_create_service(account: Optional[str] = None) -> Optional[CoreService
         service_config = {'throttle': current_settings.get('throttle', config.get_throttle_config()['throttle'])}
     else:
         service_config = config.get_throttle_config()
+    service_config.update(config.get_session_config())
     
     service = CoreService(cookie, service_config)
     success, error_msg = service.login(cookie)
@@ -254,12 +327,27 @@ def get_or_create_service(account: Optional[str] = None) -> Optional[CoreService
         if current_settings:
             service.apply_settings(current_settings)
         
+        # 任务状态变化推送到控制面板事件流
+        service.set_event_callback(partial(queue_events.publish, account))
+        
+        # 任务结果批量写入操作日志
+        if config.OPERATION_LOG_ENABLED:
+            service.set_operation_callback(partial(operation_logs.record, account))
+        
         services[account] = service
         logger.info(f"账户登录成功: {account}")
-        return service
+        return service, ""
     else:
         logger.error(f"账户登录失败: {account}, 错误: {error_msg}")
-        return None
+        return None, error_msg
+
+
+# 后台登录线程池和账户登录状态缓存
+account_logins = AccountLoginPool(
+    login_account,
+    max_workers=config.ACCOUNT_LOGIN_WORKERS,
+    retry_interval_sec=config.ACCOUNT_LOGIN_RETRY_SEC
+)
 
 
 # ============================================================================
@@ -305,6 +393,62 @@ def health_check():
     })
 
 
+def collect_queue_depths():
+    """抓取时统计各账户各队列的任务数（只读已登录账户，不触发登录）"""
+    for account, service in list(services.items()):
+        for queue in QUEUE_NAMES:
+            tasks = service.transfer_queue if queue == 'transfer' else service.share_queue
+            counts = count_statuses(tasks)
+            for status in TASK_STATUSES:
+                yield (account, queue, status), counts[status]
+
+
+metrics.registry.gauge_collector('queue_tasks', '队列中各状态的任务数', ('account', 'queue', 'status'),
+                                 collect_queue_depths)
+
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+def get_metrics():
+    """
+    Prometheus 指标
+    ---
+    tags:
+      - 系统
+    description: |
+      Prometheus 文本格式的性能指标，需要 ENABLE_PERFORMANCE_MONITORING=True。
+      认证方式：X-API-Key 请求头，或 Authorization: Bearer <API密钥>（Prometheus 的 authorization 配置）
+    security:
+      - ApiKeyAuth: []
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: 指标文本
+      401:
+        description: 无效或缺失的API密钥
+      404:
+        description: 未启用性能监控
+    """
+    api_key = request.headers.get('X-API-Key')
+    if not api_key:
+        scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+        api_key = token.strip() if scheme.lower() == 'bearer' else ''
+    if not api_key or not verify_api_key(api_key):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid or missing API key',
+            'message': '无效或缺失的API密钥'
+        }), 401
+    if not metrics.registry.enabled:
+        return jsonify({
+            'success': False,
+            'error': 'Metrics disabled',
+            'message': '未启用性能监控（ENABLE_PERFORMANCE_MONITORING）'
+        }), 404
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/api/info', methods=['GET'])
 @require_auth
 def get_info():
@@ -353,23 +497,33 @@ def get_stats():
         in: query
         type: string
         required: false
-        description: 账户名（不填则返回所有账户）
+        description: 账户名（不填则返回所有已登录账户）
     responses:
       200:
         description: 统计信息
       401:
         description: 未授权
+      404:
+        description: 账户不存在
+      503:
+        description: 账户尚未登录（已在后台发起登录）
     """
     account = request.args.get('account')
     
     if account:
-        # 获取单个账户的统计信息
-        service = get_or_create_service(account)
-        if not service:
+        # 获取单个账户的统计信息（只读已登录的服务，不在请求中登录）
+        if account not in accounts:
             return jsonify({
                 'success': False,
                 'error': f'Account not found: {account}'
             }), 404
+        service = get_cached_service(account)
+        if not service:
+            return jsonify({
+                'success': False,
+                'error': f'Account not logged in: {account}',
+                'login': account_logins.health(account)
+            }), 503
         
         stats = {
             'account': account,
@@ -380,7 +534,7 @@ def get_stats():
         # 获取所有账户的统计信息
         stats = {}
         for acc in accounts.keys():
-            service = get_or_create_service(acc)
+            service = get_cached_service(acc)
             if service:
                 stats[acc] = {
                     'transfer': service.get_transfer_status(),
@@ -762,6 +916,29 @@ def clear_transfer_queue(service):
     })
 
 
+def _export_results_stream(results, format_type: str, basename: str):
+    """
+    以NDJSON/Parquet/Arrow格式导出结果列表（csv/json保持原有输出）
+
+    Args:
+        results: 结果字典列表
+        format_type: ndjson/parquet/arrow
+        basename: 下载文件名前缀
+
+    Returns:
+        Flask响应
+    """
+    if format_type in COLUMNAR_FORMATS and not columnar_available():
+        return jsonify({
+            'success': False,
+            'error': 'pyarrow not installed',
+            'message': f'导出{format_type}需要安装pyarrow: pip install pyarrow'
+        }), 501
+
+    fields = list(results[0].keys()) if results else []
+    return export_response(results, fields, format_type, basename)
+
+
 @app.route('/api/transfer/export', methods=['GET'])
 @require_service
 def export_transfer_results(service):
@@ -780,17 +957,23 @@ def export_transfer_results(service):
       - name: format
         in: query
         type: string
-        enum: [json, csv]
+        enum: [json, csv, ndjson, parquet, arrow]
         default: json
+        description: 导出格式（parquet/arrow需要安装pyarrow）
     responses:
       200:
         description: 导出成功
       401:
         description: 未授权
+      501:
+        description: 未安装pyarrow，无法导出parquet/arrow
     """
     format_type = request.args.get('format', 'json')
     results = service.export_transfer_results()
     
+    if format_type in ('ndjson',) + COLUMNAR_FORMATS:
+        return _export_results_stream(results, format_type, 'transfer_results')
+    
     if format_type == 'csv':
         # 生成CSV
         output = io.StringIO()
@@ -992,10 +1175,13 @@ def clear_share_queue(service):
 @app.route('/api/share/export', methods=['GET'])
 @require_service
 def export_share_results(service):
-    """导出分享结果"""
+    """导出分享结果（format: json/csv/ndjson/parquet/arrow）"""
     format_type = request.args.get('format', 'json')
     results = service.export_share_results()
     
+    if format_type in ('ndjson',) + COLUMNAR_FORMATS:
+        return _export_results_stream(results, format_type, 'share_results')
+    
     if format_type == 'csv':
         output = io.StringIO()
         if results:
@@ -1188,7 +1374,11 @@ def get_control_panel_overview():
                 'core': len(services) > 0,
                 'crawler': crawler_service is not None,
                 'link_extractor': link_extractor_service is not None
-            }
+            },
+            # 账户登录状态缓存（登录在后台进行，概览接口不触发网络请求）
+            'accounts': account_logins.health(),
+            # 已登录账户的会话状态（ready/refreshing/expired，失效时工作线程暂停）
+            'sessions': {name: service.get_session_status() for name, service in list(services.items())}
         }
         
         # 获取账户列表
@@ -1207,9 +1397,9 @@ def get_control_panel_overview():
             'total_share_failed': 0
         }
         
-        # 汇总所有账户的队列统计
+        # 汇总已登录账户的队列统计
         for account_name in account_list:
-            service = get_or_create_service(account_name)
+            service = get_cached_service(account_name)
             if service:
                 transfer_status = service.get_transfer_status()
                 share_status = service.get_share_status()
@@ -1247,11 +1437,46 @@ def get_control_panel_overview():
 def get_aggregated_queues():
     """
     获取所有账户的聚合队列数据
+    不带分页参数时返回完整队列（兼容旧客户端）；带 limit/offset/status/since/queue 任一参数时
+    每个队列只返回一页任务（任务附带 index），并附带 total/offset/limit/has_more/reset。
     ---
     tags:
       - 系统
     security:
       - ApiKeyAuth: []
+    parameters:
+      - name: account
+        in: query
+        type: string
+        required: false
+        description: 只返回该账户的队列
+      - name: queue
+        in: query
+        type: string
+        enum: [transfer, share]
+        required: false
+        description: 只返回该队列
+      - name: status
+        in: query
+        type: string
+        enum: [pending, running, completed, failed, skipped]
+        required: false
+        description: 只返回该状态的任务（since 增量查询时不过滤）
+      - name: limit
+        in: query
+        type: integer
+        default: 100
+        description: 每个队列返回的任务数（最大1000）
+      - name: offset
+        in: query
+        type: integer
+        default: 0
+        description: 偏移量
+      - name: since
+        in: query
+        type: integer
+        required: false
+        description: 上次响应的 version，只返回此后变化过的任务；reset 为 true 时客户端应丢弃本地数据
     responses:
       200:
         description: 聚合的队列状态和任务数据
@@ -1265,68 +1490,108 @@ def get_aggregated_queues():
                 timestamp:
                   type: string
                   description: 数据生成时间
+                version:
+                  type: integer
+                  description: 快照对应的事件序号（增量查询的 since，或订阅 /api/control/queues/stream 的起点）
                 accounts:
                   type: object
                   description: 按账户分组的队列数据
+      400:
+        description: 参数错误
       401:
         description: 未授权
+      404:
+        description: 账户不存在
     """
     try:
+        args = request.args
+        paged = any(name in args for name in ('limit', 'offset', 'status', 'since', 'queue'))
+        try:
+            limit = min(max(int(args.get('limit', 100)), 1), QUEUE_PAGE_MAX_LIMIT)
+            offset = max(int(args.get('offset', 0)), 0)
+            since = int(args['since']) if args.get('since') else None
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid parameter',
+                'message': 'limit、offset、since 必须是整数'
+            }), 400
+        
+        status = args.get('status') or None
+        queue_names = [args['queue']] if args.get('queue') else list(QUEUE_NAMES)
+        if status is not None and status not in TASK_STATUSES:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid status',
+                'message': f"status 必须是 {', '.join(TASK_STATUSES)} 之一"
+            }), 400
+        if not set(queue_names) <= set(QUEUE_NAMES):
+            return jsonify({
+                'success': False,
+                'error': 'Invalid queue',
+                'message': 'queue 必须是 transfer 或 share'
+            }), 400
+        
+        account_names = list(accounts.keys())
+        if args.get('account'):
+            if args['account'] not in accounts:
+                return jsonify({
+                    'success': False,
+                    'error': 'Account not found',
+                    'message': f"账户不存在: {args['account']}"
+                }), 404
+            account_names = [args['account']]
+        
+        # 先记录事件序号再读取队列，订阅事件流或下次增量查询时从该序号之后开始不会遗漏变化
+        version = queue_events.version
+        reset = since is not None and since > version
+        if reset:
+            # since 来自重启前的服务进程，按全量分页返回
+            since = None
+        
         result = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'version': version,
             'accounts': {}
         }
         
-        # 遍历所有账户，收集队列数据
-        for account_name in accounts.keys():
-            service = get_or_create_service(account_name)
+        # 遍历账户，收集已登录账户的队列数据（未登录的账户在后台登录，不阻塞请求）
+        for account_name in account_names:
+            service = get_cached_service(account_name)
             
-            # 如果服务不可用，记录错误但继续处理其他账户
+            # 如果服务不可用，记录登录状态但继续处理其他账户
             if not service:
-                result['accounts'][account_name] = {
-                    'available': False,
-                    'error': 'Service unavailable or login failed'
-                }
+                result['accounts'][account_name] = describe_unavailable_account(account_name)
                 continue
             
-            # 获取转存状态和队列
-            transfer_status = service.get_transfer_status()
-            transfer_queue = service.get_transfer_queue()
-            
-            # 获取分享状态和队列
-            share_status = service.get_share_status()
-            share_queue = service.get_share_queue()
-            
-            # 构建归一化的账户数据
-            result['accounts'][account_name] = {
-                'available': True,
-                'transfer': {
-                    'status': {
-                        'total': transfer_status.get('total', 0),
-                        'pending': transfer_status.get('pending', 0),
-                        'running': transfer_status.get('running', 0),
-                        'completed': transfer_status.get('completed', 0),
-                        'failed': transfer_status.get('failed', 0),
-                        'skipped': transfer_status.get('skipped', 0),
-                        'is_running': transfer_status.get('is_running', False),
-                        'is_paused': transfer_status.get('is_paused', False)
-                    },
-                    'queue': transfer_queue
-                },
-                'share': {
+            account_data = {'available': True}
+            for queue_name in queue_names:
+                if paged:
+                    page = service.get_queue_page(queue_name, status=status, offset=offset,
+                                                  limit=limit, since=since)
+                    page['reset'] = page['reset'] or reset
+                    account_data[queue_name] = page
+                    continue
+                
+                if queue_name == 'transfer':
+                    queue_status, queue = service.get_transfer_status(), service.get_transfer_queue()
+                else:
+                    queue_status, queue = service.get_share_status(), service.get_share_queue()
+                # 构建归一化的队列数据
+                account_data[queue_name] = {
                     'status': {
-                        'total': share_status.get('total', 0),
-                        'pending': share_status.get('pending', 0),
-                        'running': share_status.get('running', 0),
-                        'completed': share_status.get('completed', 0),
-                        'failed': share_status.get('failed', 0),
-                        'skipped': share_status.get('skipped', 0),
-                        'is_running': share_status.get('is_running', False),
-                        'is_paused': share_status.get('is_paused', False)
+                        'total': queue_status.get('total', 0),
+                        'pending': queue_status.get('pending', 0),
+                        'running': queue_status.get('running', 0),
+                        'completed': queue_status.get('completed', 0),
+                        'failed': queue_status.get('failed', 0),
+                        'skipped': queue_status.get('skipped', 0),
+                        'is_running': queue_status.get('is_running', False),
+                        'is_paused': queue_status.get('is_paused', False)
                     },
-                    'queue': share_queue
+                    'queue': queue
                 }
-            }
+            result['accounts'][account_name] = account_data
         
         return jsonify({
             'success': True,
@@ -1342,6 +1607,259 @@ def get_aggregated_queues():
         }), 500
 
 
+@app.route('/api/control/queues/stream', methods=['GET'])
+@require_auth
+def stream_queue_events():
+    """
+    订阅队列事件流（Server-Sent Events）
+    
+    每个连接在 QUEUE_EVENTS_MAX_STREAM_SEC 内占用一个工作线程：gunicorn 需使用 gthread/gevent 工作模式，
+    sync 工作模式下该值必须明显小于 --timeout（见 docs/DEPLOYMENT.md）。
+    ---
+    tags:
+      - 系统
+    security:
+      - ApiKeyAuth: []
+    produces:
+      - text/event-stream
+    parameters:
+      - name: account
+        in: query
+        type: string
+        required: false
+        description: 只推送该账户的事件
+      - name: since
+        in: query
+        type: integer
+        required: false
+        description: 从该事件序号之后开始推送（通常为 /api/control/queues 返回的 version；也可用 Last-Event-ID 请求头）
+    responses:
+      200:
+        description: |
+          事件流。task 事件为单个任务的状态变化（index、status、previous、delta计数器增量、task快照），
+          queue 事件为导入/清空/启停（action、status计数器），reset 表示事件已不连续，客户端应重新拉取快照
+      400:
+        description: 参数错误
+      401:
+        description: 未授权
+    """
+    since = request.args.get('since') or request.headers.get('Last-Event-ID')
+    try:
+        last_id = int(since) if since else queue_events.version
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid since',
+            'message': 'since 必须是整数'
+        }), 400
+    
+    events = stream_events(
+        queue_events, last_id,
+        account=request.args.get('account') or None,
+        heartbeat_sec=config.QUEUE_EVENTS_HEARTBEAT_SEC,
+        max_duration_sec=config.QUEUE_EVENTS_MAX_STREAM_SEC
+    )
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/control/profiler', methods=['GET'])
+@require_auth
+def get_profiler_status():
+    """
+    采样分析状态
+    ---
+    tags:
+      - 系统
+    security:
+      - ApiKeyAuth: []
+    responses:
+      200:
+        description: 是否正在采样、采样次数、时长和各线程组的采样数
+      401:
+        description: 未授权
+    """
+    return jsonify({'success': True, 'data': profiler.status()})
+
+
+@app.route('/api/control/profiler/start', methods=['POST'])
+@require_auth
+def start_profiler():
+    """
+    开始采样分析
+    ---
+    tags:
+      - 系统
+    description: |
+      在当前进程中按间隔采集所有线程（请求线程、转存/分享工作线程等）的调用栈，
+      到达 duration_sec 或 PROFILER_MAX_DURATION_SEC 后自动停止。
+      多进程部署时只分析处理该请求的进程。
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: body
+        in: body
+        required: false
+        schema:
+          properties:
+            interval_ms:
+              type: number
+              default: 10
+              description: 采样间隔（毫秒，1~1000）
+            duration_sec:
+              type: number
+              description: 采样时长（秒），不超过 PROFILER_MAX_DURATION_SEC
+            threads:
+              type: string
+              description: 只采集线程组名包含该字符串的线程，如 worker、waitress
+    responses:
+      200:
+        description: 已开始
+      400:
+        description: 参数错误
+      401:
+        description: 未授权
+      409:
+        description: 已在采样
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        interval_ms = float(data.get('interval_ms', 10))
+        duration_sec = float(data['duration_sec']) if data.get('duration_sec') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'Invalid parameters',
+            'message': 'interval_ms 和 duration_sec 必须是数字'
+        }), 400
+    
+    if not profiler.start(interval_ms=interval_ms, duration_sec=duration_sec,
+                          thread_filter=data.get('threads') or None):
+        return jsonify({
+            'success': False,
+            'error': 'Profiler already running',
+            'message': '采样分析正在进行，请先停止'
+        }), 409
+    return jsonify({'success': True, 'message': '采样分析已开始', 'data': profiler.status()})
+
+
+@app.route('/api/control/profiler/stop', methods=['POST'])
+@require_auth
+def stop_profiler():
+    """
+    停止采样分析并返回折叠栈
+    ---
+    tags:
+      - 系统
+    security:
+      - ApiKeyAuth: []
+    responses:
+      200:
+        description: 采样状态和 collapsed 折叠栈文本（可直接交给 flamegraph.pl / speedscope）
+      401:
+        description: 未授权
+    """
+    profiler.stop()
+    return jsonify({
+        'success': True,
+        'message': '采样分析已停止',
+        'data': {**profiler.status(), 'collapsed': profiler.collapsed()}
+    })
+
+
+@app.route('/api/control/profiler/stacks', methods=['GET'])
+@require_auth
+def get_profiler_stacks():
+    """
+    下载最近一次采样的折叠栈
+    ---
+    tags:
+      - 系统
+    security:
+      - ApiKeyAuth: []
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: 折叠栈文本，每行 "线程组;函数;...;函数 采样次数"
+      401:
+        description: 未授权
+    """
+    return Response(profiler.collapsed(), mimetype='text/plain',
+                    headers={'Content-Disposition': 'attachment; filename=profile.collapsed'})
+
+
+@app.route('/api/control/operations/timeseries', methods=['GET'])
+@require_auth
+def get_operation_timeseries():
+    """
+    按账户查询任务吞吐量和错误率时间序列
+    ---
+    tags:
+      - 系统
+    security:
+      - ApiKeyAuth: []
+    parameters:
+      - name: account
+        in: query
+        type: string
+        description: 只查询该账户
+      - name: operation
+        in: query
+        type: string
+        enum: [transfer, share]
+        description: 只查询该操作
+      - name: hours
+        in: query
+        type: number
+        default: 24
+        description: 查询最近多少小时（最多720）
+      - name: bucket_sec
+        in: query
+        type: integer
+        default: 300
+        description: 分桶宽度（秒，60~86400）
+    responses:
+      200:
+        description: 每个账户的时间序列，每个桶包含各结果条数、throughput_per_min、error_rate、avg_latency_ms
+      400:
+        description: 参数错误
+      401:
+        description: 未授权
+    """
+    try:
+        hours = float(request.args.get('hours', 24))
+        bucket_sec = int(request.args.get('bucket_sec', 300))
+        if not 0 < hours <= 720:
+            raise ValueError('hours 必须在 0~720 之间')
+        operation = request.args.get('operation') or None
+        if operation not in (None, 'transfer', 'share'):
+            raise ValueError('operation 只能是 transfer 或 share')
+        # 先写入缓冲中的记录，查询结果包含刚结束的任务
+        operation_logs.flush()
+        until_ts = int(time.time()) + 1
+        data = query_timeseries(
+            config,
+            since_ts=until_ts - int(hours * 3600),
+            until_ts=until_ts,
+            bucket_sec=bucket_sec,
+            account=request.args.get('account') or None,
+            operation=operation
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid parameters',
+            'message': str(e)
+        }), 400
+    
+    data['writer'] = operation_logs.get_status()
+    return jsonify({'success': True, 'data': data})
+
+
 @app.route('/api/control/settings', methods=['GET'])
 @require_auth
 def get_settings():
@@ -1631,18 +2149,34 @@ def get_articles():
         type: integer
         default: 0
         description: 偏移量
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: 上一页返回的next_cursor（键集分页，传入时忽略offset）
     responses:
       200:
         description: 文章列表
+      400:
+        description: 游标无效
       401:
         description: 未授权
     """
     try:
         limit = request.args.get('limit', 100, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor') or None
         
         service = get_crawler_service()
-        articles = service.get_articles(limit, offset)
+        try:
+            page = service.get_articles_page(limit, offset, cursor=cursor)
+        except ValueError as ve:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor',
+                'message': str(ve)
+            }), 400
+        articles = page['articles']
         
         return jsonify({
             'success': True,
@@ -1650,7 +2184,9 @@ def get_articles():
                 'articles': articles,
                 'limit': limit,
                 'offset': offset,
-                'count': len(articles)
+                'count': len(articles),
+                'has_more': page['has_more'],
+                'next_cursor': page['next_cursor']
             }
         })
         
@@ -1775,9 +2311,19 @@ def extract_links():
               type: integer
               default: 0
               description: 偏移量
+            parallel:
+              type: boolean
+              default: false
+              description: 不支持，全量并行提取请在服务器上运行 python link_extractor_service.py
+            incremental:
+              type: boolean
+              default: false
+              description: 只处理尚未提取链接的新增或更新文章（最多limit篇，忽略offset）
     responses:
       200:
         description: 提取成功
+      400:
+        description: 请求了并行全量提取
       401:
         description: 未授权
     """
@@ -1786,20 +2332,40 @@ def extract_links():
         limit = data.get('limit', 100)
         offset = data.get('offset', 0)
         
+        if data.get('parallel'):
+            # 全量提取会在请求线程中跑完整个语料并启动进程池，只允许通过命令行运行
+            return jsonify({
+                'success': False,
+                'error': 'parallel extraction is CLI-only',
+                'message': '全量并行提取请在服务器上运行: python link_extractor_service.py --workers N'
+            }), 400
+        
         service = get_link_extractor_service()
+        
+        if data.get('incremental'):
+            result = service.extract_new_links(limit=limit)
+            return jsonify({
+                'success': True,
+                'data': {
+                    'articles_processed': result['total_articles'],
+                    'links_extracted': result['saved_links']
+                }
+            })
+        
         result = service.get_articles_with_links(limit, offset)
         
-        # 保存提取的链接
-        saved_count = 0
-        for article in result:
-            for link in article.get('extracted_links', []):
-                service.save_extracted_link(
-                    article_id=article['article_id'],
-                    original_link=link['link'],
-                    original_password=link['password'],
-                    status='pending'
-                )
-                saved_count += 1
+        # 批量保存提取的链接
+        links = [
+            {
+                'article_id': article['article_id'],
+                'original_link': link['link'],
+                'original_password': link['password'],
+                'status': 'pending'
+            }
+            for article in result
+            for link in article.get('extracted_links', [])
+        ]
+        saved_count = service.save_extracted_links(links, keep_existing=True)
         
         return jsonify({
             'success': True,
@@ -1849,9 +2415,16 @@ def list_extracted_links():
         type: integer
         default: 0
         description: 偏移量
+      - name: cursor
+        in: query
+        type: string
+        required: false
+        description: 上一页返回的next_cursor（键集分页，传入时忽略offset）
     responses:
       200:
         description: 链接列表
+      400:
+        description: 游标无效
       401:
         description: 未授权
     """
@@ -1860,9 +2433,18 @@ def list_extracted_links():
         status = request.args.get('status')
         limit = int(request.args.get('limit', 100))
         offset = int(request.args.get('offset', 0))
+        cursor = request.args.get('cursor') or None
         
         service = get_link_extractor_service()
-        links = service.get_extracted_links(article_id, status, limit, offset)
+        try:
+            page = service.get_extracted_links_page(article_id, status, limit, offset, cursor=cursor)
+        except ValueError as ve:
+            return jsonify({
+                'success': False,
+                'error': 'Invalid cursor',
+                'message': str(ve)
+            }), 400
+        links = page['links']
         
         return jsonify({
             'success': True,
@@ -1870,7 +2452,9 @@ def list_extracted_links():
                 'links': links,
                 'count': len(links),
                 'limit': limit,
-                'offset': offset
+                'offset': offset,
+                'has_more': page['has_more'],
+                'next_cursor': page['next_cursor']
             }
         })
         
@@ -2003,7 +2587,7 @@ def process_links():
         
         # 根据模式执行不同操作
         if mode == 'extract':
-            result = processor.extract_and_save_links(limit=limit)
+            result = processor.extract_and_save_links(limit=limit, incremental=True)
         elif mode == 'transfer':
             result = processor.process_pending_links(limit=limit, target_path=target_path)
         elif mode == 'share':
@@ -2165,6 +2749,10 @@ def initialize_app():
     logger.info("加载账户配置...")
     if not load_accounts_from_env():
         logger.warning("未加载到任何账户")
+    elif config.ACCOUNT_LOGIN_AT_STARTUP:
+        # 后台并行登录，不阻塞服务启动
+        submitted = account_logins.submit_all(accounts.keys())
+        logger.info(f"已在后台登录 {submitted} 个账户")
     
     logger.info("应用初始化完成")
 
@@ -2178,6 +2766,15 @@ def shutdown_handler(signum, frame):
         logger.info(f"关闭账户服务: {account}")
         service.stop_transfer()
         service.stop_share()
+        if service.session:
+            service.session.stop()
+    
+    account_logins.shutdown()
+    profiler.stop()
+    operation_logs.close()
+    
+    # 关闭数据库连接池
+    close_all_pools()
     
     logger.info("服务已关闭")
     sys.exit(0)
@@ -130,6 +130,7 @@ case $mode in
         echo "配置:"
         echo "  - Workers: $WORKERS"
         echo "  - Timeout: $TIMEOUT秒"
+        echo "  - Threads: ${THREADS:-8}"
         echo ""
         echo "访问地址:"
         echo "  - 健康检查: http://${HOST:-0.0.0.0}:${PORT:-5000}/api/health"
@@ -138,6 +139,7 @@ case $mode in
         echo ""
         
         gunicorn -w $WORKERS \
+                 -k gthread --threads ${THREADS:-8} \
                  -b ${HOST:-0.0.0.0}:${PORT:-5000} \
                  --timeout $TIMEOUT \
                  --access-logfile - \
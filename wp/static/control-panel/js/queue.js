@@ -1,3 +1,11 @@
+// 事件流连续失败达到该次数后回退到定时拉取
+const STREAM_MAX_FAILURES = 3;
+const STREAM_RETRY_DELAY_MS = 3000;
+// 每个队列只加载第一页任务，其余通过计数器展示
+const QUEUE_PAGE_SIZE = 50;
+// 定时拉取时单次增量的最大任务数，超过则重新加载第一页
+const QUEUE_DELTA_LIMIT = 500;
+
 class QueueManager {
     constructor(controlPanel) {
         this.controlPanel = controlPanel;
@@ -6,6 +14,14 @@ class QueueManager {
         this.currentAccount = null;
         this.queueData = null;
         
+        // 队列事件流（SSE）：推送任务状态变化，替代定时拉取整个队列
+        this.streamController = null;
+        this.streamRetryTimer = null;
+        this.streamFailures = 0;
+        this.lastEventId = null;
+        this.snapshotVersion = null;
+        this.renderScheduled = false;
+        
         this.init();
     }
 
@@ -27,9 +43,9 @@ class QueueManager {
             autoRefreshToggle.addEventListener('change', (e) => {
                 this.autoRefreshEnabled = e.target.checked;
                 if (this.autoRefreshEnabled) {
-                    this.startAutoRefresh();
+                    this.startLiveUpdates();
                 } else {
-                    this.stopAutoRefresh();
+                    this.stopLiveUpdates();
                 }
             });
         }
@@ -69,14 +85,17 @@ class QueueManager {
             if (tab === 'queue') {
                 this.onQueueTabActivated();
             } else {
-                this.stopAutoRefresh();
+                this.stopLiveUpdates();
             }
         });
 
-        this.controlPanel.eventBus.on('accountChanged', (account) => {
+        this.controlPanel.eventBus.on('accountChanged', async (account) => {
             this.currentAccount = account;
             if (this.isQueueTabActive()) {
-                this.refreshQueues();
+                await this.refreshQueues();
+                if (this.isStreaming()) {
+                    this.connectStream();
+                }
             }
         });
 
@@ -87,7 +106,8 @@ class QueueManager {
         });
 
         this.controlPanel.eventBus.on('settingsUpdated', (settings) => {
-            if (settings.autoRefreshInterval && this.autoRefreshEnabled && this.isQueueTabActive()) {
+            // 刷新间隔只影响事件流不可用时的定时拉取
+            if (settings.autoRefreshInterval && this.refreshInterval && this.isQueueTabActive()) {
                 this.startAutoRefresh();
             }
         });
@@ -98,20 +118,206 @@ class QueueManager {
         return queueView && queueView.classList.contains('active');
     }
 
-    onQueueTabActivated() {
+    async onQueueTabActivated() {
         this.currentAccount = this.controlPanel.getSelectedAccount();
-        this.refreshQueues();
+        await this.refreshQueues();
         if (this.autoRefreshEnabled) {
+            this.startLiveUpdates();
+        }
+    }
+
+    startLiveUpdates() {
+        if (window.ReadableStream && window.TextDecoder && window.AbortController) {
+            this.streamFailures = 0;
+            this.connectStream();
+        } else {
             this.startAutoRefresh();
         }
     }
 
+    stopLiveUpdates() {
+        this.disconnectStream();
+        this.stopAutoRefresh();
+    }
+
+    isStreaming() {
+        return this.streamController !== null;
+    }
+
+    async connectStream() {
+        this.disconnectStream();
+        const controller = new AbortController();
+        this.streamController = controller;
+
+        // 从快照和已收到事件中较新的位置继续
+        const since = Math.max(this.lastEventId ?? -1, this.snapshotVersion ?? -1);
+        const params = new URLSearchParams();
+        if (since >= 0) {
+            params.set('since', since);
+        }
+        if (this.currentAccount) {
+            params.set('account', this.currentAccount);
+        }
+
+        try {
+            // 使用fetch读取事件流（EventSource不能携带 X-API-Key 请求头）
+            const response = await fetch(`/api/control/queues/stream?${params}`, {
+                headers: { 'X-API-Key': this.controlPanel.getApiKey() },
+                signal: controller.signal
+            });
+            if (!response.ok || !response.body) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            this.streamFailures = 0;
+            this.stopAutoRefresh();
+            await this.readEventStream(response.body.getReader());
+        } catch (error) {
+            if (controller.signal.aborted) {
+                return;
+            }
+            console.error('Queue event stream failed:', error);
+            this.streamFailures += 1;
+        }
+
+        if (controller.signal.aborted || this.streamController !== controller) {
+            return;
+        }
+
+        // 服务端到期关闭连接时立即重连；连续失败时回退到定时拉取
+        this.streamController = null;
+        if (this.streamFailures >= STREAM_MAX_FAILURES) {
+            this.startAutoRefresh();
+            return;
+        }
+        const delay = this.streamFailures ? STREAM_RETRY_DELAY_MS : 0;
+        this.streamRetryTimer = setTimeout(() => this.connectStream(), delay);
+    }
+
+    disconnectStream() {
+        if (this.streamRetryTimer) {
+            clearTimeout(this.streamRetryTimer);
+            this.streamRetryTimer = null;
+        }
+        if (this.streamController) {
+            const controller = this.streamController;
+            this.streamController = null;
+            controller.abort();
+        }
+    }
+
+    async readEventStream(reader) {
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                return;
+            }
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+                const message = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                this.dispatchStreamMessage(message);
+            }
+        }
+    }
+
+    dispatchStreamMessage(message) {
+        let eventType = 'message';
+        let eventId = null;
+        let data = '';
+
+        message.split('\n').forEach(line => {
+            if (line.startsWith(':')) {
+                return;  // 心跳
+            }
+            const separator = line.indexOf(':');
+            const field = separator >= 0 ? line.slice(0, separator) : line;
+            const value = separator >= 0 ? line.slice(separator + 1).replace(/^ /, '') : '';
+
+            if (field === 'id') {
+                eventId = Number(value);
+                this.lastEventId = eventId;
+            } else if (field === 'event') {
+                eventType = value;
+            } else if (field === 'data') {
+                data += value;
+            }
+        });
+
+        if (data) {
+            this.handleQueueEvent(eventType, JSON.parse(data), eventId);
+        }
+    }
+
+    handleQueueEvent(eventType, event, eventId) {
+        if (eventId !== null && this.snapshotVersion !== null && eventId <= this.snapshotVersion) {
+            return;  // 快照已包含该事件
+        }
+        if (eventType === 'reset') {
+            // 事件已不连续，重新拉取快照
+            this.refreshQueues(true);
+            return;
+        }
+
+        const accountData = this.queueData && this.queueData.accounts[event.account];
+        if (!accountData || !accountData.available) {
+            this.refreshQueues(true);
+            return;
+        }
+        const queueData = accountData[event.queue];
+
+        if (eventType === 'task') {
+            this.applyTaskUpdate(queueData, { ...event.task, index: event.index });
+            Object.entries(event.delta || {}).forEach(([status, change]) => {
+                queueData.status[status] = (queueData.status[status] || 0) + change;
+            });
+        } else if (eventType === 'queue') {
+            if (event.action === 'added' || event.action === 'cleared') {
+                // 任务列表整体变化，重新拉取快照
+                this.refreshQueues(true);
+                return;
+            }
+            Object.assign(queueData.status, event.status);
+        }
+
+        this.queueData.timestamp = new Date().toLocaleString();
+        this.scheduleRender();
+    }
+
+    applyTaskUpdate(queueData, task) {
+        // 只更新已加载的第一页；第一页未满时新任务追加到末尾
+        const tasks = queueData.queue;
+        const position = tasks.findIndex(item => item.index === task.index);
+        if (position >= 0) {
+            tasks[position] = task;
+        } else if (tasks.length < QUEUE_PAGE_SIZE) {
+            tasks.push(task);
+            tasks.sort((a, b) => a.index - b.index);
+        }
+    }
+
+    scheduleRender() {
+        // 同一帧内的多个事件只渲染一次
+        if (this.renderScheduled) {
+            return;
+        }
+        this.renderScheduled = true;
+        requestAnimationFrame(() => {
+            this.renderScheduled = false;
+            this.renderQueues();
+        });
+    }
+
     startAutoRefresh() {
         this.stopAutoRefresh();
         const interval = this.getRefreshInterval();
         this.refreshInterval = setInterval(() => {
             if (this.isQueueTabActive()) {
-                this.refreshQueues();
+                this.pollQueueChanges();
             }
         }, interval);
     }
@@ -123,14 +329,25 @@ class QueueManager {
         }
     }
 
-    async refreshQueues() {
-        this.showLoading();
+    buildQueuesUrl(params) {
+        const query = new URLSearchParams(params);
+        if (this.currentAccount) {
+            query.set('account', this.currentAccount);
+        }
+        return `/api/control/queues?${query}`;
+    }
+
+    async refreshQueues(silent = false) {
+        if (!silent) {
+            this.showLoading();
+        }
         
         try {
-            const response = await this.controlPanel.fetchAPI('/api/control/queues');
+            const response = await this.controlPanel.fetchAPI(this.buildQueuesUrl({ limit: QUEUE_PAGE_SIZE }));
             
             if (response.success && response.data) {
                 this.queueData = response.data;
+                this.snapshotVersion = response.data.version;
                 this.renderQueues();
                 this.showContent();
             } else {
@@ -142,6 +359,43 @@ class QueueManager {
         }
     }
 
+    async pollQueueChanges() {
+        // 定时拉取只取上次版本之后变化的任务
+        if (!this.queueData || this.snapshotVersion === null) {
+            return this.refreshQueues(true);
+        }
+
+        try {
+            const response = await this.controlPanel.fetchAPI(
+                this.buildQueuesUrl({ limit: QUEUE_DELTA_LIMIT, since: this.snapshotVersion })
+            );
+            if (!response.success || !response.data) {
+                return;
+            }
+
+            for (const [account, accountData] of Object.entries(response.data.accounts)) {
+                const current = this.queueData.accounts[account];
+                if (!accountData.available || !current || !current.available) {
+                    return this.refreshQueues(true);
+                }
+                for (const queueName of ['transfer', 'share']) {
+                    const delta = accountData[queueName];
+                    if (delta.reset || delta.has_more) {
+                        return this.refreshQueues(true);
+                    }
+                    delta.queue.forEach(task => this.applyTaskUpdate(current[queueName], task));
+                    current[queueName].status = delta.status;
+                }
+            }
+
+            this.snapshotVersion = response.data.version;
+            this.queueData.timestamp = response.data.timestamp;
+            this.renderQueues();
+        } catch (error) {
+            console.error('Failed to poll queue changes:', error);
+        }
+    }
+
     renderQueues() {
         if (!this.queueData || !this.currentAccount) {
             return;
@@ -178,7 +432,7 @@ class QueueManager {
             return;
         }
 
-        queue.slice(0, 50).forEach(task => {
+        queue.slice(0, QUEUE_PAGE_SIZE).forEach(task => {
             const row = document.createElement('tr');
             
             const statusBadge = this.createStatusBadge(task.status);
@@ -196,9 +450,10 @@ class QueueManager {
             tbody.appendChild(row);
         });
 
-        if (queue.length > 50) {
+        const total = status.total || queue.length;
+        if (total > QUEUE_PAGE_SIZE) {
             const row = document.createElement('tr');
-            row.innerHTML = `<td colspan="4" style="text-align: center; color: #757575;">显示前50条，共${queue.length}条任务</td>`;
+            row.innerHTML = `<td colspan="4" style="text-align: center; color: #757575;">显示前${QUEUE_PAGE_SIZE}条，共${total}条任务</td>`;
             tbody.appendChild(row);
         }
     }
@@ -220,7 +475,7 @@ class QueueManager {
             return;
         }
 
-        queue.slice(0, 50).forEach(task => {
+        queue.slice(0, QUEUE_PAGE_SIZE).forEach(task => {
             const row = document.createElement('tr');
             
             const statusBadge = this.createStatusBadge(task.status);
@@ -238,9 +493,10 @@ class QueueManager {
             tbody.appendChild(row);
         });
 
-        if (queue.length > 50) {
+        const total = status.total || queue.length;
+        if (total > QUEUE_PAGE_SIZE) {
             const row = document.createElement('tr');
-            row.innerHTML = `<td colspan="4" style="text-align: center; color: #757575;">显示前50条，共${queue.length}条任务</td>`;
+            row.innerHTML = `<td colspan="4" style="text-align: center; color: #757575;">显示前${QUEUE_PAGE_SIZE}条，共${total}条任务</td>`;
             tbody.appendChild(row);
         }
     }
@@ -281,7 +537,9 @@ class QueueManager {
             
             if (data.success) {
                 this.controlPanel.showToast(data.message || `转存${action}成功`, 'success');
-                this.refreshQueues();
+                if (!this.isStreaming()) {
+                    this.refreshQueues();
+                }
             } else {
                 this.controlPanel.showToast(data.error || `转存${action}失败`, 'error');
             }
@@ -314,7 +572,9 @@ class QueueManager {
             
             if (data.success) {
                 this.controlPanel.showToast(data.message || `分享${action}成功`, 'success');
-                this.refreshQueues();
+                if (!this.isStreaming()) {
+                    this.refreshQueues();
+                }
             } else {
                 this.controlPanel.showToast(data.error || `分享${action}失败`, 'error');
             }
@@ -30,6 +30,8 @@ class KnowledgeApp {
         this.apiKey = localStorage.getItem(API_KEY_STORAGE) || '';
         this.currentPage = 1;
         this.pageSize = 50;
+        // pageCursors[i] 为第 i+1 页的游标（第一页为 null）
+        this.pageCursors = [null];
         this.filters = {
             search: '',
             status: [],
@@ -150,6 +152,7 @@ class KnowledgeApp {
             const response = await this.fetchAPI('/tags');
             if (response.success) {
                 this.allTags = response.data.tags;
+                this.tagCounts = response.data.counts || {};
                 this.populateTagFilter();
             }
         } catch (error) {
@@ -163,7 +166,8 @@ class KnowledgeApp {
         this.allTags.forEach(tag => {
             const option = document.createElement('option');
             option.value = tag;
-            option.textContent = tag;
+            const count = this.tagCounts && this.tagCounts[tag];
+            option.textContent = count ? `${tag} (${count})` : tag;
             select.appendChild(option);
         });
     }
@@ -240,9 +244,16 @@ class KnowledgeApp {
             if (this.filters.dateFrom) params.append('date_from', this.filters.dateFrom);
             if (this.filters.dateTo) params.append('date_to', this.filters.dateTo);
 
+            if (this.currentPage === 1) {
+                this.pageCursors = [null];
+            }
+            const cursor = this.pageCursors[this.currentPage - 1];
+            if (cursor) params.append('cursor', cursor);
+
             const response = await this.fetchAPI(`/entries?${params}`);
             
             if (response.success) {
+                this.pageCursors[this.currentPage] = response.data.pagination.next_cursor || null;
                 this.renderTable(response.data.entries);
                 this.renderPagination(response.data.pagination);
                 this.updateResultsCount(response.data.pagination);
@@ -363,7 +374,7 @@ class KnowledgeApp {
             `第 ${pagination.page} / ${pagination.total_pages} 页 (共 ${pagination.total} 条)`;
         
         document.getElementById('prevPageBtn').disabled = pagination.page <= 1;
-        document.getElementById('nextPageBtn').disabled = pagination.page >= pagination.total_pages;
+        document.getElementById('nextPageBtn').disabled = !pagination.has_more;
         
         document.getElementById('paginationContainer').style.display = 'flex';
     }
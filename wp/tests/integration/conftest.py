@@ -134,6 +134,19 @@ class FakeCoreService:
             }
         ]
     
+    def get_queue_page(self, queue: str, status: str = None, offset: int = 0,
+                       limit: int = 100, since: int = None) -> Dict[str, Any]:
+        """Return one page of the fake queue (since returns no changes)."""
+        from queue_events import select_tasks
+        
+        if queue == 'transfer':
+            queue_status, tasks = self.get_transfer_status(), self.get_transfer_queue()
+        else:
+            queue_status, tasks = self.get_share_status(), self.get_share_queue()
+        queue_status = {key: value for key, value in queue_status.items() if key != 'tasks'}
+        page = select_tasks(tasks, [] if since is not None else None, status, offset, limit)
+        return {'status': queue_status, **page, 'reset': False}
+    
     def update_throttle(self, throttle_config: Dict[str, Any]):
         """Update throttler configuration (stub for testing)."""
         self.config['throttle'] = throttle_config
@@ -170,12 +183,13 @@ def fake_services(fake_accounts):
 @pytest.fixture
 def app_with_fakes(monkeypatch, fake_accounts, fake_services):
     """
-    Flask test app with monkeypatched load_accounts_from_env and get_or_create_service.
+    Flask test app with monkeypatched load_accounts_from_env, get_or_create_service
+    and get_cached_service.
     
     This fixture:
     - Uses testing config
     - Replaces account loading with fake data
-    - Replaces service creation with fake services
+    - Replaces service creation and the logged-in service cache with fake services
     - Ensures no real Baidu API calls
     """
     # Import server module - use sys.path manipulation to import from parent
@@ -212,6 +226,9 @@ def app_with_fakes(monkeypatch, fake_accounts, fake_services):
     
     monkeypatch.setattr(server_module, 'get_or_create_service', fake_get_or_create_service)
     
+    # Aggregation endpoints only read already logged-in services
+    monkeypatch.setattr(server_module, 'get_cached_service', lambda account: fake_services.get(account))
+    
     # Initialize accounts
     fake_load_accounts()
     
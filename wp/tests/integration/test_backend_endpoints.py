@@ -11,6 +11,7 @@ No real Baidu API calls are made - FakeCoreService provides stub data.
 """
 import pytest
 import json
+import time
 
 
 class TestHealthAndInfo:
@@ -369,14 +370,14 @@ class TestControlQueues:
         sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
         import server as server_module
         
-        original_get_or_create_service = server_module.get_or_create_service
+        original_get_cached_service = server_module.get_cached_service
         
-        def mock_get_or_create_service(account=None):
+        def mock_get_cached_service(account):
             if account == 'test_account':
                 return None  # Simulate unavailable service
-            return original_get_or_create_service(account)
+            return original_get_cached_service(account)
         
-        monkeypatch.setattr(server_module, 'get_or_create_service', mock_get_or_create_service)
+        monkeypatch.setattr(server_module, 'get_cached_service', mock_get_cached_service)
         
         response = client.get('/api/control/queues', headers=auth_headers)
         assert response.status_code == 200
@@ -390,6 +391,232 @@ class TestControlQueues:
             assert 'error' in accounts['test_account']
 
 
+class TestControlQueuesPaged:
+    """Test pagination, filtering and incremental reads of the queue endpoint."""
+    
+    def test_paged_response(self, client, auth_headers):
+        response = client.get('/api/control/queues?account=test_account&queue=transfer&limit=1',
+                              headers=auth_headers)
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert isinstance(data['version'], int)
+        assert list(data['accounts']) == ['test_account']
+        
+        transfer = data['accounts']['test_account']['transfer']
+        assert 'share' not in data['accounts']['test_account']
+        assert [task['index'] for task in transfer['queue']] == [0]
+        assert transfer['total'] == 2
+        assert transfer['has_more'] is True
+        assert transfer['reset'] is False
+        assert transfer['status']['total'] == 10
+        assert 'tasks' not in transfer['status']
+    
+    def test_status_filter(self, client, auth_headers):
+        response = client.get('/api/control/queues?status=completed', headers=auth_headers)
+        share = response.get_json()['data']['accounts']['test_account']['share']
+        assert [task['status'] for task in share['queue']] == ['completed']
+        assert share['total'] == 1
+    
+    def test_since_from_future_version_resets(self, client, auth_headers):
+        response = client.get('/api/control/queues?since=999999999', headers=auth_headers)
+        transfer = response.get_json()['data']['accounts']['test_account']['transfer']
+        assert transfer['reset'] is True
+        assert transfer['total'] == 2
+    
+    @pytest.mark.parametrize('query', ['limit=abc', 'since=x', 'status=done', 'queue=upload'])
+    def test_invalid_parameters(self, client, auth_headers, query):
+        response = client.get(f'/api/control/queues?{query}', headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+    
+    def test_unknown_account(self, client, auth_headers):
+        response = client.get('/api/control/queues?account=missing', headers=auth_headers)
+        assert response.status_code == 404
+
+
+class TestAggregationUsesLoginCache:
+    """Aggregation endpoints read logged-in services only and never log in."""
+    
+    @pytest.fixture
+    def no_login(self, monkeypatch):
+        import server as server_module
+        
+        def fail_login(account=None):
+            raise AssertionError(f'unexpected login for {account}')
+        
+        monkeypatch.setattr(server_module, 'get_or_create_service', fail_login)
+        return server_module
+    
+    @pytest.mark.parametrize('url', ['/api/control/overview', '/api/control/queues', '/api/stats'])
+    def test_no_login_in_request(self, client, auth_headers, no_login, url):
+        response = client.get(url, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['success'] is True
+    
+    def test_overview_includes_login_health(self, client, auth_headers, no_login):
+        response = client.get('/api/control/overview', headers=auth_headers)
+        data = response.get_json()['data']
+        assert isinstance(data['health']['accounts'], dict)
+        assert data['queues_summary']['total_transfer_completed'] == 10
+    
+    def test_stats_for_account_not_logged_in(self, client, auth_headers, no_login, monkeypatch):
+        monkeypatch.setattr(no_login, 'get_cached_service', lambda account: None)
+        response = client.get('/api/stats?account=test_account', headers=auth_headers)
+        assert response.status_code == 503
+        assert 'login' in response.get_json()
+        
+        response = client.get('/api/stats?account=missing', headers=auth_headers)
+        assert response.status_code == 404
+
+
+class TestQueueEventStream:
+    """Test the /api/control/queues/stream SSE endpoint."""
+    
+    def test_stream_requires_auth(self, client):
+        """Event stream should require authentication."""
+        response = client.get('/api/control/queues/stream')
+        assert response.status_code == 401
+    
+    def test_stream_rejects_invalid_since(self, client, auth_headers):
+        """A non-integer since should return 400."""
+        response = client.get('/api/control/queues/stream?since=abc', headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_stream_pushes_events_after_snapshot(self, client, auth_headers, monkeypatch):
+        """Events published after the snapshot version are streamed in order."""
+        import server as server_module
+        
+        monkeypatch.setattr(server_module.config, 'QUEUE_EVENTS_HEARTBEAT_SEC', 0.01)
+        monkeypatch.setattr(server_module.config, 'QUEUE_EVENTS_MAX_STREAM_SEC', 0.05)
+        
+        snapshot = client.get('/api/control/queues', headers=auth_headers).get_json()
+        version = snapshot['data']['version']
+        
+        bus = server_module.queue_events
+        bus.publish('test_account', 'transfer', 'task', {'index': 0, 'status': 'running'})
+        bus.publish('test_account2', 'share', 'queue', {'action': 'paused'})
+        
+        response = client.get(
+            f'/api/control/queues/stream?since={version}&account=test_account', headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        
+        body = response.get_data(as_text=True)
+        assert f'id: {version + 1}\nevent: task\n' in body
+        assert '"status": "running"' in body
+        assert 'event: queue' not in body
+
+
+class TestMetricsEndpoint:
+    """Test the Prometheus /metrics endpoint."""
+    
+    @pytest.fixture
+    def metrics_enabled(self, monkeypatch):
+        import metrics
+        monkeypatch.setattr(metrics.registry, 'enabled', True)
+        return metrics
+    
+    def test_metrics_requires_auth(self, client, metrics_enabled):
+        """Metrics should require an API key."""
+        assert client.get('/metrics').status_code == 401
+    
+    def test_metrics_disabled_returns_404(self, client, auth_headers, monkeypatch):
+        """Metrics are only served when performance monitoring is enabled."""
+        import metrics
+        monkeypatch.setattr(metrics.registry, 'enabled', False)
+        response = client.get('/metrics', headers=auth_headers)
+        assert response.status_code == 404
+    
+    def test_metrics_exposes_requests_and_queues(self, client, auth_headers, fake_services, metrics_enabled,
+                                                 monkeypatch):
+        """Request latency and queue depths of logged-in accounts appear in the Prometheus output."""
+        import server as server_module
+        monkeypatch.setattr(server_module, 'services', fake_services)
+        fake_services['test_account'].transfer_queue.append({'status': 'pending'})
+        client.get('/api/health')
+        
+        response = client.get('/metrics', headers={'Authorization': f"Bearer {auth_headers['X-API-Key']}"})
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain; version=0.0.4')
+        
+        body = response.get_data(as_text=True)
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        assert 'http_request_duration_seconds_count{method="GET",endpoint="/api/health",status="200"}' in body
+        assert 'queue_tasks{account="test_account",queue="transfer",status="pending"} 1' in body
+
+
+class TestProfilerEndpoints:
+    """Test the sampling profiler control endpoints."""
+    
+    def test_profiler_requires_auth(self, client):
+        """Profiler endpoints should require an API key."""
+        assert client.post('/api/control/profiler/start').status_code == 401
+        assert client.get('/api/control/profiler/stacks').status_code == 401
+    
+    def test_start_stop_returns_collapsed_stacks(self, client, auth_headers):
+        """Starting then stopping returns collapsed stacks for the process threads."""
+        response = client.post('/api/control/profiler/start', json={'interval_ms': 1}, headers=auth_headers)
+        assert response.status_code == 200
+        assert response.get_json()['data']['running'] is True
+        
+        try:
+            response = client.post('/api/control/profiler/start', json={}, headers=auth_headers)
+            assert response.status_code == 409
+            time.sleep(0.05)
+        finally:
+            response = client.post('/api/control/profiler/stop', headers=auth_headers)
+        
+        data = response.get_json()['data']
+        assert data['running'] is False
+        assert data['samples'] > 0
+        assert data['collapsed'].strip()
+        
+        response = client.get('/api/control/profiler/stacks', headers=auth_headers)
+        assert response.mimetype == 'text/plain'
+        assert response.get_data(as_text=True) == data['collapsed']
+    
+    def test_start_rejects_invalid_interval(self, client, auth_headers):
+        """A non-numeric interval should return 400."""
+        response = client.post('/api/control/profiler/start', json={'interval_ms': 'fast'}, headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestOperationTimeseries:
+    """Test the operation_logs time-series endpoint."""
+    
+    def test_timeseries_requires_auth(self, client):
+        """The time-series endpoint should require an API key."""
+        assert client.get('/api/control/operations/timeseries').status_code == 401
+    
+    def test_timeseries_passes_filters(self, client, auth_headers, monkeypatch):
+        """Query parameters are forwarded and the writer status is attached."""
+        import server as server_module
+        
+        captured = {}
+        
+        def fake_query(config, since_ts, until_ts, bucket_sec=300, account=None, operation=None):
+            captured.update(window=until_ts - since_ts, bucket_sec=bucket_sec, account=account, operation=operation)
+            return {'bucket_sec': bucket_sec, 'since': since_ts, 'until': until_ts, 'series': {}}
+        
+        monkeypatch.setattr(server_module, 'query_timeseries', fake_query)
+        response = client.get(
+            '/api/control/operations/timeseries?account=test_account&operation=share&hours=2&bucket_sec=600',
+            headers=auth_headers
+        )
+        
+        assert response.status_code == 200
+        data = response.get_json()['data']
+        assert captured == {'window': 7200, 'bucket_sec': 600, 'account': 'test_account', 'operation': 'share'}
+        assert set(data['writer']) == {'buffered', 'written', 'dropped'}
+    
+    def test_timeseries_rejects_invalid_parameters(self, client, auth_headers):
+        """Out-of-range buckets, windows and operations return 400."""
+        for query in ('bucket_sec=5', 'hours=0', 'hours=abc', 'operation=delete'):
+            response = client.get(f'/api/control/operations/timeseries?{query}', headers=auth_headers)
+            assert response.status_code == 400, query
+
+
 class TestSettingsEndpoints:
     """Test settings management endpoints."""
     
@@ -836,3 +1063,18 @@ class TestSettingsEndpoints:
         assert response.status_code == 200
         # Verify apply_settings was called on services
         assert len(calls) >= 0  # May be 0 if no services are currently initialized
+
+
+class TestLinkExtraction:
+    """Test /api/links/extract request handling"""
+    
+    def test_parallel_mode_is_cli_only(self, client, auth_headers):
+        response = client.post(
+            '/api/links/extract',
+            json={'parallel': True, 'workers': 10000, 'batch_size': 'abc'},
+            headers=auth_headers
+        )
+        assert response.status_code == 400
+        data = response.get_json()
+        assert data['success'] is False
+        assert 'link_extractor_service.py' in data['message']
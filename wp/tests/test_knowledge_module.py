@@ -15,7 +15,10 @@ from unittest.mock import patch
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from knowledge_repository import KnowledgeRepository
+from article_content import encode_content
+from article_tags import migrate_article_tags
 from config import Config
+from knowledge_search import drop_article_search_index, ensure_search_index
 
 
 class TestKnowledgeRepository(unittest.TestCase):
@@ -56,7 +59,8 @@ class TestKnowledgeRepository(unittest.TestCase):
         
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
-                article_id TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                article_id TEXT UNIQUE NOT NULL,
                 url TEXT NOT NULL,
                 title TEXT,
                 content TEXT,
@@ -124,6 +128,9 @@ class TestKnowledgeRepository(unittest.TestCase):
         """, test_links)
         
         conn.commit()
+        # 测试库按旧结构建表，由迁移补充并回填标签列、建立全文索引
+        migrate_article_tags(conn, 'sqlite')
+        ensure_search_index(conn, 'sqlite')
         conn.close()
     
     def test_tag_derivation(self):
@@ -165,6 +172,37 @@ class TestKnowledgeRepository(unittest.TestCase):
             result_page2['entries'][0]['article_id']
         )
     
+    def test_list_entries_cursor_pagination(self):
+        """测试游标分页遍历全部条目且不重复"""
+        for sort_by in ('created_at', 'title', 'status'):
+            with self.subTest(sort_by=sort_by):
+                seen = []
+                cursor = None
+                while True:
+                    result = self.repo.list_entries(limit=2, sort_by=sort_by, cursor=cursor)
+                    seen.extend(e['article_id'] for e in result['entries'])
+                    if not result['has_more']:
+                        self.assertIsNone(result['next_cursor'])
+                        break
+                    cursor = result['next_cursor']
+                
+                full = self.repo.list_entries(limit=10, sort_by=sort_by)
+                self.assertEqual(seen, [e['article_id'] for e in full['entries']])
+    
+    def test_list_entries_cursor_errors(self):
+        """测试无效游标和排序不匹配的游标"""
+        with self.assertRaises(ValueError):
+            self.repo.list_entries(limit=2, cursor='not-a-cursor')
+        
+        cursor = self.repo.list_entries(limit=2)['next_cursor']
+        with self.assertRaises(ValueError):
+            self.repo.list_entries(limit=2, sort_by='title', cursor=cursor)
+    
+    def test_list_entries_count_modes(self):
+        """测试总数统计方式"""
+        self.assertIsNone(self.repo.list_entries(limit=2, count_mode='none')['total'])
+        self.assertEqual(self.repo.list_entries(limit=2, count_mode='cached')['total'], 5)
+    
     def test_list_entries_search(self):
         """测试全文搜索功能"""
         result = self.repo.list_entries(limit=10, offset=0, search='技术文章')
@@ -179,6 +217,110 @@ class TestKnowledgeRepository(unittest.TestCase):
         self.assertEqual(len(result['entries']), 1)
         self.assertIn('new3', result['entries'][0]['new_link'])
     
+    def test_search_without_index_falls_back_to_like(self):
+        """测试缺少全文索引时回退到LIKE检索，读取路径不建立索引"""
+        conn = sqlite3.connect(self.test_db_path)
+        drop_article_search_index(conn)
+        conn.close()
+        
+        repo = KnowledgeRepository(config=self.test_config)
+        result = repo.list_entries(limit=10, search='技术内容')
+        self.assertEqual([e['article_id'] for e in result['entries']], ['art001'])
+        
+        conn = sqlite3.connect(self.test_db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        conn.close()
+        self.assertNotIn('articles_fts', tables)
+    
+    def test_search_uses_fulltext_index(self):
+        """测试检索使用全文索引，并覆盖文章正文"""
+        result = self.repo.list_entries(limit=10, search='技术内容')
+        self.assertEqual([e['article_id'] for e in result['entries']], ['art001'])
+        
+        conn = sqlite3.connect(self.test_db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        conn.close()
+        self.assertIn('articles_fts', tables)
+        self.assertIn('extracted_links_fts', tables)
+    
+    def test_search_index_follows_writes(self):
+        """测试全文索引随文章和链接的写入增量同步"""
+        self.repo.list_entries(limit=1, search='warmup')
+        
+        # 全文索引触发器只使用普通SQL，未注册任何函数的连接也能直接写入
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute(
+            "INSERT INTO articles (article_id, url, title, content) VALUES (?, ?, ?, ?)",
+            ('art006', 'https://lewz.cn/jprj/technology/article6', '新文章', '新内容')
+        )
+        conn.execute(
+            "INSERT INTO extracted_links (article_id, original_link, status) VALUES (?, ?, ?)",
+            ('art006', 'https://pan.baidu.com/s/test6', 'pending')
+        )
+        conn.execute("UPDATE extracted_links SET new_title = '更新后的分享标题' WHERE article_id = 'art002'")
+        conn.commit()
+        conn.close()
+        
+        repo = KnowledgeRepository(config=self.test_config)
+        self.assertEqual(repo.list_entries(search='test6')['total'], 1)
+        self.assertEqual(
+            [e['article_id'] for e in repo.list_entries(search='更新后的分享')['entries']],
+            ['art002']
+        )
+    
+    def test_search_matches_like_semantics(self):
+        """测试全文检索与LIKE检索结果一致"""
+        like_repo = KnowledgeRepository(config=self.test_config)
+        like_repo._search_index_available = False
+        
+        for term in ['技术文章', 'pan.baidu.com/s/new', 'New Title', 'TEST3', '技术']:
+            with self.subTest(term=term):
+                fts_result = self.repo.list_entries(limit=10, search=term)
+                like_result = like_repo.list_entries(limit=10, search=term)
+                self.assertEqual(
+                    [e['article_id'] for e in fts_result['entries']],
+                    [e['article_id'] for e in like_result['entries']]
+                )
+                self.assertEqual(fts_result['total'], like_result['total'])
+    
+    def test_search_compressed_content(self):
+        """测试未启用全文索引时压缩存储的正文可被LIKE检索命中"""
+        content = '压缩正文里的独特关键词。' + '填充内容' * 100
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute(
+            "INSERT INTO articles (article_id, url, title, content) VALUES (?, ?, ?, ?)",
+            ('art007', 'https://lewz.cn/jprj/technology/article7', '压缩文章', encode_content(content, 'zlib'))
+        )
+        conn.execute(
+            "INSERT INTO extracted_links (article_id, original_link, status) VALUES (?, ?, ?)",
+            ('art007', 'https://pan.baidu.com/s/test7', 'pending')
+        )
+        conn.commit()
+        stored = conn.execute("SELECT content FROM articles WHERE article_id = 'art007'").fetchone()[0]
+        self.assertIsInstance(stored, bytes)
+        conn.close()
+        
+        like_repo = KnowledgeRepository(config=self.test_config)
+        like_repo._search_index_available = False
+        result = like_repo.list_entries(limit=10, search='独特关键词')
+        self.assertEqual([e['article_id'] for e in result['entries']], ['art007'])
+    
+    def test_search_relevance_sort(self):
+        """测试按相关度排序并使用游标翻页"""
+        full = self.repo.list_entries(limit=10, search='pan.baidu.com/s/new', sort_by='relevance')
+        self.assertNotIn('error', full)
+        self.assertEqual(full['total'], 3)
+        
+        seen = []
+        cursor = None
+        while True:
+            page = self.repo.list_entries(limit=1, search='pan.baidu.com/s/new', sort_by='relevance', cursor=cursor)
+            seen.extend(e['article_id'] for e in page['entries'])
+            if not page['has_more']:
+                break
+            cursor = page['next_cursor']
+        self.assertEqual(seen, [e['article_id'] for e in full['entries']])
+    
     def test_list_entries_status_filter(self):
         """测试状态过滤"""
         result_completed = self.repo.list_entries(limit=10, offset=0, status='completed')
@@ -209,6 +351,36 @@ class TestKnowledgeRepository(unittest.TestCase):
         self.assertEqual(len(result_uncategorized['entries']), 1)
         self.assertEqual(result_uncategorized['entries'][0]['tag'], '未分类')
     
+    def test_list_entries_tag_filter_pagination(self):
+        """测试标签过滤在SQL中完成，分页和总数正确"""
+        page1 = self.repo.list_entries(limit=1, tag='technology')
+        self.assertEqual(page1['total'], 2)
+        self.assertEqual(len(page1['entries']), 1)
+        self.assertTrue(page1['has_more'])
+        
+        page2 = self.repo.list_entries(limit=1, tag='technology', cursor=page1['next_cursor'])
+        self.assertEqual(len(page2['entries']), 1)
+        self.assertFalse(page2['has_more'])
+        self.assertNotEqual(page1['entries'][0]['article_id'], page2['entries'][0]['article_id'])
+    
+    def test_tag_column_migrated_on_demand(self):
+        """测试旧schema在首次查询时自动添加并回填tag列"""
+        self.repo.list_entries(limit=1)
+        
+        conn = sqlite3.connect(self.test_db_path)
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(articles)")]
+        tags = dict(conn.execute("SELECT article_id, tag FROM articles"))
+        conn.close()
+        
+        self.assertIn('tag', columns)
+        self.assertEqual(tags['art001'], 'technology')
+        self.assertEqual(tags['art004'], '未分类')
+    
+    def test_tag_counts(self):
+        """测试按标签统计条目数量"""
+        counts = self.repo.tag_counts()
+        self.assertEqual(counts, {'technology': 2, 'business': 1, 'entertainment': 1, '未分类': 1})
+    
     def test_list_entries_date_filter(self):
         """测试日期范围过滤"""
         result = self.repo.list_entries(
@@ -328,6 +500,38 @@ class TestKnowledgeRepository(unittest.TestCase):
         total = sum(summaries.values())
         self.assertEqual(total, 5)
     
+    def test_get_entry_returns_all_links(self):
+        """测试按文章ID获取条目及其全部链接"""
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute("""
+            INSERT INTO extracted_links (article_id, original_link, status, created_at, updated_at)
+            VALUES ('art001', 'https://pan.baidu.com/s/extra', 'pending', '2024-02-01 09:00:00', '2024-02-01 09:00:00')
+        """)
+        conn.commit()
+        conn.close()
+        
+        entry = self.repo.get_entry('art001')
+        
+        self.assertIsNotNone(entry)
+        self.assertEqual(entry['article_id'], 'art001')
+        self.assertEqual(entry['original_link'], 'https://pan.baidu.com/s/extra')
+        self.assertEqual(entry['tag'], 'technology')
+        self.assertEqual(
+            [link['original_link'] for link in entry['links']],
+            ['https://pan.baidu.com/s/extra', 'https://pan.baidu.com/s/test1']
+        )
+    
+    def test_get_entry_exact_match_only(self):
+        """测试按文章ID精确匹配，不受其他文章内容干扰"""
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute("UPDATE articles SET title = '引用 art003 的文章' WHERE article_id = 'art005'")
+        conn.commit()
+        conn.close()
+        
+        self.assertEqual(self.repo.get_entry('art003')['article_id'], 'art003')
+        self.assertIsNone(self.repo.get_entry('art'))
+        self.assertIsNone(self.repo.get_entry('nonexistent'))
+    
     def test_prepare_export_rows_all_fields(self):
         """测试导出所有字段"""
         fields = [
@@ -366,6 +570,23 @@ class TestKnowledgeRepository(unittest.TestCase):
         for row in rows:
             self.assertEqual(row['status'], 'completed')
     
+    def test_iter_export_rows_chunked(self):
+        """测试分块流式导出与一次性导出结果一致"""
+        fields = ['article_id', 'status', 'tag']
+        expected = self.repo.prepare_export_rows(fields)
+        
+        rows = list(self.repo.iter_export_rows(fields, chunk_size=2))
+        self.assertEqual(rows, expected)
+        self.assertEqual(len(rows), 5)
+        
+        filtered = list(self.repo.iter_export_rows(fields, filters={'tag': 'technology'}, chunk_size=1))
+        self.assertEqual([r['article_id'] for r in filtered], ['art005', 'art001'])
+    
+    def test_iter_export_rows_invalid_fields(self):
+        """测试非法字段在开始迭代前立即抛出异常"""
+        with self.assertRaises(ValueError):
+            self.repo.iter_export_rows(['article_id', 'content'])
+    
     def test_prepare_export_rows_invalid_fields(self):
         """测试非法字段抛出异常"""
         invalid_fields = ['article_id', 'invalid_field', 'another_invalid']
@@ -419,6 +640,9 @@ class TestKnowledgeAPI(unittest.TestCase):
         
         self.repo_patcher = patch('knowledge_api.get_knowledge_repository', side_effect=get_test_repo)
         self.repo_patcher.start()
+        
+        from response_cache import knowledge_cache
+        knowledge_cache.invalidate()
     
     def tearDown(self):
         """每个测试后清理"""
@@ -435,7 +659,8 @@ class TestKnowledgeAPI(unittest.TestCase):
         
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS articles (
-                article_id TEXT PRIMARY KEY,
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                article_id TEXT UNIQUE NOT NULL,
                 url TEXT NOT NULL,
                 title TEXT,
                 content TEXT,
@@ -486,6 +711,8 @@ class TestKnowledgeAPI(unittest.TestCase):
         ])
         
         conn.commit()
+        migrate_article_tags(conn, 'sqlite')
+        ensure_search_index(conn, 'sqlite')
         conn.close()
     
     def test_entries_without_auth(self):
@@ -581,6 +808,7 @@ class TestKnowledgeAPI(unittest.TestCase):
         self.assertIn('tags', data['data'])
         self.assertIn('count', data['data'])
         self.assertIsInstance(data['data']['tags'], list)
+        self.assertEqual(sorted(data['data']['counts']), data['data']['tags'])
     
     def test_statuses_endpoint(self):
         """测试获取状态统计"""
@@ -624,6 +852,56 @@ class TestKnowledgeAPI(unittest.TestCase):
         
         self.assertNotIn('original_link', header_line)
     
+    def test_export_csv_gzip(self):
+        """测试gzip压缩导出"""
+        import gzip
+        
+        plain = self.client.get('/api/knowledge/export', headers=self.headers)
+        response = self.client.get('/api/knowledge/export?compression=gzip', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/gzip')
+        self.assertIn('.csv.gz', response.headers.get('Content-Disposition', ''))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+        
+        bad = self.client.get('/api/knowledge/export?compression=zip', headers=self.headers)
+        self.assertEqual(bad.status_code, 400)
+    
+    def test_export_ndjson(self):
+        """测试NDJSON导出"""
+        import json
+        
+        response = self.client.get('/api/knowledge/export?format=ndjson&fields=article_id,status',
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertIn('.ndjson', response.headers.get('Content-Disposition', ''))
+        
+        lines = response.data.decode('utf-8').splitlines()
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            self.assertEqual(set(json.loads(line)), {'article_id', 'status'})
+        
+        bad = self.client.get('/api/knowledge/export?format=xlsx', headers=self.headers)
+        self.assertEqual(bad.status_code, 400)
+    
+    def test_export_parquet(self):
+        """测试Parquet导出（需要pyarrow）"""
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            self.skipTest('pyarrow未安装')
+        
+        csv_lines = self.client.get('/api/knowledge/export', headers=self.headers).data \
+            .decode('utf-8-sig').strip().splitlines()
+        response = self.client.get('/api/knowledge/export?format=parquet', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/vnd.apache.parquet')
+        
+        table = pyarrow.parquet.read_table(pyarrow.BufferReader(response.data))
+        self.assertEqual(table.num_rows, len(csv_lines) - 1)
+        self.assertEqual(table.column_names, KnowledgeRepository.ALLOWED_EXPORT_FIELDS)
+    
     def test_export_csv_with_filters(self):
         """测试带过滤条件的导出"""
         response = self.client.get(
@@ -648,6 +926,52 @@ class TestKnowledgeAPI(unittest.TestCase):
         data = response.get_json()
         self.assertFalse(data['success'])
     
+    def test_tags_etag_and_invalidation(self):
+        """测试只读接口的响应缓存、ETag/304和写入后失效"""
+        from knowledge_repository import invalidate_knowledge_cache
+        
+        first = self.client.get('/api/knowledge/tags', headers=self.headers)
+        self.assertEqual(first.headers.get('X-Cache'), 'MISS')
+        etag = first.headers.get('ETag')
+        self.assertTrue(etag)
+        
+        second = self.client.get('/api/knowledge/tags', headers=self.headers)
+        self.assertEqual(second.headers.get('X-Cache'), 'HIT')
+        self.assertEqual(second.data, first.data)
+        
+        not_modified = self.client.get('/api/knowledge/tags',
+                                       headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        
+        conn = sqlite3.connect(self.test_db_path)
+        conn.execute("""
+            INSERT INTO articles (article_id, url, title, content, tag)
+            VALUES ('art_new', 'https://lewz.cn/jprj/science/new', '新文章', '内容', 'science')
+        """)
+        conn.execute("""
+            INSERT INTO extracted_links (article_id, original_link, status)
+            VALUES ('art_new', 'https://pan.baidu.com/s/new', 'pending')
+        """)
+        conn.commit()
+        conn.close()
+        
+        stale = self.client.get('/api/knowledge/tags', headers=self.headers)
+        self.assertNotIn('science', stale.get_json()['data']['tags'])
+        
+        invalidate_knowledge_cache()
+        fresh = self.client.get('/api/knowledge/tags', headers={**self.headers, 'If-None-Match': etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn('science', fresh.get_json()['data']['tags'])
+    
+    def test_entry_detail(self):
+        """测试获取条目详情"""
+        response = self.client.get('/api/knowledge/entry/art001', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        
+        data = response.get_json()['data']
+        self.assertEqual(data['article_id'], 'art001')
+        self.assertEqual(len(data['links']), 1)
+    
     def test_entry_detail_not_found(self):
         """测试获取不存在的条目返回404"""
         response = self.client.get(
@@ -0,0 +1,104 @@
+"""
+Unit tests for background account logins.
+Tests parallel logins, sharing an in-flight login, the health cache and
+the retry interval after a failed login.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from account_logins import AccountLoginPool
+
+
+class FakeLogin:
+    """Login function that blocks until released and counts calls per account."""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.release = threading.Event()
+        self.calls = {}
+        self.lock = threading.Lock()
+
+    def __call__(self, account):
+        with self.lock:
+            self.calls[account] = self.calls.get(account, 0) + 1
+        self.release.wait(5)
+        if account in self.failing:
+            return None, 'Cookie无效'
+        return f'service:{account}', ''
+
+
+class TestAccountLoginPool:
+    """Test AccountLoginPool."""
+
+    def test_logins_run_in_parallel(self):
+        login = FakeLogin()
+        pool = AccountLoginPool(login, max_workers=4)
+        try:
+            assert pool.submit_all(['a', 'b', 'c']) == 3
+            # 全部账户同时在登录，状态缓存立即可读
+            deadline = time.monotonic() + 5
+            while sum(login.calls.values()) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert sum(login.calls.values()) == 3
+            assert {state['state'] for state in pool.health().values()} == {'pending'}
+
+            login.release.set()
+            assert pool.login('a') == 'service:a'
+            assert pool.submit('b').result(5) == ('service:b', '')
+        finally:
+            pool.shutdown(wait=True)
+
+        health = pool.health('c')
+        assert health['state'] == 'ready'
+        assert health['attempts'] == 1
+        assert health['login_sec'] is not None
+
+    def test_blocking_login_shares_inflight_login(self):
+        login = FakeLogin()
+        pool = AccountLoginPool(login)
+        try:
+            future = pool.submit('a')
+            assert pool.submit('a') is future
+
+            results = []
+            waiter = threading.Thread(target=lambda: results.append(pool.login('a')))
+            waiter.start()
+            login.release.set()
+            waiter.join(5)
+        finally:
+            pool.shutdown(wait=True)
+
+        assert results == ['service:a']
+        assert login.calls == {'a': 1}
+
+    def test_failed_login_backoff(self):
+        login = FakeLogin(failing={'a'})
+        login.release.set()
+        pool = AccountLoginPool(login, retry_interval_sec=60)
+
+        assert pool.login('a') is None
+        health = pool.health('a')
+        assert (health['state'], health['error']) == ('failed', 'Cookie无效')
+        assert '_failed_at' not in health
+
+        # 重试间隔内后台登录不再发起，强制登录（接口需要账户时）仍会重试
+        assert pool.submit('a') is None
+        assert pool.login('a') is None
+        assert login.calls == {'a': 2}
+
+        pool.retry_interval_sec = 0
+        assert pool.submit('a').result(5) == (None, 'Cookie无效')
+        pool.shutdown(wait=True)
+
+    def test_login_exception_recorded(self):
+        def broken(account):
+            raise RuntimeError('network down')
+
+        pool = AccountLoginPool(broken)
+        assert pool.login('a') is None
+        assert 'network down' in pool.health('a')['error']
+        assert pool.health('unknown') == {'state': None}
@@ -0,0 +1,248 @@
+"""
+Unit tests for article content storage.
+Tests the compression codec, crawl-time previews, the content migration
+for existing databases and that article lists no longer read the body.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from article_content import (
+    CONTENT_PREVIEW_LENGTH, decode_content, encode_content, make_preview,
+    migrate_article_content, register_sqlite_functions, resolve_compression
+)
+
+LONG_TEXT = '百度网盘链接：https://pan.baidu.com/s/1abc 提取码：abc1\n' * 50
+
+
+@pytest.fixture
+def no_fts(monkeypatch):
+    """Disable the full-text index so SQLite bodies are stored compressed."""
+    from config import Config
+    monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', False)
+
+
+class TestCodec:
+    """Test encode_content and decode_content."""
+
+    def test_zlib_round_trip(self):
+        encoded = encode_content(LONG_TEXT, 'zlib')
+        assert isinstance(encoded, bytes)
+        assert len(encoded) * 5 < len(LONG_TEXT.encode('utf-8'))
+        assert decode_content(encoded) == LONG_TEXT
+
+    def test_plain_text_passthrough(self):
+        assert encode_content(LONG_TEXT, 'none') == LONG_TEXT
+        assert encode_content('短文本', 'zlib') == '短文本'
+        assert encode_content(None, 'zlib') is None
+        assert decode_content(LONG_TEXT) == LONG_TEXT
+        assert decode_content(None) is None
+
+    def test_uncompressed_blob_decoded_as_utf8(self):
+        assert decode_content('正文'.encode('utf-8')) == '正文'
+
+    def test_zstd_round_trip(self):
+        pytest.importorskip('zstandard')
+        encoded = encode_content(LONG_TEXT, 'zstd')
+        assert decode_content(encoded) == LONG_TEXT
+
+    def test_resolve_compression(self, no_fts):
+        assert resolve_compression('mysql', 'zlib') == 'none'
+        assert resolve_compression('sqlite', 'ZLIB') == 'zlib'
+        assert resolve_compression('sqlite', 'lz4') == 'zlib'
+
+    def test_no_compression_with_fulltext_index(self):
+        assert resolve_compression('sqlite', 'zlib') == 'none'
+
+    def test_preview(self):
+        assert make_preview(LONG_TEXT) == LONG_TEXT[:CONTENT_PREVIEW_LENGTH]
+        assert make_preview(None) is None
+
+    def test_sql_function(self):
+        conn = sqlite3.connect(':memory:')
+        register_sqlite_functions(conn)
+        assert conn.execute("SELECT article_text(?)", (encode_content(LONG_TEXT, 'zlib'),)).fetchone()[0] == LONG_TEXT
+        conn.close()
+
+
+class TestMigration:
+    """Test migrate_article_content on an existing database."""
+
+    def _legacy_db(self, tmp_path):
+        from init_db import migrate_database
+
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'content.db'))
+        migrate_database(conn, 'sqlite', target=4)
+        conn.executemany(
+            "INSERT INTO articles (article_id, url, title, content) VALUES (?, ?, ?, ?)",
+            [(f'a{i}', f'https://lewz.cn/jprj/tech/{i}', f't{i}', f'第{i}篇 ' + LONG_TEXT) for i in range(30)]
+        )
+        conn.commit()
+        return conn
+
+    def test_backfills_preview_and_compresses(self, tmp_path, no_fts):
+        conn = self._legacy_db(tmp_path)
+        try:
+            assert migrate_article_content(conn, 'sqlite', batch_size=7) == 30
+
+            content, preview = conn.execute(
+                "SELECT content, content_preview FROM articles WHERE article_id = 'a3'"
+            ).fetchone()
+            assert isinstance(content, bytes)
+            assert decode_content(content) == '第3篇 ' + LONG_TEXT
+            assert preview == ('第3篇 ' + LONG_TEXT)[:CONTENT_PREVIEW_LENGTH]
+
+            assert migrate_article_content(conn, 'sqlite') == 0
+        finally:
+            conn.close()
+
+    def test_fulltext_index_keeps_plain_content(self, tmp_path):
+        from knowledge_search import ensure_search_index
+
+        conn = self._legacy_db(tmp_path)
+        try:
+            assert migrate_article_content(conn, 'sqlite', batch_size=7) == 30
+            assert isinstance(conn.execute("SELECT content FROM articles WHERE article_id = 'a3'").fetchone()[0], str)
+
+            # 全文索引已重建，并继续随写入同步
+            assert ensure_search_index(conn, 'sqlite')
+            hits = conn.execute("SELECT rowid FROM articles_fts WHERE articles_fts MATCH '\"第12篇\"'").fetchall()
+            assert len(hits) == 1
+            conn.execute("UPDATE articles SET content = '新正文' WHERE article_id = 'a12'")
+            assert conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH '\"第12篇\"'").fetchone()[0] == 0
+            assert conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH '\"新正文\"'").fetchone()[0] == 1
+        finally:
+            conn.close()
+
+    def test_plain_connection_can_write_articles(self, tmp_path):
+        from init_db import init_sqlite
+
+        path = os.path.join(str(tmp_path), 'plain.db')
+        assert init_sqlite(path)
+
+        conn = sqlite3.connect(path)
+        try:
+            conn.execute(
+                "INSERT INTO articles (article_id, url, title, content) VALUES ('p1', 'https://lewz.cn/jprj/x/1', '标题', '普通正文')"
+            )
+            conn.execute("UPDATE articles SET content = '更新后的正文' WHERE article_id = 'p1'")
+            conn.commit()
+            assert conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH '\"更新后\"'").fetchone()[0] == 1
+            conn.execute("DELETE FROM articles WHERE article_id = 'p1'")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def test_restores_compressed_content_for_fulltext_index(self, tmp_path, monkeypatch):
+        from config import Config
+        from init_db import migrate_database
+        from article_content import migrate_article_search_content
+
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'legacy.db'))
+        register_sqlite_functions(conn)
+        try:
+            migrate_database(conn, 'sqlite', target=6)
+            # 旧版本：正文压缩存储，触发器通过 article_text() 解压
+            conn.execute("DROP TRIGGER articles_fts_ai")
+            conn.execute(
+                "CREATE TRIGGER articles_fts_ai AFTER INSERT ON articles BEGIN "
+                "INSERT INTO articles_fts(rowid, content) VALUES (new.rowid, article_text(new.content)); END"
+            )
+            conn.execute(
+                "INSERT INTO articles (article_id, url, title, content) VALUES (?, ?, ?, ?)",
+                ('a1', 'https://lewz.cn/jprj/x/1', '标题', encode_content('旧版本正文' * 50, 'zlib'))
+            )
+            conn.commit()
+
+            monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', False)
+            assert migrate_article_search_content(conn, 'sqlite') == 0
+            monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', True)
+            assert migrate_article_search_content(conn, 'sqlite') == 1
+
+            assert conn.execute("SELECT content FROM articles").fetchone()[0] == '旧版本正文' * 50
+            triggers = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger'").fetchall()
+            assert not any('article_text' in sql for sql, in triggers)
+            assert conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH '\"旧版本正文\"'").fetchone()[0] == 1
+        finally:
+            conn.close()
+
+
+class TestCrawlerStorage:
+    """Test that the crawler writes compressed content and a preview."""
+
+    @pytest.fixture
+    def service(self, tmp_path, no_fts):
+        from config import Config
+        from crawler_service import CrawlerService
+        from init_db import init_sqlite
+
+        class TempConfig(Config):
+            DATABASE_TYPE = 'sqlite'
+            DATABASE_PATH = os.path.join(str(tmp_path), 'crawler.db')
+
+        assert init_sqlite(TempConfig.DATABASE_PATH)
+        return CrawlerService(TempConfig)
+
+    def test_save_and_read(self, service):
+        url = 'https://lewz.cn/jprj/tech/1'
+        assert service._save_article(url, '标题', LONG_TEXT)
+
+        conn = sqlite3.connect(service.config.DATABASE_PATH)
+        content, preview = conn.execute("SELECT content, content_preview FROM articles").fetchone()
+        conn.close()
+        assert isinstance(content, bytes)
+        assert preview == LONG_TEXT[:CONTENT_PREVIEW_LENGTH]
+
+        article_id = service._generate_article_id(url)
+        assert service.get_article_by_id(article_id)['content'] == LONG_TEXT
+        assert service.get_articles_page(limit=10)['articles'][0]['content_preview'] == preview
+
+    def test_articles_page_does_not_read_content(self, service):
+        from db_pool import get_connection
+
+        service._save_article('https://lewz.cn/jprj/tech/2', '标题', LONG_TEXT)
+
+        conn = get_connection(service.config)
+        statements = []
+        conn.raw.set_trace_callback(statements.append)
+        try:
+            service.get_articles_page(limit=10)
+        finally:
+            conn.raw.set_trace_callback(None)
+            conn.close()
+
+        selects = [sql for sql in statements if 'FROM articles' in sql]
+        assert selects
+        assert not any('content,' in sql or 'content)' in sql for sql in selects)
+
+    def test_link_extraction_reads_compressed_content(self, service):
+        from link_extractor_service import LinkExtractorService
+
+        service._save_article('https://lewz.cn/jprj/tech/3', '标题', LONG_TEXT)
+        result = LinkExtractorService(service.config).extract_all_links_parallel(batch_size=10, max_workers=1)
+        assert result['total_links'] >= 1
+
+    def test_plain_content_with_fulltext_index(self, tmp_path, monkeypatch):
+        from config import Config
+        from crawler_service import CrawlerService
+        from init_db import init_sqlite
+
+        monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', True)
+
+        class TempConfig(Config):
+            DATABASE_TYPE = 'sqlite'
+            DATABASE_PATH = os.path.join(str(tmp_path), 'fts.db')
+
+        assert init_sqlite(TempConfig.DATABASE_PATH)
+        assert CrawlerService(TempConfig)._save_article('https://lewz.cn/jprj/tech/4', '标题', LONG_TEXT)
+
+        conn = sqlite3.connect(TempConfig.DATABASE_PATH)
+        content = conn.execute("SELECT content FROM articles").fetchone()[0]
+        hits = conn.execute("SELECT COUNT(*) FROM articles_fts WHERE articles_fts MATCH '\"提取码\"'").fetchone()[0]
+        conn.close()
+        assert content == LONG_TEXT
+        assert hits == 1
@@ -0,0 +1,67 @@
+"""
+Unit tests for the materialized article tag column.
+Tests tag derivation, the schema migration and the backfill.
+"""
+import os
+import sys
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from article_tags import UNCATEGORIZED_TAG, derive_tag_from_url, migrate_article_tags
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """SQLite database with the pre-tag articles schema."""
+    conn = sqlite3.connect(os.path.join(str(tmp_path), 'legacy.db'))
+    conn.execute("""
+        CREATE TABLE articles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            article_id TEXT UNIQUE NOT NULL,
+            url TEXT NOT NULL
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO articles (article_id, url) VALUES (?, ?)",
+        [(f'a{i}', f'https://lewz.cn/jprj/cat{i % 3}/post{i}' if i % 4 else f'https://lewz.cn/jprj/post{i}')
+         for i in range(25)]
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_derive_tag_from_url():
+    """The second path segment is the tag; anything else is uncategorized."""
+    assert derive_tag_from_url('https://lewz.cn/jprj/technology/article1') == 'technology'
+    assert derive_tag_from_url('https://lewz.cn/jprj/article1') == UNCATEGORIZED_TAG
+    assert derive_tag_from_url(None) == UNCATEGORIZED_TAG
+
+
+def test_migration_adds_indexed_column_and_backfills(legacy_db):
+    """The migration adds tag, indexes it and backfills every row in batches."""
+    assert migrate_article_tags(legacy_db, 'sqlite', batch_size=7) is True
+
+    rows = legacy_db.execute("SELECT url, tag FROM articles").fetchall()
+    assert all(tag == derive_tag_from_url(url) for url, tag in rows)
+
+    indexes = [row[1] for row in legacy_db.execute("PRAGMA index_list(articles)")]
+    assert 'idx_articles_tag' in indexes
+
+    plan = ' '.join(str(row[-1]) for row in legacy_db.execute(
+        "EXPLAIN QUERY PLAN SELECT article_id FROM articles WHERE tag = 'cat1'"
+    ))
+    assert 'idx_articles_tag' in plan
+
+
+def test_migration_is_idempotent(legacy_db):
+    """Re-running only fills rows whose tag is still NULL."""
+    migrate_article_tags(legacy_db, 'sqlite')
+    legacy_db.execute("INSERT INTO articles (article_id, url) VALUES ('new', 'https://lewz.cn/jprj/late/x')")
+    legacy_db.commit()
+
+    assert migrate_article_tags(legacy_db, 'sqlite') is False
+    assert legacy_db.execute("SELECT tag FROM articles WHERE article_id = 'new'").fetchone()[0] == 'late'
@@ -0,0 +1,192 @@
+"""
+Unit tests for the shared database connection pool.
+Tests per-thread SQLite reuse, transaction cleanup and server pool limits.
+"""
+import os
+import sys
+import sqlite3
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from db_pool import SQLiteConnectionManager, ServerConnectionPool
+
+
+PRAGMAS = (('journal_mode', 'WAL'), ('synchronous', 'NORMAL'))
+
+
+@pytest.fixture
+def manager(tmp_path):
+    mgr = SQLiteConnectionManager(os.path.join(str(tmp_path), 'test.db'), PRAGMAS, timeout=5)
+    yield mgr
+    mgr.close_all()
+
+
+class TestSQLiteConnectionManager:
+    """Test SQLiteConnectionManager."""
+
+    def test_same_thread_reuses_connection(self, manager):
+        """Sequential acquisitions on one thread share the underlying connection."""
+        first = manager.acquire()
+        raw = first.raw
+        first.close()
+        second = manager.acquire()
+        assert second.raw is raw
+        second.close()
+
+    def test_threads_get_distinct_connections(self, manager):
+        """Each thread gets its own sqlite3 connection."""
+        conn = manager.acquire()
+        main_raw = conn.raw
+        conn.close()
+
+        seen = []
+
+        def worker():
+            c = manager.acquire()
+            seen.append(c.raw)
+            c.close()
+            manager.close_all()
+
+        t = threading.Thread(target=worker)
+        t.start()
+        t.join()
+
+        assert seen and seen[0] is not main_raw
+
+    def test_wal_pragma_applied(self, manager):
+        """Connections are opened in WAL journal mode."""
+        conn = manager.acquire()
+        mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+        conn.close()
+        assert mode.lower() == 'wal'
+
+    def test_release_rolls_back_uncommitted_work(self, manager):
+        """Uncommitted writes are discarded when the connection is returned."""
+        conn = manager.acquire()
+        conn.execute('CREATE TABLE t (x INTEGER)')
+        conn.commit()
+        conn.execute('INSERT INTO t VALUES (1)')
+        conn.close()
+
+        conn = manager.acquire()
+        count = conn.execute('SELECT COUNT(*) FROM t').fetchone()[0]
+        conn.close()
+        assert count == 0
+
+    def test_closed_proxy_rejects_use(self, manager):
+        """Using a returned connection raises instead of touching the shared one."""
+        conn = manager.acquire()
+        conn.close()
+        conn.close()  # idempotent
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.cursor()
+
+    def test_context_manager_commits(self, manager):
+        """The context manager commits on success."""
+        with manager.acquire() as conn:
+            conn.execute('CREATE TABLE t (x INTEGER)')
+            conn.execute('INSERT INTO t VALUES (1)')
+
+        conn = manager.acquire()
+        assert conn.execute('SELECT COUNT(*) FROM t').fetchone()[0] == 1
+        conn.close()
+
+    def test_reopens_when_file_replaced(self, manager):
+        """A deleted and recreated database file is picked up on next acquire."""
+        conn = manager.acquire()
+        conn.execute('CREATE TABLE old_table (x INTEGER)')
+        conn.commit()
+        raw = conn.raw
+        conn.close()
+
+        for suffix in ('', '-wal', '-shm'):
+            path = manager.db_path + suffix
+            if os.path.exists(path):
+                os.remove(path)
+        fresh = sqlite3.connect(manager.db_path)
+        fresh.execute('CREATE TABLE new_table (x INTEGER)')
+        fresh.commit()
+        fresh.close()
+
+        conn = manager.acquire()
+        tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert conn.raw is not raw
+        conn.close()
+        assert tables == {'new_table'}
+
+
+class FakeConnection:
+    """Minimal DB-API connection stand-in."""
+
+    def __init__(self):
+        self.open = True
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.open = False
+
+
+class TestServerConnectionPool:
+    """Test ServerConnectionPool."""
+
+    def make_pool(self, **kwargs):
+        created = []
+
+        def factory():
+            conn = FakeConnection()
+            created.append(conn)
+            return conn
+
+        pool = ServerConnectionPool(factory, lambda c: c.open, **kwargs)
+        return pool, created
+
+    def test_reuses_released_connection(self):
+        """A released connection is handed out again."""
+        pool, created = self.make_pool(max_size=2)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+        assert raw.rollbacks == 1
+
+        again = pool.acquire()
+        assert again.raw is raw
+        assert len(created) == 1
+        again.close()
+
+    def test_times_out_when_exhausted(self):
+        """Acquire blocks and then times out when the pool is full."""
+        pool, _ = self.make_pool(max_size=1, timeout=0.05)
+        held = pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+        held.close()
+        assert pool.size == 1
+
+    def test_discards_dead_connection(self):
+        """Connections that are no longer alive are replaced."""
+        pool, created = self.make_pool(max_size=1)
+        conn = pool.acquire()
+        raw = conn.raw
+        conn.close()
+        raw.open = False
+
+        fresh = pool.acquire()
+        assert fresh.raw is not raw
+        assert len(created) == 2
+        fresh.close()
+
+    def test_recycles_old_connection(self):
+        """Connections older than recycle_sec are rebuilt."""
+        pool, created = self.make_pool(max_size=1, recycle_sec=0)
+        conn = pool.acquire()
+        conn.close()
+        time.sleep(0.01)
+        pool.acquire().close()
+        assert len(created) == 2
@@ -0,0 +1,119 @@
+"""
+Unit tests for the streaming export writers.
+Tests CSV/NDJSON chunking, streaming gzip compression and columnar formats.
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from export_writers import csv_chunks, gzip_chunks, ndjson_chunks, columnar_chunks, encode_rows
+
+
+FIELDS = ['id', 'title']
+ROWS = [{'id': i, 'title': f'标题,"{i}"'} for i in range(500)]
+
+
+def _reference_csv(rows, fields):
+    output = io.StringIO()
+    output.write('\ufeff')
+    writer = csv.DictWriter(output, fieldnames=fields, extrasaction='ignore')
+    writer.writeheader()
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+class TestCsvChunks:
+    """Test csv_chunks."""
+
+    def test_matches_csv_module(self):
+        """Concatenated chunks equal a one-shot csv.DictWriter dump."""
+        assert ''.join(csv_chunks(ROWS, FIELDS)) == _reference_csv(ROWS, FIELDS)
+
+    def test_flushes_in_bounded_chunks(self):
+        """Output is split once the buffer passes flush_bytes."""
+        chunks = list(csv_chunks(ROWS, FIELDS, flush_bytes=1024))
+        assert len(chunks) > 5
+        assert all(len(chunk) < 1024 + 100 for chunk in chunks)
+
+    def test_rows_consumed_lazily(self):
+        """Rows are pulled from the iterator as chunks are produced."""
+        pulled = []
+
+        def rows():
+            for row in ROWS:
+                pulled.append(row)
+                yield row
+
+        chunks = csv_chunks(rows(), FIELDS, flush_bytes=1024)
+        next(chunks)
+        assert len(pulled) < len(ROWS)
+
+    def test_empty_rows_still_have_header(self):
+        assert ''.join(csv_chunks([], FIELDS, bom=False)) == 'id,title\r\n'
+
+
+class TestGzipChunks:
+    """Test gzip_chunks."""
+
+    def test_round_trip(self):
+        """Compressed stream decompresses to the UTF-8 CSV text."""
+        data = b''.join(gzip_chunks(csv_chunks(ROWS, FIELDS, flush_bytes=1024)))
+        assert gzip.decompress(data).decode('utf-8') == _reference_csv(ROWS, FIELDS)
+
+    def test_accepts_bytes(self):
+        data = b''.join(gzip_chunks([b'abc', 'def']))
+        assert gzip.decompress(data) == b'abcdef'
+
+
+class TestNdjsonChunks:
+    """Test ndjson_chunks."""
+
+    def test_one_object_per_line(self):
+        lines = ''.join(ndjson_chunks(ROWS, flush_bytes=1024)).splitlines()
+        assert [json.loads(line) for line in lines] == ROWS
+
+    def test_non_ascii_and_dates(self):
+        from datetime import datetime
+        text = ''.join(ndjson_chunks([{'t': '中文', 'at': datetime(2024, 1, 2)}]))
+        assert text == '{"t": "中文", "at": "2024-01-02 00:00:00"}\n'
+
+    def test_encode_rows_keeps_field_order(self):
+        text = ''.join(encode_rows([{'title': 'a', 'id': 1, 'extra': 'x'}], ['id', 'title'], 'ndjson'))
+        assert text == '{"id": 1, "title": "a"}\n'
+
+
+class TestColumnarChunks:
+    """Test Parquet/Arrow output (requires pyarrow)."""
+
+    def test_parquet_round_trip(self):
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.parquet as pq
+
+        rows = ROWS + [{'id': None, 'title': None}]
+        data = b''.join(columnar_chunks(iter(rows), FIELDS, 'parquet', batch_rows=200))
+        parquet_file = pq.ParquetFile(pyarrow.BufferReader(data))
+        assert parquet_file.num_row_groups == 3
+        table = parquet_file.read()
+        assert table.column('title').to_pylist()[:2] == [ROWS[0]['title'], ROWS[1]['title']]
+        assert table.column('id').to_pylist()[-1] is None
+
+    def test_parquet_streams_per_row_group(self):
+        pytest.importorskip('pyarrow')
+        chunks = columnar_chunks(iter(ROWS), FIELDS, 'parquet', batch_rows=100)
+        assert len(list(chunks)) >= 5
+
+    def test_arrow_stream_round_trip(self):
+        pyarrow = pytest.importorskip('pyarrow')
+        import pyarrow.ipc
+
+        data = b''.join(columnar_chunks(iter(ROWS), FIELDS, 'arrow', batch_rows=200))
+        table = pyarrow.ipc.open_stream(data).read_all()
+        assert table.num_rows == len(ROWS)
+        assert table.column('id').to_pylist()[:3] == ['0', '1', '2']
@@ -0,0 +1,102 @@
+"""
+Unit tests for the offline Baidu Pan stand-in server used by the benchmarks.
+Tests the adapter round trip through the redirect transport, error
+injection, rate limiting and a CoreService transfer queue run end to end.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from baidu_pan_adapter import BaiduPanAdapter
+from fake_pan_server import FakePanServer, parse_error_rates, redirect
+
+
+def _adapter(server):
+    adapter = BaiduPanAdapter()
+    redirect(adapter.session, server.url)
+    assert adapter.init('BDUSS=fake')
+    return adapter
+
+
+@pytest.fixture
+def server():
+    with FakePanServer() as fake:
+        yield fake
+
+
+class TestFakePanServer:
+    """Test the emulated endpoints through the real adapter."""
+
+    def test_transfer_list_and_share_round_trip(self, server):
+        adapter = _adapter(server)
+        link = server.make_link('资料.zip', password='abcd')
+
+        assert adapter.transfer(link, 'abcd', '/目标') == 0
+        items = adapter.list_dir('/目标')
+        assert [item['server_filename'] for item in items] == ['资料.zip']
+        assert items[0]['path'] == '/目标/资料.zip'
+
+        shared = adapter.create_share(items[0]['fs_id'], expiry=7, password='wxyz')
+        assert shared.startswith('https://pan.baidu.com/s/1') and len(shared) == 47
+        assert adapter.transfer(shared, 'wxyz', '/再次') == 0
+
+        requests = server.get_stats()['requests']
+        assert requests['share_transfer'] == 2
+        assert requests['share_set'] == 1
+
+    def test_wrong_password_and_unknown_share(self, server):
+        adapter = _adapter(server)
+        link = server.make_link(password='abcd')
+
+        assert adapter.transfer(link, 'zzzz', '/目标') == -9
+        assert adapter.transfer('https://pan.baidu.com/s/1' + 'x' * 22, '', '/目标') == -1
+
+    def test_error_injection(self):
+        with FakePanServer(error_rates={'-9': 1.0}) as server:
+            adapter = _adapter(server)
+            assert adapter.transfer(server.make_link(password='abcd'), 'abcd', '/目标') == -9
+            assert server.get_stats()['errors'] == {'-9': 1}
+
+        with FakePanServer() as server:
+            adapter = _adapter(server)
+            server.error_rates = {'500': 1.0}
+            assert adapter.list_dir('/') == -1
+
+    def test_rate_limit_returns_62(self):
+        with FakePanServer(rate_limit=1) as server:
+            adapter = _adapter(server)
+            link = server.make_link(password='abcd')
+            assert adapter.transfer(link, 'abcd', '/目标') == -62
+            assert server.get_stats()['errors']['rate_limited'] >= 1
+
+    def test_latency(self):
+        with FakePanServer(latency_ms=50) as server:
+            adapter = _adapter(server)
+            start = time.perf_counter()
+            adapter.list_dir('/')
+            assert time.perf_counter() - start >= 0.05
+
+    def test_invalid_error_kind(self):
+        with pytest.raises(ValueError):
+            FakePanServer(error_rates={'-4': 0.1})
+        assert parse_error_rates(['-62=0.01', '500=0.5']) == {'-62': 0.01, '500': 0.5}
+
+
+class TestCoreServiceAgainstFakeServer:
+    """Run a real transfer queue through the stand-in server."""
+
+    def test_transfer_queue_drains(self, server):
+        from bench_pipeline import bench_core
+
+        results = bench_core(server, 5, throttle=False)
+
+        transfer, share = results
+        assert (transfer['completed'], transfer['failed'], transfer['skipped']) == (5, 0, 0)
+        assert (share['tasks'], share['completed']) == (5, 5)
+        assert server.get_stats()['requests']['share_set'] == 5
@@ -0,0 +1,409 @@
+"""
+Unit tests for LinkExtractorService text extraction.
+Tests the single-pass link scanner and nearby password lookup.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from link_extractor_service import LinkExtractorService
+
+
+@pytest.fixture
+def service():
+    return LinkExtractorService()
+
+
+class TestExtractLinksFromText:
+    """Test extract_links_from_text."""
+
+    def test_empty_text(self, service):
+        """Empty or link-free text yields no links."""
+        assert service.extract_links_from_text('') == []
+        assert service.extract_links_from_text(None) == []
+        assert service.extract_links_from_text('没有链接 https://example.com/a') == []
+
+    def test_standard_link_with_keyword_password(self, service):
+        """A /s/ link picks up a nearby 提取码."""
+        text = '链接：https://pan.baidu.com/s/1a2b3c4d5e6f\n提取码：abcd'
+        assert service.extract_links_from_text(text) == [
+            {'link': 'https://pan.baidu.com/s/1a2b3c4d5e6f', 'password': 'abcd'}
+        ]
+
+    def test_share_init_link(self, service):
+        """share/init?surl= links are recognised."""
+        text = '资源下载地址：https://pan.baidu.com/share/init?surl=xyz123\n密码: 1234'
+        assert service.extract_links_from_text(text) == [
+            {'link': 'https://pan.baidu.com/share/init?surl=xyz123', 'password': '1234'}
+        ]
+
+    def test_query_password(self, service):
+        """?pwd= is used when no keyword password is nearby."""
+        text = '链接：https://pan.baidu.com/s/testlink?pwd=test'
+        assert service.extract_links_from_text(text) == [
+            {'link': 'https://pan.baidu.com/s/testlink', 'password': 'test'}
+        ]
+
+    def test_keyword_password_preferred_over_query(self, service):
+        """Keyword passwords take priority over ?pwd= within the window."""
+        text = 'https://pan.baidu.com/s/abc?pwd=qqqq 提取码 wxyz'
+        assert service.extract_links_from_text(text)[0]['password'] == 'wxyz'
+
+    def test_case_insensitive_scheme(self, service):
+        """Upper-case URLs are matched, including an HTTP scheme."""
+        text = 'HTTP://PAN.BAIDU.COM/S/UPPER code: AB12'
+        assert service.extract_links_from_text(text) == [
+            {'link': 'HTTP://PAN.BAIDU.COM/S/UPPER', 'password': 'AB12'}
+        ]
+
+    def test_password_outside_window_ignored(self, service):
+        """Passwords further than PASSWORD_WINDOW characters away are not used."""
+        text = 'https://pan.baidu.com/s/far' + ' ' * (LinkExtractorService.PASSWORD_WINDOW + 1) + '提取码: abcd'
+        assert service.extract_links_from_text(text)[0]['password'] == ''
+
+    def test_duplicates_removed_and_order_kept(self, service):
+        """Repeated links are reported once; /s/ links come before share/init links."""
+        text = (
+            'https://pan.baidu.com/share/init?surl=second '
+            'https://pan.baidu.com/s/first 提取码: 1111 '
+            'https://pan.baidu.com/s/first'
+        )
+        links = service.extract_links_from_text(text)
+        assert [l['link'] for l in links] == [
+            'https://pan.baidu.com/s/first',
+            'https://pan.baidu.com/share/init?surl=second',
+        ]
+
+    def test_scheme_required(self, service):
+        """Bare '://pan.baidu.com' without http(s) is not a link."""
+        assert service.extract_links_from_text('ftp://pan.baidu.com/s/abc') == []
+
+
+@pytest.fixture
+def db_service(tmp_path):
+    """LinkExtractorService backed by a freshly initialised SQLite database."""
+    from config import Config
+    from init_db import init_sqlite
+
+    class TempConfig(Config):
+        DATABASE_TYPE = 'sqlite'
+        DATABASE_PATH = os.path.join(str(tmp_path), 'links.db')
+
+    assert init_sqlite(TempConfig.DATABASE_PATH)
+    service = LinkExtractorService(TempConfig)
+
+    conn = service._get_db_connection()
+    conn.executemany(
+        "INSERT INTO articles (article_id, url, title, content) VALUES (?, ?, ?, ?)",
+        [
+            (f'a{i}', f'https://example.com/{i}', f'title {i}',
+             f'https://pan.baidu.com/s/link{i} 提取码: {i:04d}' if i % 3 == 0 else '无链接')
+            for i in range(25)
+        ]
+    )
+    conn.commit()
+    conn.close()
+    return service
+
+
+class TestBulkAndParallelExtraction:
+    """Test batch streaming, bulk save and parallel extraction."""
+
+    def test_iter_article_batches_covers_all_rows(self, db_service):
+        """Keyset batches return every article exactly once."""
+        batches = list(db_service.iter_article_batches(batch_size=10))
+        assert [len(b) for b in batches] == [10, 10, 5]
+        ids = [row[0] for batch in batches for row in batch]
+        assert ids == sorted(set(ids))
+
+    def test_save_extracted_links_bulk(self, db_service):
+        """Bulk save writes all rows in one call."""
+        saved = db_service.save_extracted_links([
+            {'article_id': 'a1', 'original_link': 'https://pan.baidu.com/s/x', 'original_password': 'abcd'},
+            {'article_id': 'a2', 'original_link': 'https://pan.baidu.com/s/y', 'original_password': ''},
+        ])
+        assert saved == 2
+        assert len(db_service.get_extracted_links(status='pending')) == 2
+        assert db_service.save_extracted_links([]) == 0
+
+    @pytest.mark.parametrize('workers', [1, 2])
+    def test_extract_all_links_parallel(self, db_service, workers, monkeypatch):
+        """Serial and process-pool extraction save the same links."""
+        monkeypatch.setattr('link_extractor_service.os.cpu_count', lambda: 2)
+        result = db_service.extract_all_links_parallel(batch_size=4, max_workers=workers)
+        assert result['success'] is True
+        assert result['workers'] == workers
+        assert result['total_articles'] == 25
+        assert result['total_links'] == 9
+        assert result['saved_links'] == 9
+
+        links = db_service.get_extracted_links(limit=100)
+        assert {l['original_link'] for l in links} == {
+            f'https://pan.baidu.com/s/link{i}' for i in range(0, 25, 3)
+        }
+        for link in links:
+            number = int(link['original_link'].rsplit('link', 1)[1])
+            assert link['original_password'] == f'{number:04d}'
+
+    def test_workers_are_clamped_to_cpu_count(self, db_service, monkeypatch):
+        """More workers than CPU cores are capped at the core count."""
+        monkeypatch.setattr('link_extractor_service.os.cpu_count', lambda: 1)
+        result = db_service.extract_all_links_parallel(batch_size=4, max_workers=10000)
+        assert result['workers'] == 1
+        assert result['saved_links'] == 9
+
+    @pytest.mark.parametrize('kwargs', [{'batch_size': 0}, {'batch_size': -5}, {'max_workers': 0}])
+    def test_invalid_parallel_arguments(self, db_service, kwargs):
+        """Non-positive batch size or worker count is rejected."""
+        with pytest.raises(ValueError):
+            db_service.extract_all_links_parallel(**kwargs)
+
+    def test_reextraction_keeps_processed_links(self, db_service):
+        """Re-running a full extraction does not reset processed links to pending."""
+        db_service.extract_all_links_parallel(batch_size=4, max_workers=1)
+        assert db_service.update_extracted_link_statuses([
+            {'article_id': 'a0', 'original_link': 'https://pan.baidu.com/s/link0',
+             'status': 'completed', 'new_link': 'https://pan.baidu.com/s/new0'},
+            {'article_id': 'a3', 'original_link': 'https://pan.baidu.com/s/link3', 'status': 'failed'},
+        ]) == 2
+
+        db_service.extract_all_links_parallel(batch_size=4, max_workers=1)
+
+        links = {l['article_id']: l for l in db_service.get_extracted_links(limit=100)}
+        assert len(links) == 9
+        assert (links['a0']['status'], links['a0']['new_link']) == ('completed', 'https://pan.baidu.com/s/new0')
+        assert links['a3']['status'] == 'failed'
+        assert links['a6']['status'] == 'pending'
+
+
+class TestBulkUpsert:
+    """Test bulk upsert and status updates on extracted_links."""
+
+    def _row(self, service, article_id, link):
+        conn = service._get_db_connection()
+        row = conn.execute(
+            "SELECT id, status, created_at, updated_at, new_link FROM extracted_links "
+            "WHERE article_id = ? AND original_link = ?",
+            (article_id, link)
+        ).fetchone()
+        conn.close()
+        return row
+
+    def _age_row(self, service, article_id, link):
+        conn = service._get_db_connection()
+        conn.execute(
+            "UPDATE extracted_links SET created_at = '2000-01-01 00:00:00', "
+            "updated_at = '2000-01-01 00:00:00' WHERE article_id = ? AND original_link = ?",
+            (article_id, link)
+        )
+        conn.commit()
+        conn.close()
+
+    def test_upsert_preserves_id_and_created_at(self, db_service):
+        """Saving an existing link updates it in place."""
+        link = 'https://pan.baidu.com/s/keep'
+        assert db_service.save_extracted_link('a1', link, 'abcd')
+        self._age_row(db_service, 'a1', link)
+        original_id = self._row(db_service, 'a1', link)[0]
+
+        assert db_service.save_extracted_link('a1', link, 'abcd', status='failed')
+
+        row_id, status, created_at, updated_at, _ = self._row(db_service, 'a1', link)
+        assert row_id == original_id
+        assert status == 'failed'
+        assert created_at == '2000-01-01 00:00:00'
+        assert updated_at != '2000-01-01 00:00:00'
+
+    def test_bulk_status_update_preserves_created_at(self, db_service):
+        """Bulk status updates touch updated_at only."""
+        links = [
+            {'article_id': f'a{i}', 'original_link': f'https://pan.baidu.com/s/u{i}', 'original_password': ''}
+            for i in range(3)
+        ]
+        assert db_service.save_extracted_links(links) == 3
+        for link in links:
+            self._age_row(db_service, link['article_id'], link['original_link'])
+
+        updated = db_service.update_extracted_link_statuses([
+            {'article_id': 'a0', 'original_link': 'https://pan.baidu.com/s/u0', 'status': 'transferred'},
+            {'article_id': 'a1', 'original_link': 'https://pan.baidu.com/s/u1',
+             'status': 'completed', 'new_link': 'https://pan.baidu.com/s/new1'},
+            {'article_id': 'missing', 'original_link': 'https://pan.baidu.com/s/none', 'status': 'failed'},
+        ])
+        assert updated == 2
+
+        _, status, created_at, updated_at, _ = self._row(db_service, 'a0', 'https://pan.baidu.com/s/u0')
+        assert (status, created_at) == ('transferred', '2000-01-01 00:00:00')
+        assert updated_at != '2000-01-01 00:00:00'
+        _, status, _, _, new_link = self._row(db_service, 'a1', 'https://pan.baidu.com/s/u1')
+        assert (status, new_link) == ('completed', 'https://pan.baidu.com/s/new1')
+        assert self._row(db_service, 'a2', 'https://pan.baidu.com/s/u2')[1] == 'pending'
+
+    def test_update_single_status(self, db_service):
+        """The single-row helper delegates to the bulk update."""
+        link = 'https://pan.baidu.com/s/one'
+        db_service.save_extracted_link('a1', link, '')
+        assert db_service.update_extracted_link_status('a1', link, status='processing') is True
+        assert self._row(db_service, 'a1', link)[1] == 'processing'
+
+    def test_writes_invalidate_knowledge_cache(self, db_service, monkeypatch):
+        """Saving links and updating statuses clear the knowledge API caches."""
+        import link_extractor_service
+
+        calls = []
+        monkeypatch.setattr(link_extractor_service, 'invalidate_knowledge_cache', lambda: calls.append(1))
+        link = 'https://pan.baidu.com/s/cache'
+        db_service.save_extracted_link('a1', link, '')
+        db_service.update_extracted_link_status('a1', link, status='processing')
+        assert len(calls) == 2
+
+    def test_ten_thousand_links(self, db_service):
+        """10k links are saved and updated in single transactions."""
+        links = [
+            {'article_id': f'bulk{i % 100}', 'original_link': f'https://pan.baidu.com/s/b{i}', 'original_password': ''}
+            for i in range(10000)
+        ]
+        assert db_service.save_extracted_links(links) == 10000
+        updates = [dict(link, status='processing') for link in links]
+        assert db_service.update_extracted_link_statuses(updates) == 10000
+        assert db_service.get_statistics()['processing'] == 10000
+
+
+class TestIncrementalExtraction:
+    """Test incremental extraction tracked by articles.links_extracted_at."""
+
+    def _add_article(self, service, article_id, content, updated_at):
+        conn = service._get_db_connection()
+        conn.execute(
+            "INSERT INTO articles (article_id, url, title, content, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (article_id, f'https://example.com/{article_id}', article_id, content, updated_at)
+        )
+        conn.commit()
+        conn.close()
+
+    def _unextracted_count(self, service):
+        conn = service._get_db_connection()
+        count = conn.execute("SELECT COUNT(*) FROM articles WHERE links_extracted_at IS NULL").fetchone()[0]
+        conn.close()
+        return count
+
+    def test_first_run_processes_everything(self, db_service):
+        """Every article is processed once and then marked."""
+        assert self._unextracted_count(db_service) == 25
+        result = db_service.extract_new_links(batch_size=7)
+        assert result['total_articles'] == 25
+        assert result['saved_links'] == 9
+        assert self._unextracted_count(db_service) == 0
+
+        again = db_service.extract_new_links()
+        assert again['total_articles'] == 0
+
+    def test_only_new_articles_are_processed(self, db_service):
+        """Subsequent runs only see new articles and keep existing link status."""
+        db_service.extract_new_links()
+        db_service.update_extracted_link_status('a0', 'https://pan.baidu.com/s/link0', status='completed')
+
+        self._add_article(db_service, 'new1', 'https://pan.baidu.com/s/fresh 提取码: abcd', '2000-01-01 00:00:00')
+        result = db_service.extract_new_links()
+        assert result['total_articles'] == 1
+        assert result['total_links'] == 1
+
+        links = {l['original_link']: l for l in db_service.get_extracted_links(limit=100)}
+        assert links['https://pan.baidu.com/s/fresh']['status'] == 'pending'
+        assert links['https://pan.baidu.com/s/link0']['status'] == 'completed'
+
+    def test_limit_resumes_where_it_stopped(self, db_service):
+        """A limited run resumes where it stopped."""
+        first = db_service.extract_new_links(limit=10)
+        second = db_service.extract_new_links(limit=10)
+        third = db_service.extract_new_links(limit=10)
+        assert [first['total_articles'], second['total_articles'], third['total_articles']] == [10, 10, 5]
+
+    def test_same_second_updates_are_processed_once(self, db_service):
+        """Articles sharing an updated_at second are neither skipped nor re-read."""
+        conn = db_service._get_db_connection()
+        conn.execute("UPDATE articles SET updated_at = '2020-01-01 00:00:00'")
+        conn.commit()
+        conn.close()
+
+        seen = 0
+        for _ in range(10):
+            seen += db_service.extract_new_links(limit=3, batch_size=3)['total_articles']
+        assert seen == 25
+
+    def test_crawler_update_is_reprocessed(self, db_service):
+        """An article re-saved by the crawler in the same second is extracted again."""
+        from crawler_service import CrawlerService
+
+        crawler = CrawlerService(db_service.config)
+        assert crawler._save_article('https://example.com/c', 'c', '无链接')
+        db_service.extract_new_links()
+
+        assert crawler._save_article('https://example.com/c', 'c', 'https://pan.baidu.com/s/late 提取码: late')
+        result = db_service.extract_new_links(limit=1)
+        assert result['total_articles'] == 1
+        assert 'https://pan.baidu.com/s/late' in {l['original_link'] for l in db_service.get_extracted_links(limit=100)}
+
+    def test_article_changed_during_extraction_stays_unmarked(self, db_service):
+        """Marking skips articles whose content changed after they were read."""
+        rows = next(db_service.iter_unextracted_article_batches(batch_size=2))
+        conn = db_service._get_db_connection()
+        conn.execute("UPDATE articles SET content = 'changed' WHERE id = ?", (rows[0][0],))
+        conn.commit()
+        conn.close()
+
+        assert db_service.mark_links_extracted(rows) == 1
+        assert self._unextracted_count(db_service) == 24
+
+    def test_processor_incremental_is_opt_in(self, db_service):
+        """LinkProcessorService extracts by offset unless incremental mode is requested."""
+        from link_processor_service import LinkProcessorService
+
+        processor = LinkProcessorService('test', None, db_service.config)
+        processor.extract_and_save_links(limit=5, offset=5)
+        assert self._unextracted_count(db_service) == 25
+
+        with pytest.raises(ValueError):
+            processor.extract_and_save_links(limit=5, offset=5, incremental=True)
+        assert processor.extract_and_save_links(limit=5, incremental=True)['total_articles'] == 5
+        assert self._unextracted_count(db_service) == 20
+
+    def test_parallel_run_marks_articles(self, db_service):
+        """A full extraction leaves nothing for the next incremental run."""
+        db_service.extract_all_links_parallel(max_workers=1)
+        assert db_service.extract_new_links()['total_articles'] == 0
+
+        assert db_service.reset_extraction_marks()
+        assert db_service.extract_new_links()['total_articles'] == 25
+
+
+class TestCursorPagination:
+    """Test keyset pagination of extracted links."""
+
+    def test_pages_cover_all_links(self, db_service):
+        """Following next_cursor visits every link exactly once."""
+        db_service.save_extracted_links([
+            {'article_id': f'a{i}', 'original_link': f'https://pan.baidu.com/s/p{i}', 'status': 'pending'}
+            for i in range(7)
+        ])
+
+        seen = []
+        cursor = None
+        while True:
+            page = db_service.get_extracted_links_page(limit=3, cursor=cursor)
+            seen.extend(link['original_link'] for link in page['links'])
+            if not page['has_more']:
+                assert page['next_cursor'] is None
+                break
+            cursor = page['next_cursor']
+
+        assert len(seen) == 7
+        assert seen == [link['original_link'] for link in db_service.get_extracted_links(limit=10)]
+
+    def test_invalid_cursor(self, db_service):
+        """A malformed cursor raises ValueError."""
+        with pytest.raises(ValueError):
+            db_service.get_extracted_links_page(cursor='bogus')
@@ -0,0 +1,104 @@
+"""
+Unit tests for the logging pipeline.
+Tests JSON formatting, the non-blocking queue handler, log sampling and
+the lazy, sampled per-task logging in CoreService.
+"""
+import json
+import logging
+import os
+import queue
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from logger import JsonFormatter, LogSampler, NonBlockingQueueHandler
+
+
+def _record(msg, *args, **extra):
+    record = logging.makeLogRecord({'name': 'test', 'levelno': logging.INFO, 'levelname': 'INFO',
+                                    'msg': msg, 'args': args, **extra})
+    return record
+
+
+class TestJsonFormatter:
+    """Test JsonFormatter."""
+
+    def test_formats_message_and_extra(self):
+        line = JsonFormatter().format(_record('任务 %d 完成', 3, account='main'))
+        data = json.loads(line)
+        assert data['message'] == '任务 3 完成'
+        assert data['level'] == 'INFO'
+        assert data['account'] == 'main'
+        assert 'msg' not in data and 'args' not in data
+
+
+class TestNonBlockingQueueHandler:
+    """Test NonBlockingQueueHandler."""
+
+    def test_enqueue_drops_when_full(self):
+        log_queue = queue.Queue(maxsize=1)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.handle(_record('任务 %d', 1))
+        handler.handle(_record('任务 %d', 2))
+
+        assert log_queue.get_nowait().getMessage() == '任务 1'
+        assert handler.dropped == 1
+
+    def test_message_is_fixed_at_enqueue(self):
+        """Mutable arguments changed after logging do not alter the queued message."""
+        log_queue = queue.Queue()
+        handler = NonBlockingQueueHandler(log_queue)
+        items = ['a']
+        handler.handle(_record('队列 %s', items))
+        items.append('b')
+
+        record = log_queue.get_nowait()
+        assert (record.msg, record.args) == ("队列 ['a']", None)
+        assert record.getMessage() == "队列 ['a']"
+
+
+class TestLogSampler:
+    """Test LogSampler."""
+
+    def test_burst_then_every(self):
+        sampler = LogSampler(burst=2, every=3)
+        results = [sampler.allow('key') for _ in range(8)]
+        assert [allowed for allowed, _ in results] == [True, True, False, False, True, False, False, True]
+        assert results[4] == (True, 2)
+        assert results[7] == (True, 2)
+        # 不同键分别计数
+        assert sampler.allow('other') == (True, 0)
+
+    def test_disabled(self):
+        sampler = LogSampler(burst=0)
+        assert all(sampler.allow('key') == (True, 0) for _ in range(1000))
+
+    def test_new_window_reports_suppressed(self):
+        sampler = LogSampler(burst=1, every=0, window_sec=0)
+        assert sampler.allow('key') == (True, 0)
+        sampler.window_sec = 60
+        assert sampler.allow('key') == (False, 0)
+        sampler.window_sec = 0
+        assert sampler.allow('key') == (True, 1)
+
+
+class TestCoreServiceLogging:
+    """Test the sampled per-task logging in CoreService."""
+
+    def test_import_lines_are_sampled(self):
+        from core_service import CoreService
+
+        service = CoreService(cookie='fake_cookie', config={})
+        service._log_sampler = LogSampler(burst=2, every=100)
+        messages = []
+        service.set_log_callback(messages.append)
+
+        rows = [{'链接': f'https://pan.baidu.com/s/1task{i}', '标题': f't{i}'} for i in range(250)]
+        assert service.add_transfer_tasks_from_csv(rows) == 250
+
+        imports = [message for message in messages if message.startswith('📥')]
+        assert imports[0] == "📥 导入任务 #1: 标题='t0', 链接=https://pan.baidu.com/s/1task0..."
+        assert len(imports) == 2 + 2
+        assert imports[2].endswith('（同类日志已省略 99 条）')
+        # 不带参数的汇总日志不采样
+        assert messages[-1] == '已导入 250 个转存任务'
@@ -0,0 +1,127 @@
+"""
+Unit tests for the Prometheus metrics registry.
+Tests the text exposition format, histogram buckets, the disabled no-op
+mode and the instrumentation of adapter calls, throttler sleeps, task
+durations and database statements.
+"""
+import os
+import sqlite3
+import sys
+from unittest.mock import patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import metrics
+from metrics import MetricsRegistry, TimedCursor, sql_operation, timed_pan_call
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics.registry, 'enabled', True)
+
+
+class TestRegistry:
+    """Test MetricsRegistry rendering."""
+
+    def test_counter_render(self):
+        registry = MetricsRegistry(enabled=True)
+        counter = registry.counter('calls_total', 'Calls', ('endpoint', 'errno'))
+        counter.inc(endpoint='list', errno=0)
+        counter.inc(2, endpoint='list', errno=0)
+        counter.inc(endpoint='say "hi"', errno=-6)
+
+        text = registry.render()
+        assert '# TYPE calls_total counter' in text
+        assert 'calls_total{endpoint="list",errno="0"} 3' in text
+        assert 'calls_total{endpoint="say \\"hi\\"",errno="-6"} 1' in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        registry = MetricsRegistry(enabled=True)
+        histogram = registry.histogram('latency_seconds', 'Latency', ('op',), buckets=(0.1, 1))
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value, op='a')
+
+        lines = registry.render().splitlines()
+        assert 'latency_seconds_bucket{op="a",le="0.1"} 1' in lines
+        assert 'latency_seconds_bucket{op="a",le="1"} 2' in lines
+        assert 'latency_seconds_bucket{op="a",le="+Inf"} 3' in lines
+        assert 'latency_seconds_sum{op="a"} 5.55' in lines
+        assert 'latency_seconds_count{op="a"} 3' in lines
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter('calls_total', 'Calls')
+        counter.inc()
+        assert counter.value() == 0
+        assert [line for line in registry.render().splitlines() if not line.startswith('#')] == []
+
+    def test_gauge_collector_and_duplicates(self):
+        registry = MetricsRegistry(enabled=True)
+        registry.gauge_collector('depth', 'Depth', ('queue',), lambda: [(('transfer',), 4)])
+        assert 'depth{queue="transfer"} 4' in registry.render()
+        with pytest.raises(ValueError):
+            registry.counter('depth', 'Depth')
+
+
+class TestInstrumentation:
+    """Test the instrumentation helpers."""
+
+    def test_timed_pan_call_records_errno(self, enabled):
+        @timed_pan_call('test_share')
+        def call(result):
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        call('https://pan.baidu.com/s/1ok')
+        call(-62)
+        with pytest.raises(RuntimeError):
+            call(RuntimeError('boom'))
+
+        assert metrics.PAN_API_REQUESTS.value(endpoint='test_share', errno=0) == 1
+        assert metrics.PAN_API_REQUESTS.value(endpoint='test_share', errno=-62) == 1
+        assert metrics.PAN_API_REQUESTS.value(endpoint='test_share', errno='exception') == 1
+        assert metrics.PAN_API_DURATION.count(endpoint='test_share') == 3
+
+    def test_throttler_sleep_by_reason(self, enabled):
+        from core_service import Throttler
+
+        throttler = Throttler({'throttle': {'cooldown_on_errno_-62_sec': 3, 'max_consecutive_failures': 10}})
+        before = metrics.THROTTLE_SLEEP.value(reason='cooldown_62')
+        with patch('core_service.time.sleep') as sleep:
+            throttler.on_failure(-62)
+        sleep.assert_called_once_with(3)
+        assert metrics.THROTTLE_SLEEP.value(reason='cooldown_62') == before + 3
+
+    def test_task_duration_observed(self, enabled):
+        from core_service import CoreService
+
+        service = CoreService(cookie='fake_cookie', config={})
+        service.set_log_callback(lambda message: None)
+        service.share_queue.append({'status': 'running', 'file_info': {}})
+        before = metrics.TASK_DURATION.count(queue='share', outcome='failed')
+
+        service._on_share_progress(0, 'running')
+        service.share_queue[0]['status'] = 'failed'
+        service._on_share_failed(0, 'boom')
+
+        assert metrics.TASK_DURATION.count(queue='share', outcome='failed') == before + 1
+
+    def test_sql_operation(self):
+        assert sql_operation('  select * from t') == 'SELECT'
+        assert sql_operation('PRAGMA journal_mode') == 'OTHER'
+        assert sql_operation('') == 'OTHER'
+
+    def test_timed_cursor(self, enabled):
+        conn = sqlite3.connect(':memory:')
+        cursor = TimedCursor(conn.cursor())
+        before = metrics.DB_QUERY_DURATION.count(operation='CREATE')
+        cursor.execute('CREATE TABLE t (x INTEGER)')
+        cursor.executemany('INSERT INTO t VALUES (?)', [(1,), (2,)])
+        cursor.execute('SELECT x FROM t ORDER BY x')
+
+        assert [row[0] for row in cursor] == [1, 2]
+        assert metrics.DB_QUERY_DURATION.count(operation='CREATE') == before + 1
+        conn.close()
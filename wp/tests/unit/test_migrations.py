@@ -0,0 +1,203 @@
+"""
+Unit tests for the versioned migration runner.
+Tests version bookkeeping, adoption of legacy databases, the online DDL
+helpers and batched backfills on SQLite.
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from migrations import (
+    Migration, add_column, applied_versions, backfill_in_batches, create_index, index_exists, run_migrations
+)
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(os.path.join(str(tmp_path), 'migrations.db'))
+    yield conn
+    conn.close()
+
+
+def _table(version, name):
+    return Migration(version, f'create_{name}', scripts={
+        'sqlite': [f"CREATE TABLE IF NOT EXISTS {name} (id INTEGER PRIMARY KEY, value TEXT)"]
+    })
+
+
+class TestRunMigrations:
+    """Test run_migrations."""
+
+    def test_applies_in_version_order_once(self, conn):
+        calls = []
+        migrations = [
+            Migration(2, 'second', upgrade=lambda c, db: calls.append(2)),
+            Migration(1, 'first', upgrade=lambda c, db: calls.append(1)),
+        ]
+
+        assert run_migrations(conn, 'sqlite', migrations) == [1, 2]
+        assert run_migrations(conn, 'sqlite', migrations) == []
+        assert calls == [1, 2]
+        assert applied_versions(conn, 'sqlite') == {1: 'first', 2: 'second'}
+
+    def test_scripts_per_backend(self, conn):
+        run_migrations(conn, 'sqlite', [_table(1, 't1'), _table(2, 't2')])
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {'t1', 't2', 'schema_migrations'} <= tables
+
+    def test_target_version(self, conn):
+        migrations = [Migration(v, f'm{v}', upgrade=lambda c, db: None) for v in (1, 2, 3)]
+        assert run_migrations(conn, 'sqlite', migrations, target=2) == [1, 2]
+        assert run_migrations(conn, 'sqlite', migrations) == [3]
+
+    def test_failure_keeps_completed_versions(self, conn):
+        def broken(c, db):
+            raise RuntimeError('boom')
+
+        migrations = [Migration(1, 'ok', upgrade=lambda c, db: None), Migration(2, 'broken', upgrade=broken)]
+        with pytest.raises(RuntimeError):
+            run_migrations(conn, 'sqlite', migrations)
+        assert applied_versions(conn, 'sqlite') == {1: 'ok'}
+
+        migrations[1] = Migration(2, 'fixed', upgrade=lambda c, db: None)
+        assert run_migrations(conn, 'sqlite', migrations) == [2]
+
+    def test_duplicate_versions_rejected(self, conn):
+        with pytest.raises(ValueError):
+            run_migrations(conn, 'sqlite', [_table(1, 'a'), _table(1, 'b')])
+
+
+class TestSchemaHelpers:
+    """Test create_index, add_column and backfill_in_batches."""
+
+    def test_create_index_and_add_column_idempotent(self, conn):
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+
+        assert create_index(conn, 'sqlite', 'idx_items_name', 'items', 'name') is True
+        assert create_index(conn, 'sqlite', 'idx_items_name', 'items', 'name') is False
+        assert index_exists(conn.cursor(), 'sqlite', 'items', 'idx_items_name')
+
+        assert add_column(conn, 'sqlite', 'items', 'label', 'TEXT') is True
+        assert add_column(conn, 'sqlite', 'items', 'label', 'TEXT') is False
+
+    def test_backfill_in_batches(self, conn):
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, upper_name TEXT)")
+        conn.executemany("INSERT INTO items (name) VALUES (?)", [(f'n{i}',) for i in range(25)])
+        conn.execute("UPDATE items SET upper_name = 'SET' WHERE id = 3")
+        conn.commit()
+
+        statements = []
+        conn.set_trace_callback(statements.append)
+        updated = backfill_in_batches(
+            conn, 'sqlite', 'items', ['name'], ['upper_name'],
+            lambda row: (row[0].upper(),), where='upper_name IS NULL', batch_size=10
+        )
+        conn.set_trace_callback(None)
+
+        assert updated == 24
+        assert sum(1 for sql in statements if sql == 'COMMIT') == 3
+        rows = dict(conn.execute("SELECT id, upper_name FROM items").fetchall())
+        assert rows[3] == 'SET'
+        assert rows[25] == 'N24'
+
+
+class TestInitDbMigrations:
+    """Test the schema migrations defined in init_db."""
+
+    def test_fresh_database(self, tmp_path):
+        from init_db import MIGRATIONS, init_sqlite
+
+        db_path = os.path.join(str(tmp_path), 'fresh.db')
+        assert init_sqlite(db_path)
+        assert init_sqlite(db_path)
+
+        conn = sqlite3.connect(db_path)
+        try:
+            versions = applied_versions(conn, 'sqlite')
+        finally:
+            conn.close()
+        assert sorted(versions) == [m.version for m in MIGRATIONS]
+
+    def test_adopts_legacy_database(self, tmp_path):
+        """A database created before versioning (no tag column) is brought up to date."""
+        from init_db import MIGRATIONS, migrate_database
+
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'legacy.db'))
+        conn.execute("""
+            CREATE TABLE articles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                article_id TEXT UNIQUE NOT NULL,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT,
+                content TEXT,
+                crawled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.execute(
+            "INSERT INTO articles (article_id, url, title, content) "
+            "VALUES ('a1', 'https://lewz.cn/jprj/tech/1', 't', 'c')"
+        )
+        conn.commit()
+
+        try:
+            assert migrate_database(conn, 'sqlite') == [m.version for m in MIGRATIONS]
+            assert conn.execute("SELECT tag FROM articles").fetchone()[0] == 'tech'
+            assert migrate_database(conn, 'sqlite') == []
+        finally:
+            conn.close()
+
+    def test_search_index_migration_follows_setting(self, tmp_path, monkeypatch):
+        """Migration 3 skips the index when disabled and fails loudly when it cannot be built."""
+        import knowledge_search
+        from config import Config
+        from init_db import migrate_database
+
+        monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', False)
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'nofts.db'))
+        try:
+            migrate_database(conn, 'sqlite', target=3)
+            assert not knowledge_search.search_index_exists(conn, 'sqlite')
+        finally:
+            conn.close()
+
+        monkeypatch.setattr(Config, 'KNOWLEDGE_FTS_ENABLED', True)
+        monkeypatch.setattr(knowledge_search, 'ensure_search_index', lambda conn, db_type: False)
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'broken.db'))
+        try:
+            with pytest.raises(RuntimeError):
+                migrate_database(conn, 'sqlite', target=3)
+            assert 3 not in applied_versions(conn, 'sqlite')
+        finally:
+            conn.close()
+
+    def test_links_extracted_at_adopts_legacy_watermark(self, tmp_path):
+        """Articles up to the old incremental watermark are marked as extracted."""
+        import json
+        from init_db import migrate_database
+
+        conn = sqlite3.connect(os.path.join(str(tmp_path), 'watermark.db'))
+        try:
+            migrate_database(conn, 'sqlite', target=7)
+            conn.executemany(
+                "INSERT INTO articles (article_id, url, content, updated_at) VALUES (?, ?, 'c', ?)",
+                [(f'a{i}', f'https://lewz.cn/jprj/x/{i}', f'2020-01-0{i} 00:00:00') for i in range(1, 5)]
+            )
+            conn.execute(
+                "INSERT INTO system_config (key, value) VALUES ('link_extraction_watermark', ?)",
+                (json.dumps({'updated_at': '2020-01-02 00:00:00', 'id': 2}),)
+            )
+            conn.commit()
+
+            assert migrate_database(conn, 'sqlite') == [8]
+            rows = conn.execute("SELECT article_id, links_extracted_at FROM articles ORDER BY id").fetchall()
+            assert [row[1] is not None for row in rows] == [True, True, False, False]
+            assert conn.execute(
+                "SELECT COUNT(*) FROM system_config WHERE key = 'link_extraction_watermark'"
+            ).fetchone()[0] == 0
+        finally:
+            conn.close()
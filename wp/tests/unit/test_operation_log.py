@@ -0,0 +1,204 @@
+"""
+Unit tests for the operation_logs batch writer and time-series query.
+Tests the migration columns, batched writes, buffer overflow, bucket
+arithmetic and the CoreService operation callback.
+"""
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from operation_log import OperationLogWriter, query_timeseries
+
+
+@pytest.fixture
+def temp_config(tmp_path):
+    from config import Config
+    from init_db import init_sqlite
+
+    class TempConfig(Config):
+        DATABASE_TYPE = 'sqlite'
+        DATABASE_PATH = os.path.join(str(tmp_path), 'operations.db')
+
+    assert init_sqlite(TempConfig.DATABASE_PATH)
+    return TempConfig
+
+
+def _rows(config, sql='SELECT account, operation, status, errno, latency_ms, created_ts FROM operation_logs ORDER BY id'):
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def _insert(config, rows):
+    """Insert (account, operation, status, latency_ms, created_ts) rows directly."""
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    try:
+        conn.executemany(
+            "INSERT INTO operation_logs (account, operation, status, latency_ms, created_ts) VALUES (?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class TestMigration:
+    """Test the operation_logs migration."""
+
+    def test_columns_and_indexes(self, temp_config):
+        columns = {row[1] for row in _rows(temp_config, "PRAGMA table_info(operation_logs)")}
+        assert {'errno', 'latency_ms', 'created_ts'} <= columns
+
+        indexes = {row[1] for row in _rows(temp_config, "PRAGMA index_list(operation_logs)")}
+        assert {'idx_operation_logs_account_ts', 'idx_operation_logs_ts'} <= indexes
+
+
+class TestOperationLogWriter:
+    """Test buffered batch writes."""
+
+    def test_flush_writes_buffered_rows(self, temp_config):
+        writer = OperationLogWriter(temp_config, batch_size=100, flush_interval_sec=60)
+        try:
+            writer.record('main', 'transfer', 'completed', errno=0, latency_ms=120, details='https://pan.baidu.com/s/1abc')
+            writer.record('main', 'share', 'failed', errno=-6, latency_ms=30)
+            assert _rows(temp_config) == []
+            assert writer.get_status()['buffered'] == 2
+
+            assert writer.flush() == 2
+            rows = _rows(temp_config)
+        finally:
+            writer.close()
+
+        assert [row[:5] for row in rows] == [
+            ('main', 'transfer', 'completed', 0, 120),
+            ('main', 'share', 'failed', -6, 30),
+        ]
+        assert abs(rows[0][5] - time.time()) < 5
+        assert writer.get_status() == {'buffered': 0, 'written': 2, 'dropped': 0}
+
+    def test_batch_size_wakes_background_thread(self, temp_config):
+        writer = OperationLogWriter(temp_config, batch_size=3, flush_interval_sec=60)
+        try:
+            for _ in range(3):
+                writer.record('main', 'transfer', 'completed')
+            deadline = time.time() + 5
+            while writer.written < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            assert len(_rows(temp_config)) == 3
+        finally:
+            writer.close()
+
+    def test_full_buffer_drops_new_rows(self, temp_config):
+        writer = OperationLogWriter(temp_config, batch_size=100, flush_interval_sec=60, max_buffer=2)
+        try:
+            for _ in range(5):
+                writer.record('main', 'transfer', 'completed')
+            assert writer.get_status()['dropped'] == 3
+        finally:
+            writer.close()
+        assert len(_rows(temp_config)) == 2
+
+    def test_close_flushes_remaining(self, temp_config):
+        writer = OperationLogWriter(temp_config, batch_size=100, flush_interval_sec=60)
+        writer.record('main', 'transfer', 'skipped', errno=4)
+        writer.close()
+        assert [row[2] for row in _rows(temp_config)] == ['skipped']
+
+
+class TestQueryTimeseries:
+    """Test the per-account time-series aggregation."""
+
+    def test_buckets_throughput_and_error_rate(self, temp_config):
+        base = 1_700_000_100 - 1_700_000_100 % 300
+        _insert(temp_config, [
+            ('main', 'transfer', 'completed', 100, base + 10),
+            ('main', 'transfer', 'completed', 300, base + 20),
+            ('main', 'transfer', 'failed', None, base + 30),
+            ('main', 'transfer', 'skipped', None, base + 40),
+            ('main', 'transfer', 'requeued', None, base + 50),
+            ('main', 'share', 'completed', 50, base + 310),
+            ('backup', 'transfer', 'failed', None, base + 20),
+        ])
+
+        data = query_timeseries(temp_config, base, base + 600, bucket_sec=300)
+        main = data['series']['main']
+        assert [point['ts'] for point in main] == [base, base + 300]
+
+        first = main[0]
+        assert (first['completed'], first['failed'], first['skipped'], first['requeued']) == (2, 1, 1, 1)
+        assert first['finished'] == 4
+        assert first['error_rate'] == 0.5
+        assert first['throughput_per_min'] == 0.4
+        assert first['avg_latency_ms'] == 200.0
+
+        assert data['series']['backup'][0]['error_rate'] == 1.0
+        assert data['series']['backup'][0]['avg_latency_ms'] is None
+
+    def test_filters(self, temp_config):
+        base = 1_700_000_000
+        _insert(temp_config, [
+            ('main', 'transfer', 'completed', 1, base),
+            ('main', 'share', 'completed', 1, base),
+            ('backup', 'transfer', 'completed', 1, base),
+            ('main', 'transfer', 'completed', 1, base + 3600),
+        ])
+
+        data = query_timeseries(temp_config, base, base + 60, bucket_sec=60, account='main', operation='share')
+        assert list(data['series']) == ['main']
+        assert sum(point['completed'] for point in data['series']['main']) == 1
+
+    def test_invalid_arguments(self, temp_config):
+        with pytest.raises(ValueError):
+            query_timeseries(temp_config, 0, 3600, bucket_sec=10)
+        with pytest.raises(ValueError):
+            query_timeseries(temp_config, 3600, 0)
+        with pytest.raises(ValueError):
+            query_timeseries(temp_config, 0, 86400 * 30, bucket_sec=60)
+
+
+class TestCoreServiceCallback:
+    """Test that CoreService reports task outcomes to the operation callback."""
+
+    def test_failed_share_reported_with_errno_and_latency(self):
+        from core_service import CoreService
+
+        calls = []
+        service = CoreService(cookie='fake_cookie', config={})
+        service.set_log_callback(lambda message: None)
+        service.set_operation_callback(lambda *args: calls.append(args))
+        service.share_queue.append({'status': 'running', 'file_info': {'path': '/docs/a.pdf'}})
+
+        service._on_share_progress(0, 'running')
+        service.share_queue[0].update(status='failed', errno=-9, error_message='文件不存在')
+        service._on_share_failed(0, '文件不存在')
+
+        assert len(calls) == 1
+        queue, outcome, errno, latency_ms, details = calls[0]
+        assert (queue, outcome, errno) == ('share', 'failed', -9)
+        assert latency_ms >= 0
+        assert details == '/docs/a.pdf 文件不存在'
+
+    def test_callback_errors_do_not_break_tasks(self):
+        from core_service import CoreService
+
+        def broken(*args):
+            raise RuntimeError('db down')
+
+        logs = []
+        service = CoreService(cookie='fake_cookie', config={})
+        service.set_log_callback(logs.append)
+        service.set_operation_callback(broken)
+        service.transfer_queue.append({'status': 'running', 'share_link': 'https://pan.baidu.com/s/1abc'})
+
+        service._on_transfer_progress(0, 'running')
+        service.transfer_queue[0]['status'] = 'completed'
+        service._on_transfer_completed(0, '/批量转存')
+
+        assert any('记录操作日志失败' in message for message in logs)
@@ -0,0 +1,90 @@
+"""
+Unit tests for keyset cursor pagination helpers.
+Tests cursor round trips, keyset conditions and the count cache.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from pagination import CountCache, decode_cursor, encode_cursor, keyset_condition
+
+
+class TestCursor:
+    """Test encode_cursor / decode_cursor."""
+
+    def test_round_trip(self):
+        """A cursor decodes back to its sort value and id."""
+        cursor = encode_cursor('title', 'asc', '标题 1', 42)
+        assert '=' not in cursor
+        assert decode_cursor(cursor, 'title', 'ASC') == ('标题 1', 42)
+
+    def test_non_primitive_value_stringified(self):
+        """Datetime-like values are stored as strings."""
+        import datetime
+        value = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        cursor = encode_cursor('created_at', 'DESC', value, 1)
+        assert decode_cursor(cursor, 'created_at', 'DESC') == (str(value), 1)
+
+    def test_invalid_cursor(self):
+        """Garbage input raises ValueError."""
+        with pytest.raises(ValueError):
+            decode_cursor('!!!', 'created_at', 'DESC')
+
+    def test_sort_mismatch(self):
+        """A cursor cannot be reused with a different sort."""
+        cursor = encode_cursor('created_at', 'DESC', '2024-01-01', 1)
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 'created_at', 'ASC')
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 'title', 'DESC')
+
+
+class TestKeysetCondition:
+    """Test keyset_condition."""
+
+    def test_desc(self):
+        sql, params = keyset_condition('created_at', 'id', 'DESC', '?', 'x', 7)
+        assert sql == '(created_at < ? OR (created_at = ? AND id < ?))'
+        assert params == ['x', 'x', 7]
+
+    def test_asc(self):
+        sql, _ = keyset_condition('title', 'el.id', 'asc', '%s', 'x', 7)
+        assert sql == '(title > %s OR (title = %s AND el.id > %s))'
+
+
+class TestCountCache:
+    """Test CountCache."""
+
+    def test_cached_within_ttl(self):
+        """compute runs once per key within the TTL."""
+        cache = CountCache(ttl_sec=60)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        assert cache.get_or_compute('k', compute) == 1
+        assert cache.get_or_compute('k', compute) == 1
+        assert cache.get_or_compute('other', compute) == 2
+
+    def test_expired_and_invalidated(self):
+        """Expired entries and invalidate() force a recount."""
+        cache = CountCache(ttl_sec=0)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        cache.get_or_compute('k', compute)
+        cache.get_or_compute('k', compute)
+        assert len(calls) == 2
+
+        cache = CountCache(ttl_sec=60)
+        cache.get_or_compute('k', compute)
+        cache.invalidate()
+        cache.get_or_compute('k', compute)
+        assert len(calls) == 4
+
+    def test_bounded_size(self):
+        """The cache never grows past max_entries."""
+        cache = CountCache(ttl_sec=60, max_entries=3)
+        for i in range(10):
+            cache.get_or_compute(i, lambda: 0)
+        assert len(cache._entries) <= 3
@@ -0,0 +1,156 @@
+"""
+Unit tests for the Baidu Pan session manager.
+Tests bdstoken refresh, pausing workers while re-authenticating and that
+tasks hit by an expired login are retried instead of marked failed.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from core_service import MAX_AUTH_RETRIES, ShareWorker, Throttler, TransferWorker
+from pan_session import SESSION_EXPIRED, SESSION_READY, PanSession
+
+NO_DELAY = {'throttle': {'jitter_ms_min': 0, 'jitter_ms_max': 0}}
+
+
+class FakeAdapter:
+    """Adapter whose bdstoken refreshes and operations follow a script."""
+
+    def __init__(self, refresh_results=None, op_results=None):
+        self.bdstoken = 'token0'
+        self.refresh_results = list(refresh_results or [])
+        self.op_results = list(op_results or [])
+        self.refresh_calls = 0
+        self.op_tokens = []
+
+    def refresh_bdstoken(self):
+        self.refresh_calls += 1
+        result = self.refresh_results.pop(0) if self.refresh_results else f'token{self.refresh_calls}'
+        if isinstance(result, str):
+            self.bdstoken = result
+        return result
+
+    def _next(self):
+        self.op_tokens.append(self.bdstoken)
+        return self.op_results.pop(0) if self.op_results else 0
+
+    def create_share(self, fs_id, expiry=7, password=''):
+        result = self._next()
+        return 'https://pan.baidu.com/s/1ok' if result == 0 else result
+
+    def transfer(self, share_url, password, dest_folder):
+        return self._next()
+
+
+def _run_worker(worker, tasks):
+    worker.start()
+    deadline = time.monotonic() + 5
+    while not all(t['status'] in ('completed', 'failed') for t in tasks) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+    worker.join(2)
+
+
+def _share_tasks(count=1):
+    return [{'file_info': {'fs_id': i, 'name': f'f{i}', 'path': f'/f{i}'}, 'status': 'pending',
+             'password_mode': 'none'} for i in range(count)]
+
+
+class TestPanSession:
+    """Test PanSession."""
+
+    def test_recover_refreshes_token(self):
+        adapter = FakeAdapter()
+        session = PanSession(adapter, log_callback=lambda message: None)
+
+        assert session.recover(-6, 'token0')
+        assert adapter.bdstoken == 'token1'
+        assert session.state == SESSION_READY
+        assert session.wait_ready(0)
+
+        # 另一个工作线程带着旧令牌失败：令牌已刷新，不再重复认证
+        assert session.recover(-4, 'token0')
+        assert adapter.refresh_calls == 1
+        assert not session.recover(-62, 'token1')
+
+    def test_failed_recover_pauses_until_background_retry(self):
+        adapter = FakeAdapter(refresh_results=[-6, 'fresh'])
+        session = PanSession(adapter, refresh_interval_sec=0, retry_sec=0.05, log_callback=lambda message: None)
+
+        assert not session.recover(-6, 'token0')
+        assert session.state == SESSION_EXPIRED
+        assert not session.wait_ready(0)
+        assert session.get_status()['last_error'] == -6
+
+        session.start()
+        try:
+            assert session.wait_ready(5)
+        finally:
+            session.stop()
+        assert adapter.bdstoken == 'fresh'
+        assert session.get_status()['state'] == SESSION_READY
+
+    def test_network_error_keeps_current_token(self):
+        adapter = FakeAdapter(refresh_results=[-1])
+        session = PanSession(adapter, log_callback=lambda message: None)
+
+        assert not session.refresh()
+        assert session.state == SESSION_READY
+        assert adapter.bdstoken == 'token0'
+
+
+class TestWorkersWithSession:
+    """Test TransferWorker/ShareWorker recovery from expired logins."""
+
+    def test_share_task_retried_after_reauth(self):
+        adapter = FakeAdapter(op_results=[-6, 0])
+        session = PanSession(adapter, log_callback=lambda message: None)
+        tasks = _share_tasks()
+        requeued, failed = [], []
+        worker = ShareWorker(tasks, adapter, Throttler(NO_DELAY), on_failed=lambda i, e: failed.append(i),
+                             session=session, on_requeued=requeued.append)
+
+        _run_worker(worker, tasks)
+
+        assert tasks[0]['status'] == 'completed'
+        assert requeued == [0] and failed == []
+        assert adapter.op_tokens == ['token0', 'token1']
+
+    def test_transfer_task_retried_after_reauth(self):
+        adapter = FakeAdapter(op_results=[-4, 0])
+        session = PanSession(adapter, log_callback=lambda message: None)
+        tasks = [{'share_link': 'https://pan.baidu.com/s/1abc', 'status': 'pending'}]
+        worker = TransferWorker(tasks, adapter, Throttler(NO_DELAY), session=session)
+
+        _run_worker(worker, tasks)
+
+        assert tasks[0]['status'] == 'completed'
+        assert tasks[0]['auth_retries'] == 1
+
+    def test_retries_are_bounded(self):
+        adapter = FakeAdapter(op_results=[-6] * 5)
+        session = PanSession(adapter, log_callback=lambda message: None)
+        tasks = _share_tasks()
+        worker = ShareWorker(tasks, adapter, Throttler(NO_DELAY), session=session)
+
+        _run_worker(worker, tasks)
+
+        assert tasks[0]['status'] == 'failed'
+        assert len(adapter.op_tokens) == MAX_AUTH_RETRIES + 1
+
+    def test_workers_pause_while_session_expired(self):
+        adapter = FakeAdapter(refresh_results=[-6])
+        session = PanSession(adapter, log_callback=lambda message: None)
+        assert not session.recover(-6, 'token0')
+
+        tasks = _share_tasks(2)
+        worker = ShareWorker(tasks, adapter, Throttler(NO_DELAY), session=session)
+        threading.Timer(0.2, session.refresh).start()
+        _run_worker(worker, tasks)
+
+        # 会话失效期间没有取任务，恢复后自动继续
+        assert adapter.op_tokens == ['token2', 'token2']
+        assert [task['status'] for task in tasks] == ['completed', 'completed']
@@ -0,0 +1,67 @@
+"""
+Unit tests for the sampling profiler.
+Tests thread grouping, collapsed stack output, thread filtering and the
+bounded sampling window.
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from profiler import SamplingProfiler, thread_group
+
+
+def _busy_until(event):
+    while not event.is_set():
+        sum(range(100))
+
+
+class TestSamplingProfiler:
+    """Test SamplingProfiler."""
+
+    def test_thread_group(self):
+        assert thread_group('waitress-12') == 'waitress-N'
+        assert thread_group('Thread-3 (process_request_thread)') == 'Thread-N (process_request_thread)'
+        assert thread_group('transfer-worker') == 'transfer-worker'
+
+    def test_collapsed_stacks_for_named_thread(self):
+        done = threading.Event()
+        worker = threading.Thread(target=_busy_until, args=(done,), name='share-worker', daemon=True)
+        worker.start()
+        profiler = SamplingProfiler()
+        try:
+            assert profiler.start(interval_ms=1, thread_filter='worker')
+            assert not profiler.start()
+            time.sleep(0.1)
+            assert profiler.stop()
+        finally:
+            done.set()
+            worker.join(2)
+
+        lines = profiler.collapsed().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(' ', 1)
+        frames = stack.split(';')
+        assert frames[0] == 'share-worker'
+        assert any(frame.startswith('_busy_until (test_profiler.py:') for frame in frames)
+        assert int(count) > 0
+
+        status = profiler.status()
+        assert not status['running']
+        assert set(status['threads']) == {'share-worker'}
+        assert status['samples'] > 0
+
+    def test_stops_after_duration(self):
+        profiler = SamplingProfiler(max_duration_sec=0.05)
+        assert profiler.start(interval_ms=1, duration_sec=10)
+        deadline = time.monotonic() + 5
+        while profiler.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        status = profiler.status()
+        assert not status['running']
+        assert status['duration_sec'] < 1
+        assert status['finished_at'] is not None
+        assert not profiler.stop()
@@ -0,0 +1,140 @@
+"""
+Query-plan regression tests for hot queries.
+Records the SQL the services actually run (via the SQLite trace callback)
+and asserts EXPLAIN QUERY PLAN uses the composite indexes instead of full
+scans or temporary sort B-trees.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from db_pool import get_connection
+from schema_indexes import COMPOSITE_INDEXES, ensure_composite_indexes
+
+
+@pytest.fixture
+def config(tmp_path):
+    from config import Config
+    from init_db import init_sqlite
+
+    class TempConfig(Config):
+        DATABASE_TYPE = 'sqlite'
+        DATABASE_PATH = os.path.join(str(tmp_path), 'plans.db')
+
+    assert init_sqlite(TempConfig.DATABASE_PATH)
+
+    conn = get_connection(TempConfig)
+    conn.executemany(
+        "INSERT INTO articles (article_id, url, title, content, tag) VALUES (?, ?, ?, ?, ?)",
+        [(f'a{i}', f'https://lewz.cn/jprj/t{i % 5}/{i}', f'title {i}', 'x' * 500, f't{i % 5}')
+         for i in range(200)]
+    )
+    conn.executemany(
+        "INSERT INTO extracted_links (article_id, original_link, status) VALUES (?, ?, ?)",
+        [(f'a{i % 200}', f'https://pan.baidu.com/s/{i}', ('pending', 'completed', 'failed')[i % 3])
+         for i in range(600)]
+    )
+    conn.commit()
+    conn.close()
+    return TempConfig
+
+
+def _record_sql(config, action, table):
+    """Run action and return the traced statements that read or write table."""
+    conn = get_connection(config)
+    statements = []
+    conn.raw.set_trace_callback(statements.append)
+    try:
+        action()
+    finally:
+        conn.raw.set_trace_callback(None)
+        conn.close()
+    return [sql for sql in statements
+            if table in sql and sql.lstrip().upper().startswith(('SELECT', 'UPDATE'))]
+
+
+def _plan(config, sql):
+    conn = get_connection(config)
+    try:
+        return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+    finally:
+        conn.close()
+
+
+def _assert_indexed(plan, index_name):
+    assert any(index_name in step for step in plan), plan
+    assert not any('TEMP B-TREE' in step for step in plan), plan
+    assert not any(step.startswith('SCAN') and 'INDEX' not in step for step in plan), plan
+
+
+class TestCompositeIndexes:
+    """Test ensure_composite_indexes."""
+
+    def test_created_by_init_and_idempotent(self, config):
+        conn = get_connection(config)
+        try:
+            names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert {name for name, _, _ in COMPOSITE_INDEXES} <= names
+            assert ensure_composite_indexes(conn, 'sqlite') == []
+        finally:
+            conn.close()
+
+
+class TestHotQueryPlans:
+    """Test the query plans of the hot access paths."""
+
+    def test_links_by_status_ordered_by_created_at(self, config):
+        from link_extractor_service import LinkExtractorService
+
+        service = LinkExtractorService(config)
+        statements = _record_sql(
+            config, lambda: service.get_extracted_links_page(status='pending', limit=20), 'extracted_links'
+        )
+        _assert_indexed(_plan(config, statements[0]), 'idx_extracted_links_status_created')
+
+    def test_links_by_article_ordered_by_created_at(self, config):
+        from link_extractor_service import LinkExtractorService
+
+        service = LinkExtractorService(config)
+        statements = _record_sql(
+            config, lambda: service.get_extracted_links_page(article_id='a7', limit=20), 'extracted_links'
+        )
+        _assert_indexed(_plan(config, statements[0]), 'idx_extracted_links_article_created')
+
+    def test_knowledge_entries_filtered_by_status(self, config):
+        from knowledge_repository import KnowledgeRepository
+
+        repo = KnowledgeRepository(config)
+        statements = _record_sql(
+            config, lambda: repo.list_entries(limit=20, status='completed', count_mode='none'), 'extracted_links'
+        )
+        _assert_indexed(_plan(config, statements[-1]), 'idx_extracted_links_status_created')
+
+    def test_entry_detail(self, config):
+        from knowledge_repository import KnowledgeRepository
+
+        repo = KnowledgeRepository(config)
+        statements = _record_sql(config, lambda: repo.get_entry('a7'), 'extracted_links')
+        _assert_indexed(_plan(config, statements[-1]), 'idx_extracted_links_article_created')
+
+    def test_status_update_uses_unique_key(self, config):
+        from link_extractor_service import LinkExtractorService
+
+        service = LinkExtractorService(config)
+        statements = _record_sql(
+            config,
+            lambda: service.update_extracted_link_status('a7', 'https://pan.baidu.com/s/7', status='failed'),
+            'extracted_links'
+        )
+        plan = _plan(config, statements[0])
+        assert any('article_id=? AND original_link=?' in step for step in plan), plan
+
+    def test_articles_page_ordered_by_crawled_at(self, config):
+        from crawler_service import CrawlerService
+
+        service = CrawlerService(config)
+        statements = _record_sql(config, lambda: service.get_articles_page(limit=20), 'articles')
+        _assert_indexed(_plan(config, statements[0]), 'idx_articles_crawled_at')
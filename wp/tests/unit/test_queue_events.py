@@ -0,0 +1,227 @@
+"""
+Unit tests for the queue event bus.
+Tests sequencing and replay, reset on buffer overflow, the SSE encoding,
+the events CoreService publishes for task and queue changes and the
+paginated, incremental queue reads built on the event sequence.
+"""
+import json
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from queue_events import (
+    QueueEventBus, count_statuses, counter_delta, format_sse, select_tasks, stream_events
+)
+
+
+def _parse_sse(chunks):
+    """Split SSE text into (event, id, data) tuples, skipping comments."""
+    messages = []
+    for block in ''.join(chunks).split('\n\n'):
+        fields = {}
+        for line in block.split('\n'):
+            if line and not line.startswith(':'):
+                name, _, value = line.partition(': ')
+                fields[name] = value
+        if 'data' in fields:
+            messages.append((fields.get('event'), int(fields['id']), json.loads(fields['data'])))
+    return messages
+
+
+class TestQueueEventBus:
+    """Test QueueEventBus."""
+
+    def test_events_since_replays_in_order(self):
+        bus = QueueEventBus(buffer_size=10)
+        start = bus.version
+        ids = [bus.publish('main', 'transfer', 'task', {'index': i}) for i in range(3)]
+
+        events, reset = bus.events_since(start)
+        assert not reset
+        assert [e['id'] for e in events] == ids
+        assert bus.events_since(ids[1]) == ([events[2]], False)
+        assert bus.events_since(ids[2]) == ([], False)
+
+    def test_reset_when_events_evicted(self):
+        bus = QueueEventBus(buffer_size=2)
+        for i in range(5):
+            bus.publish('main', 'share', 'task', {'index': i})
+
+        assert bus.events_since(1) == ([], True)
+        assert len(bus.events_since(3)[0]) == 2
+        # 序号大于当前版本（服务重启前的客户端）
+        assert bus.events_since(99) == ([], True)
+
+    def test_wait_for_events_wakes_on_publish(self):
+        bus = QueueEventBus()
+        timer = threading.Timer(0.05, bus.publish, args=('main', 'transfer', 'queue', {'action': 'started'}))
+        timer.start()
+        try:
+            events, reset = bus.wait_for_events(0, timeout=5)
+        finally:
+            timer.cancel()
+        assert not reset
+        assert events[0]['data'] == {'action': 'started'}
+
+    def test_wait_for_events_times_out(self):
+        bus = QueueEventBus()
+        assert bus.wait_for_events(0, timeout=0.01) == ([], False)
+
+
+class TestStreamEvents:
+    """Test format_sse and stream_events."""
+
+    def test_format_sse(self):
+        assert format_sse('task', {'name': '文件'}, 7) == 'id: 7\nevent: task\ndata: {"name": "文件"}\n\n'
+
+    def test_stream_filters_account_and_ends(self):
+        bus = QueueEventBus()
+        bus.publish('main', 'transfer', 'task', {'index': 0})
+        bus.publish('backup', 'transfer', 'task', {'index': 1})
+        bus.publish('main', 'share', 'queue', {'action': 'paused'})
+
+        chunks = list(stream_events(bus, 0, account='main', heartbeat_sec=0.01, max_duration_sec=0.05))
+        messages = _parse_sse(chunks)
+
+        assert [(event, event_id) for event, event_id, _ in messages] == [('task', 1), ('queue', 3)]
+        assert messages[0][2] == {'account': 'main', 'queue': 'transfer', 'index': 0}
+        # 其他账户的事件只推进序号
+        assert 'id: 2\n\n' in chunks
+        assert ': keepalive\n\n' in chunks
+
+    def test_stream_sends_reset(self):
+        bus = QueueEventBus(buffer_size=1)
+        for i in range(3):
+            bus.publish('main', 'transfer', 'task', {'index': i})
+
+        messages = _parse_sse(stream_events(bus, 0, heartbeat_sec=0.01, max_duration_sec=0.03))
+        assert messages[0] == ('reset', 3, {'version': 3})
+
+
+class TestCoreServiceEvents:
+    """Test the events CoreService publishes."""
+
+    def _service(self):
+        from core_service import CoreService
+
+        service = CoreService(cookie='fake_cookie', config={})
+        service.set_log_callback(lambda message: None)
+        events = []
+        service.set_event_callback(lambda queue, event, data: events.append((queue, event, data)))
+        return service, events
+
+    def test_counter_delta(self):
+        assert counter_delta('pending', 'running') == {'pending': -1, 'running': 1}
+        assert counter_delta(None, 'pending') == {'pending': 1}
+        assert counter_delta('running', 'running') == {}
+
+    def test_queue_and_task_events(self):
+        service, events = self._service()
+
+        service.add_transfer_task('https://pan.baidu.com/s/1abc', 'abcd')
+        queue, event, data = events[-1]
+        assert (queue, event, data['action'], data['count']) == ('transfer', 'queue', 'added', 1)
+        assert data['status']['pending'] == 1
+        assert 'tasks' not in data['status']
+
+        # 模拟工作线程：更新任务状态后调用回调
+        service.transfer_queue[0]['status'] = 'running'
+        service._on_transfer_progress(0, 'running')
+        service.transfer_queue[0]['status'] = 'completed'
+        service._on_transfer_completed(0, '/批量转存')
+
+        task_events = [data for _, event, data in events if event == 'task']
+        assert [(d['previous'], d['status']) for d in task_events] == [('pending', 'running'), ('running', 'completed')]
+        assert task_events[1]['delta'] == {'running': -1, 'completed': 1}
+        assert task_events[1]['task']['share_link'] == 'https://pan.baidu.com/s/1abc'
+
+        service.clear_transfer_queue()
+        assert events[-1][2]['action'] == 'cleared'
+        assert events[-1][2]['status']['total'] == 0
+
+    def test_callback_errors_do_not_propagate(self):
+        from core_service import CoreService
+
+        service = CoreService(cookie='fake_cookie', config={})
+        messages = []
+        service.set_log_callback(messages.append)
+
+        def broken(queue, event, data):
+            raise RuntimeError('boom')
+
+        service.set_event_callback(broken)
+        assert service.add_transfer_task('https://pan.baidu.com/s/1abc')
+        assert any('发布队列事件失败' in message for message in messages)
+
+
+class TestQueuePages:
+    """Test select_tasks and CoreService.get_queue_page."""
+
+    TASKS = [{'status': status} for status in ['pending', 'completed', 'failed', 'completed', 'pending']]
+
+    def test_count_statuses(self):
+        assert count_statuses(self.TASKS) == {
+            'total': 5, 'pending': 2, 'running': 0, 'completed': 2, 'failed': 1, 'skipped': 0
+        }
+
+    def test_select_tasks(self):
+        page = select_tasks(self.TASKS, offset=1, limit=2)
+        assert [task['index'] for task in page['queue']] == [1, 2]
+        assert (page['total'], page['has_more']) == (5, True)
+
+        page = select_tasks(self.TASKS, status='completed', offset=1, limit=10)
+        assert [task['index'] for task in page['queue']] == [3]
+        assert (page['total'], page['has_more']) == (2, False)
+
+        page = select_tasks(self.TASKS, indices=[0, 4, 9], limit=1)
+        assert [task['index'] for task in page['queue']] == [0]
+        assert (page['total'], page['has_more']) == (2, True)
+
+    def _service(self, bus):
+        from core_service import CoreService
+
+        service = CoreService(cookie='fake_cookie', config={})
+        service.set_log_callback(lambda message: None)
+        service.set_event_callback(lambda queue, event, data: bus.publish('main', queue, event, data))
+        return service
+
+    def test_since_returns_only_changed_tasks(self):
+        bus = QueueEventBus()
+        service = self._service(bus)
+        for i in range(5):
+            service.add_transfer_task(f'https://pan.baidu.com/s/1task{i}')
+
+        page = service.get_queue_page('transfer', limit=2)
+        assert [task['index'] for task in page['queue']] == [0, 1]
+        assert page['status']['pending'] == 5 and page['has_more'] and not page['reset']
+
+        version = bus.version
+        assert service.get_queue_page('transfer', since=version)['queue'] == []
+
+        for index in (3, 1, 3):
+            service.transfer_queue[index]['status'] = 'completed'
+            service._on_transfer_completed(index, '/批量转存')
+        service.add_transfer_task('https://pan.baidu.com/s/1task5')
+
+        # 增量查询不按状态过滤，按队列顺序返回
+        page = service.get_queue_page('transfer', status='pending', since=version)
+        assert [task['index'] for task in page['queue']] == [1, 3, 5]
+        assert page['status']['completed'] == 2
+        assert service.get_queue_page('transfer', since=bus.version)['queue'] == []
+        assert service.get_queue_page('share', since=version)['total'] == 0
+
+    def test_since_before_clear_resets(self):
+        bus = QueueEventBus()
+        service = self._service(bus)
+        service.add_transfer_task('https://pan.baidu.com/s/1old')
+        version = bus.version
+
+        service.clear_transfer_queue()
+        service.add_transfer_task('https://pan.baidu.com/s/1new')
+
+        page = service.get_queue_page('transfer', since=version)
+        assert page['reset']
+        assert [task['share_link'] for task in page['queue']] == ['https://pan.baidu.com/s/1new']
+        assert not service.get_queue_page('transfer', since=bus.version)['reset']
@@ -0,0 +1,122 @@
+"""
+Unit tests for the API response cache.
+Tests TTL expiry, ETag/304 handling and invalidation.
+"""
+import os
+import sys
+
+from flask import Flask, jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from response_cache import ResponseCache
+
+
+def _make_app(cache):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/items')
+    @cache.cached
+    def items():
+        calls.append(1)
+        return jsonify({'calls': len(calls)})
+
+    @app.route('/missing')
+    @cache.cached
+    def missing():
+        calls.append(1)
+        return jsonify({'error': 'not found'}), 404
+
+    return app, calls
+
+
+class TestResponseCache:
+    """Test ResponseCache.cached."""
+
+    def test_hit_after_miss(self):
+        app, calls = _make_app(ResponseCache(ttl_sec=60))
+        client = app.test_client()
+
+        first = client.get('/items')
+        second = client.get('/items')
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.get_json() == {'calls': 1}
+        assert len(calls) == 1
+
+    def test_query_string_is_part_of_key(self):
+        app, calls = _make_app(ResponseCache(ttl_sec=60))
+        client = app.test_client()
+
+        client.get('/items?page=1')
+        client.get('/items?page=2')
+        assert len(calls) == 2
+
+    def test_if_none_match_returns_304(self):
+        app, _ = _make_app(ResponseCache(ttl_sec=60))
+        client = app.test_client()
+
+        etag = client.get('/items').headers['ETag']
+        response = client.get('/items', headers={'If-None-Match': etag})
+
+        assert response.status_code == 304
+        assert response.data == b''
+        assert response.headers['ETag'] == etag
+
+    def test_invalidate(self):
+        cache = ResponseCache(ttl_sec=60)
+        app, calls = _make_app(cache)
+        client = app.test_client()
+
+        etag = client.get('/items').headers['ETag']
+        cache.invalidate()
+        response = client.get('/items', headers={'If-None-Match': etag})
+
+        assert response.status_code == 200
+        assert response.get_json() == {'calls': 2}
+        assert response.headers['ETag'] != etag
+
+    def test_ttl_expiry(self, monkeypatch):
+        import response_cache
+
+        now = [1000.0]
+        monkeypatch.setattr(response_cache.time, 'time', lambda: now[0])
+        app, calls = _make_app(ResponseCache(ttl_sec=30))
+        client = app.test_client()
+
+        client.get('/items')
+        now[0] += 29
+        client.get('/items')
+        now[0] += 2
+        client.get('/items')
+        assert len(calls) == 2
+
+    def test_errors_not_cached(self):
+        app, calls = _make_app(ResponseCache(ttl_sec=60))
+        client = app.test_client()
+
+        assert client.get('/missing').status_code == 404
+        client.get('/missing')
+        assert len(calls) == 2
+
+    def test_disabled(self):
+        app, calls = _make_app(ResponseCache(ttl_sec=0))
+        client = app.test_client()
+
+        response = client.get('/items')
+        client.get('/items')
+        assert 'ETag' not in response.headers
+        assert len(calls) == 2
+
+    def test_redis_url_without_redis_falls_back(self, monkeypatch):
+        import response_cache
+
+        monkeypatch.setattr(response_cache, 'redis', None)
+        app, calls = _make_app(ResponseCache(ttl_sec=60, storage_url='redis://localhost:6379/0'))
+        client = app.test_client()
+
+        client.get('/items')
+        client.get('/items')
+        assert len(calls) == 1
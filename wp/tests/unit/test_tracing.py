@@ -0,0 +1,115 @@
+"""
+Unit tests for the tracing module.
+Tests the no-op mode, the built-in span recorder and JSON exporter,
+parent/child linking, sampling and the spans emitted by the workers.
+"""
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+import tracing
+from tracing import Tracer
+
+
+def _read_spans(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    path = os.path.join(tmp_path, 'traces.jsonl')
+    tracing.configure(enabled=True, export_path=path, use_otel=False)
+    yield path
+    tracing.configure(enabled=False)
+
+
+class TestTracer:
+    """Test Tracer."""
+
+    def test_disabled_is_noop(self, tmp_path):
+        path = os.path.join(tmp_path, 'traces.jsonl')
+        tracer = Tracer(enabled=False, export_path=path)
+        with tracer.span('noop', key='value') as span:
+            span.set_attribute('other', 1)
+        tracer.flush()
+        assert tracer.backend == 'disabled'
+        assert not os.path.exists(path)
+
+    def test_builtin_spans_nest_and_export(self, tmp_path):
+        path = os.path.join(tmp_path, 'traces.jsonl')
+        tracer = Tracer(enabled=True, export_path=path, use_otel=False)
+        with tracer.span('parent', account='main') as parent:
+            with tracer.span('child') as child:
+                child.set_attribute('errno', -62)
+            parent.set_attribute('items', [1, 2])
+        with pytest.raises(ValueError):
+            with tracer.span('failing'):
+                raise ValueError('bad')
+        tracer.flush()
+
+        child, parent, failing = _read_spans(path)
+        assert tracer.backend == 'builtin'
+        assert child['parent_id'] == parent['span_id']
+        assert child['trace_id'] == parent['trace_id']
+        assert parent['parent_id'] is None
+        assert child['attributes'] == {'errno': -62}
+        assert parent['attributes'] == {'account': 'main', 'items': '[1, 2]'}
+        assert failing['status'] == 'error' and failing['error'] == 'ValueError: bad'
+        assert failing['trace_id'] != parent['trace_id']
+
+    def test_unsampled_trace_drops_children(self, tmp_path):
+        path = os.path.join(tmp_path, 'traces.jsonl')
+        tracer = Tracer(enabled=True, export_path=path, sample_rate=0, use_otel=False)
+        with tracer.span('root'):
+            with tracer.span('child'):
+                pass
+        tracer.flush()
+        assert not os.path.exists(path)
+
+    def test_traced_decorator_uses_global_tracer(self, trace_file):
+        @tracing.traced('work')
+        def work(value):
+            return value * 2
+
+        assert work(21) == 42
+        tracing.tracer.flush()
+        assert [span['name'] for span in _read_spans(trace_file)] == ['work']
+
+
+class TestWorkerSpans:
+    """Test the spans recorded around worker iterations and throttler waits."""
+
+    def test_share_task_span_contains_adapter_and_throttle_spans(self, trace_file):
+        from core_service import ShareWorker, Throttler
+
+        class FakeAdapter:
+            bdstoken = 'token'
+
+            @tracing.traced('pan.create_share')
+            def create_share(self, fs_id, expiry=7, password=''):
+                return -62
+
+        tasks = [{'file_info': {'fs_id': 1, 'name': 'f'}, 'status': 'pending', 'password_mode': 'none'}]
+        throttler = Throttler({'throttle': {'jitter_ms_min': 0, 'jitter_ms_max': 0,
+                                            'cooldown_on_errno_-62_sec': 0}})
+        worker = ShareWorker(tasks, FakeAdapter(), throttler)
+        worker.start()
+        deadline = time.monotonic() + 5
+        while tasks[0]['status'] != 'skipped' and time.monotonic() < deadline:
+            time.sleep(0.01)
+        worker.stop()
+        worker.join(2)
+        tracing.tracer.flush()
+
+        spans = {span['name']: span for span in _read_spans(trace_file)}
+        task_span = spans['worker.share_task']
+        assert task_span['attributes'] == {'index': 0, 'errno': -62}
+        assert spans['pan.create_share']['parent_id'] == task_span['span_id']
+        assert spans['throttler.sleep']['attributes']['reason'] == 'jitter'
+        assert spans['throttler.sleep']['trace_id'] == task_span['trace_id']
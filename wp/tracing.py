@@ -0,0 +1,323 @@
+"""
+链路追踪模块
+在转存/分享链路的热点步骤上记录 span，定位耗时集中在哪一步：
+规范化链接 → 验证提取码 → 获取分享页 → 解析参数 → 转存 → 更新状态。
+
+- 安装了 opentelemetry-sdk 时使用 OpenTelemetry 的 Tracer（父子关系、采样与标准一致）
+- 未安装时使用内置的轻量实现，记录同样字段
+- 两种实现都写入本地 JSON Lines 文件（每行一个 span），无需网络和采集服务
+- TRACING_ENABLED 关闭时 span() 返回空操作对象，traced() 直接调用原函数
+
+JSON 记录字段：name、trace_id、span_id、parent_id、start（Unix时间戳）、duration_ms、
+status（ok/error）、error、thread、attributes
+"""
+import atexit
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from config import get_config
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+
+# JSON 导出器缓冲的 span 数，达到后写入文件
+EXPORT_BATCH_SIZE = 64
+# 缓冲最长保留时间（秒）
+EXPORT_FLUSH_SEC = 2.0
+
+
+def _attribute(value: Any) -> Any:
+    """span 属性只保留基本类型，其余转为字符串"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+class JsonSpanExporter:
+    """将 span 记录追加写入 JSON Lines 文件（缓冲批量写入）"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._buffer: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def export(self, record: Dict[str, Any]):
+        """缓冲一条 span 记录"""
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._buffer.append(line)
+            if (len(self._buffer) < EXPORT_BATCH_SIZE
+                    and time.monotonic() - self._last_flush < EXPORT_FLUSH_SEC):
+                return
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            self._write(lines)
+
+    def flush(self):
+        """写入缓冲中的记录"""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            self._write(lines)
+
+    def _write(self, lines: List[str]):
+        """追加写入文件（调用方需持有锁）"""
+        if not lines:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+        except Exception as e:
+            logger.warning(f"写入追踪记录失败: {self.path}, 错误: {e}")
+
+
+class _NoopSpan:
+    """追踪关闭或未采样时使用的空操作 span"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+# 内置实现的当前 span（未采样的链路记为 _UNSAMPLED，子 span 跟随不记录）
+_UNSAMPLED = object()
+_current_span: contextvars.ContextVar = contextvars.ContextVar('trace_span', default=None)
+
+
+class _Span:
+    """内置实现的 span"""
+
+    __slots__ = ('tracer', 'name', 'attributes', 'trace_id', 'span_id', 'parent_id',
+                 'start', 'started', 'recording', '_token')
+
+    def __init__(self, tracer: 'Tracer', name: str, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.recording = False
+
+    def __enter__(self):
+        parent = _current_span.get()
+        if parent is _UNSAMPLED or (parent is None and random.random() >= self.tracer.sample_rate):
+            self._token = _current_span.set(_UNSAMPLED)
+            return self
+        self.recording = True
+        self.trace_id = parent.trace_id if parent else '%032x' % random.getrandbits(128)
+        self.parent_id = parent.span_id if parent else None
+        self.span_id = '%016x' % random.getrandbits(64)
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if self.recording:
+            self.tracer.exporter.export({
+                'name': self.name,
+                'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent_id,
+                'start': round(self.start, 6),
+                'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+                'status': 'error' if exc_type else 'ok',
+                'error': f"{exc_type.__name__}: {exc}" if exc_type else None,
+                'thread': threading.current_thread().name,
+                'attributes': {key: _attribute(value) for key, value in self.attributes.items()}
+            })
+        return False
+
+    def set_attribute(self, key: str, value: Any):
+        if self.recording:
+            self.attributes[key] = value
+
+
+class _OtelSpan:
+    """OpenTelemetry span 的包装（与内置实现接口一致）"""
+
+    __slots__ = ('_tracer', '_name', '_attributes', '_cm', '_span')
+
+    def __init__(self, otel_tracer, name: str, attributes: Dict[str, Any]):
+        self._tracer = otel_tracer
+        self._name = name
+        self._attributes = attributes
+
+    def __enter__(self):
+        attributes = {key: _attribute(value) for key, value in self._attributes.items() if value is not None}
+        self._cm = self._tracer.start_as_current_span(self._name, attributes=attributes)
+        self._span = self._cm.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cm.__exit__(exc_type, exc, tb)
+
+    def set_attribute(self, key: str, value: Any):
+        if value is not None:
+            self._span.set_attribute(key, _attribute(value))
+
+
+if OTEL_AVAILABLE:
+    class _OtelJsonExporter(SpanExporter):
+        """把 OpenTelemetry span 转为与内置实现相同的 JSON 记录"""
+
+        def __init__(self, exporter: JsonSpanExporter):
+            self.exporter = exporter
+
+        def export(self, spans):
+            for span in spans:
+                status = span.status.status_code.name.lower()
+                self.exporter.export({
+                    'name': span.name,
+                    'trace_id': format(span.context.trace_id, '032x'),
+                    'span_id': format(span.context.span_id, '016x'),
+                    'parent_id': format(span.parent.span_id, '016x') if span.parent else None,
+                    'start': round(span.start_time / 1e9, 6),
+                    'duration_ms': round((span.end_time - span.start_time) / 1e6, 3),
+                    'status': 'error' if status == 'error' else 'ok',
+                    'error': span.status.description,
+                    'thread': None,
+                    'attributes': dict(span.attributes or {})
+                })
+            self.exporter.flush()
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            self.exporter.flush()
+
+
+class Tracer:
+    """追踪器：按配置选择 OpenTelemetry 或内置实现"""
+
+    def __init__(self, enabled: bool = False, export_path: str = 'logs/traces.jsonl',
+                 sample_rate: float = 1.0, use_otel: Optional[bool] = None):
+        """
+        初始化追踪器
+
+        Args:
+            enabled: 是否启用追踪
+            export_path: JSON Lines 输出文件
+            sample_rate: 链路采样比例（0~1，按根 span 决定，子 span 跟随）
+            use_otel: 是否使用 OpenTelemetry（None 表示已安装时使用）
+        """
+        self.enabled = enabled
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.exporter = JsonSpanExporter(export_path)
+        self.provider = None
+        self._otel_tracer = None
+
+        if use_otel is None:
+            use_otel = OTEL_AVAILABLE
+        if enabled and use_otel:
+            if not OTEL_AVAILABLE:
+                logger.warning("未安装 OpenTelemetry，使用内置追踪实现。请运行: pip install opentelemetry-sdk")
+            else:
+                self.provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(self.sample_rate)))
+                self.provider.add_span_processor(BatchSpanProcessor(_OtelJsonExporter(self.exporter)))
+                self._otel_tracer = self.provider.get_tracer('baidu-pan-server')
+
+    @property
+    def backend(self) -> str:
+        """当前实现：disabled / opentelemetry / builtin"""
+        if not self.enabled:
+            return 'disabled'
+        return 'opentelemetry' if self._otel_tracer else 'builtin'
+
+    def span(self, name: str, **attributes):
+        """
+        创建 span（用作上下文管理器）
+
+        Args:
+            name: span 名称（如 pan.transfer、worker.share_task）
+            **attributes: span 属性
+
+        Returns:
+            支持 set_attribute() 的上下文管理器
+        """
+        if not self.enabled:
+            return _NOOP_SPAN
+        if self._otel_tracer:
+            return _OtelSpan(self._otel_tracer, name, attributes)
+        return _Span(self, name, attributes)
+
+    def flush(self):
+        """写入缓冲中的 span"""
+        if self.provider:
+            self.provider.force_flush()
+        self.exporter.flush()
+
+    def shutdown(self):
+        """关闭追踪器并写入剩余 span"""
+        if self.provider:
+            self.provider.shutdown()
+        self.exporter.flush()
+
+
+def _create_tracer() -> Tracer:
+    config = get_config()
+    return Tracer(enabled=config.TRACING_ENABLED, export_path=config.TRACING_EXPORT_PATH,
+                  sample_rate=config.TRACING_SAMPLE_RATE)
+
+
+tracer = _create_tracer()
+atexit.register(lambda: tracer.shutdown())
+
+
+def configure(**kwargs) -> Tracer:
+    """
+    替换全局追踪器（参数同 Tracer）
+
+    Returns:
+        新的追踪器
+    """
+    global tracer
+    old, tracer = tracer, Tracer(**kwargs)
+    old.shutdown()
+    return tracer
+
+
+def span(name: str, **attributes):
+    """在全局追踪器上创建 span"""
+    return tracer.span(name, **attributes)
+
+
+def traced(name: str) -> Callable:
+    """
+    装饰器：函数调用记录为一个 span
+
+    Args:
+        name: span 名称
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator